@@ -2,37 +2,51 @@
 API endpoints para análisis de datos
 """
 
-from fastapi import APIRouter, HTTPException, Body
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from typing import Optional
 from app.models.schemas import AnalisisCompleto
-from app.services.analysis_service import AnalysisService
+from app.api.deps import obtener_fuente_datos, obtener_limite_categorias, ejecutar_condicional
+from app.services import compute_tasks
+from app.services.compute_tasks import FuenteDatos
+from app.utils.serialization import respuesta_rapida
 
 router = APIRouter()
 
 
-@router.post("/analyze", response_model=AnalisisCompleto)
-async def analyze_data(data: List[Dict] = Body(...)):
+@router.post(
+    "/analyze",
+    response_model=AnalisisCompleto
+)
+async def analyze_data(
+    request: Request,
+    response: Response,
+    data: FuenteDatos = Depends(obtener_fuente_datos),
+    limite: Optional[int] = Depends(obtener_limite_categorias),
+    offset: int = Query(0, ge=0, description="Categorías a saltar en cada distribución")
+):
     """
     Analiza datos de rotación y retorna métricas completas
 
     Args:
-        data: Lista de registros de empleados con rotación
+        data: Lista de registros de empleados con rotación (o `?dataset_id=`)
+        limite: Categorías por distribución; el resto se agrupa en "Otros"
+        offset: Categorías a saltar (paginación)
 
     Returns:
-        AnalisisCompleto con todas las métricas y análisis
+        AnalisisCompleto con todas las métricas y análisis (304 si el
+        ETag de If-None-Match sigue vigente)
     """
     try:
-        if not data:
-            raise HTTPException(
-                status_code=400,
-                detail="No se proporcionaron datos para analizar"
-            )
-
-        # Realizar análisis
-        analisis = AnalysisService.analizar_datos(data)
+        # Realizar análisis en el pool de procesos (o reutilizar el de los mismos datos)
+        analisis = await ejecutar_condicional(
+            request, response, compute_tasks.analizar_datos, data, limite, offset,
+            admision='analisis'
+        )
 
-        return analisis
+        return respuesta_rapida(analisis, response)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
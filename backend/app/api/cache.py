@@ -0,0 +1,37 @@
+"""
+API endpoints para el caché de resultados
+"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from app.models.schemas import CacheStats
+from app.services.cache_service import get_result_cache
+
+router = APIRouter()
+
+
+@router.get("/cache/stats", response_model=CacheStats)
+async def estadisticas_cache():
+    """
+    Obtiene aciertos, fallos y ocupación del caché de resultados
+
+    Returns:
+        CacheStats del proceso que atiende el request
+    """
+    return CacheStats(**get_result_cache().estadisticas())
+
+
+@router.delete("/cache")
+async def limpiar_cache():
+    """
+    Elimina los resultados en caché (en memoria y en disco)
+    """
+    try:
+        await run_in_threadpool(get_result_cache().limpiar)
+        return {"success": True}
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al limpiar caché: {str(e)}"
+        )
@@ -0,0 +1,163 @@
+"""
+API endpoints para registrar datasets y referenciarlos por id
+"""
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
+from app.models.schemas import DatasetInfo, DatasetAppendResponse
+from app.api.deps import admitir, leer_registros
+from app.services.compute_tasks import Registros
+from app.services.dataset_service import get_dataset_service
+from app.services.event_service import get_event_service, CANAL_DATASETS
+from app.services.historial_service import get_historial_service
+from app.config.settings import get_settings
+
+router = APIRouter()
+settings = get_settings()
+
+
+def _agregar_al_historial(data: Registros, dataset_id: str) -> None:
+    """Agrega los registros al historial de bajas (corre después de responder)"""
+    try:
+        get_historial_service().registrar(data, dataset_id)
+    except Exception as e:
+        print(f"Error agregando el dataset {dataset_id} al historial: {e}")
+
+
+@router.post(
+    "/datasets",
+    response_model=DatasetInfo,
+    dependencies=[Depends(admitir('ingesta'))]
+)
+async def registrar_dataset(
+    background_tasks: BackgroundTasks,
+    data: Registros = Depends(leer_registros)
+):
+    """
+    Registra un dataset para usarlo en análisis y entrenamiento con
+    `?dataset_id=` sin volver a enviar los registros
+
+    Con HISTORIAL_REGISTRAR_DATASETS sus bajas se agregan además al
+    historial longitudinal, después de responder.
+
+    Args:
+        background_tasks: Tareas a ejecutar después de responder
+        data: Registros de empleados con rotación (JSON por filas o por
+            columnas, Arrow IPC o Parquet)
+
+    Returns:
+        DatasetInfo con el id del dataset
+    """
+    try:
+        info = await run_in_threadpool(get_dataset_service().guardar, data)
+        if settings.HISTORIAL_REGISTRAR_DATASETS:
+            background_tasks.add_task(_agregar_al_historial, data, info['dataset_id'])
+
+        return DatasetInfo(**info)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al registrar dataset: {str(e)}"
+        )
+
+
+@router.post(
+    "/datasets/{dataset_id}/append",
+    response_model=DatasetAppendResponse,
+    dependencies=[Depends(admitir('ingesta'))]
+)
+async def agregar_registros(
+    dataset_id: str,
+    background_tasks: BackgroundTasks,
+    data: Registros = Depends(leer_registros)
+):
+    """
+    Agrega registros a un dataset (p. ej. las bajas de la última semana) y
+    publica el evento 'dataset_actualizado' con el delta de agregados para
+    los dashboards suscritos a /events/datasets
+
+    Args:
+        dataset_id: Dataset base
+        background_tasks: Tareas a ejecutar después de responder
+        data: Registros nuevos
+
+    Returns:
+        DatasetAppendResponse con el dataset ampliado y el delta
+    """
+    servicio = get_dataset_service()
+    if not servicio.existe(dataset_id):
+        raise HTTPException(
+            status_code=404,
+            detail=f"El dataset '{dataset_id}' no existe"
+        )
+
+    try:
+        info = servicio.info(dataset_id)
+        if info['n_registros'] + len(data) > settings.MAX_RECORDS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"El dataset excede el máximo de {settings.MAX_RECORDS} registros"
+            )
+
+        resultado = await run_in_threadpool(servicio.agregar, dataset_id, data)
+        get_event_service().publicar(CANAL_DATASETS, 'dataset_actualizado', resultado['delta'])
+        if settings.HISTORIAL_REGISTRAR_DATASETS:
+            background_tasks.add_task(_agregar_al_historial, data, resultado['dataset']['dataset_id'])
+
+        return DatasetAppendResponse(**resultado)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al agregar registros: {str(e)}"
+        )
+
+
+@router.get("/datasets/{dataset_id}", response_model=DatasetInfo)
+async def obtener_dataset(dataset_id: str):
+    """
+    Obtiene la información de un dataset registrado
+
+    Args:
+        dataset_id: Id retornado por POST /datasets
+
+    Returns:
+        DatasetInfo
+    """
+    try:
+        return DatasetInfo(**get_dataset_service().info(dataset_id))
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+
+
+@router.delete("/datasets/{dataset_id}")
+async def eliminar_dataset(dataset_id: str):
+    """
+    Elimina un dataset registrado
+
+    Args:
+        dataset_id: Id retornado por POST /datasets
+    """
+    try:
+        get_dataset_service().eliminar(dataset_id)
+        return {"success": True, "dataset_id": dataset_id}
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
@@ -0,0 +1,382 @@
+"""
+Dependencias compartidas por los routers
+"""
+
+import asyncio
+import anyio
+from fastapi import HTTPException, Query, Request, Response
+from starlette.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+from app.services.compute_tasks import FuenteDatos, Registros
+from app.services.compute_executor import get_compute_executor
+from app.services.dataset_service import get_dataset_service
+from app.services.cache_service import get_result_cache, clave_resultado
+from app.services.admission_service import (
+    get_control_admision,
+    registros_en_cuerpo,
+    costo_mb,
+    SobrecargaError
+)
+from app.utils.http import etag, cabeceras_etag, respuesta_no_modificada
+from app.utils.formatos import decodificar_registros, FormatoNoSoportado
+from app.utils.metrics import medir_etapa
+from app.utils.profiling import perfilado_activo
+from app.config.settings import get_settings
+
+# Cálculos en curso por clave: requests idénticos simultáneos esperan el mismo
+_en_curso: Dict[str, asyncio.Future] = {}
+
+
+def _longitud_declarada(request: Request) -> Optional[int]:
+    longitud = request.headers.get('content-length')
+    return int(longitud) if longitud is not None and longitud.isdigit() else None
+
+
+async def leer_cuerpo(request: Request) -> bytes:
+    """
+    Cuerpo del request, rechazado con 413 en cuanto supera MAX_UPLOAD_SIZE
+    (por su Content-Length o, si se envía por partes, al recibirlo)
+    """
+    limite = get_settings().MAX_UPLOAD_SIZE
+    longitud = _longitud_declarada(request)
+    partes = []
+    recibido = 0
+
+    if longitud is None or longitud <= limite:
+        async for parte in request.stream():
+            recibido += len(parte)
+            if recibido > limite:
+                break
+            partes.append(parte)
+
+    if max(recibido, longitud or 0) > limite:
+        raise HTTPException(
+            status_code=413,
+            detail=f"El cuerpo excede el máximo de {limite // (1024 * 1024)} MB"
+        )
+
+    return b''.join(partes)
+
+
+async def leer_registros_opcionales(request: Request) -> Optional[Registros]:
+    """
+    Registros del cuerpo del request en el formato de su Content-Type
+    (ver app.utils.formatos); None si el cuerpo está vacío
+    """
+    contenido = await leer_cuerpo(request)
+
+    try:
+        with medir_etapa('parseo'):
+            data = await run_in_threadpool(
+                decodificar_registros, contenido, request.headers.get('content-type')
+            )
+    except FormatoNoSoportado as e:
+        raise HTTPException(
+            status_code=415,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+
+    maximo = get_settings().MAX_RECORDS
+    if data is not None and len(data) > maximo:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Se recibieron {len(data)} registros; el máximo es {maximo}"
+        )
+
+    return data
+
+
+async def leer_registros(request: Request) -> Registros:
+    """
+    Registros obligatorios del cuerpo: JSON por filas o por columnas, Arrow
+    IPC o Parquet según el Content-Type
+    """
+    data = await leer_registros_opcionales(request)
+
+    if data is None or len(data) == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="No se proporcionaron registros en el cuerpo del request"
+        )
+
+    return data
+
+
+async def obtener_fuente_datos(
+    request: Request,
+    dataset_id: Optional[str] = Query(
+        None, description="Dataset registrado con POST /api/datasets (en lugar del body)"
+    )
+) -> FuenteDatos:
+    """
+    Datos del análisis: los registros del body o el id de un dataset registrado
+
+    Con `dataset_id` el servidor no vuelve a recibir ni serializar los
+    registros; los procesos de cómputo los leen directamente del disco. El
+    body puede ser JSON por filas o por columnas, Arrow IPC o Parquet.
+    """
+    if dataset_id is not None:
+        if not get_dataset_service().existe(dataset_id):
+            raise HTTPException(
+                status_code=404,
+                detail=f"El dataset '{dataset_id}' no existe"
+            )
+        return dataset_id
+
+    data = await leer_registros_opcionales(request)
+    if data is None or len(data) == 0:
+        raise HTTPException(
+            status_code=400,
+            detail="No se proporcionaron datos para analizar"
+        )
+
+    return data
+
+
+class ReservaAdmision:
+    """Memoria reservada por una operación; liberar() la devuelve una sola vez"""
+
+    def __init__(self, costo: Optional[float]):
+        self.costo = costo
+        # Retenida: la libera la respuesta al terminar de enviarse, no el request
+        self.retenida = False
+
+    async def liberar(self) -> None:
+        if self.costo is not None:
+            costo, self.costo = self.costo, None
+            await get_control_admision().liberar(costo)
+
+
+def _registros_dataset(dataset_id: str) -> int:
+    # Un dataset inexistente no reserva nada: obtener_fuente_datos responderá 404
+    datasets = get_dataset_service()
+    return datasets.info(dataset_id)['n_registros'] if datasets.existe(dataset_id) else 0
+
+
+async def _reservar(request: Request, operacion: str) -> ReservaAdmision:
+    """Reserva el costo estimado de la operación (429/503 si no cabe)"""
+    settings = get_settings()
+    if not settings.ADMISION_HABILITADA:
+        return ReservaAdmision(None)
+
+    dataset_id = request.query_params.get('dataset_id')
+    if dataset_id is not None:
+        registros = _registros_dataset(dataset_id)
+    else:
+        registros = registros_en_cuerpo(
+            _longitud_declarada(request), request.headers.get('content-type'), settings.MAX_RECORDS
+        )
+
+    return await _reservar_costo(costo_mb(operacion, registros))
+
+
+async def _reservar_fuente(operacion: str, fuente: FuenteDatos) -> ReservaAdmision:
+    """Como _reservar(), con los registros ya leídos (o el `dataset_id`)"""
+    if not get_settings().ADMISION_HABILITADA:
+        return ReservaAdmision(None)
+
+    registros = _registros_dataset(fuente) if isinstance(fuente, str) else len(fuente)
+    return await _reservar_costo(costo_mb(operacion, registros))
+
+
+async def _reservar_costo(costo: float) -> ReservaAdmision:
+    try:
+        await get_control_admision().admitir(costo)
+    except SobrecargaError as e:
+        raise HTTPException(
+            status_code=e.codigo,
+            detail=str(e),
+            headers={'Retry-After': str(e.retry_after_s)}
+        )
+
+    return ReservaAdmision(costo)
+
+
+def admitir(operacion: str) -> Callable:
+    """
+    Dependencia que reserva la memoria estimada de una operación pesada
+    durante el request (ver app.services.admission_service)
+
+    El costo se estima antes de leer el cuerpo: por las filas del
+    `dataset_id` o por el Content-Length del cuerpo. Las rutas que calculan
+    con ejecutar_cacheado()/ejecutar_condicional() no la usan: pasan
+    `admision=` para reservar sólo si hay que calcular, así un acierto del
+    caché o un 304 no compiten por el presupuesto (el cuerpo ya está
+    acotado por MAX_UPLOAD_SIZE y MAX_RECORDS).
+
+    Args:
+        operacion: Clave de KB_POR_REGISTRO ('analisis', 'prediccion'...)
+
+    Returns:
+        Dependencia para `dependencies=[Depends(...)]` de la ruta
+    """
+    async def dependencia(request: Request) -> AsyncIterator[None]:
+        reserva = await _reservar(request, operacion)
+        try:
+            yield
+        finally:
+            await reserva.liberar()
+
+    return dependencia
+
+
+def reservar_admision(operacion: str) -> Callable:
+    """
+    Como admitir(), pero entrega la reserva a la ruta
+
+    FastAPI cierra las dependencias antes de enviar el cuerpo de una
+    StreamingResponse: una ruta que sigue calculando mientras responde
+    marca la reserva como `retenida` y la libera al terminar de enviar
+    (ver RespuestaConReserva).
+
+    Args:
+        operacion: Clave de KB_POR_REGISTRO
+
+    Returns:
+        Dependencia que produce una ReservaAdmision
+    """
+    async def dependencia(request: Request) -> AsyncIterator[ReservaAdmision]:
+        reserva = await _reservar(request, operacion)
+        try:
+            yield reserva
+        finally:
+            if not reserva.retenida:
+                await reserva.liberar()
+
+    return dependencia
+
+
+class RespuestaConReserva(StreamingResponse):
+    """StreamingResponse que libera una reserva de admisión al terminar de enviarse"""
+
+    def __init__(self, *args, reserva: ReservaAdmision, **kwargs):
+        super().__init__(*args, **kwargs)
+        reserva.retenida = True
+        self.reserva = reserva
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # También si el cliente se desconecta o el cálculo falla a la mitad
+            with anyio.CancelScope(shield=True):
+                await self.reserva.liberar()
+
+
+def obtener_limite_categorias(
+    limite: Optional[int] = Query(
+        None,
+        ge=0,
+        description="Categorías por distribución; las demás se suman en 'Otros'. "
+                    "0 = todas; por defecto LIMITE_CATEGORIAS"
+    )
+) -> Optional[int]:
+    """Límite de categorías por distribución/Pareto (None = sin límite)"""
+    if limite is None:
+        limite = get_settings().LIMITE_CATEGORIAS
+    return limite or None
+
+
+async def clave_tarea(funcion: Callable, fuente: FuenteDatos, *args: Any) -> str:
+    """Clave de caché del resultado de una tarea de cómputo con esos datos y argumentos"""
+    if isinstance(fuente, str):
+        return clave_resultado(funcion.__name__, fuente, *args)
+    # Serializar y hashear los registros no bloquea el event loop
+    with medir_etapa('clave'):
+        return await run_in_threadpool(clave_resultado, funcion.__name__, fuente, *args)
+
+
+async def ejecutar_cacheado(
+    funcion: Callable,
+    fuente: FuenteDatos,
+    *args: Any,
+    clave: Optional[str] = None,
+    admision: Optional[str] = None
+) -> Any:
+    """
+    Ejecuta una tarea de cómputo en el pool reutilizando su resultado
+
+    La clave incluye la tarea, el contenido de los datos (o su `dataset_id`)
+    y los argumentos, así que las tareas de ML deben recibir la versión del
+    modelo como argumento.
+
+    Args:
+        funcion: Tarea de app.services.compute_tasks
+        fuente: Registros o `dataset_id`
+        args: Argumentos adicionales de la tarea
+        clave: Clave ya calculada con clave_tarea()
+        admision: Operación (ver admitir()) cuyo costo se reserva sólo si
+            hay que calcular; los requests que esperan el mismo cálculo no
+            reservan nada
+
+    Returns:
+        El resultado de la tarea
+
+    Raises:
+        HTTPException: 429/503 si el cálculo no cabe en el presupuesto
+    """
+    if clave is None:
+        clave = await clave_tarea(funcion, fuente, *args)
+
+    async def calcular_admitido():
+        reserva = await _reservar_fuente(admision, fuente) if admision else ReservaAdmision(None)
+        try:
+            return await get_compute_executor().ejecutar(funcion, fuente, *args)
+        finally:
+            await reserva.liberar()
+
+    # Un request perfilado siempre calcula: un acierto no mostraría nada
+    if perfilado_activo():
+        return await calcular_admitido()
+
+    cache = get_result_cache()
+    resultado = cache.obtener(clave)
+    if resultado is not None:
+        return resultado
+
+    calculo = _en_curso.get(clave)
+    if calculo is None:
+        async def calcular():
+            valor = await calcular_admitido()
+            await run_in_threadpool(cache.guardar, clave, valor)
+            return valor
+
+        calculo = asyncio.ensure_future(calcular())
+        _en_curso[clave] = calculo
+        calculo.add_done_callback(lambda _: _en_curso.pop(clave, None))
+
+    # Si este request se cancela, el cálculo sigue para los demás
+    return await asyncio.shield(calculo)
+
+
+async def ejecutar_condicional(
+    request: Request,
+    response: Response,
+    funcion: Callable,
+    fuente: FuenteDatos,
+    *args: Any,
+    admision: Optional[str] = None
+) -> Any:
+    """
+    ejecutar_cacheado() con ETag: si el cliente envía el ETag vigente en
+    If-None-Match se responde 304 sin calcular, enviar el resultado ni
+    reservar admisión
+
+    Returns:
+        El resultado de la tarea, o la Response 304 para retornarla tal cual
+    """
+    clave = await clave_tarea(funcion, fuente, *args)
+    valor_etag = etag(clave)
+
+    no_modificada = respuesta_no_modificada(request, valor_etag)
+    if no_modificada is not None:
+        return no_modificada
+
+    response.headers.update(cabeceras_etag(valor_etag))
+    return await ejecutar_cacheado(funcion, fuente, *args, clave=clave, admision=admision)
@@ -0,0 +1,94 @@
+"""
+API endpoints de los temas de la encuesta de salida (4FRH-209)
+"""
+
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
+from typing import Optional
+from app.models.schemas import AnalisisEncuestas, ModeloEncuestasInfo
+from app.api.deps import obtener_fuente_datos, obtener_limite_categorias, ejecutar_cacheado
+from app.services import compute_tasks
+from app.services.compute_tasks import FuenteDatos
+from app.services.encuesta_service import get_encuesta_service
+
+router = APIRouter()
+
+
+@router.post(
+    "/encuestas/temas",
+    response_model=AnalisisEncuestas
+)
+async def analizar_temas(
+    data: FuenteDatos = Depends(obtener_fuente_datos),
+    limite: Optional[int] = Depends(obtener_limite_categorias)
+):
+    """
+    Agrupa en temas las respuestas de texto libre de la encuesta de salida
+    (encuestaSalida4FRH209) y los distribuye por área y supervisor
+
+    Un dataset registrado que el modelo de temas aún no conoce lo actualiza;
+    los temas conservan su número entre datasets. Los registros del body
+    sólo se clasifican (entrenan el modelo si todavía no existe).
+
+    Args:
+        data: Registros de empleados con rotación (o `?dataset_id=`)
+        limite: Áreas/supervisores a listar; los demás se suman en 'Otros'
+
+    Returns:
+        AnalisisEncuestas con los temas y su distribución
+    """
+    try:
+        # La versión del modelo en la clave: un modelo actualizado no reutiliza
+        # temas calculados con el anterior
+        version = await run_in_threadpool(get_encuesta_service().version)
+        resultado = await ejecutar_cacheado(
+            compute_tasks.analizar_encuestas, data, limite, version, admision='analisis'
+        )
+        return AnalisisEncuestas(**resultado)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al analizar encuestas: {str(e)}"
+        )
+
+
+@router.get("/encuestas/modelo", response_model=ModeloEncuestasInfo)
+async def info_modelo_encuestas():
+    """Versión, respuestas aprendidas y datasets del modelo de temas"""
+    info = await run_in_threadpool(get_encuesta_service().info)
+    if info is None:
+        return ModeloEncuestasInfo(entrenado=False)
+
+    return ModeloEncuestasInfo(
+        entrenado=True,
+        version=info['version'],
+        n_temas=info['n_temas'],
+        respuestas=info['respuestas'],
+        lotes=len(info['lotes']),
+        actualizado=info['actualizado']
+    )
+
+
+@router.delete("/encuestas/modelo")
+async def reiniciar_modelo_encuestas():
+    """
+    Descarta el modelo de temas; el siguiente análisis entrena uno nuevo
+    (necesario tras cambiar ENCUESTAS_TEMAS o ENCUESTAS_N_FEATURES)
+    """
+    try:
+        await run_in_threadpool(get_encuesta_service().reiniciar)
+        return {"success": True}
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al reiniciar el modelo de temas: {str(e)}"
+        )
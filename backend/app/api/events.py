@@ -0,0 +1,51 @@
+"""
+API endpoints de eventos en vivo (Server-Sent Events)
+"""
+
+from fastapi import APIRouter, Header, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Optional
+from app.services.event_service import get_event_service, formato_sse, CANAL_DATASETS
+
+router = APIRouter()
+
+# Sin buffering en proxies (nginx) para que cada evento llegue al instante
+HEADERS_SSE = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",
+}
+
+
+def respuesta_sse(
+    canales: List[str],
+    desde_id: Optional[int] = None,
+    hasta_evento=None
+) -> StreamingResponse:
+    """
+    Respuesta SSE con los eventos de los canales
+
+    Args:
+        canales: Canales a transmitir
+        desde_id: Último id que recibió el cliente (Last-Event-ID)
+        hasta_evento: Función que recibe cada evento y retorna True para cerrar el stream
+    """
+    async def transmitir():
+        async for evento in get_event_service().suscribir(canales, desde_id):
+            yield formato_sse(evento)
+            if evento is not None and hasta_evento is not None and hasta_evento(evento):
+                break
+
+    return StreamingResponse(transmitir(), media_type="text/event-stream", headers=HEADERS_SSE)
+
+
+@router.get("/events/datasets")
+async def eventos_datasets(
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID"),
+    desde_id: Optional[int] = Query(None, description="Alternativa a Last-Event-ID")
+):
+    """
+    Stream de cambios en los datasets. Cada evento 'dataset_actualizado'
+    trae los totales nuevos y los conteos agregados, para que el dashboard
+    actualice sus gráficas sin volver a pedir el AnalisisCompleto.
+    """
+    return respuesta_sse([CANAL_DATASETS], last_event_id if last_event_id is not None else desde_id)
@@ -0,0 +1,228 @@
+"""
+API endpoints para exportar análisis y predicciones a archivos (CSV, XLSX, Parquet)
+"""
+
+import anyio
+from fastapi import APIRouter, HTTPException, Depends, Query
+from starlette.responses import StreamingResponse
+from typing import Dict, Iterator, List, Optional, get_args
+import pandas as pd
+from app.models.schemas import AnalisisCompleto
+from app.api.deps import (
+    obtener_fuente_datos,
+    ejecutar_cacheado,
+    reservar_admision,
+    ReservaAdmision,
+    RespuestaConReserva
+)
+from app.api.ml import _sincronizar_modelo
+from app.services import compute_tasks
+from app.services.compute_executor import get_compute_executor
+from app.services.compute_tasks import FuenteDatos
+from app.services.dataset_service import get_dataset_service
+from app.utils.exportacion import Tabla, exportar, TIPOS_EXPORTACION
+from app.config.settings import get_settings
+from datetime import datetime
+
+router = APIRouter()
+settings = get_settings()
+
+COLUMNAS_PREDICCION = [
+    'empleado_id', 'nombre', 'probabilidad_rv', 'probabilidad_bxf',
+    'prediccion', 'nivel_riesgo', 'confianza', 'factores_clave'
+]
+
+
+def _respuesta_archivo(
+    contenido: Iterator[bytes],
+    formato: str,
+    nombre: str,
+    headers: Optional[Dict] = None,
+    reserva: Optional[ReservaAdmision] = None
+) -> StreamingResponse:
+    """
+    StreamingResponse de descarga; el iterador síncrono corre en el threadpool.
+    Con `reserva`, la admisión se libera al terminar de enviar el archivo.
+    """
+    parametros = dict(
+        media_type=TIPOS_EXPORTACION[formato],
+        headers={
+            'Content-Disposition': f'attachment; filename="{nombre}.{formato}"',
+            **(headers or {})
+        }
+    )
+    if reserva is not None:
+        return RespuestaConReserva(contenido, reserva=reserva, **parametros)
+    return StreamingResponse(contenido, **parametros)
+
+
+def _tablas_analisis(analisis) -> List[Tabla]:
+    """Indicadores generales en una tabla 'resumen' y una tabla por cada lista"""
+    if not isinstance(analisis, dict):
+        analisis = analisis.model_dump()
+
+    resumen = []
+    tablas = []
+    for campo, info in AnalisisCompleto.model_fields.items():
+        valor = analisis.get(campo)
+        if isinstance(valor, list):
+            columnas = list(get_args(info.annotation)[0].model_fields)
+            filas = [[fila.get(columna) for columna in columnas] for fila in valor]
+            tablas.append(Tabla(campo, columnas, [filas]))
+        else:
+            resumen.append([campo, valor])
+
+    return [Tabla('resumen', ['indicador', 'valor'], [resumen])] + tablas
+
+
+def _bloques_prediccion(
+    fuente: FuenteDatos,
+    total: int,
+    version: Optional[str],
+    tamano_bloque: int
+) -> Iterator[List[list]]:
+    """
+    Predice bloque por bloque en el pool de cómputo; sólo un bloque de
+    empleados y de predicciones vive en memoria
+
+    Corre en el threadpool de Starlette mientras se envía el archivo: cada
+    bloque espera su turno en el ComputeExecutor como cualquier otra tarea.
+    Un dataset se lee por row groups en el proceso de cómputo; de los
+    registros del body se envía sólo el bloque.
+    """
+    for inicio in range(0, total, tamano_bloque):
+        if isinstance(fuente, str):
+            bloque = fuente
+        elif isinstance(fuente, pd.DataFrame):
+            bloque = fuente.iloc[inicio:inicio + tamano_bloque]
+        else:
+            bloque = fuente[inicio:inicio + tamano_bloque]
+
+        predicciones = anyio.from_thread.run(
+            get_compute_executor().ejecutar,
+            compute_tasks.predecir_bloque, bloque, version, inicio, tamano_bloque
+        )
+
+        filas = []
+        for prediccion in predicciones:
+            prediccion['factores_clave'] = '; '.join(f['feature'] for f in prediccion['factores_clave'])
+            filas.append([prediccion[columna] for columna in COLUMNAS_PREDICCION])
+        yield filas
+
+
+@router.post("/export/analyze")
+async def exportar_analisis(
+    data: FuenteDatos = Depends(obtener_fuente_datos),
+    formato: str = Query('xlsx', description="csv, xlsx o parquet"),
+    tabla: Optional[str] = Query(
+        None, description="Tabla a exportar (obligatoria en csv y parquet): resumen, distribucion_por_area..."
+    )
+):
+    """
+    Exporta el análisis completo a un archivo
+
+    El XLSX tiene una hoja de indicadores ('resumen') y una por cada
+    distribución, tendencia y análisis por área, con todas las categorías
+    (sin agrupar en "Otros"). CSV y Parquet contienen la tabla indicada en
+    `tabla`.
+
+    Args:
+        data: Lista de registros de empleados con rotación (o `?dataset_id=`)
+        formato: csv, xlsx o parquet
+        tabla: Tabla a exportar
+
+    Returns:
+        Archivo como descarga
+    """
+    try:
+        # El mismo cálculo (y caché) que /analyze sin límite de categorías
+        analisis = await ejecutar_cacheado(
+            compute_tasks.analizar_datos, data, None, 0, admision='analisis'
+        )
+
+        tablas = _tablas_analisis(analisis)
+        if tabla is not None:
+            tablas = [t for t in tablas if t.nombre == tabla]
+            if not tablas:
+                raise ValueError(f"Tabla '{tabla}' no encontrada")
+        elif formato != 'xlsx':
+            raise ValueError(f"Indique ?tabla= para exportar en {formato}")
+
+        contenido = exportar(tablas, formato)
+        return _respuesta_archivo(contenido, formato, f"analisis_{tabla or 'completo'}")
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al exportar análisis: {str(e)}"
+        )
+
+
+@router.post("/export/predict")
+async def exportar_predicciones(
+    reserva: ReservaAdmision = Depends(reservar_admision('exportacion')),
+    data: FuenteDatos = Depends(obtener_fuente_datos),
+    formato: str = Query('csv', description="csv, xlsx o parquet"),
+    tamano_bloque: int = Query(
+        settings.SCORING_TAMANO_BLOQUE, ge=100, le=100000, description="Empleados por bloque"
+    )
+):
+    """
+    Exporta el riesgo de rotación de una plantilla a un archivo
+
+    Las predicciones se calculan en el pool de cómputo y se escriben por
+    bloques mientras se envía el archivo, así que la memoria no crece con el
+    número de empleados; un dataset se lee por row groups. La reserva de
+    admisión dura hasta terminar de enviar el archivo. Todo el archivo usa
+    la misma versión del modelo (cabecera X-Model-Version).
+
+    Args:
+        data: Lista de empleados (o `?dataset_id=`)
+        formato: csv, xlsx o parquet
+        tamano_bloque: Empleados por bloque
+
+    Returns:
+        Archivo como descarga, una fila por empleado
+    """
+    ml_service = _sincronizar_modelo()
+
+    try:
+        bundle = ml_service.bundle
+        if bundle is None:
+            raise HTTPException(
+                status_code=400,
+                detail="El modelo no ha sido entrenado. Llama a /ml/train primero"
+            )
+
+        if isinstance(data, str):
+            total = get_dataset_service().info(data)['n_registros']
+        else:
+            total = len(data)
+
+        bloques = _bloques_prediccion(data, total, bundle.version, tamano_bloque)
+        contenido = exportar([Tabla('predicciones', COLUMNAS_PREDICCION, bloques)], formato)
+        return _respuesta_archivo(
+            contenido, formato, f"predicciones_{datetime.now():%Y%m%d}",
+            headers={'X-Model-Version': bundle.version or ''},
+            reserva=reserva
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al exportar predicciones: {str(e)}"
+        )
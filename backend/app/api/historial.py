@@ -0,0 +1,149 @@
+"""
+API endpoints del historial longitudinal de bajas y el análisis de reingresos
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
+from app.models.schemas import (
+    AnalisisReingresos,
+    BajaHistorial,
+    CargaHistorialResponse,
+    HistorialEmpleado
+)
+from app.api.deps import admitir, obtener_fuente_datos
+from app.services import compute_tasks
+from app.services.compute_executor import get_compute_executor
+from app.services.compute_tasks import FuenteDatos
+from app.services.dataset_service import get_dataset_service
+from app.services.historial_service import get_historial_service
+
+router = APIRouter()
+
+PATRON_FECHA = r'^\d{4}-\d{2}-\d{2}$'
+
+
+@router.post(
+    "/historial/bajas",
+    response_model=CargaHistorialResponse,
+    dependencies=[Depends(admitir('ingesta'))]
+)
+async def cargar_historial(data: FuenteDatos = Depends(obtener_fuente_datos)):
+    """
+    Agrega un lote de bajas al historial
+
+    Cada baja se identifica por (numeroEmpleado, fechaBajaSistema): la misma
+    baja en varios archivos se guarda una vez y la versión más reciente
+    reemplaza a la anterior.
+
+    Args:
+        data: Registros de empleados con rotación (o `?dataset_id=`)
+
+    Returns:
+        CargaHistorialResponse con los conteos del lote
+    """
+    try:
+        lote = None
+        if isinstance(data, str):
+            lote = data
+            data = await run_in_threadpool(get_dataset_service().cargar, data)
+
+        resultado = await run_in_threadpool(get_historial_service().registrar, data, lote)
+        return CargaHistorialResponse(**resultado)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al cargar historial: {str(e)}"
+        )
+
+
+@router.get("/historial/bajas", response_model=List[BajaHistorial])
+async def buscar_bajas(
+    area: Optional[str] = Query(None, description="Área exacta"),
+    supervisor: Optional[str] = Query(None, description="Supervisor exacto"),
+    desde: Optional[str] = Query(None, pattern=PATRON_FECHA, description="Fecha de baja mínima (YYYY-MM-DD)"),
+    hasta: Optional[str] = Query(None, pattern=PATRON_FECHA, description="Fecha de baja máxima (YYYY-MM-DD)"),
+    limite: int = Query(100, ge=1, le=10000, description="Bajas por página"),
+    offset: int = Query(0, ge=0, description="Bajas a saltar")
+):
+    """
+    Busca bajas del historial por área, supervisor y rango de fechas
+
+    Returns:
+        Bajas de la más reciente a la más antigua
+    """
+    try:
+        return await run_in_threadpool(
+            get_historial_service().buscar, area, supervisor, desde, hasta, limite, offset
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al buscar en el historial: {str(e)}"
+        )
+
+
+@router.get("/historial/empleados/{numero_empleado}", response_model=HistorialEmpleado)
+async def historial_empleado(numero_empleado: str):
+    """
+    Trayectoria de un empleado: todas sus bajas con el registro completo
+
+    Args:
+        numero_empleado: Número de empleado
+
+    Returns:
+        HistorialEmpleado (404 si no tiene bajas en el historial)
+    """
+    try:
+        bajas = await run_in_threadpool(get_historial_service().historial_empleado, numero_empleado)
+
+        return HistorialEmpleado(
+            numero_empleado=numero_empleado,
+            total_bajas=len(bajas),
+            reingresos=len(bajas) - 1,
+            bajas=bajas
+        )
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al obtener historial: {str(e)}"
+        )
+
+
+@router.get("/historial/reingresos", response_model=AnalisisReingresos)
+async def analizar_reingresos(
+    limite: int = Query(20, ge=1, le=1000, description="Áreas y empleados a listar")
+):
+    """
+    Analiza los reingresos (empleados recontratados que vuelven a causar
+    baja) en todo el historial
+
+    Returns:
+        AnalisisReingresos con tasas, días fuera, reingresos por área y los
+        empleados con más bajas
+    """
+    try:
+        # El historial cambia con cada carga: se calcula siempre (en el pool)
+        resultado = await get_compute_executor().ejecutar(compute_tasks.analizar_reingresos, limite)
+        return AnalisisReingresos(**resultado)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al analizar reingresos: {str(e)}"
+        )
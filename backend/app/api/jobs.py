@@ -0,0 +1,270 @@
+"""
+API endpoints para jobs en segundo plano (entrenamiento, scoring masivo y análisis)
+"""
+
+from fastapi import APIRouter, HTTPException, Query, Depends, Header, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import List, Optional
+from app.models.schemas import JobInfo, JobResultado
+from app.api.deps import obtener_fuente_datos
+from app.api.ml import _sincronizar_modelo
+from app.services.compute_tasks import FuenteDatos
+from app.services.dataset_service import get_dataset_service
+from app.services.job_service import get_job_service, ESTADOS_FINALES
+from app.services.event_service import canal_job
+from app.api.events import respuesta_sse
+from app.utils.http import etag, cabeceras_etag, respuesta_no_modificada
+from app.utils.serialization import respuesta_rapida
+from app.config.settings import get_settings
+
+router = APIRouter()
+settings = get_settings()
+
+
+async def _dataset_id(data: FuenteDatos) -> str:
+    """Los registros del body se guardan como dataset: el job sólo persiste su id"""
+    if isinstance(data, str):
+        return data
+    info = await run_in_threadpool(get_dataset_service().guardar, data)
+    return info['dataset_id']
+
+
+@router.post("/jobs/train", response_model=JobInfo, status_code=202)
+async def crear_job_entrenamiento(
+    data: FuenteDatos = Depends(obtener_fuente_datos),
+    engine: Optional[str] = Query(None, description="Engine de ML (ver /ml/engines)")
+):
+    """
+    Encola el entrenamiento del modelo; la nueva versión se activa al terminar
+
+    Args:
+        data: Lista de registros de empleados con rotación (o `?dataset_id=`)
+        engine: Engine de ML a usar; por defecto ML_ENGINE de la configuración
+
+    Returns:
+        JobInfo del job creado
+    """
+    try:
+        if not isinstance(data, str) and len(data) < 10:
+            raise HTTPException(
+                status_code=400,
+                detail="Se requieren al menos 10 registros para entrenar el modelo"
+            )
+
+        job = get_job_service().crear('train', {
+            'dataset_id': await _dataset_id(data),
+            'engine': engine or settings.ML_ENGINE,
+        })
+
+        return JobInfo(**job)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al crear job de entrenamiento: {str(e)}"
+        )
+
+
+@router.post("/jobs/predict/batch", response_model=JobInfo, status_code=202)
+async def crear_job_scoring(
+    data: FuenteDatos = Depends(obtener_fuente_datos)
+):
+    """
+    Encola la predicción de riesgo de muchos empleados con el modelo activo
+
+    Args:
+        data: Lista de empleados (o `?dataset_id=`)
+
+    Returns:
+        JobInfo del job creado
+    """
+    ml_service = _sincronizar_modelo()
+
+    try:
+        if ml_service.model is None:
+            raise HTTPException(
+                status_code=400,
+                detail="El modelo no ha sido entrenado. Llama a /ml/train primero"
+            )
+
+        job = get_job_service().crear('predict_batch', {
+            'dataset_id': await _dataset_id(data),
+            'version': ml_service.version,
+        })
+
+        return JobInfo(**job)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al crear job de scoring: {str(e)}"
+        )
+
+
+@router.post("/jobs/analyze", response_model=JobInfo, status_code=202)
+async def crear_job_analisis(
+    data: FuenteDatos = Depends(obtener_fuente_datos)
+):
+    """
+    Encola el análisis completo de un dataset grande
+
+    Args:
+        data: Lista de registros de empleados con rotación (o `?dataset_id=`)
+
+    Returns:
+        JobInfo del job creado
+    """
+    try:
+        job = get_job_service().crear('analyze', {'dataset_id': await _dataset_id(data)})
+
+        return JobInfo(**job)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al crear job de análisis: {str(e)}"
+        )
+
+
+@router.get("/jobs", response_model=List[JobInfo])
+async def listar_jobs(
+    estado: Optional[str] = Query(None, description="Filtrar por estado"),
+    limite: int = Query(50, ge=1, le=500)
+):
+    """
+    Lista los jobs del más reciente al más antiguo
+
+    Returns:
+        Lista de JobInfo
+    """
+    try:
+        return [JobInfo(**job) for job in get_job_service().listar(estado, limite)]
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al listar jobs: {str(e)}"
+        )
+
+
+@router.get("/jobs/{job_id}", response_model=JobInfo)
+async def obtener_job(job_id: str):
+    """
+    Obtiene el estado y el progreso de un job
+
+    Args:
+        job_id: Id retornado al crear el job
+
+    Returns:
+        JobInfo
+    """
+    try:
+        return JobInfo(**get_job_service().obtener(job_id))
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+
+
+@router.get("/jobs/{job_id}/events")
+async def eventos_job(
+    job_id: str,
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Stream SSE del progreso de un job (etapas del entrenamiento, folds de
+    validación cruzada, bloques de scoring). Se cierra cuando el job termina.
+
+    Args:
+        job_id: Id retornado al crear el job
+    """
+    try:
+        get_job_service().obtener(job_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+
+    # Sin Last-Event-ID se envía el historial completo del job
+    return respuesta_sse(
+        [canal_job(job_id)],
+        last_event_id or 0,
+        hasta_evento=lambda evento: (
+            evento['tipo'] == 'job_estado' and evento['datos']['estado'] in ESTADOS_FINALES
+        )
+    )
+
+
+@router.get("/jobs/{job_id}/result", response_model=JobResultado)
+async def obtener_resultado_job(job_id: str, request: Request, response: Response):
+    """
+    Obtiene el resultado de un job completado
+
+    Args:
+        job_id: Id retornado al crear el job
+
+    Returns:
+        JobResultado con el resultado del servicio correspondiente (304 si
+        el cliente ya lo tiene: el resultado de un job no cambia)
+    """
+    try:
+        job = get_job_service().obtener(job_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+
+    valor_etag = etag('job', job_id)
+    if job['estado'] == 'completado':
+        no_modificada = respuesta_no_modificada(request, valor_etag)
+        if no_modificada is not None:
+            return no_modificada
+
+    try:
+        resultado = await run_in_threadpool(get_job_service().resultado, job_id)
+        response.headers.update(cabeceras_etag(valor_etag))
+
+        return respuesta_rapida(
+            {'job_id': job_id, 'tipo': job['tipo'], 'resultado': resultado}, response
+        )
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=409,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al obtener resultado del job: {str(e)}"
+        )
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobInfo)
+async def cancelar_job(job_id: str):
+    """
+    Cancela un job: uno pendiente no llega a ejecutarse y uno en ejecución
+    se detiene en su siguiente reporte de progreso
+
+    Args:
+        job_id: Id retornado al crear el job
+
+    Returns:
+        JobInfo con el estado tras la solicitud
+    """
+    try:
+        return JobInfo(**get_job_service().cancelar(job_id))
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
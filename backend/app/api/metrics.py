@@ -0,0 +1,91 @@
+"""
+Endpoint de métricas en formato de texto de Prometheus
+"""
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from app.services.cache_service import get_result_cache
+from app.services.admission_service import get_control_admision
+from app.utils.metrics import get_metricas, muestra
+
+router = APIRouter()
+
+TIPO_PROMETHEUS = "text/plain; version=0.0.4"
+
+
+def _metricas_cache() -> list:
+    estadisticas = get_result_cache().estadisticas()
+    return (
+        muestra('rotacion_cache_hits_total', 'counter', 'Aciertos del caché de resultados', [
+            ({'nivel': 'memoria'}, estadisticas['hits_memoria']),
+            ({'nivel': 'disco'}, estadisticas['hits_disco']),
+        ])
+        + muestra('rotacion_cache_misses_total', 'counter', 'Fallos del caché de resultados',
+                  [({}, estadisticas['misses'])])
+        + muestra('rotacion_cache_expulsiones_total', 'counter', 'Entradas expulsadas por tamaño',
+                  [({}, estadisticas['expulsiones'])])
+        + muestra('rotacion_cache_tasa_aciertos', 'gauge', 'Porcentaje de aciertos del caché',
+                  [({}, estadisticas['tasa_aciertos'])])
+        + muestra('rotacion_cache_entradas', 'gauge', 'Entradas en memoria',
+                  [({}, estadisticas['entradas'])])
+        + muestra('rotacion_cache_bytes', 'gauge', 'Bytes en memoria',
+                  [({}, estadisticas['bytes'])])
+    )
+
+
+def _metricas_admision() -> list:
+    estadisticas = get_control_admision().estadisticas()
+    return (
+        muestra('rotacion_admision_operaciones', 'gauge', 'Operaciones pesadas en curso',
+                [({}, estadisticas['operaciones'])])
+        + muestra('rotacion_admision_reservado_mb', 'gauge', 'Memoria estimada reservada por las operaciones en curso',
+                  [({}, estadisticas['reservado_mb'])])
+        + muestra('rotacion_admision_admitidas_total', 'counter', 'Operaciones pesadas admitidas',
+                  [({}, estadisticas['admitidas'])])
+        + muestra('rotacion_admision_rechazos_total', 'counter', 'Operaciones rechazadas por sobrecarga', [
+            ({'motivo': 'memoria'}, estadisticas['rechazos_memoria']),
+            ({'motivo': 'operaciones'}, estadisticas['rechazos_operaciones']),
+        ])
+    )
+
+
+def _metricas_modelo() -> list:
+    from app.api.ml import get_ml_service, ml_service_cargado
+
+    # Consultar métricas no debe cargar scikit-learn en un worker que no atiende ML
+    bundle = get_ml_service().bundle if ml_service_cargado() else None
+    if bundle is None:
+        return muestra('rotacion_modelo_info', 'gauge', 'Versión del modelo activo', [])
+
+    metricas = bundle.metrics or {}
+    return (
+        muestra('rotacion_modelo_info', 'gauge', 'Versión del modelo activo', [
+            ({'version': bundle.version or '', 'engine': bundle.engine.nombre}, 1),
+        ])
+        + muestra('rotacion_modelo_entrenamiento_segundos', 'gauge',
+                  'Duración del entrenamiento del modelo activo',
+                  [({}, metricas.get('tiempo_entrenamiento_s', 0))])
+        + muestra('rotacion_modelo_muestras', 'gauge', 'Registros con los que se entrenó el modelo activo',
+                  [({}, metricas.get('n_samples', 0))])
+    )
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def exponer_metricas():
+    """
+    Métricas del proceso en formato Prometheus: requests, latencias, tamaños
+    de payload, duración por etapa, caché de resultados, control de admisión
+    y modelo activo
+
+    Returns:
+        Texto en el formato de exposición 0.0.4
+    """
+    try:
+        texto = get_metricas().exponer(_metricas_cache() + _metricas_admision() + _metricas_modelo())
+        return PlainTextResponse(texto, media_type=TIPO_PROMETHEUS)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al generar métricas: {str(e)}"
+        )
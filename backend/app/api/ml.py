@@ -2,54 +2,134 @@
 API endpoints para Machine Learning y predicción de riesgo
 """
 
-from fastapi import APIRouter, HTTPException, Body
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Body, Query, Depends, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from starlette.requests import ClientDisconnect
+from typing import List, Dict, Optional, TYPE_CHECKING
 from app.models.schemas import (
     MLTrainingResponse,
     PrediccionRiesgo,
     ModelMetrics,
-    FeatureImportance
+    FeatureImportance,
+    EngineInfo,
+    ComparacionEngine,
+    ComparacionEnginesResponse,
+    TuningResponse,
+    IncrementalTrainingResponse,
+    MonitoreoReentrenamiento,
+    ModelVersion,
+    RankingRiesgo
 )
-from app.services.ml_service import MLService
+from app.services import compute_tasks
+from app.services.compute_tasks import FuenteDatos, Registros
+from app.services.compute_executor import get_compute_executor
+from app.api.deps import admitir, obtener_fuente_datos, leer_registros, ejecutar_condicional
+from app.utils.http import etag, cabeceras_etag, respuesta_no_modificada
+from app.utils.serialization import respuesta_rapida
+from app.utils.streaming import (
+    CuerpoEnDisco,
+    DuplexStreamingResponse,
+    leer_bloques_ndjson,
+    leer_bloques_csv
+)
+from app.config.settings import get_settings
 from datetime import datetime
+from functools import lru_cache
+import asyncio
+import json
+
+if TYPE_CHECKING:
+    from app.services.ml_service import MLService
 
 router = APIRouter()
+settings = get_settings()
 
-# Instancia global del servicio ML (en producción usar cache/database)
-ml_service = MLService()
 
+@lru_cache()
+def get_ml_service() -> 'MLService':
+    """
+    Servicio ML del worker; los modelos viven en el registro en disco
+
+    Se crea con el primer request de ML (o al precalentar con PRECARGA_ML):
+    scikit-learn y el modelo activo no se cargan en los workers que sólo
+    atienden análisis y Pareto.
+    """
+    from app.ml.registry import ModelRegistry
+    from app.services.ml_service import MLService
+
+    ml_service = MLService(
+        registry=ModelRegistry(
+            settings.MODEL_REGISTRY_DIR,
+            max_versiones=settings.MODEL_REGISTRY_MAX_VERSIONS,
+            mmap=settings.MODEL_REGISTRY_MMAP
+        )
+    )
 
-@router.post("/ml/train", response_model=MLTrainingResponse)
+    # Arranque en caliente: se carga la versión activa sin reentrenar
+    try:
+        ml_service.sincronizar()
+    except Exception as e:
+        print(f"Error cargando modelo del registro: {e}")
+
+    return ml_service
+
+
+def ml_service_cargado() -> bool:
+    """True si este worker ya creó el servicio ML"""
+    return get_ml_service.cache_info().currsize > 0
+
+
+def _sincronizar_modelo() -> 'MLService':
+    """Toma la versión activa si otro worker la cambió y retorna el servicio"""
+    ml_service = get_ml_service()
+    try:
+        ml_service.sincronizar()
+    except Exception as e:
+        print(f"Error sincronizando modelo del registro: {e}")
+    return ml_service
+
+
+@router.post(
+    "/ml/train",
+    response_model=MLTrainingResponse,
+    dependencies=[Depends(admitir('entrenamiento'))]
+)
 async def entrenar_modelo(
-    data: List[Dict] = Body(...)
+    data: FuenteDatos = Depends(obtener_fuente_datos),
+    engine: Optional[str] = Query(None, description="Engine de ML (ver /ml/engines)")
 ):
     """
     Entrena modelo de ML con datos históricos de rotación
 
     Args:
-        data: Lista de registros de empleados con rotación
+        data: Lista de registros de empleados con rotación (o `?dataset_id=`)
+        engine: Engine de ML a usar; por defecto ML_ENGINE de la configuración
 
     Returns:
         MLTrainingResponse con métricas del modelo
     """
+    ml_service = get_ml_service()
     try:
-        if not data:
-            raise HTTPException(
-                status_code=400,
-                detail="No se proporcionaron datos para entrenar"
-            )
-
-        if len(data) < 10:
+        if not isinstance(data, str) and len(data) < 10:
             raise HTTPException(
                 status_code=400,
                 detail="Se requieren al menos 10 registros para entrenar el modelo"
             )
 
-        # Entrenar modelo
-        metricas_dict = ml_service.entrenar_modelo(data)
+        # Entrenar modelo en el pool de procesos; la nueva versión queda en el
+        # registro y las predicciones usan la anterior hasta cargarla
+        resultado = await get_compute_executor().ejecutar(
+            compute_tasks.entrenar_modelo,
+            data,
+            engine or settings.ML_ENGINE
+        )
+        metricas_dict = resultado['metricas']
+        ml_service.cargar_version(resultado['version'])
 
-        # Obtener top features
-        top_features = ml_service.obtener_top_features(n=10)
+        # Top features del modelo recién entrenado (otro entrenamiento pudo publicarse después)
+        top_features = ml_service.obtener_top_features(
+            n=10, feature_importance=metricas_dict['feature_importance']
+        )
 
         # Convertir a Pydantic models
         metricas = ModelMetrics(**metricas_dict)
@@ -57,12 +137,14 @@ async def entrenar_modelo(
 
         return MLTrainingResponse(
             success=True,
-            message=f"Modelo entrenado exitosamente con {len(data)} registros",
+            message=f"Modelo entrenado exitosamente con {metricas.n_samples} registros",
             metricas=metricas,
             top_features=features,
             fecha_entrenamiento=datetime.now().isoformat()
         )
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=400,
@@ -75,6 +157,280 @@ async def entrenar_modelo(
         )
 
 
+@router.post(
+    "/ml/train/incremental",
+    response_model=IncrementalTrainingResponse,
+    dependencies=[Depends(admitir('entrenamiento'))]
+)
+async def actualizar_modelo(
+    data: Registros = Depends(leer_registros),
+    n_adicionales: Optional[int] = Query(
+        None, ge=1, le=1000, description="Árboles/iteraciones a agregar"
+    )
+):
+    """
+    Actualiza el modelo activo sólo con los registros nuevos (p. ej. las bajas
+    del último mes) sin reentrenar sobre el historial completo
+
+    Args:
+        data: Registros agregados desde el último entrenamiento
+        n_adicionales: Árboles/iteraciones a agregar; por defecto el del engine
+
+    Returns:
+        IncrementalTrainingResponse con métricas y recomendación de reentrenamiento
+    """
+    ml_service = _sincronizar_modelo()
+
+    try:
+        if ml_service.model is None:
+            raise HTTPException(
+                status_code=400,
+                detail="El modelo no ha sido entrenado. Llama a /ml/train primero"
+            )
+
+        # Como /ml/train: el ajuste corre en el pool de procesos sobre la
+        # versión activa y el worker carga del registro la versión nueva
+        resultado = await get_compute_executor().ejecutar(
+            compute_tasks.actualizar_modelo, data, ml_service.version, n_adicionales
+        )
+        ml_service.cargar_version(resultado['version'])
+        monitoreo = MonitoreoReentrenamiento(**resultado['monitoreo'])
+
+        message = f"Modelo actualizado con {len(data)} registros nuevos"
+        if monitoreo.requiere_reentrenamiento:
+            message += ". Se recomienda reentrenar con /ml/train"
+
+        return IncrementalTrainingResponse(
+            success=True,
+            message=message,
+            metricas=ModelMetrics(**resultado['metricas']),
+            monitoreo=monitoreo,
+            fecha_entrenamiento=datetime.now().isoformat()
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al actualizar modelo: {str(e)}"
+        )
+
+
+@router.post(
+    "/ml/tune",
+    response_model=TuningResponse,
+    dependencies=[Depends(admitir('entrenamiento'))]
+)
+async def optimizar_modelo(
+    data: Registros = Depends(leer_registros),
+    engine: Optional[str] = Query(None, description="Engine de ML a optimizar"),
+    presupuesto_s: Optional[int] = Query(None, gt=0, description="Tiempo máximo de búsqueda en segundos"),
+    n_configuraciones: int = Query(27, ge=1, le=500, description="Configuraciones iniciales")
+):
+    """
+    Busca hiperparámetros del modelo y del pipeline de features con successive
+    halving en un pool de procesos y promueve la mejor configuración
+
+    Args:
+        data: Lista de registros de empleados con rotación
+        engine: Engine de ML; por defecto ML_ENGINE de la configuración
+        presupuesto_s: Presupuesto de tiempo; por defecto ML_TUNING_BUDGET_S
+        n_configuraciones: Configuraciones evaluadas en la primera ronda
+
+    Returns:
+        TuningResponse con la mejor configuración y las métricas del modelo promovido
+    """
+    ml_service = get_ml_service()
+    try:
+        if len(data) < 10:
+            raise HTTPException(
+                status_code=400,
+                detail="Se requieren al menos 10 registros para entrenar el modelo"
+            )
+
+        # La búsqueda bloquea minutos; se ejecuta fuera del event loop
+        resultado = await run_in_threadpool(
+            ml_service.optimizar_modelo,
+            data,
+            engine=engine or settings.ML_ENGINE,
+            presupuesto_s=presupuesto_s or settings.ML_TUNING_BUDGET_S,
+            n_configuraciones=n_configuraciones,
+            n_workers=settings.ML_TUNING_WORKERS or None
+        )
+
+        return TuningResponse(
+            success=True,
+            message=(
+                f"Mejor configuración de {resultado['configuraciones_evaluadas']} evaluadas "
+                f"promovida como modelo activo"
+            ),
+            **resultado
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al optimizar modelo: {str(e)}"
+        )
+
+
+@router.get("/ml/models", response_model=List[ModelVersion])
+async def listar_versiones():
+    """
+    Lista las versiones del registro de modelos, de la más reciente a la más antigua
+
+    Returns:
+        Lista de ModelVersion
+    """
+    ml_service = get_ml_service()
+    try:
+        return [ModelVersion(**v) for v in ml_service.registry.listar()]
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al listar versiones: {str(e)}"
+        )
+
+
+@router.post("/ml/models/{version}/promote", response_model=ModelVersion)
+async def promover_version(version: str):
+    """
+    Promueve una versión del registro como modelo activo en todos los workers
+
+    Args:
+        version: Versión a promover (p. ej. v0003)
+
+    Returns:
+        ModelVersion promovida
+    """
+    ml_service = get_ml_service()
+    try:
+        ml_service.registry.activar(version)
+        ml_service.cargar_version(version)
+
+        return ModelVersion(**ml_service.registry.metadata(version), activo=True)
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al promover versión: {str(e)}"
+        )
+
+
+@router.post("/ml/models/rollback", response_model=ModelVersion)
+async def rollback_version():
+    """
+    Regresa a la versión activa anterior
+
+    Returns:
+        ModelVersion que quedó activa
+    """
+    ml_service = get_ml_service()
+    try:
+        version = ml_service.registry.rollback()
+        ml_service.cargar_version(version)
+
+        return ModelVersion(**ml_service.registry.metadata(version), activo=True)
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error en rollback: {str(e)}"
+        )
+
+
+@router.get("/ml/engines", response_model=List[EngineInfo])
+async def listar_engines():
+    """
+    Lista los engines de ML disponibles y sus parámetros por defecto
+
+    Returns:
+        Lista de EngineInfo
+    """
+    from app.ml.engines import ENGINES
+    return [EngineInfo(**engine.info()) for engine in ENGINES.values()]
+
+
+@router.post(
+    "/ml/engines/compare",
+    response_model=ComparacionEnginesResponse,
+    dependencies=[Depends(admitir('entrenamiento'))]
+)
+async def comparar_engines(
+    data: FuenteDatos = Depends(obtener_fuente_datos),
+    engines: Optional[List[str]] = Query(None, description="Engines a comparar (todos por defecto)")
+):
+    """
+    Entrena cada engine con el mismo split y compara tiempo, memoria y AUC.
+    No reemplaza el modelo activo.
+
+    Args:
+        data: Lista de registros de empleados con rotación (o `?dataset_id=`)
+        engines: Engines a comparar
+
+    Returns:
+        ComparacionEnginesResponse con las métricas de cada engine
+    """
+    from app.ml.engines import ENGINES
+    try:
+        if not isinstance(data, str) and len(data) < 10:
+            raise HTTPException(
+                status_code=400,
+                detail="Se requieren al menos 10 registros para entrenar el modelo"
+            )
+
+        comparacion = await get_compute_executor().ejecutar(
+            compute_tasks.comparar_engines, data, engines or list(ENGINES)
+        )
+        resultados = comparacion['resultados']
+
+        con_auc = [r for r in resultados if r.get('auc_roc') is not None]
+        mejor = max(con_auc, key=lambda r: r['auc_roc'])['engine'] if con_auc else None
+
+        return ComparacionEnginesResponse(
+            n_samples=comparacion['n_samples'],
+            resultados=[ComparacionEngine(**r) for r in resultados],
+            mejor_engine=mejor
+        )
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al comparar engines: {str(e)}"
+        )
+
+
 @router.post("/ml/predict", response_model=PrediccionRiesgo)
 async def predecir_riesgo(
     empleado: Dict = Body(...)
@@ -88,6 +444,8 @@ async def predecir_riesgo(
     Returns:
         PrediccionRiesgo con probabilidad y factores de riesgo
     """
+    ml_service = _sincronizar_modelo()
+
     try:
         if ml_service.model is None:
             raise HTTPException(
@@ -112,9 +470,13 @@ async def predecir_riesgo(
         )
 
 
-@router.post("/ml/predict/batch", response_model=List[PrediccionRiesgo])
+@router.post(
+    "/ml/predict/batch",
+    response_model=List[PrediccionRiesgo],
+    dependencies=[Depends(admitir('prediccion'))]
+)
 async def predecir_riesgo_batch(
-    empleados: List[Dict] = Body(...)
+    empleados: Registros = Depends(leer_registros)
 ):
     """
     Predice el riesgo de rotación para múltiples empleados
@@ -125,6 +487,8 @@ async def predecir_riesgo_batch(
     Returns:
         Lista de PrediccionRiesgo
     """
+    ml_service = _sincronizar_modelo()
+
     try:
         if ml_service.model is None:
             raise HTTPException(
@@ -132,17 +496,140 @@ async def predecir_riesgo_batch(
                 detail="El modelo no ha sido entrenado. Llama a /ml/train primero"
             )
 
-        if not empleados:
+        # Predecir batch en el pool de procesos con la versión activa de este worker
+        predicciones = await get_compute_executor().ejecutar(
+            compute_tasks.predecir_batch, empleados, ml_service.version
+        )
+
+        return respuesta_rapida(predicciones)
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al predecir batch: {str(e)}"
+        )
+
+
+@router.post("/ml/predict/stream")
+async def predecir_riesgo_stream(
+    request: Request,
+    tamano_bloque: int = Query(
+        settings.SCORING_TAMANO_BLOQUE, ge=100, le=100000, description="Empleados por bloque"
+    )
+):
+    """
+    Predice el riesgo de rotación de una plantilla completa en streaming
+
+    El cuerpo es NDJSON (un empleado por línea) o CSV con encabezado
+    (Content-Type: text/csv). Los empleados se leen por bloques, cada bloque
+    se evalúa con una sola llamada al modelo y sus predicciones se envían
+    como NDJSON en cuanto están listas: la memoria depende del tamaño del
+    bloque y no del total de empleados (lo recibido y aún no evaluado espera
+    en un archivo temporal). Si falla un bloque, la última línea
+    es un objeto con 'error' y los registros procesados.
+
+    Args:
+        tamano_bloque: Empleados por bloque
+
+    Returns:
+        Stream NDJSON de PrediccionRiesgo
+    """
+    ml_service = _sincronizar_modelo()
+
+    # Todo el stream usa la misma versión aunque se publique otra a la mitad
+    bundle = ml_service.bundle
+    if bundle is None:
+        raise HTTPException(
+            status_code=400,
+            detail="El modelo no ha sido entrenado. Llama a /ml/train primero"
+        )
+
+    es_csv = 'csv' in request.headers.get('content-type', '')
+    lector = leer_bloques_csv if es_csv else leer_bloques_ndjson
+
+    async def generar():
+        cuerpo = CuerpoEnDisco(request.stream())
+        recepcion = asyncio.create_task(cuerpo.recibir())
+        procesados = 0
+        try:
+            async for bloque in lector(cuerpo.leer(), tamano_bloque):
+                predicciones = await run_in_threadpool(
+                    ml_service.predecir_bloque, bloque, bundle, procesados
+                )
+                procesados += len(bloque)
+                yield ''.join(json.dumps(p, ensure_ascii=False) + '\n' for p in predicciones)
+
+                # Con el cuerpo ya recibido, `receive` sólo puede traer la desconexión
+                if cuerpo.terminado and await request.is_disconnected():
+                    return
+        except ClientDisconnect:
+            return
+        except Exception as e:
+            yield json.dumps({
+                'error': f"Error al predecir en streaming: {str(e)}",
+                'registros_procesados': procesados
+            }, ensure_ascii=False) + '\n'
+        finally:
+            recepcion.cancel()
+            cuerpo.cerrar()
+
+    return DuplexStreamingResponse(
+        generar(),
+        media_type="application/x-ndjson",
+        headers={"X-Model-Version": bundle.version or ""}
+    )
+
+
+@router.post(
+    "/ml/predict/ranking",
+    response_model=RankingRiesgo
+)
+async def ranking_riesgo(
+    request: Request,
+    response: Response,
+    data: FuenteDatos = Depends(obtener_fuente_datos),
+    k: int = Query(50, ge=1, le=1000, description="Empleados por ranking"),
+    agrupar_por: Optional[str] = Query(
+        None, description="Columna para rankings por grupo (p. ej. 'supervisor' o 'area')"
+    )
+):
+    """
+    Obtiene los k empleados con mayor riesgo de rotación voluntaria, en
+    total y por supervisor/área, sin serializar las predicciones del resto
+
+    Args:
+        data: Lista de empleados (o `?dataset_id=`)
+        k: Empleados por ranking
+        agrupar_por: Columna para rankings por grupo
+
+    Returns:
+        RankingRiesgo con el top general y el de cada grupo
+    """
+    ml_service = _sincronizar_modelo()
+
+    try:
+        if ml_service.model is None:
             raise HTTPException(
                 status_code=400,
-                detail="No se proporcionaron empleados para predecir"
+                detail="El modelo no ha sido entrenado. Llama a /ml/train primero"
             )
 
-        # Predecir batch
-        predicciones = ml_service.predecir_batch(empleados)
-
-        return [PrediccionRiesgo(**p) for p in predicciones]
+        # La versión del modelo es parte de la clave de caché
+        ranking = await ejecutar_condicional(
+            request, response, compute_tasks.ranking_riesgo, data, ml_service.version, k, agrupar_por,
+            admision='prediccion'
+        )
+        return respuesta_rapida(ranking, response)
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=400,
@@ -151,18 +638,21 @@ async def predecir_riesgo_batch(
     except Exception as e:
         raise HTTPException(
             status_code=500,
-            detail=f"Error al predecir batch: {str(e)}"
+            detail=f"Error al calcular ranking de riesgo: {str(e)}"
         )
 
 
 @router.get("/ml/features", response_model=List[FeatureImportance])
-async def obtener_features_importantes():
+async def obtener_features_importantes(request: Request, response: Response):
     """
     Obtiene las features más importantes del modelo
 
     Returns:
-        Lista de features ordenadas por importancia
+        Lista de features ordenadas por importancia (304 si el modelo no
+        cambió desde el ETag de If-None-Match)
     """
+    ml_service = _sincronizar_modelo()
+
     try:
         if ml_service.model is None:
             raise HTTPException(
@@ -170,6 +660,12 @@ async def obtener_features_importantes():
                 detail="El modelo no ha sido entrenado. Llama a /ml/train primero"
             )
 
+        valor_etag = etag('features', ml_service.version)
+        no_modificada = respuesta_no_modificada(request, valor_etag)
+        if no_modificada is not None:
+            return no_modificada
+        response.headers.update(cabeceras_etag(valor_etag))
+
         features = ml_service.obtener_top_features(n=15)
 
         return [FeatureImportance(**f) for f in features]
@@ -182,13 +678,16 @@ async def obtener_features_importantes():
 
 
 @router.get("/ml/metrics", response_model=ModelMetrics)
-async def obtener_metricas_modelo():
+async def obtener_metricas_modelo(request: Request, response: Response):
     """
     Obtiene las métricas del modelo entrenado
 
     Returns:
-        ModelMetrics con accuracy, AUC, etc.
+        ModelMetrics con accuracy, AUC, etc. (304 si el modelo no cambió
+        desde el ETag de If-None-Match)
     """
+    ml_service = _sincronizar_modelo()
+
     try:
         if ml_service.model is None:
             raise HTTPException(
@@ -196,6 +695,12 @@ async def obtener_metricas_modelo():
                 detail="El modelo no ha sido entrenado. Llama a /ml/train primero"
             )
 
+        valor_etag = etag('metrics', ml_service.version)
+        no_modificada = respuesta_no_modificada(request, valor_etag)
+        if no_modificada is not None:
+            return no_modificada
+        response.headers.update(cabeceras_etag(valor_etag))
+
         return ModelMetrics(**ml_service.model_metrics)
 
     except Exception as e:
@@ -208,9 +713,11 @@ async def obtener_metricas_modelo():
 @router.get("/health")
 async def health_check():
     """Health check para el módulo de ML"""
+    ml_service = _sincronizar_modelo()
     model_status = "trained" if ml_service.model is not None else "not_trained"
     return {
         "status": "ok",
         "module": "ml",
-        "model_status": model_status
+        "model_status": model_status,
+        "model_version": ml_service.version
     }
@@ -2,36 +2,49 @@
 API endpoints para análisis Pareto
 """
 
-from fastapi import APIRouter, HTTPException, Body, Query
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from typing import List, Dict, Optional, Union
 from app.models.schemas import AnalisisParetoResponse
+from app.api.deps import (
+    obtener_fuente_datos,
+    obtener_limite_categorias,
+    ejecutar_cacheado,
+    ejecutar_condicional
+)
+from app.services import compute_tasks
+from app.services.compute_tasks import FuenteDatos
 from app.services.pareto_service import ParetoService
+from app.utils.serialization import respuesta_rapida
 
 router = APIRouter()
 
 
-@router.post("/pareto/{categoria}", response_model=AnalisisParetoResponse)
+@router.post(
+    "/pareto/{categoria}",
+    response_model=AnalisisParetoResponse
+)
 async def analizar_pareto(
     categoria: str,
-    data: List[Dict] = Body(...)
+    request: Request,
+    response: Response,
+    data: FuenteDatos = Depends(obtener_fuente_datos),
+    limite: Optional[int] = Depends(obtener_limite_categorias),
+    offset: int = Query(0, ge=0, description="Patrones a saltar")
 ):
     """
     Realiza análisis Pareto 80/20 sobre una categoría específica
 
     Args:
         categoria: Categoría a analizar (area, supervisor, turno, rango_salarial)
-        data: Lista de registros de empleados con rotación
+        data: Lista de registros de empleados con rotación (o `?dataset_id=`)
+        limite: Patrones a retornar; el resto se agrupa en "Otros"
+        offset: Patrones a saltar (paginación)
 
     Returns:
-        AnalisisParetoResponse con patrones ordenados por impacto
+        AnalisisParetoResponse con patrones ordenados por impacto (304 si
+        el ETag de If-None-Match sigue vigente)
     """
     try:
-        if not data:
-            raise HTTPException(
-                status_code=400,
-                detail="No se proporcionaron datos para analizar"
-            )
-
         # Validar categoría
         categorias_validas = ["area", "supervisor", "turno", "rango_salarial", "puesto"]
         if categoria not in categorias_validas:
@@ -40,11 +53,16 @@ async def analizar_pareto(
                 detail=f"Categoría inválida. Debe ser una de: {', '.join(categorias_validas)}"
             )
 
-        # Realizar análisis
-        analisis = ParetoService.analizar_pareto(data, categoria)
+        # Realizar análisis en el pool de procesos (o reutilizar el de los mismos datos)
+        analisis = await ejecutar_condicional(
+            request, response, compute_tasks.analizar_pareto, data, categoria, limite, offset,
+            admision='pareto'
+        )
 
-        return analisis
+        return respuesta_rapida(analisis, response)
 
+    except HTTPException:
+        raise
     except ValueError as e:
         raise HTTPException(
             status_code=400,
@@ -57,31 +75,37 @@ async def analizar_pareto(
         )
 
 
-@router.post("/pareto/all", response_model=Dict[str, AnalisisParetoResponse])
+@router.post(
+    "/pareto/all",
+    response_model=Dict[str, AnalisisParetoResponse]
+)
 async def analizar_pareto_multiple(
-    data: List[Dict] = Body(...)
+    request: Request,
+    response: Response,
+    data: FuenteDatos = Depends(obtener_fuente_datos),
+    limite: Optional[int] = Depends(obtener_limite_categorias)
 ):
     """
     Analiza múltiples categorías con método Pareto
 
     Args:
-        data: Lista de registros de empleados con rotación
+        data: Lista de registros de empleados con rotación (o `?dataset_id=`)
+        limite: Patrones por categoría; el resto se agrupa en "Otros"
 
     Returns:
         Diccionario con análisis Pareto por cada categoría
     """
     try:
-        if not data:
-            raise HTTPException(
-                status_code=400,
-                detail="No se proporcionaron datos para analizar"
-            )
-
         # Analizar todas las categorías
-        resultados = ParetoService.analizar_multiples_categorias(data)
+        resultados = await ejecutar_condicional(
+            request, response, compute_tasks.analizar_pareto_multiple, data, limite,
+            admision='pareto'
+        )
 
-        return resultados
+        return respuesta_rapida(resultados, response)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -89,26 +113,32 @@ async def analizar_pareto_multiple(
         )
 
 
-@router.post("/pareto/{categoria}/recomendaciones", response_model=Dict[str, List[str]])
+@router.post(
+    "/pareto/{categoria}/recomendaciones",
+    response_model=Dict[str, Union[str, List[str]]]
+)
 async def obtener_recomendaciones_pareto(
     categoria: str,
-    data: List[Dict] = Body(...)
+    data: FuenteDatos = Depends(obtener_fuente_datos),
+    limite: Optional[int] = Depends(obtener_limite_categorias)
 ):
     """
     Obtiene recomendaciones basadas en análisis Pareto
 
     Args:
         categoria: Categoría analizada
-        data: Lista de registros de empleados
+        data: Lista de registros de empleados (o `?dataset_id=`)
+        limite: Patrones analizados, igual que en /pareto/{categoria}
 
     Returns:
         Diccionario con lista de recomendaciones accionables
     """
     try:
-        # Primero hacer el análisis
-        analisis = ParetoService.analizar_pareto(data, categoria)
-
-        # Generar recomendaciones
+        # Reutiliza el análisis de /pareto/{categoria} con los mismos datos:
+        # mismos argumentos (la primera página) y, por lo tanto, la misma clave
+        analisis = await ejecutar_cacheado(
+            compute_tasks.analizar_pareto, data, categoria, limite, 0, admision='pareto'
+        )
         recomendaciones = ParetoService.obtener_recomendaciones(analisis)
 
         return {
@@ -116,6 +146,8 @@ async def obtener_recomendaciones_pareto(
             "recomendaciones": recomendaciones
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -0,0 +1,78 @@
+"""
+API endpoints para consultar los reportes de perfilado bajo demanda
+"""
+
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+from app.models.schemas import PerfilInfo
+from app.utils.profiling import get_almacen_perfiles, token_valido
+from app.config.settings import get_settings
+
+settings = get_settings()
+
+
+def verificar_admin(x_admin_token: Optional[str] = Header(None)) -> None:
+    """Sólo el administrador (cabecera X-Admin-Token) consulta los perfiles"""
+    if not token_valido(x_admin_token, settings.PROFILING_TOKEN):
+        raise HTTPException(
+            status_code=403,
+            detail="Token de administrador inválido"
+        )
+
+
+router = APIRouter(dependencies=[Depends(verificar_admin)])
+
+
+@router.get("/perfiles", response_model=List[PerfilInfo])
+async def listar_perfiles():
+    """
+    Lista los reportes de perfilado guardados, del más reciente al más antiguo
+
+    Returns:
+        Lista de PerfilInfo
+    """
+    try:
+        return await run_in_threadpool(get_almacen_perfiles().listar)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error al listar perfiles: {str(e)}"
+        )
+
+
+@router.get("/perfiles/{perfil_id}")
+async def obtener_perfil(perfil_id: str):
+    """
+    Reporte de un request perfilado: duración, pico de memoria, líneas que
+    más memoria asignaron y pilas más muestreadas
+
+    Args:
+        perfil_id: Id retornado en la cabecera X-Profile-Id
+    """
+    reporte = await run_in_threadpool(get_almacen_perfiles().leer, perfil_id)
+    if reporte is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"El perfil '{perfil_id}' no existe"
+        )
+    return reporte
+
+
+@router.get("/perfiles/{perfil_id}/collapsed", response_class=PlainTextResponse)
+async def obtener_pilas_colapsadas(perfil_id: str):
+    """
+    Pilas colapsadas del request, para flamegraph.pl o speedscope
+
+    Args:
+        perfil_id: Id retornado en la cabecera X-Profile-Id
+    """
+    colapsadas = await run_in_threadpool(get_almacen_perfiles().leer_colapsadas, perfil_id)
+    if colapsadas is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"El perfil '{perfil_id}' no existe"
+        )
+    return PlainTextResponse(colapsadas)
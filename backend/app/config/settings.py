@@ -20,11 +20,84 @@ class Settings(BaseSettings):
     ]
 
     # Upload
-    MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024  # 10MB
+    MAX_UPLOAD_SIZE: int = 64 * 1024 * 1024  # 64MB: MAX_RECORDS registros en JSON por filas
     UPLOAD_DIR: str = "/tmp/rotacion_uploads"
 
     # Processing
     MAX_RECORDS: int = 50000
+    LIMITE_CATEGORIAS: int = 100  # por distribución/Pareto; 0 = sin límite
+    COMPUTE_WORKERS: int = 0  # 0 = núcleos disponibles
+    COMPUTE_MAX_CONCURRENCY: int = 0  # 0 = 2 x COMPUTE_WORKERS
+    DATASET_DIR: str = "/tmp/rotacion_datasets"
+    # Copia Parquet de cada dataset: las exportaciones la leen por bloques
+    # (el engine duckdb la usa siempre)
+    DATASET_PARQUET: bool = True
+
+    # Engine de los análisis (distribuciones, tendencias, áreas y Pareto)
+    ANALISIS_ENGINE: str = "pandas"  # pandas | duckdb (requiere el paquete duckdb)
+    DUCKDB_THREADS: int = 0  # por proceso de cómputo; 0 = núcleos disponibles
+    DUCKDB_MEMORIA_MB: int = 0  # 0 = 80% de la RAM; lo que no cabe va a DUCKDB_TEMP_DIR
+    DUCKDB_TEMP_DIR: str = "/tmp/rotacion_duckdb"
+
+    # Control de admisión de operaciones pesadas (por worker)
+    ADMISION_HABILITADA: bool = True
+    ADMISION_MEMORIA_MB: int = 1024  # memoria estimada de las operaciones en curso
+    ADMISION_MAX_OPERACIONES: int = 4
+    ADMISION_ESPERA_S: float = 2  # espera por espacio antes de responder 429/503
+    ADMISION_RETRY_AFTER_S: int = 5
+
+    # Jobs en segundo plano
+    JOB_DB_PATH: str = "/tmp/rotacion_jobs/jobs.db"
+    JOB_WORKERS: int = 1
+    JOB_RETENCION_DIAS: int = 7
+
+    # Historial longitudinal de bajas (reingresos)
+    HISTORIAL_DB_PATH: str = "/tmp/rotacion_historial/historial.db"
+    HISTORIAL_REGISTRAR_DATASETS: bool = True  # cada dataset registrado se agrega al historial
+
+    # Temas de la encuesta de salida (4FRH-209)
+    ENCUESTAS_DIR: str = "/tmp/rotacion_encuestas"
+    ENCUESTAS_TEMAS: int = 8  # al cambiarlo, reiniciar el modelo (DELETE /api/encuestas/modelo)
+    ENCUESTAS_N_FEATURES: int = 2 ** 16  # dimensiones del hashing de palabras y bigramas
+
+    # Compresión de respuestas
+    GZIP_MIN_BYTES: int = 1000
+    GZIP_NIVEL: int = 6
+    SERIALIZACION_RAPIDA: bool = True  # sin revalidar contra response_model
+
+    # Caché de resultados
+    CACHE_MAX_ENTRADAS: int = 256
+    CACHE_MAX_MB: int = 256
+    CACHE_TTL_S: float = 600
+    CACHE_DIR: str = ""  # vacío = sólo memoria; con ruta se comparte entre workers
+
+    # Métricas
+    METRICAS_HABILITADAS: bool = True  # GET /metrics en formato Prometheus
+    SERVER_TIMING: bool = True  # cabecera Server-Timing con la duración por etapa
+
+    # Perfilado bajo demanda (?profile=1 con X-Admin-Token)
+    PROFILING_HABILITADO: bool = False
+    PROFILING_TOKEN: str = ""  # vacío = ningún request se puede perfilar
+    PROFILING_INTERVALO_MS: float = 5
+    PROFILING_TOP_N: int = 20
+    PROFILING_DIR: str = "/tmp/rotacion_perfiles"
+    PROFILING_MAX_REPORTES: int = 50
+
+    # Eventos en vivo (SSE)
+    EVENTOS_INTERVALO_S: float = 0.5
+    EVENTOS_HEARTBEAT_S: float = 15
+
+    # Machine Learning
+    ML_ENGINE: str = "random_forest"  # random_forest | hist_gradient_boosting
+    ML_TUNING_BUDGET_S: int = 300
+    ML_TUNING_WORKERS: int = 0  # 0 = núcleos disponibles
+    MODEL_REGISTRY_DIR: str = "/tmp/rotacion_models"
+    MODEL_REGISTRY_MAX_VERSIONS: int = 20
+    MODEL_REGISTRY_MMAP: bool = True
+    SCORING_TAMANO_BLOQUE: int = 5000
+    # scikit-learn y el modelo se cargan con el primer request de ML; con
+    # PRECARGA_ML se cargan en segundo plano al arrancar el worker
+    PRECARGA_ML: bool = False
 
     class Config:
         env_file = ".env"
@@ -2,9 +2,19 @@
 FastAPI Application - Dashboard de Análisis de Rotación
 """
 
+import asyncio
+from typing import Optional
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config.settings import get_settings
+from app.services.compute_executor import get_compute_executor
+from app.services.job_service import get_job_service
+from app.services.event_service import get_event_service
+from app.services.cache_service import get_result_cache
+from app.utils.http import CompresionMiddleware
+from app.utils.metrics import MetricasMiddleware
+from app.utils.profiling import PerfiladoMiddleware, get_almacen_perfiles
 
 settings = get_settings()
 
@@ -21,8 +31,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Model-Version", "Server-Timing", "X-Profile-Id", "Retry-After"],
 )
 
+# Compresión de respuestas (SSE y NDJSON se envían sin comprimir)
+app.add_middleware(
+    CompresionMiddleware,
+    minimum_size=settings.GZIP_MIN_BYTES,
+    compresslevel=settings.GZIP_NIVEL,
+)
+
+# Conteo, latencia y tamaño por ruta; al ser el más externo mide los bytes ya comprimidos
+if settings.METRICAS_HABILITADAS:
+    app.add_middleware(MetricasMiddleware, server_timing=settings.SERVER_TIMING)
+
+# Perfilado bajo demanda: deshabilitado no se instala y no cuesta nada
+if settings.PROFILING_HABILITADO:
+    app.add_middleware(
+        PerfiladoMiddleware,
+        token=settings.PROFILING_TOKEN,
+        almacen=get_almacen_perfiles(),
+        intervalo_s=settings.PROFILING_INTERVALO_MS / 1000,
+        top_n=settings.PROFILING_TOP_N,
+    )
+
 # Health check
 @app.get("/health")
 async def health_check():
@@ -42,8 +74,61 @@ async def root():
         "docs": "/docs"
     }
 
+@app.on_event("startup")
+async def reanudar_jobs():
+    """Reenvía los jobs que quedaron pendientes antes del último reinicio"""
+    jobs = get_job_service()
+    jobs.depurar(settings.JOB_RETENCION_DIAS)
+    get_event_service().depurar(settings.JOB_RETENCION_DIAS)
+    get_result_cache().depurar()
+    jobs.reanudar()
+
+
+# Precarga del servicio ML en curso; se conserva para reportar si falla
+_precarga_ml: Optional[asyncio.Future] = None
+
+
+def _reportar_precarga(futuro: asyncio.Future) -> None:
+    if not futuro.cancelled() and futuro.exception() is not None:
+        print(f"Error precargando el servicio ML: {futuro.exception()}")
+
+
+@app.on_event("startup")
+async def precargar_ml():
+    """Carga el stack de ML en segundo plano para que el primer request no espere"""
+    global _precarga_ml
+    if not settings.PRECARGA_ML:
+        return
+
+    from app.api.ml import get_ml_service
+    from app.services import compute_tasks
+
+    _precarga_ml = asyncio.get_running_loop().run_in_executor(None, get_ml_service)
+    _precarga_ml.add_done_callback(_reportar_precarga)
+    get_compute_executor().precalentar(compute_tasks.precalentar)
+
+
+@app.on_event("shutdown")
+async def cerrar_compute_executor():
+    """Detiene los procesos de cómputo"""
+    get_compute_executor().cerrar()
+    get_job_service().executor.cerrar()
+
 # Incluir routers
-from app.api import analysis, pareto, ml
+from app.api import analysis, pareto, ml, exports, historial, encuestas, datasets, jobs, events, cache, metrics, perfiles
+app.include_router(datasets.router, prefix="/api", tags=["datasets"])
+app.include_router(jobs.router, prefix="/api", tags=["jobs"])
+app.include_router(events.router, prefix="/api", tags=["events"])
 app.include_router(analysis.router, prefix="/api", tags=["analysis"])
 app.include_router(pareto.router, prefix="/api", tags=["pareto"])
 app.include_router(ml.router, prefix="/api", tags=["ml"])
+app.include_router(exports.router, prefix="/api", tags=["exports"])
+app.include_router(historial.router, prefix="/api", tags=["historial"])
+app.include_router(encuestas.router, prefix="/api", tags=["encuestas"])
+app.include_router(cache.router, prefix="/api", tags=["cache"])
+
+if settings.METRICAS_HABILITADAS:
+    app.include_router(metrics.router, tags=["metrics"])
+
+if settings.PROFILING_HABILITADO:
+    app.include_router(perfiles.router, prefix="/api", tags=["perfiles"])
@@ -0,0 +1,55 @@
+"""
+Bundle inmutable de un modelo entrenado
+Agrupa todo lo necesario para predecir con una versión del modelo
+"""
+
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional
+
+from app.ml.engines import ModelEngine, obtener_engine
+from app.ml.features import FeaturePipeline
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """
+    Modelo, engine, pipeline de features, importancias y métricas de una versión
+
+    Un bundle nunca se modifica después de publicarse: el entrenamiento
+    construye uno nuevo y el servicio lo reemplaza con una sola asignación,
+    así cada predicción ve una versión completa y consistente.
+    """
+
+    model: Any
+    engine: ModelEngine
+    pipeline: FeaturePipeline
+    feature_importance: Dict[str, float] = field(default_factory=dict)
+    metrics: Dict = field(default_factory=dict)
+    version: Optional[str] = None
+
+    @property
+    def feature_names(self) -> List[str]:
+        return self.pipeline.feature_names
+
+    def con_version(self, version: Optional[str]) -> 'ModelBundle':
+        return replace(self, version=version)
+
+    def artefactos(self) -> Dict:
+        """Objetos que se persisten en el registro de modelos"""
+        return {
+            'model': self.model,
+            'engine': self.engine.nombre,
+            'pipeline': self.pipeline,
+            'feature_importance': self.feature_importance,
+        }
+
+    @classmethod
+    def desde_artefactos(cls, artefactos: Dict, metrics: Dict, version: str) -> 'ModelBundle':
+        return cls(
+            model=artefactos['model'],
+            engine=obtener_engine(artefactos['engine']),
+            pipeline=artefactos['pipeline'],
+            feature_importance=artefactos['feature_importance'],
+            metrics=metrics,
+            version=version,
+        )
@@ -0,0 +1,222 @@
+"""
+Engines de modelos para predicción de riesgo de rotación
+Cada engine encapsula un clasificador de scikit-learn y cómo alimentarlo
+"""
+
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+from sklearn.ensemble import RandomForestClassifier, HistGradientBoostingClassifier
+from sklearn.inspection import permutation_importance
+from app.ml.features import FeaturePipeline
+
+
+class ModelEngine:
+    """Interfaz común de los engines de ML"""
+
+    nombre: str = ''
+    descripcion: str = ''
+    # Límite de categorías que el modelo acepta por feature (None = sin límite)
+    max_categorias: Optional[int] = None
+    parametros_defecto: Dict = {}
+    # Árboles/iteraciones que agrega una actualización incremental
+    incremento_defecto: int = 20
+
+    def crear_modelo(self, feature_names: List[str], random_state: int = 42, **params):
+        """Instancia el clasificador con los parámetros por defecto sobrescritos por `params`"""
+        raise NotImplementedError
+
+    def crear_pipeline(
+        self,
+        max_categorias: Optional[int] = None,
+        incluir_derivadas: bool = False
+    ) -> FeaturePipeline:
+        """Pipeline de features que respeta el límite de categorías del engine"""
+        if self.max_categorias is not None:
+            max_categorias = (
+                self.max_categorias if max_categorias is None
+                else min(max_categorias, self.max_categorias)
+            )
+        return FeaturePipeline(max_categorias=max_categorias, incluir_derivadas=incluir_derivadas)
+
+    def preparar_X(self, X: pd.DataFrame) -> pd.DataFrame:
+        """Adapta la matriz del pipeline de features al formato del modelo"""
+        return X
+
+    def ajustar(self, modelo, X: pd.DataFrame, y, pipeline: FeaturePipeline):
+        """Entrena el modelo con la matriz de `pipeline` (ya adaptada con preparar_X)"""
+        return modelo.fit(X, y)
+
+    def ampliar_modelo(
+        self,
+        modelo,
+        X: pd.DataFrame,
+        y: pd.Series,
+        n_adicionales: int,
+        pipeline: FeaturePipeline
+    ):
+        """Agrega `n_adicionales` árboles entrenados sólo con X, y (warm start)"""
+        raise NotImplementedError
+
+    def importancias(
+        self,
+        modelo,
+        X: pd.DataFrame,
+        y: pd.Series,
+        random_state: int = 42
+    ) -> np.ndarray:
+        """Importancia normalizada (suma 1) de cada feature"""
+        raise NotImplementedError
+
+    def info(self) -> Dict:
+        return {
+            'nombre': self.nombre,
+            'descripcion': self.descripcion,
+            'parametros': dict(self.parametros_defecto),
+        }
+
+
+class RandomForestEngine(ModelEngine):
+    """Random Forest sobre categorías codificadas como enteros"""
+
+    nombre = 'random_forest'
+    descripcion = 'Random Forest con categorías codificadas (LabelEncoder)'
+    parametros_defecto = {
+        'n_estimators': 100,
+        'max_depth': 10,
+        'min_samples_split': 5,
+        'min_samples_leaf': 2,
+    }
+
+    def crear_modelo(self, feature_names: List[str], random_state: int = 42, **params):
+        return RandomForestClassifier(
+            **{**self.parametros_defecto, **params},
+            random_state=random_state,
+            class_weight='balanced'
+        )
+
+    def preparar_X(self, X: pd.DataFrame) -> pd.DataFrame:
+        # Categorías desconocidas como código propio
+        return X.fillna(-1)
+
+    def ampliar_modelo(self, modelo, X, y, n_adicionales, pipeline):
+        # Con warm_start, fit sólo entrena los árboles nuevos
+        modelo.set_params(warm_start=True, n_estimators=len(modelo.estimators_) + n_adicionales)
+        return self.ajustar(modelo, X, y, pipeline)
+
+    def importancias(self, modelo, X, y, random_state=42):
+        return modelo.feature_importances_
+
+
+class HistGradientBoostingEngine(ModelEngine):
+    """Gradient boosting por histogramas con soporte nativo de categóricos"""
+
+    nombre = 'hist_gradient_boosting'
+    descripcion = 'Histogram Gradient Boosting con categóricos nativos'
+    # HistGradientBoosting admite hasta max_bins (255) categorías por feature
+    max_categorias = 255
+    parametros_defecto = {
+        'max_iter': 200,
+        'learning_rate': 0.1,
+        'max_leaf_nodes': 31,
+        'min_samples_leaf': 20,
+        'l2_regularization': 0.0,
+    }
+    incremento_defecto = 50
+
+    def crear_modelo(self, feature_names: List[str], random_state: int = 42, **params):
+        categoricos = [feature.endswith('_encoded') for feature in feature_names]
+        return HistGradientBoostingClassifier(
+            **{**self.parametros_defecto, **params},
+            categorical_features=categoricos if any(categoricos) else None,
+            early_stopping='auto',
+            random_state=random_state,
+            class_weight='balanced'
+        )
+
+    def ajustar(self, modelo, X, y, pipeline):
+        # Cada fit vuelve a codificar los categóricos con las categorías
+        # presentes en X (OrdinalEncoder interno, scikit-learn >= 1.4): con un
+        # subconjunto de los datos los códigos dejarían de ser los que usan
+        # los árboles de otro fit. Una fila de peso cero por categoría del
+        # pipeline hace que la codificación interna sea siempre la identidad
+        # sobre sus códigos; sin peso, las filas no cambian el entrenamiento
+        anclas = _filas_ancla(X, pipeline)
+        if anclas.empty:
+            return modelo.fit(X, y)
+
+        y = pd.Series(np.asarray(y))
+        return modelo.fit(
+            pd.concat([X, anclas], ignore_index=True),
+            pd.concat([y, y.iloc[np.arange(len(anclas)) % len(y)]], ignore_index=True),
+            sample_weight=np.r_[np.ones(len(X)), np.zeros(len(anclas))]
+        )
+
+    def ampliar_modelo(self, modelo, X, y, n_adicionales, pipeline):
+        # Las iteraciones nuevas parten de las predicciones del modelo actual
+        previas = modelo.predict_proba(X)
+        n_previas = modelo.n_iter_
+
+        modelo.set_params(warm_start=True, max_iter=n_previas + n_adicionales)
+        self.ajustar(modelo, X, y, pipeline)
+
+        # Las iteraciones anteriores deben predecir igual que antes de ampliar
+        # (p. ej. un modelo entrenado sin filas ancla): si no, reentrenar
+        etapa = next(islice(modelo.staged_predict_proba(X), n_previas - 1, None))
+        if not np.allclose(etapa, previas):
+            raise ValueError(
+                "La codificación de categorías del modelo no coincide con la del "
+                "pipeline; reentrena el modelo completo con /ml/train"
+            )
+        return modelo
+
+    def importancias(self, modelo, X, y, random_state=42):
+        # El modelo no expone importancias; se estiman por permutación
+        resultado = permutation_importance(
+            modelo, X, y,
+            n_repeats=3,
+            max_samples=min(len(X), 5000),
+            random_state=random_state,
+        )
+        importancias = np.clip(resultado.importances_mean, 0, None)
+        total = importancias.sum()
+        if total > 0:
+            return importancias / total
+        return np.full(len(importancias), 1 / max(len(importancias), 1))
+
+
+def _filas_ancla(X: pd.DataFrame, pipeline: FeaturePipeline) -> pd.DataFrame:
+    """
+    Filas con cada código de categoría del pipeline en sus columnas
+    categóricas (NaN en las demás); tantas como categorías tiene el feature
+    con más categorías
+    """
+    n = max((len(categorias) for categorias in pipeline.categorias.values()), default=0)
+    anclas = pd.DataFrame(np.nan, index=range(n), columns=X.columns)
+    for feature, categorias in pipeline.categorias.items():
+        columna = f'{feature}_encoded'
+        if columna in anclas.columns and categorias:
+            anclas[columna] = np.arange(n) % len(categorias)
+    return anclas
+
+
+ENGINES: Dict[str, ModelEngine] = {
+    engine.nombre: engine
+    for engine in (RandomForestEngine(), HistGradientBoostingEngine())
+}
+
+
+def obtener_engine(nombre: str) -> ModelEngine:
+    """
+    Obtiene un engine por nombre
+
+    Raises:
+        ValueError: Si el engine no existe
+    """
+    if nombre not in ENGINES:
+        raise ValueError(
+            f"Engine inválido '{nombre}'. Debe ser uno de: {', '.join(ENGINES)}"
+        )
+    return ENGINES[nombre]
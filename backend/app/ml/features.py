@@ -0,0 +1,141 @@
+"""
+Pipeline de features para los modelos de riesgo de rotación
+Convierte registros de empleados en la matriz numérica que consumen los engines
+"""
+
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Optional, Union
+
+
+# Feature -> (columna origen, valor por defecto)
+FEATURES_NUMERICOS = {
+    'antiguedad_semanas': ('antiguedadSemanas', 0),
+    'salario': ('salario', 0),
+    'total_faltas': ('totalFaltas', 0),
+    'permisos': ('permisos', 0),
+    'horas_ultima_semana': ('totalHorasUltimaSemana', 0),
+}
+
+FEATURES_BOOLEANOS = {
+    'cumplio_entrenamiento': ('cumplioEntrenamiento', True),
+    'rotacion_temprana': ('rotacionTemprana', False),
+}
+
+CATEGORICAL_FEATURES = ['area', 'supervisor', 'puesto', 'turno', 'clase']
+
+
+class FeaturePipeline:
+    """
+    Transforma registros de empleados en features para el modelo
+
+    Las categorías se codifican como enteros ordenados alfabéticamente
+    (equivalente a LabelEncoder). Valores no vistos en entrenamiento o
+    fuera de las `max_categorias` más frecuentes quedan como NaN, para que
+    cada engine decida cómo tratarlos.
+    """
+
+    def __init__(
+        self,
+        max_categorias: Optional[int] = None,
+        incluir_derivadas: bool = False
+    ):
+        self.max_categorias = max_categorias
+        self.incluir_derivadas = incluir_derivadas
+        self.categorias: Dict[str, List[str]] = {}
+        self.feature_names: List[str] = []
+
+    @property
+    def ajustado(self) -> bool:
+        return bool(self.feature_names)
+
+    @property
+    def features_categoricos(self) -> List[str]:
+        """Nombres de las columnas codificadas a partir de categorías"""
+        return [f'{feature}_encoded' for feature in self.categorias]
+
+    def fit(self, data: Union[List[Dict], pd.DataFrame]) -> 'FeaturePipeline':
+        """
+        Aprende las categorías de cada feature categórico
+
+        Args:
+            data: Registros de empleados (lista o DataFrame)
+
+        Returns:
+            El propio pipeline ajustado
+        """
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+
+        self.categorias = {}
+        for feature in CATEGORICAL_FEATURES:
+            if feature not in df.columns:
+                continue
+
+            conteo = df[feature].dropna().astype(str).value_counts()
+            if self.max_categorias is not None:
+                conteo = conteo.iloc[:self.max_categorias]
+
+            self.categorias[feature] = sorted(conteo.index.tolist())
+
+        self.feature_names = self._transformar(df).columns.tolist()
+        return self
+
+    def transform(self, data: Union[List[Dict], pd.DataFrame]) -> pd.DataFrame:
+        """
+        Construye la matriz de features con las categorías aprendidas
+
+        Args:
+            data: Registros de empleados (lista o DataFrame)
+
+        Returns:
+            DataFrame con las columnas en el orden de `feature_names`
+        """
+        if not self.ajustado:
+            raise ValueError("El pipeline de features no ha sido ajustado")
+
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        return self._transformar(df)[self.feature_names]
+
+    def fit_transform(self, data: Union[List[Dict], pd.DataFrame]) -> pd.DataFrame:
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        return self.fit(df).transform(df)
+
+    def _transformar(self, df: pd.DataFrame) -> pd.DataFrame:
+        features_df = pd.DataFrame(index=df.index)
+
+        # Features numéricos directos
+        for feature, (columna, default) in FEATURES_NUMERICOS.items():
+            features_df[feature] = self._columna_numerica(df, columna, default)
+
+        # Booleanos a int
+        for feature, (columna, default) in FEATURES_BOOLEANOS.items():
+            if columna in df.columns:
+                features_df[feature] = df[columna].fillna(default).astype(bool).astype(int)
+            else:
+                features_df[feature] = int(default)
+
+        # Features categóricos - códigos enteros, NaN para desconocidos
+        for feature, categorias in self.categorias.items():
+            if feature in df.columns:
+                codigos = pd.Categorical(
+                    df[feature].astype(str).where(df[feature].notna()),
+                    categories=categorias
+                ).codes.astype(float)
+                codigos[codigos < 0] = np.nan
+            else:
+                codigos = np.full(len(df), np.nan)
+            features_df[f'{feature}_encoded'] = codigos
+
+        # Features derivados
+        if self.incluir_derivadas:
+            semanas = features_df['antiguedad_semanas'] + 1
+            features_df['salario_por_semana'] = features_df['salario'] / semanas
+            features_df['faltas_por_semana'] = features_df['total_faltas'] / semanas
+
+        return features_df
+
+    @staticmethod
+    def _columna_numerica(df: pd.DataFrame, columna: str, default: float) -> pd.Series:
+        if columna not in df.columns:
+            return pd.Series(default, index=df.index, dtype=float)
+        return pd.to_numeric(df[columna], errors='coerce').fillna(default)
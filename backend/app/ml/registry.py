@@ -0,0 +1,259 @@
+"""
+Registro local de modelos versionados
+Persiste modelo, pipeline de features, métricas y huella de los datos de entrenamiento
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Dict, Optional
+
+import joblib
+import pandas as pd
+
+
+ARCHIVO_MODELO = 'modelo.joblib'
+ARCHIVO_METADATA = 'metadata.json'
+ARCHIVO_ACTIVO = 'ACTIVO.json'
+ARCHIVO_BLOQUEO = '.lock'
+
+
+def huella_dataframe(df: pd.DataFrame) -> str:
+    """Hash SHA-256 del contenido de un DataFrame (independiente del índice)"""
+    hashes = pd.util.hash_pandas_object(df.astype(str), index=False).to_numpy()
+    columnas = '|'.join(map(str, df.columns)).encode()
+    return hashlib.sha256(columnas + hashes.tobytes()).hexdigest()
+
+
+class ModelRegistry:
+    """
+    Registro de modelos en disco
+
+    Estructura:
+        {directorio}/versiones/v0001/modelo.joblib
+        {directorio}/versiones/v0001/metadata.json
+        {directorio}/ACTIVO.json   -> versión activa e historial de promociones
+        {directorio}/.lock         -> bloqueo de ACTIVO.json y de la depuración
+
+    Las versiones se escriben en un directorio temporal y se publican con un
+    rename atómico, por lo que varios workers pueden registrar a la vez.
+    Activar, hacer rollback y depurar leen y reescriben ACTIVO.json bajo un
+    bloqueo de archivo entre procesos; una versión que otro worker está
+    cargando (bloqueo compartido en su `.lock`) no se depura.
+
+    Los artefactos se cargan con memory-map: los arreglos numpy que joblib
+    guarda aparte (p. ej. los nodos de los predictores de
+    HistGradientBoosting) quedan mapeados y se comparten entre procesos vía
+    el page cache. Los árboles de Random Forest no: Tree.__setstate__ de
+    scikit-learn copia sus nodos a memoria de cada worker.
+    """
+
+    def __init__(self, directorio: str, max_versiones: int = 20, mmap: bool = True):
+        self.directorio = directorio
+        self.directorio_versiones = os.path.join(directorio, 'versiones')
+        self.max_versiones = max_versiones
+        self.mmap = mmap
+        self._activo_cache = (None, None)  # ((inode, mtime_ns), contenido)
+        os.makedirs(self.directorio_versiones, exist_ok=True)
+
+    def registrar(self, artefactos: Dict, metadata: Dict, activar: bool = True) -> str:
+        """
+        Guarda una nueva versión del modelo
+
+        Args:
+            artefactos: Objetos a persistir (modelo, pipeline, etc.)
+            metadata: Información serializable a JSON (métricas, engine, huella)
+            activar: Si la nueva versión pasa a ser la activa
+
+        Returns:
+            Identificador de la versión creada
+        """
+        temporal = os.path.join(self.directorio, f'.tmp-{uuid.uuid4().hex}')
+        os.makedirs(temporal)
+
+        try:
+            joblib.dump(artefactos, os.path.join(temporal, ARCHIVO_MODELO))
+
+            while True:
+                version = self._siguiente_version()
+                metadata = {
+                    **metadata,
+                    'version': version,
+                    'fecha_registro': datetime.now().isoformat(),
+                }
+                with open(os.path.join(temporal, ARCHIVO_METADATA), 'w', encoding='utf-8') as f:
+                    json.dump(metadata, f, ensure_ascii=False, default=str)
+
+                try:
+                    os.rename(temporal, os.path.join(self.directorio_versiones, version))
+                    break
+                except OSError:
+                    # Otro worker publicó la misma versión; se toma la siguiente
+                    if not os.path.isdir(os.path.join(self.directorio_versiones, version)):
+                        raise
+        except Exception:
+            shutil.rmtree(temporal, ignore_errors=True)
+            raise
+
+        with self._bloqueo(self.directorio):
+            if activar:
+                self._activar(version)
+            self._depurar()
+        return version
+
+    def cargar(self, version: str) -> Dict:
+        """
+        Carga los artefactos de una versión (con memory-map si está habilitado)
+
+        Mientras carga, la versión tiene un bloqueo compartido y otro worker
+        no la depura.
+
+        Raises:
+            ValueError: Si la versión no existe (o se depuró mientras se esperaba)
+        """
+        ruta = self._ruta_version(version)
+        try:
+            with self._bloqueo(ruta, compartido=True):
+                return joblib.load(
+                    os.path.join(self._ruta_version(version), ARCHIVO_MODELO),
+                    mmap_mode='r' if self.mmap else None
+                )
+        except FileNotFoundError:
+            raise ValueError(f"La versión '{version}' no existe en el registro")
+
+    def metadata(self, version: str) -> Dict:
+        with open(os.path.join(self._ruta_version(version), ARCHIVO_METADATA), encoding='utf-8') as f:
+            return json.load(f)
+
+    def listar(self) -> List[Dict]:
+        """Metadata de todas las versiones, de la más reciente a la más antigua"""
+        activa = self.version_activa()
+        versiones = []
+
+        for version in sorted(self._versiones(), reverse=True):
+            try:
+                metadata = self.metadata(version)
+            except (OSError, ValueError):
+                continue
+            metadata['activo'] = version == activa
+            versiones.append(metadata)
+
+        return versiones
+
+    def version_activa(self) -> Optional[str]:
+        return self._leer_activo().get('version')
+
+    def activar(self, version: str) -> None:
+        """Promueve una versión; la anterior queda en el historial para rollback"""
+        with self._bloqueo(self.directorio):
+            self._activar(version)
+
+    def _activar(self, version: str) -> None:
+        self._ruta_version(version)
+
+        activo = self._leer_activo()
+        historial = activo.get('historial', [])
+        if activo.get('version') and activo['version'] != version:
+            historial = historial + [activo['version']]
+
+        self._escribir_activo({'version': version, 'historial': historial[-self.max_versiones:]})
+
+    def rollback(self) -> str:
+        """
+        Vuelve a la versión activa anterior
+
+        Raises:
+            ValueError: Si no hay versiones previas en el historial
+        """
+        with self._bloqueo(self.directorio):
+            activo = self._leer_activo()
+            historial = [v for v in activo.get('historial', []) if v in self._versiones()]
+
+            if not historial:
+                raise ValueError("No hay una versión anterior a la cual regresar")
+
+            version = historial.pop()
+            self._escribir_activo({'version': version, 'historial': historial})
+        return version
+
+    def _ruta_version(self, version: str) -> str:
+        ruta = os.path.join(self.directorio_versiones, os.path.basename(version))
+        if not os.path.isdir(ruta):
+            raise ValueError(f"La versión '{version}' no existe en el registro")
+        return ruta
+
+    def _versiones(self) -> List[str]:
+        return [
+            nombre for nombre in os.listdir(self.directorio_versiones)
+            if nombre.startswith('v') and nombre[1:].isdigit()
+        ]
+
+    def _siguiente_version(self) -> str:
+        numeros = [int(v[1:]) for v in self._versiones()]
+        return f'v{max(numeros, default=0) + 1:04d}'
+
+    def _leer_activo(self) -> Dict:
+        ruta = os.path.join(self.directorio, ARCHIVO_ACTIVO)
+        try:
+            estado = os.stat(ruta)
+        except FileNotFoundError:
+            return {}
+
+        # Sólo se relee cuando otro proceso reemplazó el archivo
+        clave = (estado.st_ino, estado.st_mtime_ns)
+        if self._activo_cache[0] != clave:
+            with open(ruta, encoding='utf-8') as f:
+                self._activo_cache = (clave, json.load(f))
+        return self._activo_cache[1]
+
+    def _escribir_activo(self, contenido: Dict) -> None:
+        ruta = os.path.join(self.directorio, ARCHIVO_ACTIVO)
+        temporal = f'{ruta}.{uuid.uuid4().hex}'
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(contenido, f)
+        os.replace(temporal, ruta)
+
+    def _depurar(self) -> None:
+        """
+        Elimina las versiones más antiguas que no estén activas, en el
+        historial ni cargándose en otro worker (con el bloqueo del registro)
+        """
+        activo = self._leer_activo()
+        protegidas = {activo.get('version'), *activo.get('historial', [])}
+        sobrantes = sorted(self._versiones())[:-self.max_versiones]
+
+        for version in sobrantes:
+            if version in protegidas:
+                continue
+            ruta = os.path.join(self.directorio_versiones, version)
+            try:
+                with self._bloqueo(ruta, esperar=False):
+                    shutil.rmtree(ruta, ignore_errors=True)
+            except (BlockingIOError, FileNotFoundError):
+                # Se está cargando (se depura la próxima vez) o ya se eliminó
+                continue
+
+    @staticmethod
+    @contextmanager
+    def _bloqueo(directorio: str, compartido: bool = False, esperar: bool = True):
+        """
+        flock sobre {directorio}/.lock entre procesos
+
+        Raises:
+            BlockingIOError: Con esperar=False, si otro proceso tiene el bloqueo
+        """
+        modo = fcntl.LOCK_SH if compartido else fcntl.LOCK_EX
+        if not esperar:
+            modo |= fcntl.LOCK_NB
+
+        with open(os.path.join(directorio, ARCHIVO_BLOQUEO), 'a') as archivo:
+            fcntl.flock(archivo, modo)
+            try:
+                yield
+            finally:
+                fcntl.flock(archivo, fcntl.LOCK_UN)
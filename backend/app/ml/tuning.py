@@ -0,0 +1,256 @@
+"""
+Búsqueda de hiperparámetros con successive halving
+Evalúa configuraciones en un pool de procesos con presupuesto de tiempo
+"""
+
+import math
+import os
+import random
+import time
+import multiprocessing
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import train_test_split
+
+from app.ml.engines import obtener_engine
+
+
+# Espacio de búsqueda por engine: parámetro -> valores candidatos
+ESPACIOS_BUSQUEDA = {
+    'random_forest': {
+        'n_estimators': [50, 100, 200, 300],
+        'max_depth': [6, 10, 14, 20, None],
+        'min_samples_split': [2, 5, 10, 20],
+        'min_samples_leaf': [1, 2, 5, 10],
+        'max_features': ['sqrt', 0.5, 1.0],
+    },
+    'hist_gradient_boosting': {
+        'max_iter': [100, 200, 400],
+        'learning_rate': [0.03, 0.05, 0.1, 0.2],
+        'max_leaf_nodes': [15, 31, 63],
+        'min_samples_leaf': [10, 20, 50, 100],
+        'l2_regularization': [0.0, 0.1, 1.0],
+    },
+}
+
+# Parámetros del pipeline de features incluidos en la búsqueda
+ESPACIO_PIPELINE = {
+    'max_categorias': [None, 100, 30],
+    'incluir_derivadas': [False, True],
+}
+
+MIN_REGISTROS_RONDA = 100
+
+# Estado de cada proceso del pool (se carga una sola vez por worker)
+_datos_worker: Dict = {}
+
+
+def _inicializar_worker(df: pd.DataFrame, y: np.ndarray, idx_train: np.ndarray, idx_val: np.ndarray):
+    """Recibe los datos una sola vez por proceso en lugar de en cada tarea"""
+    from threadpoolctl import threadpool_limits
+
+    # Un hilo por proceso: el paralelismo lo da el pool
+    threadpool_limits(1)
+    _datos_worker.update(df=df, y=y, idx_train=idx_train, idx_val=idx_val)
+
+
+def _evaluar_tarea(tarea: Tuple) -> Tuple[int, Optional[float], Optional[str]]:
+    """Evalúa una configuración capturando errores para no detener la ronda"""
+    indice, engine, configuracion, n_registros, random_state = tarea
+    try:
+        return indice, _evaluar_configuracion(engine, configuracion, n_registros, random_state), None
+    except Exception as e:
+        return indice, None, str(e)
+
+
+def _evaluar_configuracion(engine: str, configuracion: Dict, n_registros: int, random_state: int) -> float:
+    """Entrena una configuración con los primeros `n_registros` de train y retorna el AUC de validación"""
+    df, y = _datos_worker['df'], _datos_worker['y']
+    idx_train = _datos_worker['idx_train'][:n_registros]
+    idx_val = _datos_worker['idx_val']
+
+    model_engine = obtener_engine(engine)
+    pipeline = model_engine.crear_pipeline(**configuracion['pipeline'])
+
+    X_train = model_engine.preparar_X(pipeline.fit_transform(df.iloc[idx_train]))
+    X_val = model_engine.preparar_X(pipeline.transform(df.iloc[idx_val]))
+
+    model = model_engine.crear_modelo(
+        pipeline.feature_names, random_state=random_state, **configuracion['modelo']
+    )
+    model_engine.ajustar(model, X_train, y[idx_train], pipeline)
+
+    try:
+        return float(roc_auc_score(y[idx_val], model.predict_proba(X_val)[:, 1]))
+    except ValueError:
+        return float(model.score(X_val, y[idx_val]))
+
+
+def _muestrear_configuraciones(engine: str, n: int, rng: random.Random) -> List[Dict]:
+    """Configuraciones aleatorias únicas del espacio de búsqueda"""
+    espacio = ESPACIOS_BUSQUEDA[engine]
+    total_posibles = math.prod(len(v) for v in espacio.values()) * math.prod(
+        len(v) for v in ESPACIO_PIPELINE.values()
+    )
+
+    configuraciones, vistas = [], set()
+    while len(configuraciones) < min(n, total_posibles):
+        configuracion = {
+            'modelo': {param: rng.choice(valores) for param, valores in espacio.items()},
+            'pipeline': {param: rng.choice(valores) for param, valores in ESPACIO_PIPELINE.items()},
+        }
+        clave = repr(configuracion)
+        if clave not in vistas:
+            vistas.add(clave)
+            configuraciones.append(configuracion)
+
+    return configuraciones
+
+
+def buscar_hiperparametros(
+    data: List[Dict],
+    engine: str,
+    presupuesto_s: float = 300,
+    n_configuraciones: int = 27,
+    eta: int = 3,
+    n_workers: Optional[int] = None,
+    random_state: int = 42
+) -> Dict:
+    """
+    Successive halving sobre parámetros del modelo y del pipeline de features
+
+    Cada ronda entrena las configuraciones vivas con `eta` veces más registros
+    que la anterior y conserva sólo la mejor fracción 1/eta. La búsqueda se
+    detiene al agotar el presupuesto de tiempo y devuelve la mejor
+    configuración evaluada con más registros.
+
+    Args:
+        data: Lista de registros de empleados con rotación
+        engine: Engine de ML a optimizar
+        presupuesto_s: Tiempo máximo de reloj en segundos
+        n_configuraciones: Configuraciones iniciales a evaluar
+        eta: Factor de reducción entre rondas
+        n_workers: Procesos del pool (por defecto, núcleos disponibles)
+        random_state: Seed para reproducibilidad
+
+    Returns:
+        Diccionario con la mejor configuración y el detalle de cada ronda
+    """
+    if len(data) < 10:
+        raise ValueError("Se requieren al menos 10 registros para entrenar el modelo")
+    if engine not in ESPACIOS_BUSQUEDA:
+        obtener_engine(engine)
+        raise ValueError(f"El engine '{engine}' no tiene espacio de búsqueda definido")
+    if eta < 2:
+        raise ValueError("eta debe ser al menos 2")
+
+    inicio = time.perf_counter()
+    limite = inicio + presupuesto_s
+    rng = random.Random(random_state)
+
+    df = pd.DataFrame(data)
+    y = (df.get('tipoBajaNormalizado', 'RV') == 'RV').astype(int).to_numpy()
+
+    idx_train, idx_val = train_test_split(
+        np.arange(len(df)), test_size=0.2, random_state=random_state, stratify=y
+    )
+    # Orden aleatorio fijo: cada ronda usa un prefijo más largo del mismo train
+    idx_train = np.random.RandomState(random_state).permutation(idx_train)
+
+    configuraciones = _muestrear_configuraciones(engine, n_configuraciones, rng)
+    n_rondas = 1
+    while eta ** n_rondas <= len(configuraciones):
+        n_rondas += 1
+
+    vivas = list(range(len(configuraciones)))
+    puntajes: Dict[int, float] = {}
+    mejor_por_recurso: Dict[int, int] = {}
+    rondas = []
+    presupuesto_agotado = False
+
+    n_workers = n_workers or os.cpu_count() or 1
+    contexto = multiprocessing.get_context('spawn')
+
+    pool = contexto.Pool(
+        processes=min(n_workers, len(configuraciones)),
+        initializer=_inicializar_worker,
+        initargs=(df, y, idx_train, idx_val)
+    )
+
+    try:
+        for ronda in range(n_rondas):
+            n_registros = len(idx_train) // (eta ** (n_rondas - 1 - ronda))
+            n_registros = min(len(idx_train), max(n_registros, MIN_REGISTROS_RONDA))
+            inicio_ronda = time.perf_counter()
+
+            tareas = [(i, engine, configuraciones[i], n_registros, random_state) for i in vivas]
+            en_curso = pool.imap_unordered(_evaluar_tarea, tareas)
+            resultados_ronda: Dict[int, float] = {}
+
+            for _ in tareas:
+                restante = limite - time.perf_counter()
+                if restante <= 0:
+                    presupuesto_agotado = True
+                    break
+                try:
+                    indice, puntaje, error = en_curso.next(timeout=restante)
+                except multiprocessing.TimeoutError:
+                    presupuesto_agotado = True
+                    break
+
+                if error is not None:
+                    print(f"Error evaluando configuración {indice}: {error}")
+                else:
+                    resultados_ronda[indice] = puntaje
+
+            if resultados_ronda:
+                puntajes.update(resultados_ronda)
+                mejor = max(resultados_ronda, key=resultados_ronda.get)
+                mejor_por_recurso[n_registros] = mejor
+                rondas.append({
+                    'ronda': ronda + 1,
+                    'n_configuraciones': len(vivas),
+                    'n_evaluadas': len(resultados_ronda),
+                    'n_registros': n_registros,
+                    'mejor_auc': round(resultados_ronda[mejor], 4),
+                    'tiempo_s': round(time.perf_counter() - inicio_ronda, 2),
+                })
+
+            if presupuesto_agotado or ronda == n_rondas - 1:
+                break
+
+            # Conservar la mejor fracción 1/eta
+            ordenadas = sorted(resultados_ronda, key=resultados_ronda.get, reverse=True)
+            vivas = ordenadas[:max(1, len(vivas) // eta)]
+
+            # La siguiente ronda tarda aproximadamente lo mismo que ésta
+            if time.perf_counter() + (time.perf_counter() - inicio_ronda) > limite:
+                presupuesto_agotado = True
+                break
+    finally:
+        # Las configuraciones que siguen corriendo se descartan
+        if presupuesto_agotado:
+            pool.terminate()
+        else:
+            pool.close()
+        pool.join()
+
+    if not mejor_por_recurso:
+        raise ValueError("El presupuesto de tiempo no alcanzó para evaluar ninguna configuración")
+
+    recurso_max = max(mejor_por_recurso)
+    mejor = mejor_por_recurso[recurso_max]
+
+    return {
+        'engine': engine,
+        'parametros_modelo': configuraciones[mejor]['modelo'],
+        'parametros_pipeline': configuraciones[mejor]['pipeline'],
+        'mejor_auc': round(puntajes[mejor], 4),
+        'rondas': rondas,
+        'configuraciones_evaluadas': len(puntajes),
+        'presupuesto_agotado': presupuesto_agotado,
+        'tiempo_total_s': round(time.perf_counter() - inicio, 2),
+    }
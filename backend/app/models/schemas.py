@@ -3,7 +3,7 @@ Schemas para request/response
 """
 
 from datetime import date
-from typing import List, Optional
+from typing import List, Optional, Union
 from pydantic import BaseModel, Field
 
 
@@ -43,6 +43,7 @@ class PatronRotacion(BaseModel):
     porcentaje_acumulado: float = Field(..., ge=0, le=100)
     impacto_80_20: bool
     indice_rotacion: float
+    agrupadas: Optional[int] = None  # Categorías sumadas en el patrón "Otros"
 
 
 class AnalisisParetoResponse(BaseModel):
@@ -51,6 +52,7 @@ class AnalisisParetoResponse(BaseModel):
     patrones: List[PatronRotacion]
     concentracion_80: List[PatronRotacion]
     total_rotaciones: int
+    total_categorias: Optional[int] = None
     fecha_analisis: str
 
 
@@ -69,6 +71,7 @@ class DistribucionCategoria(BaseModel):
     categoria: str
     total: int
     porcentaje: float
+    agrupadas: Optional[int] = None  # Categorías sumadas en la entrada "Otros"
 
 
 class TendenciaRotacion(BaseModel):
@@ -145,6 +148,23 @@ class PrediccionRiesgo(BaseModel):
     confianza: float = Field(..., ge=0, le=100)
 
 
+class GrupoRiesgo(BaseModel):
+    """Empleados de mayor riesgo de un supervisor/área"""
+    grupo: str
+    total_empleados: int
+    top: List[PrediccionRiesgo]
+
+
+class RankingRiesgo(BaseModel):
+    """Los k empleados de mayor riesgo, en total y por grupo"""
+    version: Optional[str] = None
+    total_empleados: int
+    k: int
+    agrupar_por: Optional[str] = None
+    top: List[PrediccionRiesgo]
+    grupos: List[GrupoRiesgo] = []
+
+
 class FeatureImportance(BaseModel):
     """Importancia de una feature en el modelo"""
     feature: str
@@ -163,6 +183,11 @@ class ModelMetrics(BaseModel):
     test_size: int
     auc_roc: Optional[float] = None
     feature_importance: dict
+    engine: Optional[str] = None
+    tiempo_entrenamiento_s: Optional[float] = None
+    tamano_modelo_kb: Optional[float] = None
+    actualizaciones_incrementales: Optional[int] = None
+    registros_incrementales: Optional[int] = None
 
 
 class MLTrainingResponse(BaseModel):
@@ -172,3 +197,268 @@ class MLTrainingResponse(BaseModel):
     metricas: ModelMetrics
     top_features: List[FeatureImportance]
     fecha_entrenamiento: str
+
+
+class EngineInfo(BaseModel):
+    """Engine de ML disponible"""
+    nombre: str
+    descripcion: str
+    parametros: dict
+
+
+class ComparacionEngine(BaseModel):
+    """Resultado de un engine en la comparación"""
+    engine: str
+    tiempo_entrenamiento_s: float
+    memoria_pico_mb: float
+    tamano_modelo_kb: float
+    accuracy: float
+    auc_roc: Optional[float] = None
+
+
+class ComparacionEnginesResponse(BaseModel):
+    """Comparación de engines sobre el mismo conjunto de datos"""
+    n_samples: int
+    resultados: List[ComparacionEngine]
+    mejor_engine: Optional[str] = None
+
+
+class RondaHalving(BaseModel):
+    """Resultado de una ronda de successive halving"""
+    ronda: int
+    n_configuraciones: int
+    n_evaluadas: int
+    n_registros: int
+    mejor_auc: float
+    tiempo_s: float
+
+
+class TuningResponse(BaseModel):
+    """Resultado de la búsqueda de hiperparámetros"""
+    success: bool
+    message: str
+    engine: str
+    parametros_modelo: dict
+    parametros_pipeline: dict
+    mejor_auc: float
+    rondas: List[RondaHalving]
+    configuraciones_evaluadas: int
+    presupuesto_agotado: bool
+    tiempo_total_s: float
+    metricas: ModelMetrics
+
+
+class MonitoreoReentrenamiento(BaseModel):
+    """Indicadores para decidir si conviene un reentrenamiento completo"""
+    registros_nuevos: int
+    registros_incrementales_acumulados: int
+    proporcion_incremental: float
+    auc_referencia: Optional[float] = None
+    auc_nuevos_registros: Optional[float] = None
+    tasa_categorias_desconocidas: float
+    requiere_reentrenamiento: bool
+    motivos: List[str]
+
+
+class IncrementalTrainingResponse(BaseModel):
+    """Respuesta de la actualización incremental del modelo"""
+    success: bool
+    message: str
+    metricas: ModelMetrics
+    monitoreo: MonitoreoReentrenamiento
+    fecha_entrenamiento: str
+
+
+class ModelVersion(BaseModel):
+    """Versión registrada del modelo"""
+    version: str
+    engine: str
+    origen: str  # 'train', 'tune' o 'incremental'
+    version_base: Optional[str] = None
+    fecha_registro: str
+    huella_datos: str
+    metricas: ModelMetrics
+    activo: bool = False
+
+
+class DatasetInfo(BaseModel):
+    """Dataset registrado para referenciarlo por id en los análisis"""
+    dataset_id: str
+    n_registros: int
+    columnas: List[str]
+    fecha_registro: str
+    dataset_base: Optional[str] = None
+    agregados: Optional[dict] = None
+
+
+class DatasetDelta(BaseModel):
+    """Cambio en los agregados al agregar registros a un dataset"""
+    dataset_id: str
+    dataset_base: str
+    registros_nuevos: int
+    totales: dict
+    cambios: dict  # conteos de los registros nuevos por tipo de baja, área y supervisor
+
+
+class DatasetAppendResponse(BaseModel):
+    """Respuesta al agregar registros a un dataset"""
+    dataset: DatasetInfo
+    delta: DatasetDelta
+
+
+class CacheStats(BaseModel):
+    """Estadísticas del caché de resultados de un proceso del servidor"""
+    entradas: int
+    bytes: int
+    max_entradas: int
+    max_bytes: int
+    ttl_s: float
+    disco: bool
+    hits_memoria: int
+    hits_disco: int
+    misses: int
+    expulsiones: int
+    expiraciones: int
+    tasa_aciertos: float
+
+
+class PerfilInfo(BaseModel):
+    """Resumen de un reporte de perfilado de un request"""
+    id: str
+    fecha: str
+    metodo: str
+    ruta: str
+    estado: int
+    duracion_ms: float
+
+
+class JobInfo(BaseModel):
+    """Estado de un job en segundo plano"""
+    job_id: str
+    tipo: str  # 'train', 'predict_batch' o 'analyze'
+    estado: str  # 'pendiente', 'en_ejecucion', 'completado', 'error' o 'cancelado'
+    progreso: float = Field(..., ge=0, le=1)
+    mensaje: Optional[str] = None
+    error: Optional[str] = None
+    fecha_creacion: str
+    fecha_inicio: Optional[str] = None
+    fecha_fin: Optional[str] = None
+
+
+class JobResultado(BaseModel):
+    """Resultado de un job completado"""
+    job_id: str
+    tipo: str
+    resultado: Union[dict, list]
+
+
+class BajaHistorial(BaseModel):
+    """Baja de un empleado en el historial longitudinal"""
+    numero_empleado: str
+    fecha_baja: str
+    fecha_alta: Optional[str] = None
+    area: Optional[str] = None
+    supervisor: Optional[str] = None
+    puesto: Optional[str] = None
+    tipo_baja: Optional[str] = None
+    antiguedad_semanas: Optional[float] = None
+    salario: Optional[float] = None
+    rotacion_temprana: Optional[bool] = None
+    lote: Optional[str] = None  # dataset del que proviene la última versión
+    fecha_carga: str
+    registro: Optional[dict] = None  # registro completo (en el historial de un empleado)
+
+
+class HistorialEmpleado(BaseModel):
+    """Trayectoria de un empleado: todas sus bajas, de la más antigua a la más reciente"""
+    numero_empleado: str
+    total_bajas: int
+    reingresos: int
+    bajas: List[BajaHistorial]
+
+
+class CargaHistorialResponse(BaseModel):
+    """Resultado de cargar un lote de bajas al historial"""
+    recibidos: int
+    nuevos: int
+    actualizados: int
+    sin_cambios: int
+    duplicados: int  # repetidos dentro del mismo lote
+    descartados: int  # sin número de empleado o fecha de baja válida
+    total_historial: int
+
+
+class ReingresosPorArea(BaseModel):
+    """Reingresos según el área de la baja anterior"""
+    area: str
+    bajas: int
+    reingresos: int
+    tasa_reingreso: float  # reingresos por cada 100 bajas del área
+
+
+class EmpleadoReingresos(BaseModel):
+    """Empleado con varias bajas en el historial"""
+    numero_empleado: str
+    total_bajas: int
+    primera_baja: str
+    ultima_baja: str
+    areas: List[str]
+
+
+class AnalisisReingresos(BaseModel):
+    """Reingresos (bajas de empleados recontratados) en todo el historial"""
+    total_bajas: int
+    total_empleados: int
+    empleados_con_reingreso: int
+    tasa_reingreso: float  # % de empleados con más de una baja
+    total_reingresos: int
+    dias_fuera_mediana: Optional[float] = None  # de la baja anterior a la recontratación
+    dias_fuera_promedio: Optional[float] = None
+    reingresos_tras_bxf: int
+    reingresos_misma_area: int
+    reingresos_mismo_supervisor: int
+    reingresos_con_rotacion_temprana: int
+    por_area: List[ReingresosPorArea]
+    empleados_frecuentes: List[EmpleadoReingresos]
+
+
+class TemaEncuesta(BaseModel):
+    """Tema de la encuesta de salida: términos y respuestas que lo representan"""
+    tema: int
+    terminos: List[str]
+    ejemplos: List[str]  # respuestas más frecuentes del tema
+    respuestas: int
+    porcentaje: float  # % de las respuestas con contenido
+
+
+class TemasPorCategoria(BaseModel):
+    """Respuestas de cada tema en un área o supervisor"""
+    categoria: str
+    total: int
+    conteos: List[int]  # conteos[i] = respuestas del tema i
+    tema_predominante: int
+
+
+class AnalisisEncuestas(BaseModel):
+    """Temas de las respuestas de la encuesta de salida 4FRH-209"""
+    total_registros: int
+    total_respuestas: int
+    sin_respuesta: int  # vacías o sin términos ("N/A", "ninguno")
+    respuestas_distintas: int
+    n_temas: int
+    version_modelo: Optional[str] = None
+    respuestas_modelo: int  # respuestas aprendidas por el modelo en total
+    respuestas_aprendidas: int  # aprendidas en este análisis
+    temas: List[TemaEncuesta]
+    por_area: List[TemasPorCategoria]
+    por_supervisor: List[TemasPorCategoria]
+
+
+class ModeloEncuestasInfo(BaseModel):
+    """Estado del modelo de temas de la encuesta de salida"""
+    entrenado: bool
+    version: Optional[str] = None
+    n_temas: Optional[int] = None
+    respuestas: int = 0
+    lotes: int = 0  # datasets aprendidos
+    actualizado: Optional[str] = None
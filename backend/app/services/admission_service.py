@@ -0,0 +1,172 @@
+"""
+Control de admisión de operaciones pesadas
+Cada worker tiene un presupuesto de memoria y un máximo de operaciones
+pesadas simultáneas (análisis, Pareto, entrenamiento, predicción masiva).
+Una operación reserva su costo estimado antes de leer el cuerpo del request;
+si no cabe espera hasta `espera_s` a que se libere espacio y, si sigue sin
+caber, se rechaza con un código y un Retry-After en lugar de competir por
+memoria con las demás hasta que el sistema mate el proceso.
+"""
+
+import asyncio
+import math
+import time
+from functools import lru_cache
+from typing import Dict, Optional
+
+from app.config.settings import get_settings
+
+# KB por registro que ocupa cada tipo de operación mientras está en curso:
+# los registros decodificados, el DataFrame y los intermedios del cálculo
+# (medidos con benchmarks.suite)
+KB_POR_REGISTRO = {
+    'ingesta': 3.0,
+    'pareto': 2.0,
+    'analisis': 3.0,
+    'entrenamiento': 4.0,
+    'prediccion': 8.0,
+    # Los datos de entrada; las filas exportadas se escriben por bloques
+    'exportacion': 2.0,
+}
+
+# Bytes por registro en el cuerpo según el Content-Type, para estimar cuántos
+# registros trae un request antes de leerlo (por lo bajo: sobreestima)
+BYTES_POR_REGISTRO = {
+    'json': 300,
+    'arrow': 150,
+    'parquet': 30,
+}
+
+
+class SobrecargaError(Exception):
+    """La operación no cabe en el presupuesto del worker"""
+
+    def __init__(self, mensaje: str, codigo: int, retry_after_s: int):
+        super().__init__(mensaje)
+        self.codigo = codigo
+        self.retry_after_s = retry_after_s
+
+
+def registros_en_cuerpo(longitud: Optional[int], content_type: Optional[str], maximo: int) -> int:
+    """
+    Registros estimados de un cuerpo a partir de su Content-Length
+
+    Args:
+        longitud: Bytes del cuerpo (None si se envía por partes)
+        content_type: Cabecera Content-Type
+        maximo: MAX_RECORDS; un cuerpo con más registros se rechaza al decodificarlo
+
+    Returns:
+        Número de registros estimado, como máximo `maximo`
+    """
+    if longitud is None:
+        return maximo
+
+    tipo = (content_type or 'json').lower()
+    formato = 'parquet' if 'parquet' in tipo else 'arrow' if 'arrow' in tipo else 'json'
+    return min(maximo, math.ceil(longitud / BYTES_POR_REGISTRO[formato]))
+
+
+def costo_mb(operacion: str, registros: int) -> float:
+    """Memoria estimada de una operación con `registros` registros"""
+    return KB_POR_REGISTRO[operacion] * registros / 1024
+
+
+class ControlAdmision:
+    """
+    Presupuesto de memoria y de operaciones simultáneas de un worker
+
+    Una operación más grande que todo el presupuesto se admite sólo cuando
+    no hay otra en curso, para que nunca quede rechazada para siempre.
+    """
+
+    def __init__(
+        self,
+        memoria_mb: float = 1024,
+        max_operaciones: int = 4,
+        espera_s: float = 2.0,
+        retry_after_s: int = 5
+    ):
+        self.memoria_mb = memoria_mb
+        self.max_operaciones = max_operaciones
+        self.espera_s = espera_s
+        self.retry_after_s = retry_after_s
+        self._reservado_mb = 0.0
+        self._operaciones = 0
+        self._condicion: Optional[asyncio.Condition] = None
+        self._estadisticas = {'admitidas': 0, 'rechazos_memoria': 0, 'rechazos_operaciones': 0}
+
+    async def admitir(self, costo: float) -> None:
+        """
+        Reserva `costo` MB para una operación; liberar() los devuelve
+
+        Raises:
+            SobrecargaError: 429 si ya hay `max_operaciones` en curso, 503 si
+                no queda memoria; ambos tras esperar `espera_s`
+        """
+        if self._condicion is None:
+            self._condicion = asyncio.Condition()
+
+        limite = time.monotonic() + self.espera_s
+        async with self._condicion:
+            while not self._cabe(costo):
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    raise self._rechazo(costo)
+                try:
+                    await asyncio.wait_for(self._condicion.wait(), restante)
+                except asyncio.TimeoutError:
+                    pass
+
+            self._reservado_mb += costo
+            self._operaciones += 1
+            self._estadisticas['admitidas'] += 1
+
+    async def liberar(self, costo: float) -> None:
+        async with self._condicion:
+            self._reservado_mb -= costo
+            self._operaciones -= 1
+            self._condicion.notify_all()
+
+    def estadisticas(self) -> Dict:
+        return {
+            **self._estadisticas,
+            'operaciones': self._operaciones,
+            'reservado_mb': round(self._reservado_mb, 1),
+            'memoria_mb': self.memoria_mb,
+            'max_operaciones': self.max_operaciones,
+        }
+
+    def _cabe(self, costo: float) -> bool:
+        if self._operaciones == 0:
+            return True
+        return (
+            self._operaciones < self.max_operaciones
+            and self._reservado_mb + costo <= self.memoria_mb
+        )
+
+    def _rechazo(self, costo: float) -> SobrecargaError:
+        if self._operaciones >= self.max_operaciones:
+            self._estadisticas['rechazos_operaciones'] += 1
+            return SobrecargaError(
+                f"Hay {self._operaciones} operaciones pesadas en curso; intente más tarde",
+                429, self.retry_after_s
+            )
+        self._estadisticas['rechazos_memoria'] += 1
+        return SobrecargaError(
+            f"La operación requiere ~{costo:.0f} MB y el servidor tiene "
+            f"{self.memoria_mb - self._reservado_mb:.0f} MB libres; intente más tarde",
+            503, self.retry_after_s
+        )
+
+
+@lru_cache()
+def get_control_admision() -> ControlAdmision:
+    """Control de admisión del worker configurado desde settings"""
+    settings = get_settings()
+    return ControlAdmision(
+        memoria_mb=settings.ADMISION_MEMORIA_MB,
+        max_operaciones=settings.ADMISION_MAX_OPERACIONES,
+        espera_s=settings.ADMISION_ESPERA_S,
+        retry_after_s=settings.ADMISION_RETRY_AFTER_S
+    )
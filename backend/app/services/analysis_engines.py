@@ -0,0 +1,338 @@
+"""
+Engines de ejecución de los análisis de rotación
+Cada engine resuelve las consultas primitivas (conteos por categoría,
+indicadores generales, tendencias y agregados por área) sobre los registros;
+AnalysisService y ParetoService construyen los resultados a partir de ellas,
+así que el resultado es el mismo con cualquier engine.
+
+    pandas  -> DataFrame en memoria, un hilo (por defecto)
+    duckdb  -> SQL columnar embebido: multi-hilo y, sobre el Parquet de un
+               dataset registrado, sin cargarlo completo en memoria
+               (requiere el paquete duckdb)
+"""
+
+from typing import Dict, List, Optional, Tuple, Type, Union
+
+import numpy as np
+import pandas as pd
+
+# Columna con la posición del registro: el orden de aparición desempata los
+# conteos igual que en pandas
+COLUMNA_FILA = '__fila'
+
+# Tendencia de un mes: (periodo 'YYYY-MM', total RV, total BXF)
+Tendencia = Tuple[str, int, int]
+
+
+class AnalysisEngine:
+    """Interfaz común de los engines de análisis"""
+
+    nombre: str = ''
+    descripcion: str = ''
+
+    @property
+    def columnas(self) -> List[str]:
+        raise NotImplementedError
+
+    def total(self) -> int:
+        raise NotImplementedError
+
+    def conteo(self, columna: str) -> pd.Series:
+        """Registros por categoría (sin nulos) en orden de primera aparición"""
+        raise NotImplementedError
+
+    def resumen(self) -> Dict:
+        """Totales por tipo de baja, promedios y total de rotación temprana"""
+        raise NotImplementedError
+
+    def tendencias(self) -> List[Tendencia]:
+        """RV y BXF por mes de fechaBajaSistema"""
+        raise NotImplementedError
+
+    def por_area(self) -> List[Dict]:
+        """
+        Registros, promedios y tipo de baja predominante (la moda; ante
+        empates el menor) de cada área, en orden de primera aparición
+        """
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        return self.total()
+
+
+class PandasAnalysisEngine(AnalysisEngine):
+    """Consultas sobre un DataFrame en memoria"""
+
+    nombre = 'pandas'
+    descripcion = 'DataFrame de pandas en memoria (un hilo)'
+
+    def __init__(self, data: Union[List[Dict], pd.DataFrame]):
+        self.df = pd.DataFrame(data)
+
+    @property
+    def columnas(self) -> List[str]:
+        return list(self.df.columns)
+
+    def total(self) -> int:
+        return len(self.df)
+
+    def conteo(self, columna: str) -> pd.Series:
+        return self.df[columna].value_counts(sort=False)
+
+    def resumen(self) -> Dict:
+        df = self.df
+        return {
+            'total_rv': len(df[df['tipoBajaNormalizado'] == 'RV']),
+            'total_bxf': len(df[df['tipoBajaNormalizado'] == 'BXF']),
+            'antiguedad_promedio_dias': float(df['diasAntiguedad'].mean()) if 'diasAntiguedad' in df.columns else 0,
+            'antiguedad_promedio_semanas': float(df['antiguedadSemanas'].mean()),
+            'salario_promedio': float(df['salario'].mean()),
+            'total_rotacion_temprana': len(df[df['rotacionTemprana'] == True]),
+        }
+
+    def tendencias(self) -> List[Tendencia]:
+        df = self.df
+        periodo = pd.to_datetime(df['fechaBajaSistema']).dt.to_period('M')
+
+        # Agrupar por periodo y tipo de baja
+        agrupado = df.groupby([periodo, df['tipoBajaNormalizado']]).size().unstack(fill_value=0)
+
+        return [
+            (str(periodo), int(row.get('RV', 0)), int(row.get('BXF', 0)))
+            for periodo, row in agrupado.iterrows()
+        ]
+
+    def por_area(self) -> List[Dict]:
+        df = self.df
+        areas = []
+
+        for area in df['area'].unique():
+            if pd.notna(area):
+                df_area = df[df['area'] == area]
+                tipo_predominante = df_area['tipoBajaNormalizado'].mode()
+
+                areas.append({
+                    'area': str(area),
+                    'total': len(df_area),
+                    'antiguedad_promedio': float(df_area['antiguedadSemanas'].mean()),
+                    'salario_promedio': float(df_area['salario'].mean()),
+                    'tipo_baja_predominante': str(tipo_predominante[0]) if len(tipo_predominante) > 0 else 'N/A',
+                })
+
+        return areas
+
+
+def _id(nombre: str) -> str:
+    """Identificador SQL entre comillas"""
+    return '"' + str(nombre).replace('"', '""') + '"'
+
+
+def _flotante(valor) -> float:
+    # El promedio de una columna sin valores es NULL en SQL y NaN en pandas
+    return float('nan') if valor is None else float(valor)
+
+
+class DuckDBAnalysisEngine(AnalysisEngine):
+    """
+    Consultas SQL de DuckDB sobre un DataFrame o sobre un archivo Parquet
+
+    Los promedios usan suma compensada (favg) para coincidir con pandas y
+    cada consulta desempata por la posición del registro (`__fila`).
+    """
+
+    nombre = 'duckdb'
+    descripcion = 'SQL columnar embebido de DuckDB (multi-hilo, Parquet fuera de memoria)'
+
+    def __init__(
+        self,
+        data: Optional[Union[List[Dict], pd.DataFrame]] = None,
+        ruta_parquet: Optional[str] = None,
+        threads: int = 0,
+        memoria_mb: int = 0,
+        directorio_temporal: str = ''
+    ):
+        """
+        Args:
+            data: Registros (lista o DataFrame); se ignora con `ruta_parquet`
+            ruta_parquet: Archivo Parquet que se consulta sin cargarlo
+            threads: Hilos de DuckDB (0 = núcleos disponibles)
+            memoria_mb: Límite de memoria; lo que no cabe se escribe en
+                `directorio_temporal` (0 = el de DuckDB, 80% de la RAM)
+            directorio_temporal: Directorio para los datos que no caben en memoria
+        """
+        import duckdb
+
+        config = {}
+        if threads > 0:
+            config['threads'] = threads
+        if memoria_mb > 0:
+            config['memory_limit'] = f'{memoria_mb}MB'
+        if directorio_temporal:
+            config['temp_directory'] = directorio_temporal
+        self._con = duckdb.connect(config=config)
+
+        if ruta_parquet is not None:
+            ruta = ruta_parquet.replace("'", "''")
+            self._con.execute(
+                f"CREATE VIEW datos AS SELECT * EXCLUDE (file_row_number), "
+                f"file_row_number AS {COLUMNA_FILA} "
+                f"FROM read_parquet('{ruta}', file_row_number = true)"
+            )
+        else:
+            # Copia superficial: la columna de posición no modifica el DataFrame original
+            tabla = pd.DataFrame(data).copy(deep=False)
+            tabla[COLUMNA_FILA] = np.arange(len(tabla), dtype=np.int64)
+            # Se convierte una vez a una tabla columnar de DuckDB: consultar el
+            # DataFrame directamente convierte las columnas de texto en cada consulta
+            self._con.register('registros', tabla)
+            self._con.execute('CREATE TABLE datos AS SELECT * FROM registros')
+            self._con.unregister('registros')
+
+        self._columnas = [
+            fila[0] for fila in self._con.execute('DESCRIBE datos').fetchall()
+            if fila[0] != COLUMNA_FILA
+        ]
+        self._total: Optional[int] = None
+
+    @property
+    def columnas(self) -> List[str]:
+        return list(self._columnas)
+
+    def total(self) -> int:
+        if self._total is None:
+            self._total = self._con.execute('SELECT count(*) FROM datos').fetchone()[0]
+        return self._total
+
+    def conteo(self, columna: str) -> pd.Series:
+        col = _id(columna)
+        filas = self._con.execute(f"""
+            SELECT {col}, count(*) FROM datos
+            WHERE {col} IS NOT NULL
+            GROUP BY {col}
+            ORDER BY min({COLUMNA_FILA})
+        """).fetchall()
+
+        return pd.Series(
+            [n for _, n in filas],
+            index=pd.Index([valor for valor, _ in filas], dtype=object),
+            dtype=np.int64
+        )
+
+    def resumen(self) -> Dict:
+        dias = 'favg("diasAntiguedad")' if 'diasAntiguedad' in self._columnas else 'NULL'
+        rv, bxf, promedio_dias, promedio_semanas, salario, temprana = self._con.execute(f"""
+            SELECT
+                count(*) FILTER (WHERE "tipoBajaNormalizado" = 'RV'),
+                count(*) FILTER (WHERE "tipoBajaNormalizado" = 'BXF'),
+                {dias},
+                favg("antiguedadSemanas"),
+                favg("salario"),
+                count(*) FILTER (WHERE "rotacionTemprana" = TRUE)
+            FROM datos
+        """).fetchone()
+
+        return {
+            'total_rv': rv,
+            'total_bxf': bxf,
+            'antiguedad_promedio_dias': _flotante(promedio_dias) if 'diasAntiguedad' in self._columnas else 0,
+            'antiguedad_promedio_semanas': _flotante(promedio_semanas),
+            'salario_promedio': _flotante(salario),
+            'total_rotacion_temprana': temprana,
+        }
+
+    def tendencias(self) -> List[Tendencia]:
+        filas = self._con.execute("""
+            SELECT
+                strftime(CAST("fechaBajaSistema" AS TIMESTAMP), '%Y-%m') AS periodo,
+                count(*) FILTER (WHERE "tipoBajaNormalizado" = 'RV'),
+                count(*) FILTER (WHERE "tipoBajaNormalizado" = 'BXF')
+            FROM datos
+            WHERE "fechaBajaSistema" IS NOT NULL AND "tipoBajaNormalizado" IS NOT NULL
+            GROUP BY periodo
+            ORDER BY periodo
+        """).fetchall()
+
+        return [(periodo, rv, bxf) for periodo, rv, bxf in filas]
+
+    def por_area(self) -> List[Dict]:
+        filas = self._con.execute(f"""
+            WITH areas AS (
+                SELECT
+                    "area",
+                    count(*) AS total,
+                    favg("antiguedadSemanas") AS antiguedad,
+                    favg("salario") AS salario,
+                    min({COLUMNA_FILA}) AS primera
+                FROM datos
+                WHERE "area" IS NOT NULL
+                GROUP BY "area"
+            ),
+            modas AS (
+                SELECT "area", "tipoBajaNormalizado" AS tipo
+                FROM datos
+                WHERE "area" IS NOT NULL AND "tipoBajaNormalizado" IS NOT NULL
+                GROUP BY "area", "tipoBajaNormalizado"
+                QUALIFY row_number() OVER (
+                    PARTITION BY "area" ORDER BY count(*) DESC, "tipoBajaNormalizado"
+                ) = 1
+            )
+            SELECT areas."area", total, antiguedad, salario, modas.tipo
+            FROM areas LEFT JOIN modas ON areas."area" = modas."area"
+            ORDER BY primera
+        """).fetchall()
+
+        return [
+            {
+                'area': str(area),
+                'total': total,
+                'antiguedad_promedio': _flotante(antiguedad),
+                'salario_promedio': _flotante(salario),
+                'tipo_baja_predominante': str(tipo) if tipo is not None else 'N/A',
+            }
+            for area, total, antiguedad, salario, tipo in filas
+        ]
+
+
+ENGINES_ANALISIS: Dict[str, Type[AnalysisEngine]] = {
+    engine.nombre: engine
+    for engine in (PandasAnalysisEngine, DuckDBAnalysisEngine)
+}
+
+
+def crear_engine_analisis(
+    nombre: str,
+    data: Optional[Union[List[Dict], pd.DataFrame]] = None,
+    ruta_parquet: Optional[str] = None,
+    **opciones
+) -> AnalysisEngine:
+    """
+    Crea un engine de análisis sobre los registros o sobre un Parquet
+
+    Args:
+        nombre: 'pandas' o 'duckdb'
+        data: Registros (lista o DataFrame)
+        ruta_parquet: Parquet de un dataset (sólo duckdb lo consulta
+            directamente; pandas necesita `data`)
+        **opciones: Opciones del engine (threads, memoria_mb, directorio_temporal)
+
+    Raises:
+        ValueError: Si el engine no existe o su paquete no está instalado
+    """
+    if nombre not in ENGINES_ANALISIS:
+        raise ValueError(
+            f"Engine de análisis inválido '{nombre}'. Debe ser uno de: {', '.join(ENGINES_ANALISIS)}"
+        )
+    if nombre == 'pandas':
+        return PandasAnalysisEngine(data)
+
+    try:
+        return DuckDBAnalysisEngine(data, ruta_parquet=ruta_parquet, **opciones)
+    except ImportError:
+        raise ValueError("El engine de análisis 'duckdb' requiere el paquete duckdb instalado")
+
+
+def como_engine(data: Union[AnalysisEngine, List[Dict], pd.DataFrame]) -> AnalysisEngine:
+    """El engine recibido o un engine de pandas sobre los registros"""
+    if isinstance(data, AnalysisEngine):
+        return data
+    return PandasAnalysisEngine(data)
@@ -2,7 +2,7 @@
 Servicio de análisis de datos de rotación
 """
 
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 from collections import Counter
 from datetime import datetime
 import pandas as pd
@@ -14,64 +14,79 @@ from app.models.schemas import (
     TendenciaRotacion,
     AnalisisPorArea
 )
+from app.services.analysis_engines import AnalysisEngine, como_engine
+from app.utils.conteos import seleccionar_categorias, CATEGORIA_OTROS
+from app.utils.metrics import medir_etapa
 
 
 class AnalysisService:
     """Servicio para análisis estadístico de rotación"""
 
     @staticmethod
-    def analizar_datos(data: List[Dict]) -> AnalisisCompleto:
+    def analizar_datos(
+        data: Union[List[Dict], pd.DataFrame, AnalysisEngine],
+        limite: Optional[int] = None,
+        offset: int = 0
+    ) -> AnalisisCompleto:
         """
         Realiza análisis completo de los datos de rotación
 
         Args:
-            data: Lista de registros de empleados con rotación
+            data: Registros de empleados con rotación (lista o DataFrame) o
+                un engine de análisis sobre ellos (por defecto pandas)
+            limite: Categorías por distribución; las siguientes se suman en
+                una entrada "Otros". None = todas
+            offset: Categorías a saltar en cada distribución (paginación)
 
         Returns:
             AnalisisCompleto con todas las métricas y análisis
         """
-        if not data:
+        if len(data) == 0:
             return AnalysisService._get_empty_analysis()
 
-        # Convertir a DataFrame para análisis
-        df = pd.DataFrame(data)
+        # Convertir a DataFrame para análisis (salvo que llegue un engine)
+        with medir_etapa('dataframe'):
+            engine = como_engine(data)
 
-        # Métricas generales
-        total_registros = len(df)
-        total_rv = len(df[df['tipoBajaNormalizado'] == 'RV'])
-        total_bxf = len(df[df['tipoBajaNormalizado'] == 'BXF'])
+        # Métricas generales y promedios
+        with medir_etapa('resumen'):
+            total_registros = engine.total()
+            resumen = engine.resumen()
+        total_rv = resumen['total_rv']
+        total_bxf = resumen['total_bxf']
         tasa_rv_vs_bxf = (total_rv / total_registros * 100) if total_registros > 0 else 0
 
-        # Promedios
-        antiguedad_promedio_dias = float(df['diasAntiguedad'].mean()) if 'diasAntiguedad' in df.columns else 0
-        antiguedad_promedio_semanas = float(df['antiguedadSemanas'].mean())
-        salario_promedio = float(df['salario'].mean())
+        antiguedad_promedio_dias = resumen['antiguedad_promedio_dias']
+        antiguedad_promedio_semanas = resumen['antiguedad_promedio_semanas']
+        salario_promedio = resumen['salario_promedio']
 
         # Distribuciones
         distribucion_tipo_baja = AnalysisService._calcular_distribucion(
-            df, 'tipoBajaNormalizado'
+            engine, 'tipoBajaNormalizado', limite, offset
         )
         distribucion_por_area = AnalysisService._calcular_distribucion(
-            df, 'area'
+            engine, 'area', limite, offset
         )
         distribucion_por_supervisor = AnalysisService._calcular_distribucion(
-            df, 'supervisor'
+            engine, 'supervisor', limite, offset
         )
         distribucion_rango_salarial = AnalysisService._calcular_distribucion(
-            df, 'rangoSalarial'
+            engine, 'rangoSalarial', limite, offset
         )
         distribucion_rango_antiguedad = AnalysisService._calcular_distribucion(
-            df, 'rangoAntiguedad'
+            engine, 'rangoAntiguedad', limite, offset
         )
 
         # Tendencias mensuales
-        tendencias_mensuales = AnalysisService._calcular_tendencias(df)
+        with medir_etapa('tendencias'):
+            tendencias_mensuales = AnalysisService._calcular_tendencias(engine)
 
         # Análisis por área
-        analisis_areas = AnalysisService._analizar_por_area(df)
+        with medir_etapa('por_area'):
+            analisis_areas = AnalysisService._analizar_por_area(engine)
 
         # Rotación temprana
-        total_rotacion_temprana = len(df[df['rotacionTemprana'] == True])
+        total_rotacion_temprana = resumen['total_rotacion_temprana']
         porcentaje_rotacion_temprana = (
             total_rotacion_temprana / total_registros * 100
         ) if total_registros > 0 else 0
@@ -95,53 +110,93 @@ class AnalysisService:
             porcentaje_rotacion_temprana=round(porcentaje_rotacion_temprana, 2)
         )
 
+    @staticmethod
+    def calcular_agregados(data: Union[List[Dict], pd.DataFrame]) -> Dict:
+        """
+        Conteos aditivos de los registros: los de un dataset ampliado son la
+        suma de los del dataset base y los de los registros agregados
+
+        Args:
+            data: Registros de empleados con rotación (lista o DataFrame)
+
+        Returns:
+            Diccionario con totales y conteos por tipo de baja, área y supervisor
+        """
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+
+        def conteo(columna: str) -> Dict[str, int]:
+            if columna not in df.columns:
+                return {}
+            return {str(k): int(v) for k, v in df[columna].value_counts().items()}
+
+        por_tipo_baja = conteo('tipoBajaNormalizado')
+        total_registros = len(df)
+        total_rv = por_tipo_baja.get('RV', 0)
+
+        return {
+            'total_registros': total_registros,
+            'total_renuncias_voluntarias': total_rv,
+            'total_bajas_forzadas': por_tipo_baja.get('BXF', 0),
+            'tasa_rv_vs_bxf': round(total_rv / total_registros * 100, 2) if total_registros > 0 else 0,
+            'total_rotacion_temprana': int((df['rotacionTemprana'] == True).sum())
+            if 'rotacionTemprana' in df.columns else 0,
+            'por_tipo_baja': por_tipo_baja,
+            'por_area': conteo('area'),
+            'por_supervisor': conteo('supervisor'),
+        }
+
     @staticmethod
     def _calcular_distribucion(
-        df: pd.DataFrame,
-        columna: str
+        engine: AnalysisEngine,
+        columna: str,
+        limite: Optional[int] = None,
+        offset: int = 0
     ) -> List[DistribucionCategoria]:
-        """Calcula distribución por categoría"""
-        if columna not in df.columns:
+        """Calcula distribución por categoría (una página y el resto en "Otros")"""
+        if columna not in engine.columnas:
             return []
 
-        total = len(df)
-        conteo = df[columna].value_counts()
-
-        distribuciones = []
-        for categoria, cantidad in conteo.items():
-            if pd.notna(categoria):  # Excluir valores nulos
-                porcentaje = (cantidad / total * 100) if total > 0 else 0
-                distribuciones.append(
-                    DistribucionCategoria(
-                        categoria=str(categoria),
-                        total=int(cantidad),
-                        porcentaje=round(porcentaje, 2)
-                    )
-                )
+        total = engine.total()
+        # Excluye los nulos y ordena por total descendente
+        with medir_etapa('conteo'):
+            conteo = seleccionar_categorias(engine.conteo(columna), limite, offset)
+
+        totales = conteo['totales']
+        porcentajes = totales / total * 100 if total > 0 else np.zeros(len(totales))
+
+        # Valores calculados aquí: se construyen sin volver a validarlos
+        distribuciones = [
+            DistribucionCategoria.model_construct(
+                categoria=categoria, total=cantidad, porcentaje=round(porcentaje, 2)
+            )
+            for categoria, cantidad, porcentaje in zip(
+                conteo['valores'],
+                totales.tolist(),
+                porcentajes.tolist()
+            )
+        ]
+
+        if conteo['otros_categorias'] > 0:
+            distribuciones.append(DistribucionCategoria.model_construct(
+                categoria=CATEGORIA_OTROS,
+                total=conteo['otros_total'],
+                porcentaje=round(conteo['otros_total'] / total * 100, 2),
+                agrupadas=conteo['otros_categorias']
+            ))
 
-        # Ordenar por total descendente
-        distribuciones.sort(key=lambda x: x.total, reverse=True)
         return distribuciones
 
     @staticmethod
-    def _calcular_tendencias(df: pd.DataFrame) -> List[TendenciaRotacion]:
+    def _calcular_tendencias(engine: AnalysisEngine) -> List[TendenciaRotacion]:
         """Calcula tendencias mensuales de rotación"""
         tendencias = []
 
-        # Convertir fechas a datetime si no lo están
-        if 'fechaBajaSistema' not in df.columns:
+        if 'fechaBajaSistema' not in engine.columnas:
             return tendencias
 
         try:
-            # Crear columna de periodo (año-mes)
-            df['periodo'] = pd.to_datetime(df['fechaBajaSistema']).dt.to_period('M')
-
-            # Agrupar por periodo y tipo de baja
-            agrupado = df.groupby(['periodo', 'tipoBajaNormalizado']).size().unstack(fill_value=0)
-
-            for periodo, row in agrupado.iterrows():
-                total_rv = int(row.get('RV', 0))
-                total_bxf = int(row.get('BXF', 0))
+            # RV y BXF por periodo (año-mes)
+            for periodo, total_rv, total_bxf in engine.tendencias():
                 total = total_rv + total_bxf
 
                 # Calcular tasa de rotación (simplificado)
@@ -149,7 +204,7 @@ class AnalysisService:
 
                 tendencias.append(
                     TendenciaRotacion(
-                        periodo=str(periodo),
+                        periodo=periodo,
                         total_rv=total_rv,
                         total_bxf=total_bxf,
                         total=total,
@@ -166,40 +221,29 @@ class AnalysisService:
         return tendencias
 
     @staticmethod
-    def _analizar_por_area(df: pd.DataFrame) -> List[AnalisisPorArea]:
+    def _analizar_por_area(engine: AnalysisEngine) -> List[AnalisisPorArea]:
         """Analiza rotación por área"""
-        if 'area' not in df.columns:
+        if 'area' not in engine.columnas:
             return []
 
         analisis = []
-        total_registros = len(df)
-
-        # Agrupar por área
-        for area in df['area'].unique():
-            if pd.notna(area):
-                df_area = df[df['area'] == area]
-
-                total_rotaciones = len(df_area)
-                porcentaje = (total_rotaciones / total_registros * 100) if total_registros > 0 else 0
-
-                # Promedios del área
-                antiguedad_promedio = float(df_area['antiguedadSemanas'].mean())
-                salario_promedio = float(df_area['salario'].mean())
-
-                # Tipo de baja predominante
-                tipo_predominante = df_area['tipoBajaNormalizado'].mode()
-                tipo_baja_predominante = str(tipo_predominante[0]) if len(tipo_predominante) > 0 else 'N/A'
-
-                analisis.append(
-                    AnalisisPorArea(
-                        area=str(area),
-                        total_rotaciones=total_rotaciones,
-                        porcentaje=round(porcentaje, 2),
-                        antiguedad_promedio=round(antiguedad_promedio, 2),
-                        salario_promedio=round(salario_promedio, 2),
-                        tipo_baja_predominante=tipo_baja_predominante
-                    )
+        total_registros = engine.total()
+
+        # Agregados por área: registros, promedios y tipo de baja predominante
+        for area in engine.por_area():
+            total_rotaciones = area['total']
+            porcentaje = (total_rotaciones / total_registros * 100) if total_registros > 0 else 0
+
+            analisis.append(
+                AnalisisPorArea(
+                    area=area['area'],
+                    total_rotaciones=total_rotaciones,
+                    porcentaje=round(porcentaje, 2),
+                    antiguedad_promedio=round(area['antiguedad_promedio'], 2),
+                    salario_promedio=round(area['salario_promedio'], 2),
+                    tipo_baja_predominante=area['tipo_baja_predominante']
                 )
+            )
 
         # Ordenar por total de rotaciones descendente
         analisis.sort(key=lambda x: x.total_rotaciones, reverse=True)
@@ -0,0 +1,236 @@
+"""
+Caché de resultados de análisis y predicción
+Los resultados se identifican por el contenido de los datos (o su
+`dataset_id`), la operación, sus parámetros y la versión del modelo
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from app.config.settings import get_settings
+from app.ml.registry import huella_dataframe
+
+
+def clave_resultado(operacion: str, fuente: Any, *parametros: Any) -> str:
+    """
+    Clave de caché de un resultado
+
+    Args:
+        operacion: Nombre de la operación (p. ej. la tarea de cómputo)
+        fuente: `dataset_id`, lista de registros o DataFrame
+        parametros: Parámetros de la operación (categoría, versión del modelo...)
+
+    Returns:
+        Hash sha256 en hexadecimal
+    """
+    if isinstance(fuente, str):
+        # Los dataset_id ya son el hash de su contenido
+        huella = f'dataset:{fuente}'
+    elif isinstance(fuente, pd.DataFrame):
+        huella = huella_dataframe(fuente)
+    else:
+        contenido = json.dumps(fuente, sort_keys=True, default=str, ensure_ascii=False)
+        huella = hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+    payload = json.dumps([operacion, huella, list(parametros)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Caché LRU con TTL, acotado por número de entradas y por bytes
+
+    La memoria es propia de cada proceso del servidor. Con `directorio`, los
+    resultados también se escriben en disco para que otros workers (o el
+    mismo tras reiniciar) los reutilicen; un acierto en disco se promueve a
+    memoria. Los resultados nunca son None: obtener() retorna None en un fallo.
+    """
+
+    def __init__(
+        self,
+        max_entradas: int = 256,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_s: float = 600,
+        directorio: Optional[str] = None
+    ):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.directorio = directorio or None
+        if self.directorio:
+            os.makedirs(self.directorio, exist_ok=True)
+
+        # clave -> (expira, tamaño en bytes, valor); el final es lo más reciente
+        self._entradas: 'OrderedDict[str, Tuple[float, int, Any]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._estadisticas = {
+            'hits_memoria': 0,
+            'hits_disco': 0,
+            'misses': 0,
+            'expulsiones': 0,
+            'expiraciones': 0,
+        }
+
+    def obtener(self, clave: str) -> Any:
+        """
+        Obtiene un resultado vigente
+
+        Args:
+            clave: Clave retornada por clave_resultado()
+
+        Returns:
+            El resultado, o None si no está en caché o expiró
+        """
+        ahora = time.time()
+
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                expira, _, valor = entrada
+                if expira > ahora:
+                    self._entradas.move_to_end(clave)
+                    self._estadisticas['hits_memoria'] += 1
+                    return valor
+                self._quitar(clave)
+                self._estadisticas['expiraciones'] += 1
+
+        contenido = self._leer_disco(clave, ahora)
+        if contenido is not None:
+            valor = pickle.loads(contenido)
+            with self._lock:
+                self._estadisticas['hits_disco'] += 1
+                self._insertar(clave, valor, len(contenido), ahora)
+            return valor
+
+        with self._lock:
+            self._estadisticas['misses'] += 1
+        return None
+
+    def guardar(self, clave: str, valor: Any) -> None:
+        """
+        Guarda un resultado (en memoria y, si está configurado, en disco)
+
+        Args:
+            clave: Clave retornada por clave_resultado()
+            valor: Resultado serializable con pickle
+        """
+        contenido = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            self._insertar(clave, valor, len(contenido), time.time())
+
+        if self.directorio:
+            ruta = self._ruta(clave)
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            temporal = f'{ruta}.{uuid.uuid4().hex}.tmp'
+            with open(temporal, 'wb') as f:
+                f.write(contenido)
+            os.replace(temporal, ruta)
+
+    def limpiar(self) -> None:
+        """Elimina todas las entradas, en memoria y en disco"""
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+        if self.directorio:
+            for raiz, _, archivos in os.walk(self.directorio):
+                for archivo in archivos:
+                    os.remove(os.path.join(raiz, archivo))
+
+    def depurar(self) -> int:
+        """
+        Elimina del disco los resultados expirados
+
+        Returns:
+            Número de archivos eliminados
+        """
+        if not self.directorio:
+            return 0
+
+        limite = time.time() - self.ttl_s
+        eliminados = 0
+        for raiz, _, archivos in os.walk(self.directorio):
+            for archivo in archivos:
+                ruta = os.path.join(raiz, archivo)
+                try:
+                    if os.path.getmtime(ruta) < limite:
+                        os.remove(ruta)
+                        eliminados += 1
+                except FileNotFoundError:
+                    pass
+        return eliminados
+
+    def estadisticas(self) -> Dict:
+        """Aciertos, fallos y ocupación del caché de este proceso"""
+        with self._lock:
+            estadisticas = dict(self._estadisticas)
+            estadisticas['entradas'] = len(self._entradas)
+            estadisticas['bytes'] = self._bytes
+
+        consultas = estadisticas['hits_memoria'] + estadisticas['hits_disco'] + estadisticas['misses']
+        aciertos = estadisticas['hits_memoria'] + estadisticas['hits_disco']
+        estadisticas['tasa_aciertos'] = round(aciertos / consultas * 100, 2) if consultas else 0.0
+        estadisticas['max_entradas'] = self.max_entradas
+        estadisticas['max_bytes'] = self.max_bytes
+        estadisticas['ttl_s'] = self.ttl_s
+        estadisticas['disco'] = self.directorio is not None
+        return estadisticas
+
+    def _insertar(self, clave: str, valor: Any, tamano: int, ahora: float) -> None:
+        # Un resultado más grande que el caché completo no se guarda en memoria
+        if tamano > self.max_bytes:
+            return
+
+        if clave in self._entradas:
+            self._quitar(clave)
+        self._entradas[clave] = (ahora + self.ttl_s, tamano, valor)
+        self._bytes += tamano
+
+        while len(self._entradas) > self.max_entradas or self._bytes > self.max_bytes:
+            self._quitar(next(iter(self._entradas)))
+            self._estadisticas['expulsiones'] += 1
+
+    def _quitar(self, clave: str) -> None:
+        _, tamano, _ = self._entradas.pop(clave)
+        self._bytes -= tamano
+
+    def _leer_disco(self, clave: str, ahora: float) -> Optional[bytes]:
+        if not self.directorio:
+            return None
+
+        ruta = self._ruta(clave)
+        try:
+            if os.path.getmtime(ruta) + self.ttl_s <= ahora:
+                os.remove(ruta)
+                return None
+            with open(ruta, 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, clave[:2], f'{clave}.pkl')
+
+
+@lru_cache()
+def get_result_cache() -> ResultCache:
+    """Caché de resultados del proceso, configurado desde settings"""
+    settings = get_settings()
+    return ResultCache(
+        max_entradas=settings.CACHE_MAX_ENTRADAS,
+        max_bytes=settings.CACHE_MAX_MB * 1024 * 1024,
+        ttl_s=settings.CACHE_TTL_S,
+        directorio=settings.CACHE_DIR or None
+    )
@@ -0,0 +1,133 @@
+"""
+Ejecutor de cómputo fuera del event loop
+Corre los análisis y el entrenamiento (pandas/sklearn) en un pool de procesos
+para que un cálculo pesado no congele las demás peticiones del worker
+"""
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config.settings import get_settings
+from app.utils.metrics import iniciar_etapas, medir_etapa, registrar_etapas
+from app.utils.profiling import perfilado_activo
+
+
+def _inicializar_proceso():
+    """Un hilo de BLAS/OpenMP por proceso: el paralelismo lo da el pool"""
+    from threadpoolctl import threadpool_limits
+
+    threadpool_limits(1)
+
+
+def _ejecutar_con_etapas(funcion: Callable, *args, **kwargs) -> Tuple[Any, Dict[str, float]]:
+    """Corre la tarea en el proceso del pool y retorna también sus etapas medidas"""
+    etapas = iniciar_etapas()
+    return funcion(*args, **kwargs), etapas
+
+
+class ComputeExecutor:
+    """
+    Pool de procesos con concurrencia acotada
+
+    El pool se crea con el primer cálculo. Un semáforo limita cuántos
+    cálculos pueden estar en curso o en cola a la vez; los demás esperan
+    sin ocupar memoria del pool. Si un proceso muere (p. ej. por falta de
+    memoria) el pool se recrea en la siguiente llamada.
+    """
+
+    def __init__(self, n_workers: Optional[int] = None, max_concurrencia: Optional[int] = None):
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.max_concurrencia = max_concurrencia or 2 * self.n_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+
+    async def ejecutar(self, funcion: Callable, *args, **kwargs) -> Any:
+        """
+        Ejecuta `funcion(*args, **kwargs)` en un proceso del pool
+
+        La función y sus argumentos deben poder serializarse con pickle; para
+        datos grandes conviene pasar un `dataset_id` en lugar de los registros.
+        Las etapas medidas dentro del proceso se suman a las del request. Si el
+        request se está perfilando, la función corre en un hilo de este
+        proceso para que el perfilador la muestree.
+
+        Args:
+            funcion: Función de nivel de módulo a ejecutar
+            *args: Argumentos posicionales
+            **kwargs: Argumentos por nombre
+
+        Returns:
+            El resultado de la función
+        """
+        if perfilado_activo():
+            with medir_etapa('computo'):
+                return await run_in_threadpool(funcion, *args, **kwargs)
+
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_concurrencia)
+
+        async with self._semaforo:
+            pool = self._obtener_pool()
+            loop = asyncio.get_running_loop()
+            try:
+                with medir_etapa('computo'):
+                    resultado, etapas = await loop.run_in_executor(
+                        pool, partial(_ejecutar_con_etapas, funcion, *args, **kwargs)
+                    )
+            except BrokenProcessPool:
+                self._descartar_pool(pool)
+                raise RuntimeError("El proceso de cómputo terminó inesperadamente")
+
+        registrar_etapas(etapas)
+        return resultado
+
+    def precalentar(self, funcion: Callable) -> None:
+        """
+        Crea el pool y envía `funcion` una vez por proceso sin esperarla, para
+        que los primeros cálculos no paguen el arranque de los procesos ni
+        la importación de sus librerías
+
+        Args:
+            funcion: Función de nivel de módulo sin argumentos
+        """
+        pool = self._obtener_pool()
+        for _ in range(self.n_workers):
+            pool.submit(funcion)
+
+    def cerrar(self) -> None:
+        """Detiene el pool esperando los cálculos en curso"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+
+    def _obtener_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                # spawn: los procesos no heredan hilos ni locks del servidor
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_inicializar_proceso
+            )
+        return self._pool
+
+    def _descartar_pool(self, pool: ProcessPoolExecutor) -> None:
+        if self._pool is pool:
+            self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+@lru_cache()
+def get_compute_executor() -> ComputeExecutor:
+    """Ejecutor compartido por todos los routers del worker"""
+    settings = get_settings()
+    return ComputeExecutor(
+        n_workers=settings.COMPUTE_WORKERS or None,
+        max_concurrencia=settings.COMPUTE_MAX_CONCURRENCY or None
+    )
@@ -0,0 +1,241 @@
+"""
+Tareas que corren en los procesos del ComputeExecutor
+Cada función recibe datos serializables (registros o un `dataset_id`) y
+retorna el resultado del servicio correspondiente
+"""
+
+from functools import lru_cache
+from typing import Callable, List, Dict, Optional, Union
+
+import pandas as pd
+
+from app.config.settings import get_settings
+from app.services.analysis_engines import AnalysisEngine, crear_engine_analisis
+from app.services.analysis_service import AnalysisService
+from app.services.pareto_service import ParetoService
+from app.services.dataset_service import get_dataset_service
+from app.services.historial_service import get_historial_service
+
+# Registros de un request: JSON por filas o un DataFrame (formatos por columnas)
+Registros = Union[List[Dict], pd.DataFrame]
+
+# Registros enviados en el request o el id de un dataset registrado
+FuenteDatos = Union[Registros, str]
+
+# Callback de progreso de los jobs: (fracción 0-1, mensaje opcional)
+Progreso = Callable[..., None]
+
+# Empleados por bloque en el scoring masivo (un reporte de progreso por bloque)
+TAMANO_BLOQUE_SCORING = 1000
+
+
+@lru_cache(maxsize=4)
+def _cargar_dataset(dataset_id: str) -> pd.DataFrame:
+    # Los datasets son inmutables (id = hash del contenido); se reutilizan
+    # entre tareas del mismo proceso
+    return get_dataset_service().cargar(dataset_id)
+
+
+def resolver_datos(fuente: FuenteDatos) -> Registros:
+    """Registros de la fuente: la lista tal cual o el DataFrame del dataset"""
+    if isinstance(fuente, str):
+        return _cargar_dataset(fuente)
+    return fuente
+
+
+def engine_analisis(fuente: FuenteDatos) -> Union[Registros, AnalysisEngine]:
+    """
+    Datos para AnalysisService y ParetoService según ANALISIS_ENGINE
+
+    Con duckdb, un dataset registrado con su Parquet se consulta en el
+    archivo sin cargarlo; los registros de un request (o un dataset sin
+    Parquet) se consultan en memoria.
+    """
+    settings = get_settings()
+    if settings.ANALISIS_ENGINE == 'pandas':
+        return resolver_datos(fuente)
+
+    ruta = get_dataset_service().ruta_parquet(fuente) if isinstance(fuente, str) else None
+    return crear_engine_analisis(
+        settings.ANALISIS_ENGINE,
+        data=resolver_datos(fuente) if ruta is None else None,
+        ruta_parquet=ruta,
+        threads=settings.DUCKDB_THREADS,
+        memoria_mb=settings.DUCKDB_MEMORIA_MB,
+        directorio_temporal=settings.DUCKDB_TEMP_DIR
+    )
+
+
+@lru_cache()
+def _ml_service():
+    """Servicio ML del proceso, conectado al mismo registro que el servidor"""
+    from app.ml.registry import ModelRegistry
+    from app.services.ml_service import MLService
+
+    settings = get_settings()
+    return MLService(
+        registry=ModelRegistry(
+            settings.MODEL_REGISTRY_DIR,
+            max_versiones=settings.MODEL_REGISTRY_MAX_VERSIONS,
+            mmap=settings.MODEL_REGISTRY_MMAP
+        )
+    )
+
+
+def precalentar() -> None:
+    """Importa scikit-learn y carga el modelo activo en el proceso del pool"""
+    try:
+        _ml_service().sincronizar()
+    except Exception as e:
+        print(f"Error precargando modelo en el proceso de cómputo: {e}")
+
+
+def analizar_datos(fuente: FuenteDatos, limite: Optional[int] = None, offset: int = 0):
+    return AnalysisService.analizar_datos(engine_analisis(fuente), limite, offset)
+
+
+def analizar_pareto(
+    fuente: FuenteDatos,
+    categoria: str,
+    limite: Optional[int] = None,
+    offset: int = 0
+):
+    return ParetoService.analizar_pareto(engine_analisis(fuente), categoria, limite, offset)
+
+
+def analizar_pareto_multiple(fuente: FuenteDatos, limite: Optional[int] = None):
+    return ParetoService.analizar_multiples_categorias(engine_analisis(fuente), limite)
+
+
+def analizar_reingresos(limite: int) -> Dict:
+    """Reingresos en el historial de bajas (se lee del SQLite compartido)"""
+    return get_historial_service().analizar_reingresos(limite)
+
+
+def analizar_encuestas(fuente: FuenteDatos, limite: Optional[int], version: Optional[str]) -> Dict:
+    """
+    Temas de la encuesta de salida; un dataset que el modelo de temas aún no
+    conoce lo actualiza (de uno agregado sólo sus filas nuevas)
+
+    `version` sólo forma parte de la clave de caché.
+    """
+    from app.services.encuesta_service import get_encuesta_service
+
+    lote, lote_base, filas_base = None, None, 0
+    if isinstance(fuente, str):
+        datasets = get_dataset_service()
+        lote = fuente
+        lote_base = datasets.info(fuente).get('dataset_base')
+        if lote_base is not None and datasets.existe(lote_base):
+            filas_base = datasets.info(lote_base)['n_registros']
+
+    return get_encuesta_service().analizar(resolver_datos(fuente), limite, lote, lote_base, filas_base)
+
+
+def entrenar_modelo(fuente: FuenteDatos, engine: str) -> Dict:
+    """Entrena, registra y activa una nueva versión; retorna sus métricas y versión"""
+    servicio = _ml_service()
+    metricas = servicio.entrenar_modelo(resolver_datos(fuente), engine=engine)
+    return {'metricas': metricas, 'version': servicio.version}
+
+
+def actualizar_modelo(
+    nuevos: Registros,
+    version: Optional[str],
+    n_adicionales: Optional[int]
+) -> Dict:
+    """
+    Amplía la versión `version` (la activa en el servidor) con los registros
+    nuevos; la nueva versión queda registrada y activa
+    """
+    servicio = _ml_service()
+    if version is not None and servicio.version != version:
+        servicio.cargar_version(version)
+    resultado = servicio.actualizar_modelo(nuevos, n_adicionales=n_adicionales)
+    return {**resultado, 'version': servicio.version}
+
+
+def comparar_engines(fuente: FuenteDatos, engines: List[str]) -> Dict:
+    datos = resolver_datos(fuente)
+    return {
+        'n_samples': len(datos),
+        'resultados': _ml_service().comparar_engines(datos, engines),
+    }
+
+
+def predecir_batch(empleados: Registros, version: Optional[str]) -> List[Dict]:
+    """Predice con la misma versión que el proceso del servidor tiene activa"""
+    servicio = _ml_service()
+    if version is not None and servicio.version != version:
+        servicio.cargar_version(version)
+    return servicio.predecir_batch(empleados)
+
+
+def predecir_bloque(fuente: FuenteDatos, version: Optional[str], inicio: int, tamano: int) -> List[Dict]:
+    """
+    Predicciones de las filas [inicio, inicio + tamano) de un dataset (se
+    leen sólo los row groups del bloque), o de un bloque de registros ya
+    recortado que empieza en `inicio`
+    """
+    servicio = _ml_service()
+    if version is not None and servicio.version != version:
+        servicio.cargar_version(version)
+
+    if not isinstance(fuente, str):
+        empleados = fuente
+    elif get_dataset_service().ruta_parquet(fuente) is not None:
+        empleados = get_dataset_service().leer_filas(fuente, inicio, tamano)
+    else:
+        empleados = _cargar_dataset(fuente).iloc[inicio:inicio + tamano]
+
+    return servicio.predecir_bloque(empleados, offset=inicio)
+
+
+def ranking_riesgo(
+    fuente: FuenteDatos,
+    version: Optional[str],
+    k: int,
+    agrupar_por: Optional[str]
+) -> Dict:
+    """Ranking de mayor riesgo con la misma versión que el servidor tiene activa"""
+    servicio = _ml_service()
+    if version is not None and servicio.version != version:
+        servicio.cargar_version(version)
+    return servicio.ranking_riesgo(resolver_datos(fuente), k=k, agrupar_por=agrupar_por)
+
+
+def job_entrenar(parametros: Dict, progreso: Progreso) -> Dict:
+    """Job de entrenamiento: registra y activa una nueva versión del modelo"""
+    progreso(0.05, 'Cargando datos')
+    datos = resolver_datos(parametros['dataset_id'])
+
+    progreso(0.1, f"Entrenando {parametros['engine']} con {len(datos)} registros")
+    servicio = _ml_service()
+    metricas = servicio.entrenar_modelo(datos, engine=parametros['engine'], progreso=progreso)
+    return {'metricas': metricas, 'version': servicio.version}
+
+
+def job_predecir_batch(parametros: Dict, progreso: Progreso) -> List[Dict]:
+    """Job de scoring masivo con la versión activa al crear el job"""
+    servicio = _ml_service()
+    if parametros.get('version') is not None:
+        servicio.cargar_version(parametros['version'])
+    else:
+        servicio.sincronizar()
+
+    empleados = resolver_datos(parametros['dataset_id'])
+    predicciones = []
+
+    for inicio in range(0, len(empleados), TAMANO_BLOQUE_SCORING):
+        progreso(inicio / len(empleados), f'{inicio} de {len(empleados)} empleados')
+        predicciones.extend(servicio.predecir_bloque(
+            empleados.iloc[inicio:inicio + TAMANO_BLOQUE_SCORING], offset=inicio
+        ))
+
+    return predicciones
+
+
+def job_analizar(parametros: Dict, progreso: Progreso) -> Dict:
+    """Job de análisis completo de un dataset"""
+    progreso(0.1, 'Analizando datos')
+    return AnalysisService.analizar_datos(engine_analisis(parametros['dataset_id'])).model_dump()
@@ -0,0 +1,226 @@
+"""
+Servicio de datasets registrados
+Guarda los registros una sola vez en disco para que los endpoints y los
+procesos de cómputo los referencien por `dataset_id` en lugar de recibirlos
+en cada request
+"""
+
+import json
+import os
+import shutil
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from typing import List, Dict, Optional, Union
+
+import pandas as pd
+
+from app.config.settings import get_settings
+from app.ml.registry import huella_dataframe
+from app.services.analysis_service import AnalysisService
+
+
+ARCHIVO_DATOS = 'datos.pkl'
+ARCHIVO_PARQUET = 'datos.parquet'
+ARCHIVO_INFO = 'info.json'
+
+# Filas por row group del Parquet: leer_filas() lee sólo los grupos de un bloque
+FILAS_POR_GRUPO = 10000
+
+
+class DatasetService:
+    """
+    Datasets en disco identificados por el hash de su contenido
+
+    Estructura:
+        {directorio}/{dataset_id}/datos.pkl      -> DataFrame serializado
+        {directorio}/{dataset_id}/datos.parquet  -> copia columnar (con `parquet`)
+        {directorio}/{dataset_id}/info.json      -> registros, columnas y fecha
+
+    El mismo contenido siempre produce el mismo `dataset_id`, así que subir
+    dos veces los mismos datos no duplica archivos. Los procesos de cómputo
+    leen el DataFrame del page cache del sistema en lugar de recibir la lista
+    de registros serializada desde el proceso del servidor.
+
+    Con `parquet` también se guarda una copia en Parquet, que el engine de
+    análisis duckdb consulta sin cargar el dataset en memoria y de la que
+    leer_filas() lee sólo los row groups de un bloque.
+    """
+
+    def __init__(self, directorio: str, parquet: bool = False):
+        self.directorio = directorio
+        self.parquet = parquet
+        os.makedirs(directorio, exist_ok=True)
+
+    def guardar(
+        self,
+        data: Union[List[Dict], pd.DataFrame],
+        dataset_base: Optional[str] = None
+    ) -> Dict:
+        """
+        Registra un dataset
+
+        Args:
+            data: Registros de empleados (lista o DataFrame)
+            dataset_base: Dataset del que deriva (al agregar registros)
+
+        Returns:
+            Información del dataset, incluido su `dataset_id` y sus agregados
+        """
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        dataset_id = huella_dataframe(df)[:32]
+        ruta = os.path.join(self.directorio, dataset_id)
+
+        if os.path.isdir(ruta):
+            return self.info(dataset_id)
+
+        info = {
+            'dataset_id': dataset_id,
+            'n_registros': len(df),
+            'columnas': [str(c) for c in df.columns],
+            'fecha_registro': datetime.now().isoformat(),
+            'dataset_base': dataset_base,
+            'agregados': AnalysisService.calcular_agregados(df),
+        }
+
+        # Se escribe en un directorio temporal y se publica con rename atómico
+        temporal = os.path.join(self.directorio, f'.tmp-{uuid.uuid4().hex}')
+        os.makedirs(temporal)
+        df.to_pickle(os.path.join(temporal, ARCHIVO_DATOS))
+        if self.parquet:
+            try:
+                df.to_parquet(
+                    os.path.join(temporal, ARCHIVO_PARQUET), index=False, row_group_size=FILAS_POR_GRUPO
+                )
+            except Exception as e:
+                # Sin pyarrow o con columnas de tipos mezclados: sólo el pickle
+                print(f"Error guardando Parquet del dataset {dataset_id}: {e}")
+        with open(os.path.join(temporal, ARCHIVO_INFO), 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False)
+
+        try:
+            os.rename(temporal, ruta)
+        except OSError:
+            # Otro proceso registró el mismo contenido al mismo tiempo
+            shutil.rmtree(temporal, ignore_errors=True)
+
+        return info
+
+    def agregar(self, dataset_id: str, nuevos: Union[List[Dict], pd.DataFrame]) -> Dict:
+        """
+        Crea un dataset con los registros de `dataset_id` más `nuevos`
+
+        Los datasets son inmutables: el original se conserva y el ampliado
+        obtiene su propio id.
+
+        Args:
+            dataset_id: Dataset base
+            nuevos: Registros a agregar (lista o DataFrame)
+
+        Returns:
+            Información del dataset ampliado y el delta de agregados
+        """
+        if len(nuevos) == 0:
+            raise ValueError("No se proporcionaron registros para agregar")
+
+        df_nuevos = nuevos if isinstance(nuevos, pd.DataFrame) else pd.DataFrame(nuevos)
+        df = pd.concat([self.cargar(dataset_id), df_nuevos], ignore_index=True)
+        info = self.guardar(df, dataset_base=dataset_id)
+
+        return {
+            'dataset': info,
+            'delta': {
+                'dataset_id': info['dataset_id'],
+                'dataset_base': dataset_id,
+                'registros_nuevos': len(df_nuevos),
+                # Totales del dataset ampliado y conteos que cambiaron
+                'totales': {
+                    clave: valor for clave, valor in info['agregados'].items()
+                    if not isinstance(valor, dict)
+                },
+                'cambios': {
+                    clave: valor for clave, valor in
+                    AnalysisService.calcular_agregados(df_nuevos).items()
+                    if isinstance(valor, dict)
+                },
+            },
+        }
+
+    def cargar(self, dataset_id: str) -> pd.DataFrame:
+        """
+        Carga los registros de un dataset
+
+        Raises:
+            ValueError: Si el dataset no existe
+        """
+        return pd.read_pickle(os.path.join(self._ruta(dataset_id), ARCHIVO_DATOS))
+
+    def ruta_parquet(self, dataset_id: str) -> Optional[str]:
+        """
+        Ruta del Parquet de un dataset, o None si se registró sin él
+
+        Raises:
+            ValueError: Si el dataset no existe
+        """
+        ruta = os.path.join(self._ruta(dataset_id), ARCHIVO_PARQUET)
+        return ruta if os.path.exists(ruta) else None
+
+    def leer_filas(self, dataset_id: str, inicio: int, n: int) -> pd.DataFrame:
+        """
+        Registros [inicio, inicio + n) de un dataset
+
+        Con Parquet sólo se leen los row groups que contienen esas filas; sin
+        él se carga el dataset completo.
+
+        Raises:
+            ValueError: Si el dataset no existe
+        """
+        ruta = self.ruta_parquet(dataset_id)
+        if ruta is None:
+            return self.cargar(dataset_id).iloc[inicio:inicio + n].reset_index(drop=True)
+
+        import pyarrow.parquet as pq
+
+        archivo = pq.ParquetFile(ruta)
+        grupos = []
+        primera_fila = None
+        fila = 0
+        for grupo in range(archivo.num_row_groups):
+            filas_grupo = archivo.metadata.row_group(grupo).num_rows
+            if fila + filas_grupo > inicio and fila < inicio + n:
+                grupos.append(grupo)
+                if primera_fila is None:
+                    primera_fila = fila
+            fila += filas_grupo
+
+        if not grupos:
+            return archivo.schema_arrow.empty_table().to_pandas()
+
+        desde = inicio - primera_fila
+        return archivo.read_row_groups(grupos).to_pandas().iloc[desde:desde + n].reset_index(drop=True)
+
+    def info(self, dataset_id: str) -> Dict:
+        with open(os.path.join(self._ruta(dataset_id), ARCHIVO_INFO), encoding='utf-8') as f:
+            return json.load(f)
+
+    def existe(self, dataset_id: str) -> bool:
+        return os.path.isdir(os.path.join(self.directorio, os.path.basename(dataset_id)))
+
+    def eliminar(self, dataset_id: str) -> None:
+        shutil.rmtree(self._ruta(dataset_id), ignore_errors=True)
+
+    def _ruta(self, dataset_id: str) -> str:
+        ruta = os.path.join(self.directorio, os.path.basename(dataset_id))
+        if not os.path.isdir(ruta):
+            raise ValueError(f"El dataset '{dataset_id}' no existe")
+        return ruta
+
+
+@lru_cache()
+def get_dataset_service() -> DatasetService:
+    """Instancia compartida del servicio de datasets"""
+    settings = get_settings()
+    return DatasetService(
+        settings.DATASET_DIR,
+        parquet=settings.DATASET_PARQUET or settings.ANALISIS_ENGINE == 'duckdb'
+    )
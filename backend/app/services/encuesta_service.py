@@ -0,0 +1,410 @@
+"""
+Temas de la encuesta de salida (4FRH-209)
+Las respuestas de texto libre se normalizan, se vectorizan con hashing (sin
+vocabulario que crezca con cada archivo) y se agrupan en temas con
+MiniBatchKMeans. El modelo de temas es uno solo en disco: cada dataset nuevo
+lo actualiza con partial_fit, así que los temas conservan su número entre
+archivos y se refinan con las respuestas nuevas.
+
+scikit-learn se importa al vectorizar: el servidor sólo lee la versión del
+modelo (un JSON) para la clave de caché.
+"""
+
+import fcntl
+import json
+import os
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from app.config.settings import get_settings
+from app.utils.conteos import seleccionar_categorias, CATEGORIA_OTROS
+
+# Nombre del campo en los registros del frontend y en el modelo Employee
+CAMPOS_ENCUESTA = ('encuestaSalida4FRH209', 'encuesta_salida_4frh209')
+
+ARCHIVO_MODELO = 'modelo.joblib'
+ARCHIVO_INFO = 'modelo.json'
+ARCHIVO_BLOQUEO = 'modelo.lock'
+
+TERMINOS_POR_TEMA = 5
+EJEMPLOS_POR_TEMA = 3
+
+# Sin acentos: se comparan contra el texto ya normalizado. Incluye las
+# respuestas vacías habituales del formato ("N/A", "no aplica", "ninguno")
+STOPWORDS = frozenset("""
+    al algo algun alguna algunas alguno algunos ante antes aplica asi aun bien
+    cada casi como con contra cual cuando de del desde donde dos el ella ellas
+    ellos en entre era eran es esa esas ese eso esos esta estaba estan estar
+    estas este esto estos fue fueron ha habia han hasta hay la las le les lo
+    los mas me mi mis muy na nada ni ninguna ninguno no nos nosotros o otra
+    otras otro otros para pero poco por porque que se sea ser si sido sin sobre
+    solo son su sus tambien tan tanto te tenia tiene tienen todo todos tu un
+    una uno unos usted ya yo
+""".split())
+
+
+def normalizar_texto(textos: pd.Series) -> pd.Series:
+    """
+    Minúsculas, sin acentos ni signos: 'Mejor oferta salarial!' -> 'mejor oferta salarial'
+
+    Args:
+        textos: Respuestas (los nulos quedan como '')
+
+    Returns:
+        Serie de texto normalizado con el mismo índice
+    """
+    return (
+        textos.fillna('').astype(str).str.lower()
+        .str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+        .str.replace(r'[^a-z]+', ' ', regex=True)
+        .str.strip()
+    )
+
+
+class EncuestaService:
+    """
+    Modelo de temas de las respuestas de la encuesta de salida
+
+    Estructura:
+        {directorio}/modelo.joblib -> MiniBatchKMeans
+        {directorio}/modelo.json   -> versión, respuestas aprendidas y lotes
+        {directorio}/modelo.lock   -> bloqueo entre procesos al actualizar
+
+    Un dataset registrado se aprende una sola vez; de un dataset creado al
+    agregar registros a otro ya aprendido sólo se aprenden las filas nuevas.
+    Los registros de un request sólo entrenan el modelo si aún no existe.
+    """
+
+    def __init__(self, directorio: str, n_temas: int = 8, n_features: int = 2 ** 16):
+        self.directorio = directorio
+        self.n_temas = n_temas
+        self.n_features = n_features
+        os.makedirs(directorio, exist_ok=True)
+
+    def info(self) -> Optional[Dict]:
+        """Versión y estado del modelo de temas (None si no se ha entrenado)"""
+        try:
+            with open(os.path.join(self.directorio, ARCHIVO_INFO)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def version(self) -> Optional[str]:
+        info = self.info()
+        return info['version'] if info else None
+
+    def reiniciar(self) -> None:
+        """Descarta el modelo: el siguiente análisis entrena uno nuevo"""
+        with self._bloqueo():
+            for archivo in (ARCHIVO_INFO, ARCHIVO_MODELO):
+                try:
+                    os.remove(os.path.join(self.directorio, archivo))
+                except FileNotFoundError:
+                    pass
+
+    def analizar(
+        self,
+        data: Union[List[Dict], pd.DataFrame],
+        limite: Optional[int] = None,
+        lote: Optional[str] = None,
+        lote_base: Optional[str] = None,
+        filas_base: int = 0
+    ) -> Dict:
+        """
+        Asigna un tema a cada respuesta y distribuye los temas por área y supervisor
+
+        Las respuestas idénticas (tras normalizar) se vectorizan una vez y
+        pesan por su frecuencia, así que el costo depende de las respuestas
+        distintas y no del número de registros.
+
+        Args:
+            data: Registros de empleados con rotación
+            limite: Áreas/supervisores a listar; los demás se suman en 'Otros'
+            lote: Dataset de los registros (None = registros de un request)
+            lote_base: Dataset del que deriva `lote` (al agregar registros)
+            filas_base: Registros de `lote_base` (las primeras filas de `lote`)
+
+        Returns:
+            Diccionario con el formato de AnalisisEncuestas
+        """
+        df = pd.DataFrame(data)
+        campo = next((c for c in CAMPOS_ENCUESTA if c in df.columns), None)
+        textos = df[campo] if campo is not None else pd.Series('', index=df.index)
+
+        normalizados = normalizar_texto(textos)
+        # Respuestas distintas y, por registro, la posición de la suya
+        codigos, unicos = pd.factorize(normalizados)
+        terminos = self._terminos(unicos)
+        X = self._vectorizar(terminos)
+        con_contenido = np.diff(X.indptr) > 0
+        frecuencias = np.bincount(codigos, minlength=len(unicos))
+
+        aprendidas = self._actualizar(X, codigos, con_contenido, lote, lote_base, filas_base)
+        modelo = self._cargar_modelo()
+
+        respuesta = con_contenido[codigos]
+        temas_unicos = np.full(len(unicos), -1, dtype=np.int64)
+        if modelo is not None and con_contenido.any():
+            temas_unicos[con_contenido] = modelo.predict(X[con_contenido])
+        temas = temas_unicos[codigos]
+
+        n_temas = modelo.n_clusters if modelo is not None else 0
+        # Sin modelo todas las respuestas quedan sin tema (-1)
+        conteo_temas = np.bincount(temas[respuesta & (temas >= 0)], minlength=n_temas)
+        total_respuestas = int(respuesta.sum())
+        info = self.info() or {}
+
+        return {
+            'total_registros': len(df),
+            'total_respuestas': total_respuestas,
+            'sin_respuesta': len(df) - total_respuestas,
+            'respuestas_distintas': int(con_contenido.sum()),
+            'n_temas': n_temas,
+            'version_modelo': info.get('version'),
+            'respuestas_modelo': info.get('respuestas', 0),
+            'respuestas_aprendidas': aprendidas,
+            'temas': [
+                {
+                    'tema': tema,
+                    'terminos': claves,
+                    'ejemplos': ejemplos,
+                    'respuestas': int(conteo_temas[tema]),
+                    'porcentaje': round(conteo_temas[tema] / total_respuestas * 100, 2) if total_respuestas else 0,
+                }
+                for tema, (claves, ejemplos) in enumerate(
+                    self._describir_temas(terminos, textos, codigos, frecuencias, temas_unicos, n_temas)
+                )
+            ],
+            'por_area': self._distribucion(df, 'area', temas, respuesta, n_temas, limite),
+            'por_supervisor': self._distribucion(df, 'supervisor', temas, respuesta, n_temas, limite),
+        }
+
+    @staticmethod
+    def _terminos(textos: pd.Index) -> List[List[str]]:
+        """Palabras (sin stopwords) y bigramas de cada texto normalizado"""
+        from sklearn.feature_extraction.text import HashingVectorizer
+
+        analizador = HashingVectorizer(ngram_range=(1, 2), stop_words=list(STOPWORDS)).build_analyzer()
+        return [analizador(texto) for texto in textos]
+
+    def _vectorizar(self, terminos: List[List[str]]):
+        """
+        Matriz dispersa (CSR) con hashing de los términos, normalizada L2
+        (igual que HashingVectorizer; los términos se reutilizan para describir los temas)
+        """
+        from sklearn.feature_extraction import FeatureHasher
+        from sklearn.preprocessing import normalize
+
+        hasher = FeatureHasher(
+            n_features=self.n_features,
+            input_type='string',
+            alternate_sign=False,
+            dtype=np.float32
+        )
+        return normalize(hasher.transform(terminos))
+
+    def _actualizar(
+        self,
+        X,
+        codigos: np.ndarray,
+        con_contenido: np.ndarray,
+        lote: Optional[str],
+        lote_base: Optional[str],
+        filas_base: int
+    ) -> int:
+        """Entrena o actualiza el modelo con las filas que aún no aprendió; retorna cuántas"""
+        with self._bloqueo():
+            info = self.info()
+            lotes = info['lotes'] if info else []
+
+            if lote is not None and lote in lotes:
+                return 0
+            if lote is not None and lote_base in lotes:
+                codigos = codigos[filas_base:]
+            elif lote is None and info is not None:
+                return 0
+
+            # Peso de cada respuesta distinta = veces que aparece en las filas a aprender
+            pesos = np.bincount(codigos, minlength=X.shape[0]).astype(np.float64)
+            pesos[~con_contenido] = 0
+            filas = np.flatnonzero(pesos)
+            if len(filas) == 0:
+                return 0
+
+            if info is None:
+                if len(filas) < self.n_temas:
+                    # Muy pocas respuestas distintas para separar los temas
+                    return 0
+                modelo = self._nuevo_modelo()
+                modelo.fit(X[filas], sample_weight=pesos[filas])
+                info = {'id': uuid.uuid4().hex[:8], 'actualizaciones': 0, 'respuestas': 0, 'lotes': []}
+            else:
+                modelo = self._cargar_modelo()
+                modelo.partial_fit(X[filas], sample_weight=pesos[filas])
+
+            aprendidas = int(pesos.sum())
+            info['actualizaciones'] += 1
+            info['respuestas'] += aprendidas
+            info['version'] = f"{info['id']}.{info['actualizaciones']}"
+            info['n_temas'] = modelo.n_clusters
+            info['n_features'] = self.n_features
+            info['actualizado'] = datetime.now().isoformat()
+            if lote is not None:
+                info['lotes'].append(lote)
+
+            self._guardar(modelo, info)
+            return aprendidas
+
+    def _nuevo_modelo(self):
+        from sklearn.cluster import MiniBatchKMeans
+
+        return MiniBatchKMeans(
+            n_clusters=self.n_temas,
+            batch_size=2048,
+            n_init=3,
+            random_state=42
+        )
+
+    def _cargar_modelo(self):
+        try:
+            return joblib.load(os.path.join(self.directorio, ARCHIVO_MODELO))
+        except FileNotFoundError:
+            return None
+
+    def _guardar(self, modelo, info: Dict) -> None:
+        """Escribe modelo y metadata con rename atómico (primero el modelo)"""
+        for archivo, escribir in (
+            (ARCHIVO_MODELO, lambda ruta: joblib.dump(modelo, ruta)),
+            (ARCHIVO_INFO, lambda ruta: _escribir_json(ruta, info)),
+        ):
+            ruta = os.path.join(self.directorio, archivo)
+            temporal = f'{ruta}.{uuid.uuid4().hex}.tmp'
+            escribir(temporal)
+            os.replace(temporal, ruta)
+
+    @contextmanager
+    def _bloqueo(self):
+        """Bloqueo exclusivo entre procesos (workers y pool de cómputo)"""
+        with open(os.path.join(self.directorio, ARCHIVO_BLOQUEO), 'a') as archivo:
+            fcntl.flock(archivo, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(archivo, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _describir_temas(
+        terminos: List[List[str]],
+        textos: pd.Series,
+        codigos: np.ndarray,
+        frecuencias: np.ndarray,
+        temas_unicos: np.ndarray,
+        n_temas: int
+    ) -> List[Tuple[List[str], List[str]]]:
+        """
+        Términos y respuestas más representativos de cada tema
+
+        El hashing no es invertible: los términos se cuentan sobre las
+        respuestas asignadas al tema y se ponderan por en cuántos temas
+        aparecen (los términos que aparecen en todos no distinguen a ninguno).
+        Los términos se enumeran sólo para este análisis; el modelo no guarda
+        vocabulario.
+        """
+        if n_temas == 0:
+            return []
+
+        # Un término por fila: (término, respuesta distinta de la que proviene)
+        explotados = pd.Series(terminos, dtype=object).explode().dropna()
+        origen = explotados.index.to_numpy()
+        ids, vocabulario = pd.factorize(explotados)
+        temas = temas_unicos[origen]
+        asignados = temas >= 0
+
+        # Tabla tema x término con la frecuencia de las respuestas como peso
+        tabla = np.bincount(
+            temas[asignados] * len(vocabulario) + ids[asignados],
+            weights=frecuencias[origen][asignados],
+            minlength=n_temas * len(vocabulario)
+        ).reshape(n_temas, len(vocabulario))
+        puntajes = tabla * np.log1p(n_temas / np.maximum((tabla > 0).sum(axis=0), 1))
+
+        # Texto original de cada respuesta distinta (su primera aparición)
+        originales = pd.Series(textos.to_numpy()).groupby(codigos).first()
+
+        descripciones = []
+        for tema in range(n_temas):
+            mejores = np.argsort(-puntajes[tema], kind='stable')[:TERMINOS_POR_TEMA]
+            mejores = mejores[puntajes[tema][mejores] > 0]
+
+            del_tema = np.flatnonzero(temas_unicos == tema)
+            frecuentes = del_tema[np.argsort(-frecuencias[del_tema], kind='stable')][:EJEMPLOS_POR_TEMA]
+
+            descripciones.append((
+                [str(vocabulario[i]) for i in mejores],
+                [str(originales[i]).strip() for i in frecuentes],
+            ))
+
+        return descripciones
+
+    @staticmethod
+    def _distribucion(
+        df: pd.DataFrame,
+        columna: str,
+        temas: np.ndarray,
+        respuesta: np.ndarray,
+        n_temas: int,
+        limite: Optional[int]
+    ) -> List[Dict]:
+        """Respuestas por tema de cada categoría, de la que tiene más a la que tiene menos"""
+        if columna not in df.columns or n_temas == 0:
+            return []
+
+        categorias = df[columna].to_numpy()[respuesta]
+        validas = pd.notna(categorias)
+        codigos, valores = pd.factorize(pd.Series(categorias[validas]))
+        # Tabla categoría x tema en un solo bincount
+        tabla = np.bincount(
+            codigos * n_temas + temas[respuesta][validas], minlength=len(valores) * n_temas
+        ).reshape(len(valores), n_temas)
+
+        seleccion = seleccionar_categorias(pd.Series(tabla.sum(axis=1), index=valores), limite)
+        posiciones = valores.get_indexer(seleccion['valores']) if len(valores) else []
+        filas = [(str(valor), tabla[i]) for valor, i in zip(seleccion['valores'], posiciones)]
+
+        if seleccion['otros_categorias'] > 0:
+            resto = np.ones(len(valores), dtype=bool)
+            resto[posiciones] = False
+            filas.append((CATEGORIA_OTROS, tabla[resto].sum(axis=0)))
+
+        return [
+            {
+                'categoria': categoria,
+                'total': int(conteos.sum()),
+                'conteos': conteos.tolist(),
+                'tema_predominante': int(np.argmax(conteos)),
+            }
+            for categoria, conteos in filas
+        ]
+
+
+def _escribir_json(ruta: str, contenido: Dict) -> None:
+    with open(ruta, 'w') as f:
+        json.dump(contenido, f)
+
+
+@lru_cache()
+def get_encuesta_service() -> EncuestaService:
+    """Modelo de temas compartido por el servidor y los procesos de cómputo"""
+    settings = get_settings()
+    return EncuestaService(
+        settings.ENCUESTAS_DIR,
+        n_temas=settings.ENCUESTAS_TEMAS,
+        n_features=settings.ENCUESTAS_N_FEATURES
+    )
@@ -0,0 +1,231 @@
+"""
+Servicio de eventos en vivo
+Registro de eventos en SQLite que los procesos de cómputo publican y los
+clientes reciben por Server-Sent Events
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config.settings import get_settings
+
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS eventos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    canal TEXT NOT NULL,
+    tipo TEXT NOT NULL,
+    datos TEXT NOT NULL,
+    fecha TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_eventos_canal ON eventos (canal, id);
+"""
+
+# Canal que reciben todos los suscriptores del dashboard
+CANAL_DATASETS = 'datasets'
+
+
+def canal_job(job_id: str) -> str:
+    return f'job:{job_id}'
+
+
+class EventService:
+    """
+    Eventos ordenados por id en la misma base SQLite de los jobs
+
+    Cualquier proceso (servidor o cómputo) publica con un INSERT; los
+    suscriptores leen los eventos con id mayor al último recibido. El id
+    sirve como `Last-Event-ID` de SSE, así un cliente que se reconecta
+    recibe lo que se perdió sin repetir eventos.
+
+    Los suscriptores de un proceso comparten un solo sondeo: una tarea lee
+    los eventos nuevos de todos los canales en el threadpool (SQLite es
+    síncrono y puede esperar el bloqueo de WAL) y los reparte en la cola de
+    cada suscriptor. El costo del sondeo no crece con los dashboards abiertos.
+    """
+
+    def __init__(self, ruta_db: str, intervalo_s: float = 0.5, heartbeat_s: float = 15):
+        self.ruta_db = ruta_db
+        self.intervalo_s = intervalo_s
+        self.heartbeat_s = heartbeat_s
+        # Sondeo compartido: último id repartido, tarea y (cola, canales) de cada suscriptor
+        self._cursor = 0
+        self._sondeo: Optional[asyncio.Task] = None
+        self._suscriptores: Set[Tuple[asyncio.Queue, frozenset]] = set()
+
+        directorio = os.path.dirname(ruta_db)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        with self._conectar() as conexion:
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.executescript(_ESQUEMA)
+
+    def publicar(self, canal: str, tipo: str, datos: Dict) -> int:
+        """
+        Publica un evento
+
+        Args:
+            canal: Canal del evento (p. ej. 'job:<id>' o 'datasets')
+            tipo: Nombre del evento SSE
+            datos: Contenido serializable a JSON
+
+        Returns:
+            Id del evento
+        """
+        with self._conectar() as conexion:
+            cursor = conexion.execute(
+                'INSERT INTO eventos (canal, tipo, datos, fecha) VALUES (?, ?, ?, ?)',
+                (canal, tipo, json.dumps(datos, default=str), datetime.now().isoformat())
+            )
+            return cursor.lastrowid
+
+    def leer(self, canales: Optional[List[str]], desde_id: int = 0, limite: int = 100) -> List[Dict]:
+        """Eventos de los canales (None = todos) con id mayor a `desde_id`, en orden"""
+        condicion = ''
+        if canales is not None:
+            condicion = f"canal IN ({', '.join('?' for _ in canales)}) AND "
+        with self._conectar() as conexion:
+            filas = conexion.execute(
+                f'SELECT id, canal, tipo, datos FROM eventos '
+                f'WHERE {condicion}id > ? ORDER BY id LIMIT ?',
+                (*(canales or []), desde_id, limite)
+            ).fetchall()
+
+        return [{**dict(fila), 'datos': json.loads(fila['datos'])} for fila in filas]
+
+    def ultimo_id(self) -> int:
+        with self._conectar() as conexion:
+            return conexion.execute('SELECT COALESCE(MAX(id), 0) FROM eventos').fetchone()[0]
+
+    async def suscribir(
+        self,
+        canales: List[str],
+        desde_id: Optional[int] = None
+    ) -> AsyncIterator[Optional[Dict]]:
+        """
+        Itera los eventos de los canales a medida que se publican
+
+        Cada `heartbeat_s` segundos sin eventos produce None, para que el
+        endpoint envíe un comentario y los proxies no cierren la conexión.
+
+        Args:
+            canales: Canales a escuchar
+            desde_id: Último id recibido; por defecto sólo eventos nuevos
+        """
+        await self._iniciar_sondeo()
+
+        # Desde aquí el sondeo reparte los eventos posteriores a `corte`; los
+        # anteriores que el cliente no recibió se leen aparte
+        cola: asyncio.Queue = asyncio.Queue()
+        suscripcion = (cola, frozenset(canales))
+        self._suscriptores.add(suscripcion)
+        corte = self._cursor
+        if desde_id is None:
+            desde_id = corte
+
+        try:
+            while desde_id < corte:
+                pendientes = [
+                    evento for evento in await run_in_threadpool(self.leer, canales, desde_id)
+                    if evento['id'] <= corte
+                ]
+                if not pendientes:
+                    break
+                for evento in pendientes:
+                    desde_id = evento['id']
+                    yield evento
+
+            while True:
+                try:
+                    evento = await asyncio.wait_for(cola.get(), timeout=self.heartbeat_s)
+                except asyncio.TimeoutError:
+                    yield None
+                    continue
+                if evento['id'] > desde_id:
+                    desde_id = evento['id']
+                    yield evento
+        finally:
+            self._suscriptores.discard(suscripcion)
+
+    async def _iniciar_sondeo(self) -> None:
+        """Inicia el sondeo compartido si no hay uno en curso en este event loop"""
+        if self._sondeo_activo():
+            return
+
+        cursor = await run_in_threadpool(self.ultimo_id)
+        if not self._sondeo_activo():
+            self._cursor = cursor
+            self._sondeo = asyncio.ensure_future(self._sondear())
+
+    def _sondeo_activo(self) -> bool:
+        return (
+            self._sondeo is not None
+            and not self._sondeo.done()
+            and self._sondeo.get_loop() is asyncio.get_running_loop()
+        )
+
+    async def _sondear(self, limite: int = 500) -> None:
+        """Lee los eventos nuevos y los reparte mientras haya suscriptores"""
+        while self._suscriptores:
+            try:
+                eventos = await run_in_threadpool(self.leer, None, self._cursor, limite)
+            except sqlite3.Error as e:
+                print(f"Error leyendo eventos: {e}")
+                eventos = []
+
+            for evento in eventos:
+                self._cursor = evento['id']
+                for cola, canales in self._suscriptores:
+                    if evento['canal'] in canales:
+                        cola.put_nowait(evento)
+
+            # Con un lote completo quedan más eventos: se leen sin esperar
+            if len(eventos) < limite:
+                await asyncio.sleep(self.intervalo_s)
+
+    def depurar(self, dias: int) -> int:
+        """Elimina los eventos con más de `dias` días"""
+        limite = (datetime.now() - timedelta(days=dias)).isoformat()
+        with self._conectar() as conexion:
+            return conexion.execute('DELETE FROM eventos WHERE fecha < ?', (limite,)).rowcount
+
+    @contextmanager
+    def _conectar(self):
+        conexion = sqlite3.connect(self.ruta_db, timeout=30)
+        conexion.row_factory = sqlite3.Row
+        try:
+            with conexion:
+                yield conexion
+        finally:
+            conexion.close()
+
+
+def formato_sse(evento: Optional[Dict]) -> str:
+    """Serializa un evento en el formato de texto de Server-Sent Events"""
+    if evento is None:
+        return ': heartbeat\n\n'
+    return (
+        f"id: {evento['id']}\n"
+        f"event: {evento['tipo']}\n"
+        f"data: {json.dumps(evento['datos'], ensure_ascii=False, default=str)}\n\n"
+    )
+
+
+@lru_cache()
+def get_event_service() -> EventService:
+    """Servicio de eventos del proceso (comparte la base de los jobs)"""
+    settings = get_settings()
+    return EventService(
+        settings.JOB_DB_PATH,
+        intervalo_s=settings.EVENTOS_INTERVALO_S,
+        heartbeat_s=settings.EVENTOS_HEARTBEAT_S
+    )
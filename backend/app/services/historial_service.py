@@ -0,0 +1,378 @@
+"""
+Historial longitudinal de bajas
+Cada archivo subido es un lote independiente; el historial reúne las bajas
+de todos los lotes en SQLite, una por (numero_empleado, fechaBajaSistema),
+para consultar la trayectoria de un empleado y detectar reingresos
+(empleados recontratados que vuelven a causar baja).
+"""
+
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from app.config.settings import get_settings
+
+# La tabla está ordenada físicamente por su llave (WITHOUT ROWID): el
+# historial de un empleado es una búsqueda en el árbol B más una lectura
+# contigua, y el análisis de reingresos lee todo en orden sin ordenar
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS bajas (
+    numero_empleado TEXT NOT NULL,
+    fecha_baja TEXT NOT NULL,
+    fecha_alta TEXT,
+    area TEXT,
+    supervisor TEXT,
+    puesto TEXT,
+    tipo_baja TEXT,
+    antiguedad_semanas REAL,
+    salario REAL,
+    rotacion_temprana INTEGER,
+    registro TEXT NOT NULL,
+    lote TEXT,
+    fecha_carga TEXT NOT NULL,
+    PRIMARY KEY (numero_empleado, fecha_baja)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_bajas_fecha ON bajas (fecha_baja);
+CREATE INDEX IF NOT EXISTS idx_bajas_area ON bajas (area, fecha_baja);
+CREATE INDEX IF NOT EXISTS idx_bajas_supervisor ON bajas (supervisor, fecha_baja);
+"""
+
+# Columna del historial -> campo del registro (esquema del frontend)
+CAMPOS = {
+    'numero_empleado': 'numeroEmpleado',
+    'fecha_baja': 'fechaBajaSistema',
+    'fecha_alta': 'fechaAlta',
+    'area': 'area',
+    'supervisor': 'supervisor',
+    'puesto': 'puesto',
+    'tipo_baja': 'tipoBajaNormalizado',
+    'antiguedad_semanas': 'antiguedadSemanas',
+    'salario': 'salario',
+    'rotacion_temprana': 'rotacionTemprana',
+}
+
+_NUMERICAS = ('antiguedad_semanas', 'salario', 'rotacion_temprana')
+
+_COLUMNAS = list(CAMPOS) + ['registro', 'lote', 'fecha_carga']
+_COLUMNAS_INFO = ', '.join(c for c in _COLUMNAS if c != 'registro')
+# Columnas que una nueva versión de la baja sobrescribe
+_ACTUALIZAR = ', '.join(f'{c} = excluded.{c}' for c in _COLUMNAS[2:])
+
+
+def _texto(serie: pd.Series) -> pd.Series:
+    """Valores como texto sin espacios (None si faltan); 1234.0 se guarda como '1234'"""
+    validos = serie.notna()
+    texto = pd.Series(None, index=serie.index, dtype=object)
+    if pd.api.types.is_float_dtype(serie):
+        enteros = validos & (serie % 1 == 0)
+        texto[enteros] = serie[enteros].astype(np.int64).astype(str)
+        validos &= ~enteros
+    texto[validos] = serie[validos].astype(str).str.strip()
+    return texto.where(texto != '', None)
+
+
+def _fecha(serie: pd.Series) -> pd.Series:
+    """Fechas en ISO (YYYY-MM-DD); None si faltan o no se pueden leer"""
+    fechas = pd.to_datetime(serie, errors='coerce')
+    return fechas.dt.strftime('%Y-%m-%d').astype(object).where(fechas.notna(), None)
+
+
+def _columna(df: pd.DataFrame, columna: str) -> Optional[pd.Series]:
+    """Columna del historial a partir del campo del registro (None si falta)"""
+    campo = CAMPOS[columna]
+    if columna == 'tipo_baja' and campo not in df.columns:
+        campo = 'tipoBaja'
+    if campo not in df.columns:
+        return None
+    if columna.startswith('fecha_'):
+        return _fecha(df[campo])
+    if columna in _NUMERICAS:
+        return pd.to_numeric(df[campo], errors='coerce')
+    return _texto(df[campo])
+
+
+class HistorialService:
+    """
+    Historial de bajas persistente en SQLite (modo WAL)
+
+    Llave: (numero_empleado, fecha_baja). La misma baja en varios lotes (p. ej.
+    el archivo mensual y el acumulado) es un solo registro; la versión más
+    reciente sobrescribe a la anterior. Un empleado recontratado que vuelve a
+    causar baja tiene otra fecha de baja y, por lo tanto, otro registro.
+    """
+
+    def __init__(self, ruta_db: str):
+        self.ruta_db = ruta_db
+
+        directorio = os.path.dirname(ruta_db)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        with self._conectar() as conexion:
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.executescript(_ESQUEMA)
+
+    def registrar(self, data: Union[List[Dict], pd.DataFrame], lote: Optional[str] = None) -> Dict:
+        """
+        Inserta o actualiza un lote de bajas
+
+        Args:
+            data: Registros de empleados con rotación (lista o DataFrame)
+            lote: Origen del lote (p. ej. el `dataset_id`)
+
+        Returns:
+            Conteos del lote: recibidos, nuevos, actualizados, sin_cambios,
+            duplicados (repetidos dentro del lote), descartados (sin número
+            de empleado o fecha de baja válida) y total del historial
+        """
+        df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+        recibidos = len(df)
+
+        filas = pd.DataFrame({columna: _columna(df, columna) for columna in CAMPOS}, index=df.index)
+
+        validas = filas['numero_empleado'].notna() & filas['fecha_baja'].notna()
+        filas = filas[validas].copy()
+        # El registro completo se conserva como JSON para consultar la trayectoria
+        filas['registro'] = df[validas].to_json(
+            orient='records', lines=True, date_format='iso', force_ascii=False
+        ).splitlines() if len(filas) else []
+        filas['lote'] = lote
+        filas['fecha_carga'] = datetime.now().isoformat()
+
+        # Dentro del lote gana la última aparición de cada baja
+        unicas = filas.drop_duplicates(['numero_empleado', 'fecha_baja'], keep='last')
+        unicas = unicas[_COLUMNAS].astype(object).where(unicas[_COLUMNAS].notna(), None)
+
+        marcadores = ', '.join('?' * len(_COLUMNAS))
+        with self._conectar() as conexion:
+            conexion.execute('BEGIN IMMEDIATE')
+            conexion.execute(f'CREATE TEMP TABLE lote AS SELECT {", ".join(_COLUMNAS)} FROM bajas LIMIT 0')
+            conexion.executemany(
+                f'INSERT INTO lote VALUES ({marcadores})', unicas.itertuples(index=False, name=None)
+            )
+            nuevos, actualizados = conexion.execute("""
+                SELECT
+                    count(*) FILTER (WHERE b.numero_empleado IS NULL),
+                    count(*) FILTER (WHERE b.numero_empleado IS NOT NULL AND b.registro IS NOT l.registro)
+                FROM temp.lote l
+                LEFT JOIN bajas b USING (numero_empleado, fecha_baja)
+            """).fetchone()
+            # En el orden de la llave las inserciones no parten páginas al azar
+            conexion.execute(f"""
+                INSERT INTO bajas ({', '.join(_COLUMNAS)})
+                SELECT {', '.join(_COLUMNAS)} FROM temp.lote
+                ORDER BY numero_empleado, fecha_baja
+                ON CONFLICT (numero_empleado, fecha_baja) DO UPDATE SET {_ACTUALIZAR}
+                WHERE bajas.registro IS NOT excluded.registro
+            """)
+            conexion.execute('DROP TABLE temp.lote')
+            total = conexion.execute('SELECT count(*) FROM bajas').fetchone()[0]
+
+        return {
+            'recibidos': recibidos,
+            'nuevos': nuevos,
+            'actualizados': actualizados,
+            'sin_cambios': len(unicas) - nuevos - actualizados,
+            'duplicados': len(filas) - len(unicas),
+            'descartados': recibidos - len(filas),
+            'total_historial': total,
+        }
+
+    def historial_empleado(self, numero_empleado: str) -> List[Dict]:
+        """
+        Bajas de un empleado de la más antigua a la más reciente, con el
+        registro completo de cada una
+
+        Raises:
+            ValueError: Si el empleado no tiene bajas en el historial
+        """
+        with self._conectar() as conexion:
+            filas = conexion.execute(
+                f'SELECT {_COLUMNAS_INFO}, registro FROM bajas '
+                'WHERE numero_empleado = ? ORDER BY fecha_baja',
+                (numero_empleado,)
+            ).fetchall()
+
+        if not filas:
+            raise ValueError(f"El empleado '{numero_empleado}' no tiene bajas en el historial")
+        return [{**dict(fila), 'registro': json.loads(fila['registro'])} for fila in filas]
+
+    def buscar(
+        self,
+        area: Optional[str] = None,
+        supervisor: Optional[str] = None,
+        desde: Optional[str] = None,
+        hasta: Optional[str] = None,
+        limite: int = 100,
+        offset: int = 0
+    ) -> List[Dict]:
+        """
+        Bajas filtradas por área, supervisor y rango de fechas (cada filtro
+        usa su índice), de la más reciente a la más antigua
+
+        Args:
+            area: Área exacta
+            supervisor: Supervisor exacto
+            desde: Fecha de baja mínima (YYYY-MM-DD, inclusive)
+            hasta: Fecha de baja máxima (YYYY-MM-DD, inclusive)
+            limite: Bajas a retornar
+            offset: Bajas a saltar (paginación)
+        """
+        condiciones = []
+        parametros: list = []
+        for condicion, valor in (
+            ('area = ?', area),
+            ('supervisor = ?', supervisor),
+            ('fecha_baja >= ?', desde),
+            ('fecha_baja <= ?', hasta),
+        ):
+            if valor is not None:
+                condiciones.append(condicion)
+                parametros.append(valor)
+
+        consulta = f'SELECT {_COLUMNAS_INFO} FROM bajas'
+        if condiciones:
+            consulta += ' WHERE ' + ' AND '.join(condiciones)
+        consulta += ' ORDER BY fecha_baja DESC, numero_empleado LIMIT ? OFFSET ?'
+
+        with self._conectar() as conexion:
+            return [dict(fila) for fila in conexion.execute(consulta, parametros + [limite, offset])]
+
+    def analizar_reingresos(self, limite: int = 20) -> Dict:
+        """
+        Reingresos en todo el historial
+
+        Un reingreso es una baja de un empleado que ya tenía una baja
+        anterior. Se calcula por columnas sobre el historial ordenado por
+        (numero_empleado, fecha_baja): cada fila se compara con la anterior.
+
+        Args:
+            limite: Áreas y empleados a listar
+
+        Returns:
+            Totales, días fuera entre la baja anterior y la recontratación,
+            reingresos por área de la baja anterior y los empleados con más bajas
+        """
+        with self._conectar() as conexion:
+            cursor = conexion.execute("""
+                SELECT numero_empleado, fecha_baja, fecha_alta, area, supervisor,
+                       tipo_baja, rotacion_temprana
+                FROM bajas ORDER BY numero_empleado, fecha_baja
+            """)
+            df = pd.DataFrame.from_records(cursor.fetchall(), columns=[c[0] for c in cursor.description])
+
+        total_bajas = len(df)
+        if total_bajas == 0:
+            return {
+                'total_bajas': 0,
+                'total_empleados': 0,
+                'empleados_con_reingreso': 0,
+                'tasa_reingreso': 0.0,
+                'total_reingresos': 0,
+                'dias_fuera_mediana': None,
+                'dias_fuera_promedio': None,
+                'reingresos_tras_bxf': 0,
+                'reingresos_misma_area': 0,
+                'reingresos_mismo_supervisor': 0,
+                'reingresos_con_rotacion_temprana': 0,
+                'por_area': [],
+                'empleados_frecuentes': [],
+            }
+
+        empleados = df['numero_empleado'].to_numpy()
+        # reingreso[i]: la fila i tiene una baja anterior del mismo empleado (la fila i-1)
+        reingreso = np.zeros(total_bajas, dtype=bool)
+        reingreso[1:] = empleados[1:] == empleados[:-1]
+        posiciones = np.flatnonzero(reingreso)
+        previas = posiciones - 1
+
+        fecha_baja = pd.to_datetime(df['fecha_baja'], format='%Y-%m-%d')
+        fecha_alta = pd.to_datetime(df['fecha_alta'], format='%Y-%m-%d', errors='coerce')
+        dias_fuera = (
+            fecha_alta.to_numpy()[posiciones] - fecha_baja.to_numpy()[previas]
+        ) / np.timedelta64(1, 'D')
+        # Sin fecha de alta o con periodos traslapados no hay días fuera válidos
+        dias_fuera = dias_fuera[~np.isnan(dias_fuera) & (dias_fuera >= 0)]
+
+        def iguales(columna: str) -> int:
+            valores = df[columna].to_numpy()
+            return int(np.sum(
+                (valores[posiciones] == valores[previas]) & pd.notna(valores[posiciones])
+            ))
+
+        tipo_previo = df['tipo_baja'].to_numpy()[previas]
+        temprana = df['rotacion_temprana'].to_numpy()[posiciones]
+
+        bajas_por_empleado = df.groupby('numero_empleado', sort=False).size()
+        total_empleados = len(bajas_por_empleado)
+        con_reingreso = int((bajas_por_empleado > 1).sum())
+
+        # Por área de la baja anterior: de cada 100 bajas del área, cuántas
+        # personas volvieron a ser contratadas (y a causar baja)
+        bajas_area = df['area'].value_counts()
+        reingresos_area = df['area'].iloc[previas].value_counts()
+        por_area = [
+            {
+                'area': str(area),
+                'bajas': int(bajas_area[area]),
+                'reingresos': int(n),
+                'tasa_reingreso': round(n / bajas_area[area] * 100, 2),
+            }
+            for area, n in reingresos_area.head(limite).items()
+        ]
+
+        frecuentes = bajas_por_empleado[bajas_por_empleado > 1].nlargest(limite, keep='first')
+        agrupado = df[df['numero_empleado'].isin(frecuentes.index)].groupby('numero_empleado')
+        primera = agrupado['fecha_baja'].min()
+        ultima = agrupado['fecha_baja'].max()
+        areas = agrupado['area'].agg(lambda serie: sorted(serie.dropna().unique().tolist()))
+        empleados_frecuentes = [
+            {
+                'numero_empleado': str(numero),
+                'total_bajas': int(n),
+                'primera_baja': primera[numero],
+                'ultima_baja': ultima[numero],
+                'areas': areas[numero],
+            }
+            for numero, n in frecuentes.items()
+        ]
+
+        return {
+            'total_bajas': total_bajas,
+            'total_empleados': total_empleados,
+            'empleados_con_reingreso': con_reingreso,
+            'tasa_reingreso': round(con_reingreso / total_empleados * 100, 2),
+            'total_reingresos': len(posiciones),
+            'dias_fuera_mediana': round(float(np.median(dias_fuera)), 1) if len(dias_fuera) else None,
+            'dias_fuera_promedio': round(float(dias_fuera.mean()), 1) if len(dias_fuera) else None,
+            'reingresos_tras_bxf': int(np.sum(tipo_previo == 'BXF')),
+            'reingresos_misma_area': iguales('area'),
+            'reingresos_mismo_supervisor': iguales('supervisor'),
+            'reingresos_con_rotacion_temprana': int(np.sum(temprana == 1)),
+            'por_area': por_area,
+            'empleados_frecuentes': empleados_frecuentes,
+        }
+
+    @contextmanager
+    def _conectar(self):
+        """Conexión por operación: confirma al salir y siempre se cierra"""
+        conexion = sqlite3.connect(self.ruta_db, timeout=30)
+        conexion.row_factory = sqlite3.Row
+        try:
+            with conexion:
+                yield conexion
+        finally:
+            conexion.close()
+
+
+@lru_cache()
+def get_historial_service() -> HistorialService:
+    """Historial de bajas compartido por el servidor y los procesos de cómputo"""
+    return HistorialService(get_settings().HISTORIAL_DB_PATH)
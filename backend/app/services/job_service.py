@@ -0,0 +1,370 @@
+"""
+Servicio de jobs en segundo plano
+Cola persistente en SQLite para entrenamientos, scoring masivo y análisis
+grandes que corren en procesos de cómputo mientras el dashboard sigue
+respondiendo
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config.settings import get_settings
+from app.services import compute_tasks
+from app.services.compute_executor import ComputeExecutor
+from app.services.event_service import EventService, canal_job
+
+
+ESTADO_PENDIENTE = 'pendiente'
+ESTADO_EN_EJECUCION = 'en_ejecucion'
+ESTADO_COMPLETADO = 'completado'
+ESTADO_ERROR = 'error'
+ESTADO_CANCELADO = 'cancelado'
+
+ESTADOS_FINALES = (ESTADO_COMPLETADO, ESTADO_ERROR, ESTADO_CANCELADO)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    tipo TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    progreso REAL NOT NULL DEFAULT 0,
+    mensaje TEXT,
+    parametros TEXT NOT NULL,
+    resultado TEXT,
+    error TEXT,
+    cancelacion_solicitada INTEGER NOT NULL DEFAULT 0,
+    pid INTEGER,
+    fecha_creacion TEXT NOT NULL,
+    fecha_inicio TEXT,
+    fecha_fin TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_estado ON jobs (estado);
+CREATE INDEX IF NOT EXISTS idx_jobs_fecha ON jobs (fecha_creacion);
+"""
+
+_COLUMNAS_INFO = (
+    'job_id, tipo, estado, progreso, mensaje, error, '
+    'fecha_creacion, fecha_inicio, fecha_fin'
+)
+
+
+class JobCancelado(Exception):
+    """El job recibió una solicitud de cancelación"""
+
+
+class JobService:
+    """
+    Cola de jobs persistente
+
+    Los jobs se guardan en SQLite (modo WAL) para que el servidor y los
+    procesos de cómputo lean y escriban el estado a la vez, y para que los
+    jobs pendientes sobrevivan a un reinicio. Cada job corre en el pool de
+    procesos propio del servicio, separado del que atiende los requests
+    interactivos.
+
+    La cancelación es cooperativa: un job pendiente se cancela de inmediato
+    y uno en ejecución se detiene en su siguiente reporte de progreso.
+
+    Cada cambio de estado y cada reporte de progreso se publica además como
+    evento en el canal 'job:<id>' para los clientes suscritos por SSE.
+    """
+
+    def __init__(self, ruta_db: str, executor: Optional[ComputeExecutor] = None):
+        self.ruta_db = ruta_db
+        self.executor = executor
+        # Referencias a las tareas en curso para que no las recolecte el GC
+        self._tareas: set = set()
+
+        directorio = os.path.dirname(ruta_db)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        with self._conectar() as conexion:
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.executescript(_ESQUEMA)
+
+        self.eventos = EventService(ruta_db)
+
+    def crear(self, tipo: str, parametros: Dict) -> Dict:
+        """
+        Registra un job pendiente y lo envía al pool de procesos
+
+        Args:
+            tipo: Tipo de job (ver TAREAS_JOB)
+            parametros: Parámetros serializables a JSON
+
+        Returns:
+            Información del job creado
+        """
+        if tipo not in TAREAS_JOB:
+            raise ValueError(
+                f"Tipo de job inválido '{tipo}'. Debe ser uno de: {', '.join(TAREAS_JOB)}"
+            )
+
+        job_id = uuid.uuid4().hex
+        with self._conectar() as conexion:
+            conexion.execute(
+                'INSERT INTO jobs (job_id, tipo, estado, parametros, fecha_creacion) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (job_id, tipo, ESTADO_PENDIENTE, json.dumps(parametros), datetime.now().isoformat())
+            )
+
+        self._despachar(job_id)
+        return self.obtener(job_id)
+
+    def obtener(self, job_id: str) -> Dict:
+        """
+        Estado y progreso de un job
+
+        Raises:
+            ValueError: Si el job no existe
+        """
+        with self._conectar() as conexion:
+            fila = conexion.execute(
+                f'SELECT {_COLUMNAS_INFO} FROM jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+
+        if fila is None:
+            raise ValueError(f"El job '{job_id}' no existe")
+        return dict(fila)
+
+    def listar(self, estado: Optional[str] = None, limite: int = 50) -> List[Dict]:
+        """Jobs del más reciente al más antiguo, opcionalmente filtrados por estado"""
+        consulta = f'SELECT {_COLUMNAS_INFO} FROM jobs'
+        parametros: tuple = ()
+        if estado is not None:
+            consulta += ' WHERE estado = ?'
+            parametros = (estado,)
+        consulta += ' ORDER BY fecha_creacion DESC LIMIT ?'
+
+        with self._conectar() as conexion:
+            return [dict(fila) for fila in conexion.execute(consulta, parametros + (limite,))]
+
+    def resultado(self, job_id: str) -> Any:
+        """
+        Resultado de un job completado
+
+        Raises:
+            ValueError: Si el job no existe o aún no termina correctamente
+        """
+        with self._conectar() as conexion:
+            fila = conexion.execute(
+                'SELECT estado, resultado FROM jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+
+        if fila is None:
+            raise ValueError(f"El job '{job_id}' no existe")
+        if fila['estado'] != ESTADO_COMPLETADO:
+            raise ValueError(f"El job '{job_id}' no ha terminado (estado: {fila['estado']})")
+        return json.loads(fila['resultado'])
+
+    def cancelar(self, job_id: str) -> Dict:
+        """Solicita la cancelación de un job; no tiene efecto si ya terminó"""
+        self.obtener(job_id)
+
+        with self._conectar() as conexion:
+            conexion.execute(
+                'UPDATE jobs SET cancelacion_solicitada = 1 WHERE job_id = ?', (job_id,)
+            )
+            # Un job pendiente no llegó a ningún proceso: se cancela aquí
+            cursor = conexion.execute(
+                'UPDATE jobs SET estado = ?, mensaje = ?, fecha_fin = ? WHERE job_id = ? AND estado = ?',
+                (ESTADO_CANCELADO, 'Cancelado antes de iniciar', datetime.now().isoformat(),
+                 job_id, ESTADO_PENDIENTE)
+            )
+
+        job = self.obtener(job_id)
+        if cursor.rowcount:
+            self._publicar_estado(job)
+        return job
+
+    def reanudar(self) -> int:
+        """
+        Recupera la cola al arrancar el servidor: los jobs cuyo proceso ya
+        no existe se marcan como error y los pendientes se vuelven a enviar
+
+        Returns:
+            Número de jobs pendientes reenviados
+        """
+        with self._conectar() as conexion:
+            en_ejecucion = conexion.execute(
+                'SELECT job_id, pid FROM jobs WHERE estado = ?', (ESTADO_EN_EJECUCION,)
+            ).fetchall()
+            for fila in en_ejecucion:
+                if not _proceso_activo(fila['pid']):
+                    conexion.execute(
+                        'UPDATE jobs SET estado = ?, error = ?, fecha_fin = ? WHERE job_id = ?',
+                        (ESTADO_ERROR, 'Interrumpido por un reinicio del servidor',
+                         datetime.now().isoformat(), fila['job_id'])
+                    )
+
+            pendientes = [
+                fila['job_id'] for fila in conexion.execute(
+                    'SELECT job_id FROM jobs WHERE estado = ? ORDER BY fecha_creacion',
+                    (ESTADO_PENDIENTE,)
+                )
+            ]
+
+        for job_id in pendientes:
+            self._despachar(job_id)
+        return len(pendientes)
+
+    def depurar(self, dias: int) -> int:
+        """Elimina los jobs terminados hace más de `dias` días"""
+        limite = (datetime.now() - timedelta(days=dias)).isoformat()
+        marcadores = ', '.join('?' for _ in ESTADOS_FINALES)
+
+        with self._conectar() as conexion:
+            cursor = conexion.execute(
+                f'DELETE FROM jobs WHERE estado IN ({marcadores}) AND fecha_fin < ?',
+                (*ESTADOS_FINALES, limite)
+            )
+            return cursor.rowcount
+
+    def ejecutar(self, job_id: str) -> None:
+        """
+        Corre un job en el proceso actual (se llama desde el pool de procesos)
+
+        Otro proceso pudo tomarlo ya (p. ej. varios workers de uvicorn
+        reanudando la cola); sólo lo ejecuta quien logra marcarlo en ejecución.
+        """
+        with self._conectar() as conexion:
+            cursor = conexion.execute(
+                'UPDATE jobs SET estado = ?, pid = ?, fecha_inicio = ? '
+                'WHERE job_id = ? AND estado = ? AND cancelacion_solicitada = 0',
+                (ESTADO_EN_EJECUCION, os.getpid(), datetime.now().isoformat(),
+                 job_id, ESTADO_PENDIENTE)
+            )
+            if cursor.rowcount == 0:
+                return
+
+            fila = conexion.execute(
+                'SELECT tipo, parametros FROM jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+
+        self._publicar_estado(self.obtener(job_id))
+
+        try:
+            resultado = TAREAS_JOB[fila['tipo']](
+                json.loads(fila['parametros']),
+                lambda progreso, mensaje=None: self._reportar_progreso(job_id, progreso, mensaje)
+            )
+        except JobCancelado:
+            self._finalizar(job_id, ESTADO_CANCELADO, mensaje='Cancelado durante la ejecución')
+        except Exception as e:
+            self._finalizar(job_id, ESTADO_ERROR, error=str(e))
+        else:
+            self._finalizar(
+                job_id, ESTADO_COMPLETADO,
+                resultado=json.dumps(resultado, default=str), mensaje='Completado'
+            )
+
+    def _reportar_progreso(self, job_id: str, progreso: float, mensaje: Optional[str]) -> None:
+        """Actualiza el progreso y detiene el job si se pidió cancelarlo"""
+        progreso = round(min(max(progreso, 0.0), 1.0), 4)
+        with self._conectar() as conexion:
+            conexion.execute(
+                'UPDATE jobs SET progreso = ?, mensaje = COALESCE(?, mensaje) WHERE job_id = ?',
+                (progreso, mensaje, job_id)
+            )
+            fila = conexion.execute(
+                'SELECT cancelacion_solicitada FROM jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+
+        self.eventos.publicar(canal_job(job_id), 'job_progreso', {
+            'job_id': job_id,
+            'progreso': progreso,
+            'mensaje': mensaje,
+        })
+
+        if fila['cancelacion_solicitada']:
+            raise JobCancelado()
+
+    def _finalizar(
+        self,
+        job_id: str,
+        estado: str,
+        resultado: Optional[str] = None,
+        error: Optional[str] = None,
+        mensaje: Optional[str] = None
+    ) -> None:
+        with self._conectar() as conexion:
+            conexion.execute(
+                'UPDATE jobs SET estado = ?, resultado = ?, error = ?, '
+                'mensaje = COALESCE(?, mensaje), fecha_fin = ?, '
+                'progreso = CASE WHEN ? = ? THEN 1 ELSE progreso END '
+                'WHERE job_id = ?',
+                (estado, resultado, error, mensaje, datetime.now().isoformat(),
+                 estado, ESTADO_COMPLETADO, job_id)
+            )
+
+        self._publicar_estado(self.obtener(job_id))
+
+    def _publicar_estado(self, job: Dict) -> None:
+        self.eventos.publicar(canal_job(job['job_id']), 'job_estado', job)
+
+    def _despachar(self, job_id: str) -> None:
+        """Envía el job al pool sin esperar a que termine"""
+        tarea = asyncio.get_running_loop().create_task(self._correr(job_id))
+        self._tareas.add(tarea)
+        tarea.add_done_callback(self._tareas.discard)
+
+    async def _correr(self, job_id: str) -> None:
+        try:
+            await self.executor.ejecutar(ejecutar_job, self.ruta_db, job_id)
+        except Exception as e:
+            # El proceso murió antes de poder registrar el error
+            self._finalizar(job_id, ESTADO_ERROR, error=str(e))
+
+    @contextmanager
+    def _conectar(self):
+        """Conexión por operación: confirma al salir y siempre se cierra"""
+        conexion = sqlite3.connect(self.ruta_db, timeout=30)
+        conexion.row_factory = sqlite3.Row
+        try:
+            with conexion:
+                yield conexion
+        finally:
+            conexion.close()
+
+
+def ejecutar_job(ruta_db: str, job_id: str) -> None:
+    """Punto de entrada en el proceso de cómputo"""
+    JobService(ruta_db).ejecutar(job_id)
+
+
+def _proceso_activo(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Tipo de job -> función(parametros, progreso) que corre en el proceso de cómputo
+TAREAS_JOB: Dict[str, Callable] = {
+    'train': compute_tasks.job_entrenar,
+    'predict_batch': compute_tasks.job_predecir_batch,
+    'analyze': compute_tasks.job_analizar,
+}
+
+
+@lru_cache()
+def get_job_service() -> JobService:
+    """Servicio de jobs del worker, con su propio pool de procesos"""
+    settings = get_settings()
+    return JobService(
+        settings.JOB_DB_PATH,
+        executor=ComputeExecutor(n_workers=settings.JOB_WORKERS or None)
+    )
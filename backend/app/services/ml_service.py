@@ -5,25 +5,128 @@ Entrena modelos y predice probabilidad de renuncia
 
 import pandas as pd
 import numpy as np
+import copy
+import pickle
+import threading
+import time
+import tracemalloc
 from datetime import datetime
-from typing import List, Dict, Tuple, Optional
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import LabelEncoder
-from sklearn.metrics import classification_report, confusion_matrix, roc_auc_score
+from typing import Callable, List, Dict, Tuple, Optional, Union
+from sklearn.base import clone
+from sklearn.model_selection import train_test_split, StratifiedKFold
+from sklearn.metrics import roc_auc_score
+from app.ml.engines import ModelEngine, obtener_engine
+from app.ml.features import FeaturePipeline
+from app.ml.tuning import buscar_hiperparametros
+from app.ml.registry import ModelRegistry, huella_dataframe
+from app.ml.bundle import ModelBundle
+from app.utils.metrics import medir_etapa, registrar_etapa
 import warnings
 warnings.filterwarnings('ignore')
 
 
+ENGINE_DEFECTO = 'random_forest'
+
+# Umbrales para recomendar un reentrenamiento completo
+UMBRAL_DEGRADACION_AUC = 0.05
+UMBRAL_CATEGORIAS_DESCONOCIDAS = 0.10
+UMBRAL_PROPORCION_INCREMENTAL = 0.5
+
+
 class MLService:
     """Servicio de Machine Learning para predicción de rotación"""
 
-    def __init__(self):
-        self.model = None
-        self.feature_names = []
-        self.label_encoders = {}
-        self.feature_importance = {}
-        self.model_metrics = {}
+    def __init__(self, registry: Optional[ModelRegistry] = None):
+        # Bundle activo: se reemplaza completo, nunca se modifica en sitio
+        self._bundle: Optional[ModelBundle] = None
+        # Serializa las actualizaciones que parten del bundle vigente
+        self._lock_actualizacion = threading.Lock()
+        self.registry = registry
+
+    @property
+    def bundle(self) -> Optional[ModelBundle]:
+        return self._bundle
+
+    @property
+    def model(self):
+        bundle = self._bundle
+        return bundle.model if bundle is not None else None
+
+    @property
+    def engine(self) -> Optional[ModelEngine]:
+        bundle = self._bundle
+        return bundle.engine if bundle is not None else None
+
+    @property
+    def pipeline(self) -> Optional[FeaturePipeline]:
+        bundle = self._bundle
+        return bundle.pipeline if bundle is not None else None
+
+    @property
+    def feature_names(self) -> List[str]:
+        bundle = self._bundle
+        return bundle.feature_names if bundle is not None else []
+
+    @property
+    def feature_importance(self) -> Dict[str, float]:
+        bundle = self._bundle
+        return bundle.feature_importance if bundle is not None else {}
+
+    @property
+    def model_metrics(self) -> Dict:
+        bundle = self._bundle
+        return bundle.metrics if bundle is not None else {}
+
+    @property
+    def version(self) -> Optional[str]:
+        bundle = self._bundle
+        return bundle.version if bundle is not None else None
+
+    def sincronizar(self) -> None:
+        """
+        Carga la versión activa del registro si cambió (p. ej. la promovió
+        otro worker). Sin cambios sólo cuesta un stat del archivo ACTIVO.
+        """
+        if self.registry is None:
+            return
+
+        activa = self.registry.version_activa()
+        if activa is not None and activa != self.version:
+            self.cargar_version(activa)
+
+    def cargar_version(self, version: str) -> None:
+        """Carga una versión del registro como modelo activo, sin reentrenar"""
+        bundle = ModelBundle.desde_artefactos(
+            self.registry.cargar(version),
+            self.registry.metadata(version)['metricas'],
+            version
+        )
+        self._publicar(bundle)
+
+    def _publicar(self, bundle: ModelBundle) -> None:
+        """
+        Publica un bundle como modelo activo. Es una sola asignación de
+        referencia: las predicciones en curso terminan con el bundle anterior
+        y las siguientes usan el nuevo.
+        """
+        self._bundle = bundle
+
+    def _registrar(self, bundle: ModelBundle, origen: str, huella_datos: str) -> ModelBundle:
+        """Guarda el bundle como nueva versión del registro"""
+        if self.registry is None:
+            return bundle
+
+        version = self.registry.registrar(
+            bundle.artefactos(),
+            {
+                'engine': bundle.engine.nombre,
+                'origen': origen,
+                'version_base': bundle.version,
+                'huella_datos': huella_datos,
+                'metricas': bundle.metrics,
+            }
+        )
+        return bundle.con_version(version)
 
     def preparar_features(self, data: List[Dict]) -> pd.DataFrame:
         """
@@ -35,85 +138,292 @@ class MLService:
         Returns:
             DataFrame con features preparados
         """
-        df = pd.DataFrame(data)
+        bundle = self._bundle
+        if bundle is None:
+            return FeaturePipeline().fit_transform(data)
+        return bundle.pipeline.transform(data)
+
+    def entrenar_modelo(
+        self,
+        data: Union[List[Dict], pd.DataFrame],
+        test_size: float = 0.2,
+        random_state: int = 42,
+        engine: str = ENGINE_DEFECTO,
+        params: Optional[Dict] = None,
+        pipeline_params: Optional[Dict] = None,
+        origen: str = 'train',
+        progreso: Optional[Callable[[float, str], None]] = None
+    ) -> Dict:
+        """
+        Entrena modelo de clasificación para predecir tipo de baja
 
-        # Features numéricos directos
-        features_df = pd.DataFrame()
+        Args:
+            data: Lista de registros de empleados con rotación
+            test_size: Proporción para test set
+            random_state: Seed para reproducibilidad
+            engine: Nombre del engine de ML (ver app.ml.engines)
+            params: Parámetros del modelo que sobrescriben los del engine
+            pipeline_params: Parámetros del FeaturePipeline
+            origen: Origen registrado con la versión ('train', 'tune')
+            progreso: Callback (fracción, mensaje) llamado en cada etapa y fold
+                de validación cruzada; si lanza una excepción, el modelo no se publica
 
-        # Antigüedad
-        features_df['antiguedad_semanas'] = df.get('antiguedadSemanas', 0)
+        Returns:
+            Diccionario con métricas del modelo
+        """
+        # El entrenamiento construye un bundle aparte; el activo sigue sirviendo
+        resultado = self._entrenar(
+            data, test_size, random_state, engine, params, pipeline_params, progreso=progreso
+        )
+
+        if progreso is not None:
+            progreso(0.9, 'Registrando versión del modelo')
 
-        # Salario
-        features_df['salario'] = df.get('salario', 0)
+        bundle = self._registrar(resultado['bundle'], origen, resultado['huella_datos'])
+        self._publicar(bundle)
 
-        # Faltas y permisos
-        features_df['total_faltas'] = df.get('totalFaltas', 0)
-        features_df['permisos'] = df.get('permisos', 0)
+        return bundle.metrics
+
+    def comparar_engines(
+        self,
+        data: Union[List[Dict], pd.DataFrame],
+        engines: List[str],
+        test_size: float = 0.2,
+        random_state: int = 42
+    ) -> List[Dict]:
+        """
+        Entrena cada engine con el mismo split y compara tiempo, memoria y AUC
+        sin reemplazar el modelo activo
 
-        # Horas trabajadas
-        features_df['horas_ultima_semana'] = df.get('totalHorasUltimaSemana', 0)
+        Args:
+            data: Lista de registros de empleados con rotación
+            engines: Nombres de los engines a comparar
+            test_size: Proporción para test set
+            random_state: Seed para reproducibilidad
 
-        # Cumplimiento de entrenamiento (boolean a int)
-        features_df['cumplio_entrenamiento'] = df.get('cumplioEntrenamiento', True).astype(int)
+        Returns:
+            Lista con las métricas de cada engine
+        """
+        comparacion = []
 
-        # Rotación temprana (boolean a int)
-        features_df['rotacion_temprana'] = df.get('rotacionTemprana', False).astype(int)
+        for nombre in engines:
+            tracemalloc.start()
+            try:
+                resultado = self._entrenar(
+                    data, test_size, random_state, nombre, None, None, validacion_cruzada=False
+                )
+                _, pico = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+            metricas = resultado['bundle'].metrics
+            comparacion.append({
+                'engine': nombre,
+                'tiempo_entrenamiento_s': metricas['tiempo_entrenamiento_s'],
+                'memoria_pico_mb': round(pico / 1024 / 1024, 2),
+                'tamano_modelo_kb': metricas['tamano_modelo_kb'],
+                'accuracy': metricas['accuracy'],
+                'auc_roc': metricas.get('auc_roc'),
+            })
 
-        # Features categóricos - Label Encoding
-        categorical_features = ['area', 'supervisor', 'puesto', 'turno', 'clase']
+        return comparacion
 
-        for feature in categorical_features:
-            if feature in df.columns:
-                if feature not in self.label_encoders:
-                    self.label_encoders[feature] = LabelEncoder()
-                    # Fit con todos los valores únicos
-                    unique_values = df[feature].dropna().unique()
-                    self.label_encoders[feature].fit(unique_values)
+    def optimizar_modelo(
+        self,
+        data: Union[List[Dict], pd.DataFrame],
+        engine: str = ENGINE_DEFECTO,
+        presupuesto_s: float = 300,
+        n_configuraciones: int = 27,
+        n_workers: Optional[int] = None,
+        random_state: int = 42
+    ) -> Dict:
+        """
+        Busca hiperparámetros con successive halving y promueve la mejor
+        configuración como modelo activo, reentrenada con todos los datos
 
-                # Transform
-                try:
-                    features_df[f'{feature}_encoded'] = self.label_encoders[feature].transform(
-                        df[feature].fillna('Unknown')
-                    )
-                except:
-                    features_df[f'{feature}_encoded'] = 0
+        Args:
+            data: Lista de registros de empleados con rotación
+            engine: Engine de ML a optimizar
+            presupuesto_s: Tiempo máximo de la búsqueda en segundos
+            n_configuraciones: Configuraciones iniciales a evaluar
+            n_workers: Procesos del pool de búsqueda
+            random_state: Seed para reproducibilidad
 
-        # Features derivados
-        if 'salario' in features_df.columns and 'antiguedadSemanas' in features_df.columns:
-            # Salario por semana de antigüedad
-            features_df['salario_por_semana'] = features_df['salario'] / (features_df['antiguedad_semanas'] + 1)
+        Returns:
+            Diccionario con el resultado de la búsqueda y las métricas del modelo promovido
+        """
+        busqueda = buscar_hiperparametros(
+            data,
+            engine,
+            presupuesto_s=presupuesto_s,
+            n_configuraciones=n_configuraciones,
+            n_workers=n_workers,
+            random_state=random_state
+        )
 
-        # Ratio de faltas
-        if 'total_faltas' in features_df.columns and 'antiguedadSemanas' in features_df.columns:
-            features_df['faltas_por_semana'] = features_df['total_faltas'] / (features_df['antiguedad_semanas'] + 1)
+        busqueda['metricas'] = self.entrenar_modelo(
+            data,
+            random_state=random_state,
+            engine=engine,
+            params=busqueda['parametros_modelo'],
+            pipeline_params=busqueda['parametros_pipeline'],
+            origen='tune'
+        )
 
-        return features_df
+        return busqueda
 
-    def entrenar_modelo(
+    def actualizar_modelo(
         self,
-        data: List[Dict],
-        test_size: float = 0.2,
+        nuevos: Union[List[Dict], pd.DataFrame],
+        n_adicionales: Optional[int] = None,
         random_state: int = 42
     ) -> Dict:
         """
-        Entrena modelo de clasificación para predecir tipo de baja
+        Actualiza el modelo activo sólo con los registros nuevos (warm start),
+        reutilizando el pipeline de features y sus categorías. El costo es
+        proporcional a los registros nuevos, no al historial completo.
 
         Args:
-            data: Lista de registros de empleados con rotación
-            test_size: Proporción para test set
+            nuevos: Registros agregados desde el último entrenamiento
+            n_adicionales: Árboles/iteraciones a agregar; por defecto el del engine
             random_state: Seed para reproducibilidad
 
         Returns:
-            Diccionario con métricas del modelo
+            Diccionario con métricas actualizadas y monitoreo de reentrenamiento
         """
+        if len(nuevos) == 0:
+            raise ValueError("No se proporcionaron registros nuevos")
+
+        df = pd.DataFrame(nuevos)
+        y = (df.get('tipoBajaNormalizado', 'RV') == 'RV').astype(int)
+
+        if y.nunique() < 2:
+            raise ValueError("Los registros nuevos deben incluir bajas RV y BXF")
+
+        with self._lock_actualizacion:
+            base = self._bundle
+            if base is None:
+                raise ValueError("El modelo no ha sido entrenado. Llama a entrenar_modelo() primero.")
+
+            features = base.pipeline.transform(df)
+            X = base.engine.preparar_X(features)
+
+            # Se mide el modelo vigente sobre los registros nuevos antes de ampliarlo
+            monitoreo = self._monitorear_incremento(base, features, X, y)
+
+            # Se amplía una copia: el modelo vigente sigue sirviendo predicciones
+            # y, si viene del registro, es de sólo lectura (memory-map)
+            modelo = copy.deepcopy(base.model)
+            base.engine.ampliar_modelo(
+                modelo, X, y, n_adicionales or base.engine.incremento_defecto, base.pipeline
+            )
+
+            feature_importance = dict(zip(
+                base.feature_names,
+                (float(v) for v in base.engine.importancias(modelo, X, y, random_state))
+            ))
+
+            bundle = ModelBundle(
+                model=modelo,
+                engine=base.engine,
+                pipeline=base.pipeline,
+                feature_importance=feature_importance,
+                metrics={
+                    **base.metrics,
+                    'n_samples': base.metrics['n_samples'] + len(df),
+                    'feature_importance': feature_importance,
+                    'tamano_modelo_kb': round(len(pickle.dumps(modelo)) / 1024, 2),
+                    'actualizaciones_incrementales': base.metrics.get('actualizaciones_incrementales', 0) + 1,
+                    'registros_incrementales': monitoreo['registros_incrementales_acumulados'],
+                },
+                version=base.version
+            )
+
+            bundle = self._registrar(bundle, 'incremental', huella_dataframe(df))
+            self._publicar(bundle)
+
+        return {
+            'metricas': bundle.metrics,
+            'monitoreo': monitoreo,
+        }
+
+    def _monitorear_incremento(
+        self,
+        bundle: ModelBundle,
+        features: pd.DataFrame,
+        X: pd.DataFrame,
+        y: pd.Series
+    ) -> Dict:
+        """Evalúa si los registros nuevos justifican un reentrenamiento completo"""
+        incrementales_previos = bundle.metrics.get('registros_incrementales', 0)
+        n_base = bundle.metrics['n_samples'] - incrementales_previos
+        acumulados = incrementales_previos + len(y)
+        proporcion = acumulados / max(n_base, 1)
+
+        categoricos = bundle.pipeline.features_categoricos
+        tasa_desconocidas = float(features[categoricos].isna().to_numpy().mean()) if categoricos else 0.0
+
+        auc_referencia = bundle.metrics.get('auc_roc')
+        try:
+            auc_nuevos = float(roc_auc_score(y, bundle.model.predict_proba(X)[:, 1]))
+        except ValueError:
+            auc_nuevos = None
+
+        motivos = []
+        if auc_referencia is not None and auc_nuevos is not None \
+                and auc_referencia - auc_nuevos > UMBRAL_DEGRADACION_AUC:
+            motivos.append(
+                f"El AUC sobre los registros nuevos ({auc_nuevos:.3f}) cayó más de "
+                f"{UMBRAL_DEGRADACION_AUC} respecto al entrenamiento ({auc_referencia:.3f})"
+            )
+        if tasa_desconocidas > UMBRAL_CATEGORIAS_DESCONOCIDAS:
+            motivos.append(
+                f"{tasa_desconocidas:.0%} de los valores categóricos no existían al entrenar "
+                f"(nuevas áreas, supervisores o puestos)"
+            )
+        if proporcion > UMBRAL_PROPORCION_INCREMENTAL:
+            motivos.append(
+                f"Los registros incrementales ya son el {proporcion:.0%} del entrenamiento base"
+            )
+
+        return {
+            'registros_nuevos': len(y),
+            'registros_incrementales_acumulados': acumulados,
+            'proporcion_incremental': round(proporcion, 4),
+            'auc_referencia': auc_referencia,
+            'auc_nuevos_registros': auc_nuevos,
+            'tasa_categorias_desconocidas': round(tasa_desconocidas, 4),
+            'requiere_reentrenamiento': bool(motivos),
+            'motivos': motivos,
+        }
+
+    def _entrenar(
+        self,
+        data: List[Dict],
+        test_size: float,
+        random_state: int,
+        engine: str,
+        params: Optional[Dict],
+        pipeline_params: Optional[Dict] = None,
+        validacion_cruzada: bool = True,
+        progreso: Optional[Callable[[float, str], None]] = None
+    ) -> Dict:
+        """Entrena un modelo sin modificar el estado del servicio"""
         if len(data) < 10:
             raise ValueError("Se requieren al menos 10 registros para entrenar el modelo")
 
-        df = pd.DataFrame(data)
+        if progreso is None:
+            progreso = lambda fraccion, mensaje: None
+
+        model_engine = obtener_engine(engine)
+        with medir_etapa('dataframe'):
+            df = pd.DataFrame(data)
 
         # Preparar features
-        X = self.preparar_features(data)
-        self.feature_names = X.columns.tolist()
+        pipeline = model_engine.crear_pipeline(**(pipeline_params or {}))
+        with medir_etapa('features'):
+            X = model_engine.preparar_X(pipeline.fit_transform(df))
+        feature_names = pipeline.feature_names
 
         # Target: tipo de baja (RV vs BXF)
         y = (df.get('tipoBajaNormalizado', 'RV') == 'RV').astype(int)
@@ -123,73 +433,102 @@ class MLService:
             X, y, test_size=test_size, random_state=random_state, stratify=y
         )
 
-        # Entrenar Random Forest
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            min_samples_split=5,
-            min_samples_leaf=2,
-            random_state=random_state,
-            class_weight='balanced'
+        model = model_engine.crear_modelo(
+            feature_names, random_state=random_state, **(params or {})
         )
 
-        self.model.fit(X_train, y_train)
+        progreso(0.2, f'Entrenando {model_engine.nombre}')
+        inicio = time.perf_counter()
+        model_engine.ajustar(model, X_train, y_train, pipeline)
+        tiempo_entrenamiento = time.perf_counter() - inicio
+        registrar_etapa('entrenamiento', tiempo_entrenamiento)
 
         # Predicciones
-        y_pred = self.model.predict(X_test)
-        y_pred_proba = self.model.predict_proba(X_test)[:, 1]
+        y_pred_proba = model.predict_proba(X_test)[:, 1]
 
         # Métricas
-        accuracy = self.model.score(X_test, y_test)
-
-        # Cross-validation
-        cv_scores = cross_val_score(self.model, X, y, cv=min(5, len(data) // 2))
+        accuracy = model.score(X_test, y_test)
 
         # Feature importance
-        self.feature_importance = dict(zip(
-            self.feature_names,
-            self.model.feature_importances_
+        progreso(0.5, 'Calculando importancia de features')
+        feature_importance = dict(zip(
+            feature_names,
+            (float(v) for v in model_engine.importancias(model, X_test, y_test, random_state))
         ))
 
-        # Guardar métricas
-        self.model_metrics = {
+        metrics = {
             'accuracy': float(accuracy),
-            'cv_mean_score': float(cv_scores.mean()),
-            'cv_std_score': float(cv_scores.std()),
+            'cv_mean_score': float(accuracy),
+            'cv_std_score': 0.0,
             'n_samples': len(data),
-            'n_features': len(self.feature_names),
+            'n_features': len(feature_names),
             'train_size': len(X_train),
             'test_size': len(X_test),
-            'feature_importance': self.feature_importance,
+            'feature_importance': feature_importance,
+            'engine': model_engine.nombre,
+            'tiempo_entrenamiento_s': round(tiempo_entrenamiento, 4),
+            'tamano_modelo_kb': round(len(pickle.dumps(model)) / 1024, 2),
         }
 
+        # Cross-validation (mismos folds que cross_val_score, con progreso por fold)
+        if validacion_cruzada:
+            folds = StratifiedKFold(n_splits=min(5, len(data) // 2))
+            cv_scores = []
+            for i, (idx_train, idx_test) in enumerate(folds.split(X, y)):
+                progreso(
+                    0.6 + 0.3 * i / folds.n_splits,
+                    f'Validación cruzada: fold {i + 1} de {folds.n_splits}'
+                )
+                modelo_fold = model_engine.ajustar(
+                    clone(model), X.iloc[idx_train], y.iloc[idx_train], pipeline
+                )
+                cv_scores.append(modelo_fold.score(X.iloc[idx_test], y.iloc[idx_test]))
+
+            metrics['cv_mean_score'] = float(np.mean(cv_scores))
+            metrics['cv_std_score'] = float(np.std(cv_scores))
+
         try:
             auc_score = roc_auc_score(y_test, y_pred_proba)
-            self.model_metrics['auc_roc'] = float(auc_score)
+            metrics['auc_roc'] = float(auc_score)
         except:
             pass
 
-        return self.model_metrics
+        return {
+            'bundle': ModelBundle(
+                model=model,
+                engine=model_engine,
+                pipeline=pipeline,
+                feature_importance=feature_importance,
+                metrics=metrics
+            ),
+            'huella_datos': huella_dataframe(df),
+        }
 
-    def predecir_riesgo(self, empleado: Dict) -> Dict:
+    def predecir_riesgo(self, empleado: Dict, bundle: Optional[ModelBundle] = None) -> Dict:
         """
         Predice el riesgo de rotación para un empleado
 
         Args:
             empleado: Diccionario con datos del empleado
+            bundle: Versión del modelo a usar; por defecto la activa
 
         Returns:
             Diccionario con predicción y explicación
         """
-        if self.model is None:
+        # Una sola lectura del bundle: aunque se publique otro a mitad de la
+        # predicción, ésta termina con modelo y pipeline de la misma versión
+        bundle = bundle or self._bundle
+        if bundle is None:
             raise ValueError("El modelo no ha sido entrenado. Llama a entrenar_modelo() primero.")
 
         # Preparar features para un solo empleado
-        X = self.preparar_features([empleado])
+        with medir_etapa('features'):
+            X = bundle.engine.preparar_X(bundle.pipeline.transform([empleado]))
 
         # Predicción
-        prob = self.model.predict_proba(X)[0]
-        pred_class = self.model.predict(X)[0]
+        with medir_etapa('predict_proba'):
+            prob = bundle.model.predict_proba(X)[0]
+        pred_class = bundle.model.predict(X)[0]
 
         # Probabilidad de RV (riesgo alto de renuncia voluntaria)
         prob_rv = float(prob[1]) * 100
@@ -210,11 +549,13 @@ class MLService:
         factores = []
 
         for feature, importance in sorted(
-            self.feature_importance.items(),
+            bundle.feature_importance.items(),
             key=lambda x: x[1],
             reverse=True
         )[:5]:
             valor = feature_values.get(feature, 0)
+            if pd.isna(valor):
+                valor = 0
             factores.append({
                 'feature': feature,
                 'valor': float(valor),
@@ -242,35 +583,196 @@ class MLService:
         Returns:
             Lista de predicciones
         """
-        predicciones = []
+        return self.predecir_bloque(empleados)
 
-        for i, empleado in enumerate(empleados):
-            try:
-                pred = self.predecir_riesgo(empleado)
-                pred['empleado_id'] = empleado.get('numeroEmpleado', f'emp_{i}')
-                pred['nombre'] = empleado.get('nombre', 'Desconocido')
-                predicciones.append(pred)
-            except Exception as e:
-                print(f"Error prediciendo empleado {i}: {e}")
-                continue
+    def predecir_bloque(
+        self,
+        empleados: Union[List[Dict], pd.DataFrame],
+        bundle: Optional[ModelBundle] = None,
+        offset: int = 0
+    ) -> List[Dict]:
+        """
+        Predice el riesgo de un bloque de empleados con una sola llamada al
+        modelo. Produce lo mismo que predecir_riesgo() para cada empleado,
+        más su id y nombre.
+
+        Args:
+            empleados: Empleados del bloque (lista o DataFrame)
+            bundle: Versión del modelo a usar; por defecto la activa
+            offset: Posición del bloque en el total, para los ids por defecto
+
+        Returns:
+            Lista de predicciones en el orden de los empleados
+        """
+        bundle = bundle or self._bundle
+        if bundle is None:
+            raise ValueError("El modelo no ha sido entrenado. Llama a entrenar_modelo() primero.")
+
+        with medir_etapa('dataframe'):
+            df = empleados if isinstance(empleados, pd.DataFrame) else pd.DataFrame(empleados)
+        if len(df) == 0:
+            return []
+
+        with medir_etapa('features'):
+            X = bundle.engine.preparar_X(bundle.pipeline.transform(df))
+        with medir_etapa('predict_proba'):
+            proba = bundle.model.predict_proba(X)
+
+        return self._construir_predicciones(
+            df, X, proba, bundle, np.arange(offset, offset + len(df))
+        )
+
+    def ranking_riesgo(
+        self,
+        empleados: Union[List[Dict], pd.DataFrame],
+        k: int = 50,
+        agrupar_por: Optional[str] = None,
+        bundle: Optional[ModelBundle] = None
+    ) -> Dict:
+        """
+        Selecciona los k empleados con mayor probabilidad de RV, en total y
+        opcionalmente por supervisor/área
+
+        Todo el dataset se evalúa con una sola llamada al modelo, pero la
+        selección es parcial (argpartition) y sólo se construyen las
+        predicciones completas de los empleados seleccionados.
+
+        Args:
+            empleados: Empleados a evaluar (lista o DataFrame)
+            k: Empleados por ranking
+            agrupar_por: Columna para rankings por grupo ('supervisor', 'area')
+            bundle: Versión del modelo a usar; por defecto la activa
+
+        Returns:
+            Diccionario con el ranking general y, si se agrupa, uno por grupo
+        """
+        bundle = bundle or self._bundle
+        if bundle is None:
+            raise ValueError("El modelo no ha sido entrenado. Llama a entrenar_modelo() primero.")
+
+        with medir_etapa('dataframe'):
+            df = empleados if isinstance(empleados, pd.DataFrame) else pd.DataFrame(empleados)
+        if agrupar_por is not None and agrupar_por not in df.columns:
+            raise ValueError(f"La columna '{agrupar_por}' no existe en los datos")
+
+        ranking = {
+            'version': bundle.version,
+            'total_empleados': len(df),
+            'k': k,
+            'agrupar_por': agrupar_por,
+            'top': [],
+            'grupos': [],
+        }
+        if len(df) == 0:
+            return ranking
+
+        with medir_etapa('features'):
+            X = bundle.engine.preparar_X(bundle.pipeline.transform(df))
+        with medir_etapa('predict_proba'):
+            proba = bundle.model.predict_proba(X)
+        prob_rv = proba[:, 1]
+
+        def predicciones(seleccion: np.ndarray) -> List[Dict]:
+            return self._construir_predicciones(
+                df.iloc[seleccion], X.iloc[seleccion], proba[seleccion], bundle, seleccion
+            )
+
+        ranking['top'] = predicciones(_top_k(prob_rv, k))
+
+        if agrupar_por is not None:
+            grupos = df[agrupar_por].astype(object).where(df[agrupar_por].notna(), 'Sin asignar')
+            codigos, etiquetas = pd.factorize(grupos.astype(str))
+
+            # Posiciones de cada grupo: un solo ordenamiento de los códigos
+            orden = np.argsort(codigos, kind='stable')
+            cortes = np.flatnonzero(np.diff(codigos[orden])) + 1
+
+            for posiciones in np.split(orden, cortes):
+                seleccion = posiciones[_top_k(prob_rv[posiciones], k)]
+                ranking['grupos'].append({
+                    'grupo': etiquetas[codigos[posiciones[0]]],
+                    'total_empleados': len(posiciones),
+                    'top': predicciones(seleccion),
+                })
+
+            # Primero los grupos cuyo empleado de mayor riesgo es más alto
+            ranking['grupos'].sort(key=lambda g: g['top'][0]['probabilidad_rv'], reverse=True)
+
+        return ranking
+
+    def _construir_predicciones(
+        self,
+        df: pd.DataFrame,
+        X: pd.DataFrame,
+        proba: np.ndarray,
+        bundle: ModelBundle,
+        posiciones: np.ndarray
+    ) -> List[Dict]:
+        """Predicciones completas a partir de las probabilidades ya calculadas"""
+        clases = bundle.model.classes_[proba.argmax(axis=1)]
+
+        # Los factores clave son las 5 features más importantes del modelo
+        top = sorted(bundle.feature_importance.items(), key=lambda x: x[1], reverse=True)[:5]
+        valores = X[[feature for feature, _ in top]].fillna(0).to_numpy(dtype=float)
+
+        ids = _columna_texto(df, 'numeroEmpleado')
+        nombres = _columna_texto(df, 'nombre')
+
+        predicciones = []
+        for i in range(len(df)):
+            prob_rv = float(proba[i, 1]) * 100
+
+            if prob_rv >= 70:
+                nivel_riesgo, color = 'Alto', 'red'
+            elif prob_rv >= 40:
+                nivel_riesgo, color = 'Medio', 'yellow'
+            else:
+                nivel_riesgo, color = 'Bajo', 'green'
+
+            predicciones.append({
+                'empleado_id': ids[i] if ids[i] is not None else f'emp_{posiciones[i]}',
+                'nombre': nombres[i] if nombres[i] is not None else 'Desconocido',
+                'probabilidad_rv': round(prob_rv, 2),
+                'probabilidad_bxf': round((1 - proba[i, 1]) * 100, 2),
+                'prediccion': 'RV' if clases[i] == 1 else 'BXF',
+                'nivel_riesgo': nivel_riesgo,
+                'color': color,
+                'factores_clave': [
+                    {
+                        'feature': feature,
+                        'valor': float(valores[i, j]),
+                        'importancia': float(importance),
+                        'contribucion': float(importance * valores[i, j])
+                    }
+                    for j, (feature, importance) in enumerate(top)
+                ],
+                'confianza': round(float(proba[i].max()) * 100, 2)
+            })
 
         return predicciones
 
-    def obtener_top_features(self, n: int = 10) -> List[Dict]:
+    def obtener_top_features(
+        self,
+        n: int = 10,
+        feature_importance: Optional[Dict[str, float]] = None
+    ) -> List[Dict]:
         """
         Obtiene las features más importantes del modelo
 
         Args:
             n: Número de features a retornar
+            feature_importance: Importancias a usar; por defecto las del modelo activo
 
         Returns:
             Lista de features ordenadas por importancia
         """
-        if not self.feature_importance:
+        if feature_importance is None:
+            feature_importance = self.feature_importance
+        if not feature_importance:
             return []
 
         sorted_features = sorted(
-            self.feature_importance.items(),
+            feature_importance.items(),
             key=lambda x: x[1],
             reverse=True
         )[:n]
@@ -304,3 +806,28 @@ class MLService:
             return f"{feature.replace('_encoded', '').title()}"
         else:
             return feature.title()
+
+
+def _columna_texto(df: pd.DataFrame, columna: str) -> List[Optional[str]]:
+    """Valores de la columna como texto (None si falta); 1234.0 se reporta como '1234'"""
+    if columna not in df.columns:
+        return [None] * len(df)
+
+    valores = []
+    for valor in df[columna].tolist():
+        if valor is None or (isinstance(valor, float) and np.isnan(valor)):
+            valores.append(None)
+        elif isinstance(valor, float) and valor.is_integer():
+            valores.append(str(int(valor)))
+        else:
+            valores.append(str(valor))
+    return valores
+
+
+def _top_k(valores: np.ndarray, k: int) -> np.ndarray:
+    """Posiciones de los k valores más altos, de mayor a menor"""
+    if k < len(valores):
+        seleccion = np.sort(np.argpartition(-valores, k - 1)[:k])
+    else:
+        seleccion = np.arange(len(valores))
+    return seleccion[np.argsort(-valores[seleccion], kind='stable')]
@@ -3,10 +3,14 @@ Servicio de análisis Pareto 80/20
 Identifica el 20% de causas que generan el 80% de la rotación
 """
 
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional, Union
 from app.models.schemas import PatronRotacion, AnalisisParetoResponse
+from app.services.analysis_engines import AnalysisEngine, como_engine
+from app.utils.conteos import seleccionar_categorias, CATEGORIA_OTROS
+from app.utils.metrics import medir_etapa
 
 
 class ParetoService:
@@ -14,20 +18,26 @@ class ParetoService:
 
     @staticmethod
     def analizar_pareto(
-        data: List[Dict],
-        categoria: str = "area"
+        data: Union[List[Dict], pd.DataFrame, AnalysisEngine],
+        categoria: str = "area",
+        limite: Optional[int] = None,
+        offset: int = 0
     ) -> AnalisisParetoResponse:
         """
         Realiza análisis Pareto 80/20 sobre una categoría específica
 
         Args:
-            data: Lista de registros de empleados
+            data: Registros de empleados (lista o DataFrame) o un engine de
+                análisis sobre ellos (por defecto pandas)
             categoria: Categoría a analizar ('area', 'supervisor', 'razon', etc.)
+            limite: Patrones a retornar; los siguientes se suman en un patrón
+                "Otros". None = todos
+            offset: Patrones a saltar (paginación); los acumulados los incluyen
 
         Returns:
             AnalisisParetoResponse con patrones ordenados por impacto
         """
-        if not data:
+        if len(data) == 0:
             return AnalisisParetoResponse(
                 categoria=categoria,
                 patrones=[],
@@ -36,8 +46,9 @@ class ParetoService:
                 fecha_analisis=datetime.now().isoformat()
             )
 
-        # Convertir a DataFrame
-        df = pd.DataFrame(data)
+        # Convertir a DataFrame (salvo que llegue un engine)
+        with medir_etapa('dataframe'):
+            engine = como_engine(data)
 
         # Mapear nombre de categoría a columna
         columna_map = {
@@ -50,40 +61,62 @@ class ParetoService:
 
         columna = columna_map.get(categoria, categoria)
 
-        if columna not in df.columns:
+        if columna not in engine.columnas:
             raise ValueError(f"Categoría '{categoria}' no encontrada en los datos")
 
-        total_rotaciones = len(df)
+        total_rotaciones = engine.total()
 
-        # Contar rotaciones por categoría
-        conteo = df[columna].value_counts()
+        # Contar rotaciones por categoría (se excluyen los nulos)
+        with medir_etapa('conteo'):
+            conteo = seleccionar_categorias(engine.conteo(columna), limite, offset)
 
-        # Calcular porcentajes y acumulados
-        patrones = []
-        porcentaje_acum = 0.0
+        # Porcentajes y acumulados calculados por columnas
+        totales = conteo['totales']
+        porcentajes = totales / total_rotaciones * 100
+        acumulados = conteo['previos'] / total_rotaciones * 100 + np.cumsum(porcentajes)
 
-        for idx, (valor, total) in enumerate(conteo.items()):
-            if pd.notna(valor):
-                porcentaje = (total / total_rotaciones) * 100
-                porcentaje_acum += porcentaje
+        # Calcular índice de rotación (simplificado)
+        # En un caso real, se dividiría por total de empleados en esa categoría
+        indices = totales / total_rotaciones
 
-                # Calcular índice de rotación (simplificado)
-                # En un caso real, se dividiría por total de empleados en esa categoría
-                indice = total / total_rotaciones
+        # Determinar si está en el 20% crítico (causa el 80%)
+        impactos = acumulados <= 80.0
 
-                # Determinar si está en el 20% crítico (causa el 80%)
-                impacto_80_20 = porcentaje_acum <= 80.0
+        # Valores calculados aquí: se construyen sin volver a validarlos
+        patrones = [
+            PatronRotacion.model_construct(
+                categoria=categoria,
+                valor=valor,
+                total_rotaciones=total,
+                porcentaje=round(porcentaje, 2),
+                porcentaje_acumulado=round(acumulado, 2),
+                impacto_80_20=impacto,
+                indice_rotacion=round(indice, 4)
+            )
+            for valor, total, porcentaje, acumulado, impacto, indice in zip(
+                conteo['valores'],
+                totales.tolist(),
+                porcentajes.tolist(),
+                acumulados.tolist(),
+                impactos.tolist(),
+                indices.tolist()
+            )
+        ]
 
-                patron = PatronRotacion(
-                    categoria=categoria,
-                    valor=str(valor),
-                    total_rotaciones=int(total),
-                    porcentaje=round(porcentaje, 2),
-                    porcentaje_acumulado=round(porcentaje_acum, 2),
-                    impacto_80_20=impacto_80_20,
-                    indice_rotacion=round(indice, 4)
-                )
-                patrones.append(patron)
+        # La cola después de la página se resume en un solo patrón con totales exactos
+        if conteo['otros_categorias'] > 0:
+            otros = conteo['otros_total']
+            acumulado_pagina = acumulados[-1] if len(acumulados) else conteo['previos'] / total_rotaciones * 100
+            patrones.append(PatronRotacion.model_construct(
+                categoria=categoria,
+                valor=CATEGORIA_OTROS,
+                total_rotaciones=otros,
+                porcentaje=round(otros / total_rotaciones * 100, 2),
+                porcentaje_acumulado=round(float(acumulado_pagina) + otros / total_rotaciones * 100, 2),
+                impacto_80_20=False,
+                indice_rotacion=round(otros / total_rotaciones, 4),
+                agrupadas=conteo['otros_categorias']
+            ))
 
         # Identificar el 20% que causa el 80%
         concentracion_80 = [p for p in patrones if p.impacto_80_20]
@@ -93,18 +126,21 @@ class ParetoService:
             patrones=patrones,
             concentracion_80=concentracion_80,
             total_rotaciones=total_rotaciones,
+            total_categorias=conteo['total_categorias'],
             fecha_analisis=datetime.now().isoformat()
         )
 
     @staticmethod
     def analizar_multiples_categorias(
-        data: List[Dict]
+        data: Union[List[Dict], pd.DataFrame, AnalysisEngine],
+        limite: Optional[int] = None
     ) -> Dict[str, AnalisisParetoResponse]:
         """
         Analiza múltiples categorías y retorna análisis Pareto de cada una
 
         Args:
-            data: Lista de registros de empleados
+            data: Registros de empleados (lista o DataFrame) o un engine de análisis
+            limite: Patrones por categoría (el resto se agrupa en "Otros")
 
         Returns:
             Diccionario con análisis Pareto por categoría
@@ -112,9 +148,13 @@ class ParetoService:
         categorias = ["area", "supervisor", "turno", "rango_salarial"]
         resultados = {}
 
+        # Un solo DataFrame (o engine) para todas las categorías
+        if len(data) > 0:
+            data = como_engine(data)
+
         for categoria in categorias:
             try:
-                analisis = ParetoService.analizar_pareto(data, categoria)
+                analisis = ParetoService.analizar_pareto(data, categoria, limite)
                 resultados[categoria] = analisis
             except Exception as e:
                 print(f"Error analizando categoría {categoria}: {e}")
@@ -150,7 +190,8 @@ class ParetoService:
         # Concentración del 20%
         porcentaje_80 = sum(p.porcentaje for p in analisis.concentracion_80)
         num_criticos = len(analisis.concentracion_80)
-        num_total = len(analisis.patrones)
+        # Con límite los patrones son una página: el total viene aparte
+        num_total = analisis.total_categorias or len(analisis.patrones)
 
         if num_total > 0:
             porcentaje_criticos = (num_criticos / num_total) * 100
@@ -0,0 +1,84 @@
+"""
+Conteos por categoría con selección parcial y agrupación de la cola en "Otros"
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+CATEGORIA_OTROS = 'Otros'
+
+
+def contar_categorias(
+    serie: pd.Series,
+    limite: Optional[int] = None,
+    offset: int = 0
+) -> Dict:
+    """
+    Cuenta los valores de una columna y selecciona una página ordenada por
+    total descendente (empates en orden de aparición)
+
+    Sólo se ordenan las categorías hasta `offset + limite`: las demás se
+    descartan con una selección parcial (np.partition) y se suman en
+    `otros_total`, así el resultado no crece con la cardinalidad.
+
+    Args:
+        serie: Columna a contar (los nulos se excluyen)
+        limite: Categorías por página; None = todas
+        offset: Categorías a saltar (páginas anteriores)
+
+    Returns:
+        Diccionario con:
+            valores / totales: categorías de la página y sus conteos
+            previos: suma de los conteos de las categorías saltadas
+            otros_total / otros_categorias: suma y número de categorías
+                después de la página
+            total_categorias: categorías distintas
+    """
+    return seleccionar_categorias(serie.value_counts(sort=False), limite, offset)
+
+
+def seleccionar_categorias(
+    conteo: pd.Series,
+    limite: Optional[int] = None,
+    offset: int = 0
+) -> Dict:
+    """
+    Selecciona una página de conteos ya calculados (ver contar_categorias)
+
+    Args:
+        conteo: Conteo por categoría (índice = categoría) en orden de aparición
+        limite: Categorías por página; None = todas
+        offset: Categorías a saltar (páginas anteriores)
+
+    Returns:
+        El mismo diccionario que contar_categorias
+    """
+    todos = conteo.to_numpy(dtype=np.int64)
+    n = len(todos)
+
+    fin = n if limite is None else min(n, offset + limite)
+
+    if 0 < fin < n:
+        # Umbral = fin-ésimo mayor; los empates en el umbral se resuelven abajo
+        umbral = np.partition(todos, n - fin)[n - fin]
+        candidatos = np.flatnonzero(todos >= umbral)
+    else:
+        candidatos = np.arange(n)
+
+    # Orden estable: ante empates se conserva el orden de aparición
+    seleccion = candidatos[np.argsort(-todos[candidatos], kind='stable')][:fin]
+    pagina = seleccion[offset:]
+
+    suma_seleccion = int(todos[seleccion].sum())
+    previos = int(todos[seleccion[:offset]].sum())
+
+    return {
+        'valores': conteo.index[pagina].astype(str).tolist(),
+        'totales': todos[pagina],
+        'previos': previos,
+        'otros_total': int(todos.sum()) - suma_seleccion,
+        'otros_categorias': n - fin,
+        'total_categorias': n,
+    }
@@ -0,0 +1,163 @@
+"""
+Exportación de tablas a archivos en streaming
+Formatos:
+    csv      -> UTF-8 con BOM (Excel reconoce los acentos), un bloque por chunk
+    parquet  -> un row group por bloque (requiere pyarrow)
+    xlsx     -> openpyxl en modo write-only, una hoja por tabla
+Las filas llegan por bloques y cada bloque se escribe y se libera antes de
+pedir el siguiente: la memoria depende del tamaño del bloque y no del total
+de filas. El XLSX es un zip que sólo se puede cerrar al final, así que se
+escribe en un archivo temporal (openpyxl ya guarda cada hoja en disco) y se
+envía al terminar.
+"""
+
+import csv
+import io
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Iterable, Iterator, List, Sequence
+
+from app.utils.formatos import FormatoNoSoportado
+
+TIPOS_EXPORTACION = {
+    # Starlette agrega el charset a los tipos text/*
+    'csv': 'text/csv',
+    'parquet': 'application/vnd.apache.parquet',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+TAMANO_LECTURA = 1 << 20
+
+
+@dataclass
+class Tabla:
+    """Tabla a exportar: nombre (hoja del XLSX), columnas y filas por bloques"""
+    nombre: str
+    columnas: List[str]
+    bloques: Iterable[Sequence[Sequence[Any]]]
+
+
+def exportar(tablas: List[Tabla], formato: str) -> Iterator[bytes]:
+    """
+    Genera el archivo por chunks
+
+    Args:
+        tablas: Tablas a exportar; CSV y Parquet admiten una sola
+        formato: 'csv', 'parquet' o 'xlsx'
+
+    Returns:
+        Iterador de bytes del archivo
+
+    Raises:
+        FormatoNoSoportado: Si el formato no existe o falta pyarrow
+        ValueError: Si se piden varias tablas en CSV o Parquet
+    """
+    if formato not in TIPOS_EXPORTACION:
+        raise FormatoNoSoportado(
+            f"Formato '{formato}' no soportado. Use {', '.join(TIPOS_EXPORTACION)}"
+        )
+    if formato == 'xlsx':
+        return _exportar_xlsx(tablas)
+
+    if len(tablas) != 1:
+        raise ValueError(f"El formato {formato} contiene una sola tabla")
+    if formato == 'csv':
+        return _exportar_csv(tablas[0])
+
+    # Se verifica antes de empezar a responder
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise FormatoNoSoportado("El formato parquet requiere pyarrow instalado en el servidor")
+    return _exportar_parquet(tablas[0])
+
+
+def _exportar_csv(tabla: Tabla) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    buffer.write('\ufeff')
+    escritor.writerow(tabla.columnas)
+
+    for bloque in tabla.bloques:
+        escritor.writerows(bloque)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+class _Sumidero(io.RawIOBase):
+    """Archivo de sólo escritura cuyo contenido se retira por partes"""
+
+    def __init__(self):
+        super().__init__()
+        self._partes: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, datos) -> int:
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def retirar(self) -> bytes:
+        contenido = b''.join(self._partes)
+        self._partes = []
+        return contenido
+
+
+def _exportar_parquet(tabla: Tabla) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sumidero = _Sumidero()
+    escritor = None
+    esquema = None
+
+    for bloque in tabla.bloques:
+        if not bloque:
+            continue
+        columnas = {nombre: [fila[i] for fila in bloque] for i, nombre in enumerate(tabla.columnas)}
+        if escritor is None:
+            # El esquema lo fija el primer bloque (una columna sin valores se
+            # toma como texto); los siguientes se convierten a él
+            datos = pa.table(columnas)
+            esquema = pa.schema([
+                campo.with_type(pa.string()) if pa.types.is_null(campo.type) else campo
+                for campo in datos.schema
+            ])
+            datos = datos.cast(esquema)
+            escritor = pq.ParquetWriter(sumidero, esquema)
+        else:
+            datos = pa.table(columnas, schema=esquema)
+        escritor.write_table(datos)
+        yield sumidero.retirar()
+
+    if escritor is None:
+        escritor = pq.ParquetWriter(sumidero, pa.schema([(nombre, pa.string()) for nombre in tabla.columnas]))
+    escritor.close()
+    yield sumidero.retirar()
+
+
+def _exportar_xlsx(tablas: List[Tabla]) -> Iterator[bytes]:
+    from openpyxl import Workbook
+
+    libro = Workbook(write_only=True)
+    for tabla in tablas:
+        # Excel limita los nombres de hoja a 31 caracteres
+        hoja = libro.create_sheet(tabla.nombre[:31])
+        hoja.append(tabla.columnas)
+        for bloque in tabla.bloques:
+            for fila in bloque:
+                hoja.append(list(fila))
+
+    with tempfile.TemporaryFile() as archivo:
+        libro.save(archivo)
+        archivo.seek(0)
+        while True:
+            chunk = archivo.read(TAMANO_LECTURA)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,108 @@
+"""
+Decodificación de cuerpos de request con registros de empleados
+Formatos aceptados según Content-Type:
+    application/json                      -> arreglo de objetos (filas) u
+                                             objeto {columna: [valores]}
+    application/vnd.apache.arrow.stream   -> Arrow IPC (stream)
+    application/vnd.apache.arrow.file     -> Arrow IPC (archivo)
+    application/vnd.apache.parquet        -> Parquet
+Los formatos por columnas se decodifican directamente a un DataFrame con
+tipos, sin pasar por un dict por registro. Arrow/Parquet requieren pyarrow.
+"""
+
+import io
+import json
+from typing import Dict, List, Optional, Union
+
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+TIPOS_ARROW_STREAM = ('application/vnd.apache.arrow.stream',)
+TIPOS_ARROW_ARCHIVO = ('application/vnd.apache.arrow.file', 'application/x-arrow')
+TIPOS_PARQUET = ('application/vnd.apache.parquet', 'application/x-parquet')
+
+
+class FormatoNoSoportado(ValueError):
+    """Content-Type desconocido o que requiere una dependencia no instalada"""
+
+
+def decodificar_registros(
+    contenido: bytes,
+    content_type: Optional[str]
+) -> Optional[Union[List[Dict], pd.DataFrame]]:
+    """
+    Decodifica los registros de un cuerpo de request
+
+    Args:
+        contenido: Cuerpo del request
+        content_type: Cabecera Content-Type (sin ella se asume JSON)
+
+    Returns:
+        Lista de registros (JSON por filas), DataFrame (formatos por columnas)
+        o None si el cuerpo está vacío
+
+    Raises:
+        FormatoNoSoportado: Si el Content-Type no se reconoce o falta pyarrow
+        ValueError: Si el cuerpo no tiene el formato declarado
+    """
+    if not contenido:
+        return None
+
+    tipo = (content_type or 'application/json').split(';')[0].strip().lower()
+
+    if tipo == 'application/json' or tipo.endswith('+json'):
+        return _decodificar_json(contenido)
+    if tipo in TIPOS_ARROW_STREAM + TIPOS_ARROW_ARCHIVO + TIPOS_PARQUET:
+        return _decodificar_arrow(contenido, tipo)
+
+    raise FormatoNoSoportado(
+        f"Content-Type '{tipo}' no soportado. Use application/json, "
+        f"{TIPOS_ARROW_STREAM[0]}, {TIPOS_ARROW_ARCHIVO[0]} o {TIPOS_PARQUET[0]}"
+    )
+
+
+def _decodificar_json(contenido: bytes) -> Union[List[Dict], pd.DataFrame]:
+    try:
+        datos = orjson.loads(contenido) if orjson is not None else json.loads(contenido)
+    except ValueError:
+        raise ValueError("El cuerpo no es JSON válido")
+
+    if isinstance(datos, list):
+        if not all(isinstance(registro, dict) for registro in datos):
+            raise ValueError("Se esperaba un arreglo de objetos (un objeto por registro)")
+        return datos
+
+    if isinstance(datos, dict):
+        # Por columnas: {"area": [...], "salario": [...], ...}
+        longitudes = {len(valores) if isinstance(valores, list) else -1 for valores in datos.values()}
+        if -1 in longitudes:
+            raise ValueError("En el formato por columnas cada columna debe ser un arreglo")
+        if len(longitudes) > 1:
+            raise ValueError("En el formato por columnas todas las columnas deben tener la misma longitud")
+        return pd.DataFrame(datos)
+
+    raise ValueError("Se esperaba un arreglo de registros o un objeto con columnas")
+
+
+def _decodificar_arrow(contenido: bytes, tipo: str) -> pd.DataFrame:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise FormatoNoSoportado(f"El formato '{tipo}' requiere pyarrow instalado en el servidor")
+
+    try:
+        if tipo in TIPOS_PARQUET:
+            tabla = pq.read_table(io.BytesIO(contenido))
+        elif tipo in TIPOS_ARROW_ARCHIVO:
+            tabla = pa.ipc.open_file(pa.BufferReader(contenido)).read_all()
+        else:
+            tabla = pa.ipc.open_stream(pa.BufferReader(contenido)).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        raise ValueError(f"El cuerpo no es {tipo} válido: {e}")
+
+    return tabla.to_pandas()
@@ -0,0 +1,101 @@
+"""
+Utilidades HTTP: requests condicionales (ETag / If-None-Match) y compresión
+"""
+
+import hashlib
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.middleware.gzip import GZipMiddleware, GZipResponder
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Message, Receive, Scope, Send
+
+# El cliente puede guardar la respuesta pero debe revalidarla en cada uso
+CACHE_CONTROL = "private, no-cache"
+
+# Respuestas que se envían evento por evento (comprimirlas retendría los datos)
+# o que ya son formatos comprimidos
+TIPOS_SIN_COMPRESION = (
+    "text/event-stream",
+    "application/x-ndjson",
+    "application/vnd.apache.parquet",
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+)
+
+
+def etag(*partes: object) -> str:
+    """
+    ETag fuerte a partir de lo que determina el contenido de la respuesta
+
+    Args:
+        partes: Versión de los datos, parámetros, versión del modelo...
+
+    Returns:
+        ETag entre comillas
+    """
+    contenido = "\x1f".join(str(parte) for parte in partes)
+    return f'"{hashlib.sha256(contenido.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def cabeceras_etag(valor: str) -> dict:
+    """Cabeceras de una respuesta revalidable con `valor` como ETag"""
+    return {"ETag": valor, "Cache-Control": CACHE_CONTROL}
+
+
+def respuesta_no_modificada(request: Request, valor: str) -> Optional[Response]:
+    """
+    Respuesta 304 si el cliente ya tiene la representación con ese ETag
+
+    Args:
+        request: Request con la cabecera If-None-Match opcional
+        valor: ETag actual del recurso
+
+    Returns:
+        Response 304 o None si hay que enviar el contenido
+    """
+    cabecera = request.headers.get("if-none-match")
+    if not cabecera:
+        return None
+
+    # If-None-Match usa comparación débil: se ignora el prefijo W/
+    etiquetas = {e.strip().removeprefix("W/") for e in cabecera.split(",")}
+    if "*" in etiquetas or valor in etiquetas:
+        return Response(status_code=304, headers=cabeceras_etag(valor))
+    return None
+
+
+class _GZipResponderSinStreams(GZipResponder):
+    """GZipResponder que deja pasar sin comprimir las respuestas en streaming"""
+
+    sin_compresion = False
+
+    async def send_with_gzip(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            tipo = Headers(raw=message["headers"]).get("content-type", "")
+            self.sin_compresion = tipo.startswith(TIPOS_SIN_COMPRESION)
+
+        if self.sin_compresion:
+            await self.send(message)
+            return
+
+        await super().send_with_gzip(message)
+
+
+class CompresionMiddleware(GZipMiddleware):
+    """
+    GZip para las respuestas JSON/CSV
+
+    SSE y NDJSON se envían sin comprimir: GzipFile retiene los bytes hasta
+    completar un bloque y los eventos llegarían con retraso.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("Accept-Encoding", ""):
+            responder = _GZipResponderSinStreams(
+                self.app, self.minimum_size, compresslevel=self.compresslevel
+            )
+            await responder(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
@@ -0,0 +1,302 @@
+"""
+Métricas de la API: tiempos por etapa, cabecera Server-Timing y exposición
+en formato de texto de Prometheus
+
+Las etapas (parseo del cuerpo, construcción del DataFrame, agregaciones,
+features, predict_proba, serialización...) se miden con medir_etapa() y se
+acumulan en el request en curso y en un histograma por etapa. Medir una
+etapa cuesta dos lecturas del reloj y una actualización de diccionario.
+
+Las métricas son propias de cada proceso: con varios workers de uvicorn,
+Prometheus debe consultar cada uno (o usarse un solo worker por contenedor).
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LIMITES_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+LIMITES_BYTES = (1e2, 1e3, 1e4, 1e5, 1e6, 1e7, 1e8)
+
+# Etapas del request en curso: nombre -> segundos acumulados
+_etapas: ContextVar[Optional[Dict[str, float]]] = ContextVar('etapas', default=None)
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(nombres: Sequence[str], valores: Sequence[str], extra: str = '') -> str:
+    partes = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        partes.append(extra)
+    return '{' + ','.join(partes) + '}' if partes else ''
+
+
+def _numero(valor: float) -> str:
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+class _Metrica:
+    tipo = ''
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._lock = threading.Lock()
+
+    def exponer(self) -> List[str]:
+        return [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} {self.tipo}'] + self._muestras()
+
+    def _muestras(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Contador(_Metrica):
+    """Valor que sólo crece (requests, errores...)"""
+
+    tipo = 'counter'
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *valores: str, cantidad: float = 1.0) -> None:
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0.0) + cantidad
+
+    def _muestras(self) -> List[str]:
+        with self._lock:
+            valores = list(self._valores.items())
+        return [f'{self.nombre}{_etiquetas(self.etiquetas, k)} {_numero(v)}' for k, v in valores]
+
+
+class Histograma(_Metrica):
+    """Distribución de observaciones en buckets acumulados"""
+
+    tipo = 'histogram'
+
+    def __init__(
+        self,
+        nombre: str,
+        ayuda: str,
+        etiquetas: Sequence[str] = (),
+        limites: Sequence[float] = LIMITES_SEGUNDOS
+    ):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(sorted(limites))
+        # etiquetas -> [conteos por bucket (+Inf al final), suma]
+        self._valores: Dict[Tuple[str, ...], list] = {}
+
+    def observar(self, valor: float, *valores: str) -> None:
+        indice = bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._valores.get(valores)
+            if serie is None:
+                serie = self._valores[valores] = [[0] * (len(self.limites) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def _muestras(self) -> List[str]:
+        with self._lock:
+            series = [(k, list(conteos), suma) for k, (conteos, suma) in self._valores.items()]
+
+        lineas = []
+        for valores, conteos, suma in series:
+            acumulado = 0
+            for limite, conteo in zip(self.limites + (float('inf'),), conteos):
+                acumulado += conteo
+                le = _etiquetas(self.etiquetas, valores, f'le="{_numero(limite)}"')
+                lineas.append(f'{self.nombre}_bucket{le} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {_numero(suma)}')
+            lineas.append(f'{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {acumulado}')
+        return lineas
+
+
+class Metricas:
+    """Métricas HTTP y de etapas del proceso"""
+
+    def __init__(self):
+        self.requests = Contador(
+            'rotacion_http_requests_total', 'Requests atendidos', ('metodo', 'ruta', 'estado')
+        )
+        self.duracion = Histograma(
+            'rotacion_http_request_duracion_segundos', 'Latencia de los requests', ('metodo', 'ruta')
+        )
+        self.bytes_request = Histograma(
+            'rotacion_http_request_bytes', 'Tamaño del cuerpo de los requests', ('ruta',), LIMITES_BYTES
+        )
+        self.bytes_response = Histograma(
+            'rotacion_http_response_bytes', 'Tamaño del cuerpo de las respuestas (ya comprimido)',
+            ('ruta',), LIMITES_BYTES
+        )
+        self.etapas = Histograma(
+            'rotacion_etapa_duracion_segundos',
+            'Duración de cada etapa del procesamiento (la etapa entrenamiento es la duración del entrenamiento)',
+            ('etapa',)
+        )
+
+    def exponer(self, adicionales: Sequence[str] = ()) -> str:
+        """
+        Texto en el formato de exposición de Prometheus (0.0.4)
+
+        Args:
+            adicionales: Líneas ya formateadas de métricas calculadas al consultar
+
+        Returns:
+            Texto con una muestra por línea
+        """
+        lineas: List[str] = []
+        for metrica in (self.requests, self.duracion, self.bytes_request, self.bytes_response, self.etapas):
+            lineas.extend(metrica.exponer())
+        lineas.extend(adicionales)
+        return '\n'.join(lineas) + '\n'
+
+
+@lru_cache()
+def get_metricas() -> Metricas:
+    """Métricas del proceso"""
+    return Metricas()
+
+
+def muestra(nombre: str, tipo: str, ayuda: str, valores: Sequence[Tuple[Dict[str, str], float]]) -> List[str]:
+    """
+    Formatea una métrica calculada al momento de la consulta (gauge o
+    contador leído de otro componente)
+
+    Args:
+        nombre: Nombre de la métrica
+        tipo: 'gauge' o 'counter'
+        ayuda: Descripción
+        valores: Pares (etiquetas, valor)
+
+    Returns:
+        Líneas en formato Prometheus
+    """
+    lineas = [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}']
+    for etiquetas, valor in valores:
+        lineas.append(f'{nombre}{_etiquetas(list(etiquetas), list(etiquetas.values()))} {_numero(valor)}')
+    return lineas
+
+
+@contextmanager
+def medir_etapa(nombre: str) -> Iterator[None]:
+    """
+    Mide una etapa del procesamiento
+
+    La duración se suma a la etapa del request en curso (si la hay) y se
+    observa en el histograma de etapas. Una etapa repetida en el mismo
+    request (p. ej. un bloque de predicción) acumula sus duraciones.
+
+    Args:
+        nombre: Nombre de la etapa (token sin espacios, para Server-Timing)
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_etapa(nombre, time.perf_counter() - inicio)
+
+
+def registrar_etapa(nombre: str, segundos: float) -> None:
+    """Registra una etapa ya medida en el request en curso y en el histograma"""
+    etapas = _etapas.get()
+    if etapas is not None:
+        etapas[nombre] = etapas.get(nombre, 0.0) + segundos
+    get_metricas().etapas.observar(segundos, nombre)
+
+
+def iniciar_etapas() -> Dict[str, float]:
+    """
+    Empieza a acumular etapas en el contexto actual (p. ej. en un proceso
+    del pool de cómputo, para devolverlas con el resultado)
+
+    Returns:
+        Diccionario donde se acumulan las etapas
+    """
+    etapas: Dict[str, float] = {}
+    _etapas.set(etapas)
+    return etapas
+
+
+def registrar_etapas(etapas: Dict[str, float]) -> None:
+    """Registra las etapas medidas en otro proceso"""
+    for nombre, segundos in etapas.items():
+        registrar_etapa(nombre, segundos)
+
+
+def server_timing(etapas: Dict[str, float], total: float) -> str:
+    """
+    Valor de la cabecera Server-Timing
+
+    Args:
+        etapas: Segundos por etapa
+        total: Segundos desde que llegó el request
+
+    Returns:
+        Texto como `parseo;dur=1.2, dataframe;dur=3.4, total;dur=9.8` (ms)
+    """
+    partes = [f'{nombre};dur={segundos * 1000:.1f}' for nombre, segundos in etapas.items()]
+    partes.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(partes)
+
+
+class MetricasMiddleware:
+    """
+    Registra conteo, latencia y tamaños de cada request por ruta (la plantilla,
+    p. ej. /api/pareto/{categoria}) y agrega la cabecera Server-Timing con las
+    etapas medidas hasta que empieza la respuesta
+    """
+
+    def __init__(self, app: ASGIApp, server_timing: bool = True) -> None:
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        inicio = time.perf_counter()
+        etapas: Dict[str, float] = {}
+        token = _etapas.set(etapas)
+        medidas = {'estado': 500, 'entrada': 0, 'salida': 0}
+
+        async def recibir() -> Message:
+            mensaje = await receive()
+            if mensaje['type'] == 'http.request':
+                medidas['entrada'] += len(mensaje.get('body', b''))
+            return mensaje
+
+        async def enviar(mensaje: Message) -> None:
+            if mensaje['type'] == 'http.response.start':
+                medidas['estado'] = mensaje['status']
+                if self.server_timing:
+                    valor = server_timing(etapas, time.perf_counter() - inicio)
+                    mensaje['headers'] = list(mensaje.get('headers', [])) + [
+                        (b'server-timing', valor.encode('latin-1'))
+                    ]
+            elif mensaje['type'] == 'http.response.body':
+                medidas['salida'] += len(mensaje.get('body', b''))
+            await send(mensaje)
+
+        try:
+            await self.app(scope, recibir, enviar)
+        finally:
+            _etapas.reset(token)
+            # La ruta la agrega el router al scope; sin ella (404) se agrupa aparte
+            ruta = getattr(scope.get('route'), 'path', 'sin_ruta')
+            metricas = get_metricas()
+            metricas.requests.inc(scope['method'], ruta, str(medidas['estado']))
+            metricas.duracion.observar(time.perf_counter() - inicio, scope['method'], ruta)
+            metricas.bytes_request.observar(medidas['entrada'], ruta)
+            metricas.bytes_response.observar(medidas['salida'], ruta)
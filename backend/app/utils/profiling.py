@@ -0,0 +1,291 @@
+"""
+Perfilado bajo demanda de un request
+
+Con PROFILING_HABILITADO y el token de administrador, un request con
+`?profile=1` (o la cabecera `X-Profile: 1`) se ejecuta bajo un perfilador
+por muestreo y con tracemalloc. El reporte se guarda en PROFILING_DIR y su
+id se retorna en la cabecera `X-Profile-Id`:
+    - pilas colapsadas (`funcion (archivo:línea);...  muestras`), el formato
+      de flamegraph.pl y speedscope
+    - las N líneas que más memoria asignaron y el pico de memoria
+
+Mientras se perfila, el cálculo corre en un hilo de este proceso (no en el
+pool) y sin caché de resultados, para que las muestras lo incluyan. Sólo se
+perfila un request a la vez. Con el perfilado deshabilitado el middleware no
+se instala y no hay ningún costo.
+"""
+
+import asyncio
+import json
+import os
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextvars import ContextVar
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.config.settings import get_settings
+
+# Funciones en las que un hilo está esperando: sus muestras no son trabajo
+FUNCIONES_EN_ESPERA = frozenset({'wait', 'select', 'poll', '_wait_for_tstate_lock'})
+
+_perfilando: ContextVar[bool] = ContextVar('perfilando', default=False)
+
+
+def perfilado_activo() -> bool:
+    """True si el request en curso se está perfilando"""
+    return _perfilando.get()
+
+
+def token_valido(token: Optional[str], esperado: str) -> bool:
+    """Compara el token de administrador en tiempo constante (vacío = nunca válido)"""
+    return bool(esperado) and token is not None and secrets.compare_digest(token, esperado)
+
+
+class MuestreadorPilas:
+    """
+    Perfilador por muestreo: un hilo lee las pilas de los demás hilos cada
+    `intervalo_s` y cuenta cada pila colapsada
+    """
+
+    def __init__(self, intervalo_s: float = 0.005):
+        self.intervalo_s = intervalo_s
+        self.pilas: Counter = Counter()
+        self.muestras = 0
+        self._detener = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name='perfilador', daemon=True)
+
+    def iniciar(self) -> None:
+        self._hilo.start()
+
+    def detener(self) -> None:
+        self._detener.set()
+        self._hilo.join()
+
+    def _muestrear(self) -> None:
+        propio = threading.get_ident()
+        nombres = {}
+        while not self._detener.wait(self.intervalo_s):
+            self.muestras += 1
+            for ident, frame in sys._current_frames().items():
+                if ident == propio or frame.f_code.co_name in FUNCIONES_EN_ESPERA:
+                    continue
+                if ident not in nombres:
+                    hilo = next((h for h in threading.enumerate() if h.ident == ident), None)
+                    nombres[ident] = hilo.name if hilo is not None else str(ident)
+
+                pila = []
+                while frame is not None:
+                    codigo = frame.f_code
+                    pila.append(f'{codigo.co_name} ({_ruta_corta(codigo.co_filename)}:{frame.f_lineno})')
+                    frame = frame.f_back
+                pila.append(nombres[ident])
+                self.pilas[';'.join(reversed(pila))] += 1
+
+    def colapsadas(self) -> str:
+        """Pilas en formato colapsado, de la más frecuente a la menos"""
+        return ''.join(f'{pila} {n}\n' for pila, n in self.pilas.most_common())
+
+
+def _ruta_corta(ruta: str) -> str:
+    # Rutas relativas a site-packages o al paquete, para que el reporte sea legible
+    posicion = ruta.rfind('site-packages' + os.sep)
+    if posicion >= 0:
+        return ruta[posicion + len('site-packages') + 1:]
+    posicion = ruta.rfind(os.sep + 'app' + os.sep)
+    if posicion >= 0:
+        return ruta[posicion + 1:]
+    return os.path.basename(ruta)
+
+
+def _top_memoria(snapshot: tracemalloc.Snapshot, top_n: int) -> List[Dict]:
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+        tracemalloc.Filter(False, __file__),
+    ))
+    return [
+        {
+            'ubicacion': f'{_ruta_corta(estadistica.traceback[0].filename)}:{estadistica.traceback[0].lineno}',
+            'kb': round(estadistica.size / 1024, 1),
+            'bloques': estadistica.count,
+        }
+        for estadistica in snapshot.statistics('lineno')[:top_n]
+    ]
+
+
+class AlmacenPerfiles:
+    """Reportes de perfilado en disco, conservando los `max_reportes` más recientes"""
+
+    def __init__(self, directorio: str, max_reportes: int = 50):
+        self.directorio = directorio
+        self.max_reportes = max_reportes
+        os.makedirs(directorio, exist_ok=True)
+
+    def guardar(self, reporte: Dict, colapsadas: str) -> None:
+        perfil_id = reporte['id']
+        with open(os.path.join(self.directorio, f'{perfil_id}.collapsed'), 'w', encoding='utf-8') as f:
+            f.write(colapsadas)
+        with open(os.path.join(self.directorio, f'{perfil_id}.json'), 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, ensure_ascii=False, indent=2)
+        self._depurar()
+
+    def listar(self) -> List[Dict]:
+        """Resumen de los reportes, del más reciente al más antiguo"""
+        reportes = []
+        for archivo in self._archivos('.json'):
+            with open(archivo, encoding='utf-8') as f:
+                reporte = json.load(f)
+            reportes.append({clave: reporte[clave] for clave in ('id', 'fecha', 'metodo', 'ruta', 'estado', 'duracion_ms')})
+        return reportes
+
+    def leer(self, perfil_id: str) -> Optional[Dict]:
+        ruta = self._ruta(perfil_id, '.json')
+        if ruta is None or not os.path.exists(ruta):
+            return None
+        with open(ruta, encoding='utf-8') as f:
+            return json.load(f)
+
+    def leer_colapsadas(self, perfil_id: str) -> Optional[str]:
+        ruta = self._ruta(perfil_id, '.collapsed')
+        if ruta is None or not os.path.exists(ruta):
+            return None
+        with open(ruta, encoding='utf-8') as f:
+            return f.read()
+
+    def _ruta(self, perfil_id: str, extension: str) -> Optional[str]:
+        # Los ids son hexadecimales: cualquier otra cosa no es un reporte
+        if not perfil_id or not all(c in '0123456789abcdef' for c in perfil_id):
+            return None
+        return os.path.join(self.directorio, f'{perfil_id}{extension}')
+
+    def _archivos(self, extension: str) -> List[str]:
+        archivos = [
+            os.path.join(self.directorio, nombre)
+            for nombre in os.listdir(self.directorio) if nombre.endswith(extension)
+        ]
+        return sorted(archivos, key=os.path.getmtime, reverse=True)
+
+    def _depurar(self) -> None:
+        for archivo in self._archivos('.json')[self.max_reportes:]:
+            base = archivo[:-len('.json')]
+            for extension in ('.json', '.collapsed'):
+                try:
+                    os.remove(base + extension)
+                except FileNotFoundError:
+                    pass
+
+
+@lru_cache()
+def get_almacen_perfiles() -> AlmacenPerfiles:
+    """Almacén de reportes configurado desde settings"""
+    settings = get_settings()
+    return AlmacenPerfiles(settings.PROFILING_DIR, settings.PROFILING_MAX_REPORTES)
+
+
+class PerfiladoMiddleware:
+    """
+    Perfila los requests que lo piden con `?profile=1` o `X-Profile: 1` y
+    el token de administrador en `X-Admin-Token`
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        token: str,
+        almacen: AlmacenPerfiles,
+        intervalo_s: float = 0.005,
+        top_n: int = 20
+    ) -> None:
+        self.app = app
+        self.token = token
+        self.almacen = almacen
+        self.intervalo_s = intervalo_s
+        self.top_n = top_n
+        self._en_curso = asyncio.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not self._solicitado(scope):
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if not token_valido(headers.get('x-admin-token'), self.token):
+            await JSONResponse({'detail': 'Perfilado no autorizado'}, status_code=403)(scope, receive, send)
+            return
+        if self._en_curso.locked():
+            await JSONResponse({'detail': 'Ya hay un request en perfilado'}, status_code=409)(scope, receive, send)
+            return
+
+        async with self._en_curso:
+            await self._perfilar(scope, receive, send)
+
+    def _solicitado(self, scope: Scope) -> bool:
+        if Headers(scope=scope).get('x-profile') == '1':
+            return True
+        consulta = scope.get('query_string', b'')
+        return b'profile=' in consulta and parse_qs(consulta.decode('latin-1')).get('profile') == ['1']
+
+    async def _perfilar(self, scope: Scope, receive: Receive, send: Send) -> None:
+        perfil_id = uuid.uuid4().hex
+        estado = {'codigo': 500}
+
+        async def enviar(mensaje: Message) -> None:
+            if mensaje['type'] == 'http.response.start':
+                estado['codigo'] = mensaje['status']
+                mensaje['headers'] = list(mensaje.get('headers', [])) + [
+                    (b'x-profile-id', perfil_id.encode('latin-1'))
+                ]
+            await send(mensaje)
+
+        muestreador = MuestreadorPilas(self.intervalo_s)
+        tracemalloc_previo = tracemalloc.is_tracing()
+        if not tracemalloc_previo:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+        token = _perfilando.set(True)
+        inicio = time.perf_counter()
+        muestreador.iniciar()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracion = time.perf_counter() - inicio
+            muestreador.detener()
+            _perfilando.reset(token)
+
+            snapshot = tracemalloc.take_snapshot()
+            _, pico = tracemalloc.get_traced_memory()
+            if not tracemalloc_previo:
+                tracemalloc.stop()
+
+            reporte = {
+                'id': perfil_id,
+                'fecha': datetime.now().isoformat(),
+                'metodo': scope['method'],
+                'ruta': scope['path'],
+                'consulta': scope.get('query_string', b'').decode('latin-1'),
+                'estado': estado['codigo'],
+                'duracion_ms': round(duracion * 1000, 1),
+                'intervalo_ms': self.intervalo_s * 1000,
+                'muestras': muestreador.muestras,
+                'memoria_pico_mb': round(pico / 1024 / 1024, 2),
+                'memoria_top': _top_memoria(snapshot, self.top_n),
+                'pilas_top': [
+                    {'pila': pila, 'muestras': n} for pila, n in muestreador.pilas.most_common(self.top_n)
+                ],
+            }
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.almacen.guardar, reporte, muestreador.colapsadas()
+            )
@@ -0,0 +1,81 @@
+"""
+Serialización rápida de respuestas JSON
+Los resultados de los servicios ya tienen la forma de los schemas: se
+serializan en una sola pasada, sin la revalidación de `response_model` ni
+jsonable_encoder de FastAPI
+"""
+
+from typing import Any, Optional
+
+import pydantic_core
+from pydantic import BaseModel
+from starlette.responses import Response
+
+from app.config.settings import get_settings
+from app.utils.metrics import medir_etapa
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+
+def _modelo_a_dict(valor: Any) -> Any:
+    if isinstance(valor, BaseModel):
+        return valor.model_dump()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def a_json(contenido: Any) -> bytes:
+    """
+    Serializa un resultado a JSON
+
+    Los modelos Pydantic usan su serializador compilado; listas y
+    diccionarios (que pueden contener modelos) usan orjson si está instalado.
+
+    Args:
+        contenido: Modelo, lista o diccionario
+
+    Returns:
+        JSON en UTF-8
+    """
+    if isinstance(contenido, BaseModel):
+        return contenido.model_dump_json().encode('utf-8')
+    if orjson is not None:
+        return orjson.dumps(contenido, default=_modelo_a_dict, option=orjson.OPT_SERIALIZE_NUMPY)
+    return pydantic_core.to_json(contenido)
+
+
+class RespuestaJSON(Response):
+    """Response JSON serializada con a_json()"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return a_json(content)
+
+
+def respuesta_rapida(contenido: Any, response: Optional[Response] = None) -> Any:
+    """
+    Respuesta de un endpoint por el camino rápido de serialización
+
+    Al retornar una Response, FastAPI no valida el contenido contra
+    `response_model` (el schema sigue documentado en OpenAPI). Con
+    SERIALIZACION_RAPIDA desactivado retorna el contenido sin cambios.
+
+    Args:
+        contenido: Resultado del servicio, con la forma del response_model
+        response: Response inyectada del endpoint, para conservar sus cabeceras
+
+    Returns:
+        RespuestaJSON o el contenido tal cual
+    """
+    if isinstance(contenido, Response) or not get_settings().SERIALIZACION_RAPIDA:
+        return contenido
+
+    headers = dict(response.headers) if response is not None else None
+    if headers:
+        # La longitud la calcula la nueva respuesta
+        headers.pop('content-length', None)
+    with medir_etapa('serializacion'):
+        return RespuestaJSON(contenido, headers=headers)
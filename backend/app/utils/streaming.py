@@ -0,0 +1,174 @@
+"""
+Utilidades para requests y respuestas en streaming
+Lectura por bloques de cuerpos NDJSON/CSV y respuesta que se envía mientras
+el cuerpo del request todavía se está recibiendo
+"""
+
+import asyncio
+import io
+import json
+import tempfile
+from typing import AsyncIterator, List, Optional
+
+import pandas as pd
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse que no consume `receive` mientras envía
+
+    StreamingResponse escucha `receive` para detectar desconexiones, lo que
+    descarta los mensajes con el cuerpo del request. Esta variante deja el
+    cuerpo al generador (p. ej. a través de CuerpoEnDisco), que recibe la
+    desconexión del cliente como ClientDisconnect.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+
+        if self.background is not None:
+            await self.background()
+
+
+class CuerpoEnDisco:
+    """
+    Recibe el cuerpo del request en un archivo temporal mientras se consume
+
+    La mayoría de los clientes HTTP/1.1 envían todo el cuerpo antes de leer
+    la respuesta. Si el servidor dejara de recibir mientras espera poder
+    escribir, ambos quedarían bloqueados; aquí la recepción corre en su
+    propia tarea y nunca espera a la respuesta. La memoria no crece con el
+    tamaño del cuerpo: lo pendiente de procesar queda en disco.
+    """
+
+    TAMANO_LECTURA = 1 << 20
+
+    def __init__(self, stream: AsyncIterator[bytes]):
+        self._stream = stream
+        self._archivo = tempfile.TemporaryFile()
+        self._recibidos = 0
+        self._error: Optional[BaseException] = None
+        self._nuevos_datos = asyncio.Event()
+        self.terminado = False
+
+    async def recibir(self) -> None:
+        """Copia el cuerpo al archivo (se ejecuta como tarea aparte)"""
+        try:
+            async for chunk in self._stream:
+                self._archivo.seek(0, io.SEEK_END)
+                self._archivo.write(chunk)
+                self._recibidos += len(chunk)
+                self._nuevos_datos.set()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.terminado = True
+            self._nuevos_datos.set()
+
+    async def leer(self) -> AsyncIterator[bytes]:
+        """Bytes del cuerpo en orden, esperando los que aún no llegan"""
+        posicion = 0
+        while True:
+            if posicion < self._recibidos:
+                self._archivo.seek(posicion)
+                datos = self._archivo.read(min(self._recibidos - posicion, self.TAMANO_LECTURA))
+                posicion += len(datos)
+                yield datos
+            elif self.terminado:
+                if self._error is not None:
+                    raise self._error
+                return
+            else:
+                self._nuevos_datos.clear()
+                await self._nuevos_datos.wait()
+
+    def cerrar(self) -> None:
+        self._archivo.close()
+
+
+async def _lineas(stream: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Líneas completas de un stream de bytes, sin importar cómo llegan los chunks"""
+    pendiente = b''
+    async for chunk in stream:
+        pendiente += chunk
+        *lineas, pendiente = pendiente.split(b'\n')
+        for linea in lineas:
+            yield linea
+    if pendiente:
+        yield pendiente
+
+
+async def leer_bloques_ndjson(
+    stream: AsyncIterator[bytes],
+    tamano_bloque: int
+) -> AsyncIterator[pd.DataFrame]:
+    """
+    Agrupa un cuerpo NDJSON (un objeto JSON por línea) en DataFrames
+
+    Args:
+        stream: Bytes del cuerpo del request
+        tamano_bloque: Registros por DataFrame
+
+    Raises:
+        ValueError: Si una línea no es un objeto JSON
+    """
+    bloque: List[dict] = []
+    numero = 0
+
+    async for linea in _lineas(stream):
+        numero += 1
+        if not linea.strip():
+            continue
+        try:
+            registro = json.loads(linea)
+        except ValueError:
+            raise ValueError(f"Línea {numero}: JSON inválido")
+        if not isinstance(registro, dict):
+            raise ValueError(f"Línea {numero}: se esperaba un objeto JSON")
+
+        bloque.append(registro)
+        if len(bloque) >= tamano_bloque:
+            yield pd.DataFrame(bloque)
+            bloque = []
+
+    if bloque:
+        yield pd.DataFrame(bloque)
+
+
+async def leer_bloques_csv(
+    stream: AsyncIterator[bytes],
+    tamano_bloque: int
+) -> AsyncIterator[pd.DataFrame]:
+    """
+    Agrupa un cuerpo CSV con encabezado en DataFrames
+
+    Cada bloque se interpreta con pandas (tipos numéricos y booleanos
+    inferidos). Los campos entre comillas no deben contener saltos de línea.
+
+    Args:
+        stream: Bytes del cuerpo del request
+        tamano_bloque: Registros por DataFrame
+    """
+    encabezado = None
+    bloque: List[bytes] = []
+
+    async for linea in _lineas(stream):
+        if not linea.strip():
+            continue
+        if encabezado is None:
+            encabezado = linea
+            continue
+
+        bloque.append(linea)
+        if len(bloque) >= tamano_bloque:
+            yield _csv_a_dataframe(encabezado, bloque)
+            bloque = []
+
+    if bloque:
+        yield _csv_a_dataframe(encabezado, bloque)
+
+
+def _csv_a_dataframe(encabezado: bytes, lineas: List[bytes]) -> pd.DataFrame:
+    return pd.read_csv(io.BytesIO(b'\n'.join([encabezado, *lineas])))
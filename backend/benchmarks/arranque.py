@@ -0,0 +1,151 @@
+"""
+Benchmark de arranque de un worker
+
+Cada medición corre en un proceso nuevo (con directorios de datos aislados)
+y reporta:
+    - tiempo de `import app.main` y memoria residente (RSS) al terminar
+    - qué stacks pesados quedaron cargados (scikit-learn, scipy, pandas, pyarrow)
+    - duración de los eventos de startup
+    - costo del primer request de ML (GET /api/ml/models), que es el que
+      carga scikit-learn y el registro de modelos, y la RSS después de él
+
+Con --maximo-s / --maximo-mb el proceso termina con código 1 si la mediana
+del import o la RSS inicial superan el presupuesto, para usarlo en CI.
+
+Uso (desde backend/):
+    python -m benchmarks.arranque
+    python -m benchmarks.arranque --repeticiones 10 --maximo-s 2 --maximo-mb 180
+    python -m benchmarks.arranque --precarga --espera-s 5 --salida arranque.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+DIRECTORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULOS_PESADOS = ['sklearn', 'scipy', 'pandas', 'pyarrow']
+
+# Corre en el proceso medido; imprime un JSON en la última línea
+CODIGO_MEDICION = """
+import json, sys, time
+
+def rss_mb():
+    try:
+        with open('/proc/self/status') as f:
+            for linea in f:
+                if linea.startswith('VmRSS:'):
+                    return int(linea.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+inicio = time.perf_counter()
+import app.main
+resultado = {
+    'import_s': time.perf_counter() - inicio,
+    'rss_mb': rss_mb(),
+    'cargados': {m: m in sys.modules for m in MODULOS},
+}
+
+from fastapi.testclient import TestClient
+inicio = time.perf_counter()
+with TestClient(app.main.app) as cliente:
+    resultado['startup_s'] = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    cliente.get('/health')
+    resultado['primer_request_s'] = time.perf_counter() - inicio
+
+    time.sleep(ESPERA_S)
+    inicio = time.perf_counter()
+    respuesta = cliente.get('/api/ml/models')
+    resultado['primer_request_ml_s'] = time.perf_counter() - inicio
+    resultado['estado_ml'] = respuesta.status_code
+    resultado['rss_tras_ml_mb'] = rss_mb()
+
+print(json.dumps(resultado))
+"""
+
+
+def medir(precarga: bool, espera_s: float = 0.0) -> Dict:
+    """Una medición en un proceso nuevo"""
+    temporal = tempfile.mkdtemp(prefix='bench_arranque_')
+    entorno = dict(os.environ)
+    entorno.update({
+        'DATASET_DIR': os.path.join(temporal, 'datasets'),
+        'JOB_DB_PATH': os.path.join(temporal, 'jobs.db'),
+        'MODEL_REGISTRY_DIR': os.path.join(temporal, 'modelos'),
+        'CACHE_DIR': '',
+        'PRECARGA_ML': 'true' if precarga else 'false',
+        'PYTHONPATH': DIRECTORIO_BACKEND,
+    })
+    codigo = f'MODULOS = {MODULOS_PESADOS!r}\nESPERA_S = {espera_s!r}\n' + CODIGO_MEDICION
+    proceso = subprocess.run(
+        [sys.executable, '-c', codigo],
+        cwd=DIRECTORIO_BACKEND, env=entorno, capture_output=True, text=True, check=True
+    )
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def resumir(mediciones: List[Dict]) -> Dict:
+    """Mediana de cada valor numérico y módulos cargados de la primera medición"""
+    resumen = {
+        clave: round(statistics.median(m[clave] for m in mediciones), 4)
+        for clave in ('import_s', 'rss_mb', 'startup_s', 'primer_request_s',
+                      'primer_request_ml_s', 'rss_tras_ml_mb')
+    }
+    resumen['cargados'] = mediciones[0]['cargados']
+    resumen['estado_ml'] = mediciones[0]['estado_ml']
+    return resumen
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--precarga', action='store_true', help='Mide con PRECARGA_ML=true')
+    parser.add_argument('--espera-s', type=float, default=0.0,
+                        help='Pausa entre el startup y el primer request de ML (p. ej. para que termine la precarga)')
+    parser.add_argument('--maximo-s', type=float, default=None, help='Presupuesto del import de app.main')
+    parser.add_argument('--maximo-mb', type=float, default=None, help='Presupuesto de RSS tras el import')
+    parser.add_argument('--salida', default=None, help='Archivo JSON con los resultados')
+    args = parser.parse_args()
+
+    mediciones = []
+    for i in range(args.repeticiones):
+        mediciones.append(medir(args.precarga, args.espera_s))
+        print(f"  medición {i + 1}/{args.repeticiones}: "
+              f"import {mediciones[-1]['import_s']:.2f} s, RSS {mediciones[-1]['rss_mb']:.0f} MB")
+
+    resumen = resumir(mediciones)
+    cargados = ', '.join(m for m, cargado in resumen['cargados'].items() if cargado) or 'ninguno'
+    print(f"\nimport app.main      {resumen['import_s']:.2f} s")
+    print(f"RSS tras el import   {resumen['rss_mb']:.0f} MB")
+    print(f"stacks cargados      {cargados}")
+    print(f"startup              {resumen['startup_s']:.2f} s")
+    print(f"primer request       {resumen['primer_request_s'] * 1000:.1f} ms")
+    print(f"primer request ML    {resumen['primer_request_ml_s'] * 1000:.1f} ms "
+          f"(estado {resumen['estado_ml']})")
+    print(f"RSS tras request ML  {resumen['rss_tras_ml_mb']:.0f} MB")
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump({'resumen': resumen, 'mediciones': mediciones}, f, indent=2, ensure_ascii=False)
+
+    excedidos = []
+    if args.maximo_s is not None and resumen['import_s'] > args.maximo_s:
+        excedidos.append(f"import {resumen['import_s']:.2f} s > {args.maximo_s} s")
+    if args.maximo_mb is not None and resumen['rss_mb'] > args.maximo_mb:
+        excedidos.append(f"RSS {resumen['rss_mb']:.0f} MB > {args.maximo_mb} MB")
+    if excedidos:
+        print(f"\nPresupuesto excedido: {'; '.join(excedidos)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
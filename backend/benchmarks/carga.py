@@ -0,0 +1,352 @@
+"""
+Prueba de carga HTTP de extremo a extremo
+
+Levanta la app (`app.main:app`) con uvicorn en un puerto local, o usa un
+servidor ya en marcha con --url, y reproduce una mezcla de requests de
+dashboard con N usuarios concurrentes (httpx asíncrono). Por cada nivel de
+concurrencia reporta, por endpoint, throughput, latencias p50/p95/p99 y tasa
+de errores, para decidir workers y COMPUTE_* con datos.
+
+Mezcla por defecto (pesos relativos, ajustables con --peso nombre=valor):
+    analyze            POST /api/analyze?dataset_id=...
+    analyze_cuerpo     POST /api/analyze con los registros en el cuerpo
+    pareto             POST /api/pareto/{area|supervisor|turno|puesto}?dataset_id=...
+    predict            POST /api/ml/predict (un empleado)
+    predict_batch      POST /api/ml/predict/batch (lote de empleados)
+
+Uso (desde backend/):
+    python -m benchmarks.carga --concurrencia 1 8 32 --duracion 20
+    python -m benchmarks.carga --workers 2 --sin-cache --salida carga.json
+    python -m benchmarks.carga --url http://127.0.0.1:8000 --peso predict_batch=0
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from benchmarks.datos_sinteticos import generar_empleados, generar_registros
+
+DIRECTORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATEGORIAS_PARETO = ['area', 'supervisor', 'turno', 'puesto']
+
+# nombre -> peso relativo en la mezcla
+PESOS_DEFECTO = {
+    'analyze': 35,
+    'analyze_cuerpo': 5,
+    'pareto': 30,
+    'predict': 25,
+    'predict_batch': 5,
+}
+
+# (método, ruta, parámetros, cuerpo JSON serializado)
+Request = Tuple[str, str, Dict, Optional[bytes]]
+
+
+@dataclass
+class Escenario:
+    """Datos compartidos por los usuarios virtuales"""
+
+    dataset_ids: List[str]
+    cuerpo_analyze: bytes
+    empleados: List[bytes]
+    lotes: List[bytes]
+    generadores: Dict[str, Callable[[random.Random], Request]] = field(default_factory=dict)
+
+
+def _crear_escenario(dataset_ids: List[str], registros_cuerpo: int, tamano_lote: int) -> Escenario:
+    registros = generar_registros(max(registros_cuerpo, tamano_lote * 4, 1000), semilla=7)
+    escenario = Escenario(
+        dataset_ids=dataset_ids,
+        cuerpo_analyze=json.dumps(registros[:registros_cuerpo]).encode('utf-8'),
+        empleados=[json.dumps(r).encode('utf-8') for r in registros[:1000]],
+        lotes=[
+            json.dumps(registros[i * tamano_lote:(i + 1) * tamano_lote]).encode('utf-8')
+            for i in range(4)
+        ],
+    )
+    escenario.generadores = {
+        'analyze': lambda rnd: (
+            'POST', '/api/analyze', {'dataset_id': rnd.choice(dataset_ids)}, None
+        ),
+        'analyze_cuerpo': lambda rnd: (
+            'POST', '/api/analyze', {}, escenario.cuerpo_analyze
+        ),
+        'pareto': lambda rnd: (
+            'POST', f'/api/pareto/{rnd.choice(CATEGORIAS_PARETO)}',
+            {'dataset_id': rnd.choice(dataset_ids)}, None
+        ),
+        'predict': lambda rnd: (
+            'POST', '/api/ml/predict', {}, rnd.choice(escenario.empleados)
+        ),
+        'predict_batch': lambda rnd: (
+            'POST', '/api/ml/predict/batch', {}, rnd.choice(escenario.lotes)
+        ),
+    }
+    return escenario
+
+
+async def _usuario(
+    cliente: httpx.AsyncClient,
+    escenario: Escenario,
+    nombres: List[str],
+    pesos: List[float],
+    semilla: int,
+    inicio_medicion: float,
+    fin: float,
+    pausa_s: float,
+    muestras: List[Tuple[str, float, bool]]
+) -> None:
+    """Usuario virtual: envía requests de la mezcla hasta `fin`"""
+    rnd = random.Random(semilla)
+    cabeceras = {'Content-Type': 'application/json', 'Accept-Encoding': 'gzip'}
+
+    while time.perf_counter() < fin:
+        nombre = rnd.choices(nombres, weights=pesos)[0]
+        metodo, ruta, params, cuerpo = escenario.generadores[nombre](rnd)
+
+        inicio = time.perf_counter()
+        try:
+            respuesta = await cliente.request(metodo, ruta, params=params, content=cuerpo, headers=cabeceras)
+            await respuesta.aread()
+            correcto = respuesta.status_code < 400
+        except httpx.HTTPError:
+            correcto = False
+        duracion = time.perf_counter() - inicio
+
+        # Las respuestas del calentamiento no se cuentan
+        if inicio >= inicio_medicion:
+            muestras.append((nombre, duracion, correcto))
+
+        if pausa_s:
+            await asyncio.sleep(rnd.expovariate(1 / pausa_s))
+
+
+async def _ejecutar_nivel(
+    url: str,
+    escenario: Escenario,
+    pesos: Dict[str, float],
+    concurrencia: int,
+    duracion_s: float,
+    calentamiento_s: float,
+    pausa_s: float
+) -> Tuple[List[Tuple[str, float, bool]], float]:
+    nombres = [nombre for nombre, peso in pesos.items() if peso > 0]
+    valores = [pesos[nombre] for nombre in nombres]
+    muestras: List[Tuple[str, float, bool]] = []
+
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=url, limits=limites, timeout=300) as cliente:
+        ahora = time.perf_counter()
+        inicio_medicion = ahora + calentamiento_s
+        fin = inicio_medicion + duracion_s
+        await asyncio.gather(*(
+            _usuario(cliente, escenario, nombres, valores, semilla, inicio_medicion, fin, pausa_s, muestras)
+            for semilla in range(concurrencia)
+        ))
+        # Los requests en curso al terminar se cuentan: el tiempo real medido se extiende
+        transcurrido = time.perf_counter() - inicio_medicion
+
+    return muestras, transcurrido
+
+
+def resumir(muestras: List[Tuple[str, float, bool]], transcurrido: float) -> Dict[str, Dict]:
+    """
+    Resume las muestras por endpoint
+
+    Args:
+        muestras: (endpoint, duración en s, sin error)
+        transcurrido: Segundos de medición
+
+    Returns:
+        Diccionario {endpoint: {requests, errores, error_pct, rps, p50_ms, p95_ms, p99_ms, max_ms}},
+        con la clave 'total' para todos los endpoints
+    """
+    grupos: Dict[str, List[Tuple[float, bool]]] = {}
+    for nombre, duracion, correcto in muestras:
+        grupos.setdefault(nombre, []).append((duracion, correcto))
+    grupos['total'] = [(duracion, correcto) for _, duracion, correcto in muestras]
+
+    resumen = {}
+    for nombre, valores in grupos.items():
+        if not valores:
+            continue
+        duraciones = np.array([d for d, _ in valores]) * 1000
+        errores = sum(1 for _, correcto in valores if not correcto)
+        p50, p95, p99 = np.percentile(duraciones, [50, 95, 99])
+        resumen[nombre] = {
+            'requests': len(valores),
+            'errores': errores,
+            'error_pct': round(errores / len(valores) * 100, 2),
+            'rps': round(len(valores) / transcurrido, 2),
+            'p50_ms': round(float(p50), 1),
+            'p95_ms': round(float(p95), 1),
+            'p99_ms': round(float(p99), 1),
+            'max_ms': round(float(duraciones.max()), 1),
+        }
+    return resumen
+
+
+def _imprimir(concurrencia: int, resumen: Dict[str, Dict]) -> None:
+    print(f"\nConcurrencia {concurrencia}")
+    print(
+        f"{'endpoint':<16}{'requests':>10}{'errores':>9}{'rps':>9}"
+        f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+    )
+    for nombre, r in sorted(resumen.items(), key=lambda item: (item[0] == 'total', item[0])):
+        print(
+            f"{nombre:<16}{r['requests']:>10}{r['error_pct']:>8.1f}%{r['rps']:>9.1f}"
+            f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['max_ms']:>10.1f}"
+        )
+
+
+def _puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _iniciar_servidor(workers: int, sin_cache: bool, max_registros: int) -> Tuple[subprocess.Popen, str]:
+    """Inicia uvicorn con directorios de datos aislados"""
+    temporal = tempfile.mkdtemp(prefix='bench_carga_')
+    entorno = dict(os.environ)
+    entorno.update({
+        'DATASET_DIR': os.path.join(temporal, 'datasets'),
+        'JOB_DB_PATH': os.path.join(temporal, 'jobs.db'),
+        'MODEL_REGISTRY_DIR': os.path.join(temporal, 'modelos'),
+        'CACHE_DIR': os.path.join(temporal, 'cache') if workers > 1 and not sin_cache else '',
+        'MAX_RECORDS': str(max_registros),
+        'LOG_LEVEL': 'warning',
+    })
+    if sin_cache:
+        entorno['CACHE_MAX_ENTRADAS'] = '0'
+
+    puerto = _puerto_libre()
+    proceso = subprocess.Popen(
+        [
+            sys.executable, '-m', 'uvicorn', 'app.main:app',
+            '--host', '127.0.0.1', '--port', str(puerto),
+            '--workers', str(workers), '--log-level', 'warning', '--no-access-log',
+        ],
+        cwd=DIRECTORIO_BACKEND,
+        env=entorno,
+    )
+
+    url = f'http://127.0.0.1:{puerto}'
+    limite = time.time() + 60
+    while time.time() < limite:
+        if proceso.poll() is not None:
+            raise RuntimeError(f"uvicorn terminó con código {proceso.returncode}")
+        try:
+            if httpx.get(f'{url}/health', timeout=1).status_code == 200:
+                return proceso, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+
+    proceso.terminate()
+    raise RuntimeError("uvicorn no respondió a /health en 60 s")
+
+
+def _preparar_datos(url: str, n_datasets: int, registros: int, entrenar: bool) -> List[str]:
+    """Registra los datasets y, si se pide, entrena el modelo"""
+    with httpx.Client(base_url=url, timeout=600) as cliente:
+        if entrenar:
+            cliente.post('/api/ml/train', json=generar_registros(5000, semilla=1)).raise_for_status()
+
+        dataset_ids = []
+        for semilla in range(n_datasets):
+            # Por columnas: se registra rápido aun con muchos registros
+            df = generar_empleados(registros, semilla=100 + semilla)
+            columnas = {columna: df[columna].astype(object).where(df[columna].notna(), None).tolist()
+                        for columna in df.columns}
+            respuesta = cliente.post('/api/datasets', content=json.dumps(columnas).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'})
+            respuesta.raise_for_status()
+            dataset_ids.append(respuesta.json()['dataset_id'])
+        return dataset_ids
+
+
+def _leer_pesos(valores: List[str]) -> Dict[str, float]:
+    pesos = dict(PESOS_DEFECTO)
+    for valor in valores:
+        nombre, _, peso = valor.partition('=')
+        if nombre not in pesos:
+            raise SystemExit(f"Endpoint desconocido en --peso: {nombre} (use {', '.join(pesos)})")
+        pesos[nombre] = float(peso)
+    return pesos
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default=None, help='Servidor existente; sin él se levanta uno local')
+    parser.add_argument('--workers', type=int, default=1, help='Workers de uvicorn del servidor local')
+    parser.add_argument('--concurrencia', type=int, nargs='+', default=[1, 4, 16])
+    parser.add_argument('--duracion', type=float, default=20, help='Segundos medidos por nivel')
+    parser.add_argument('--calentamiento', type=float, default=3, help='Segundos sin medir por nivel')
+    parser.add_argument('--pausa-ms', type=float, default=0,
+                        help='Pausa media entre requests de un usuario (exponencial)')
+    parser.add_argument('--datasets', type=int, default=4)
+    parser.add_argument('--registros', type=int, default=20000, help='Registros por dataset')
+    parser.add_argument('--registros-cuerpo', type=int, default=2000,
+                        help='Registros de analyze_cuerpo')
+    parser.add_argument('--lote', type=int, default=200, help='Empleados por predict_batch')
+    parser.add_argument('--peso', action='append', default=[], metavar='NOMBRE=PESO')
+    parser.add_argument('--sin-cache', action='store_true',
+                        help='Servidor local sin caché de resultados (mide el cálculo)')
+    parser.add_argument('--entrenar', action='store_true',
+                        help='Entrenar el modelo también con --url')
+    parser.add_argument('--salida', default=None, help='Archivo JSON con los resultados')
+    args = parser.parse_args()
+
+    pesos = _leer_pesos(args.peso)
+    proceso = None
+    if args.url:
+        url = args.url.rstrip('/')
+    else:
+        proceso, url = _iniciar_servidor(
+            args.workers, args.sin_cache, max(args.registros, args.registros_cuerpo)
+        )
+
+    try:
+        dataset_ids = _preparar_datos(url, args.datasets, args.registros, args.entrenar or proceso is not None)
+        escenario = _crear_escenario(dataset_ids, args.registros_cuerpo, args.lote)
+
+        resultados = {}
+        for concurrencia in args.concurrencia:
+            muestras, transcurrido = asyncio.run(_ejecutar_nivel(
+                url, escenario, pesos, concurrencia, args.duracion, args.calentamiento,
+                args.pausa_ms / 1000
+            ))
+            resumen = resumir(muestras, transcurrido)
+            resultados[str(concurrencia)] = resumen
+            _imprimir(concurrencia, resumen)
+    finally:
+        if proceso is not None:
+            proceso.terminate()
+            proceso.wait(timeout=30)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump({
+                'url': url,
+                'workers': args.workers if proceso is not None else None,
+                'sin_cache': args.sin_cache,
+                'pesos': pesos,
+                'resultados': resultados,
+            }, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
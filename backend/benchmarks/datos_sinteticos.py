@@ -0,0 +1,197 @@
+"""
+Generador determinista de registros sintéticos de rotación
+
+Sigue el schema EmpleadoRotacion del frontend (claves camelCase, fechas ISO)
+con distribuciones parecidas a las de una planta real:
+    - áreas, supervisores y puestos con frecuencias sesgadas (Zipf); cada
+      supervisor pertenece a una sola área
+    - turnos 50/30/20
+    - antigüedad log-normal (muchas bajas tempranas), salario creciente con
+      puesto y antigüedad, faltas que crecen en antigüedades cortas
+    - probabilidad de renuncia voluntaria (RV) correlacionada con faltas,
+      salario, turno nocturno y entrenamiento
+
+La misma semilla produce siempre los mismos datos.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+AREAS = [
+    'Producción', 'Empaque', 'Calidad', 'Almacén', 'Mantenimiento',
+    'Logística', 'Ensamble', 'Recursos Humanos', 'Compras', 'Administración',
+]
+TURNOS = ['Matutino', 'Vespertino', 'Nocturno']
+PESOS_TURNO = [0.5, 0.3, 0.2]
+CLASES = ['Operativo', 'Administrativo', 'Técnico']
+
+# (puesto, salario base mensual, clase)
+PUESTOS = [
+    ('Operador', 7000, 'Operativo'),
+    ('Empacador', 6500, 'Operativo'),
+    ('Montacarguista', 8500, 'Operativo'),
+    ('Inspector de Calidad', 9500, 'Técnico'),
+    ('Técnico de Mantenimiento', 12000, 'Técnico'),
+    ('Auxiliar Administrativo', 9000, 'Administrativo'),
+    ('Líder de Línea', 14000, 'Operativo'),
+    ('Analista', 18000, 'Administrativo'),
+]
+
+RAZONES_RV = [
+    'Mejor oferta salarial', 'Problemas con el supervisor', 'Horario',
+    'Distancia / transporte', 'Motivos personales', 'Cambio de residencia',
+    'Estudios', 'Ambiente laboral',
+]
+RAZONES_BXF = [
+    'Faltas injustificadas', 'Abandono de trabajo', 'Término de contrato',
+    'Bajo desempeño',
+]
+
+# Mismos cortes y etiquetas que RANGOS_SALARIALES / RANGOS_ANTIGUEDAD del frontend
+CORTES_SALARIO = [0, 5000, 8000, 12000, 20000, np.inf]
+ETIQUETAS_SALARIO = [
+    '$0 - $5,000', '$5,000 - $8,000', '$8,000 - $12,000',
+    '$12,000 - $20,000', '$20,000+',
+]
+CORTES_ANTIGUEDAD = [0, 4, 13, 26, 52, 104, np.inf]
+ETIQUETAS_ANTIGUEDAD = [
+    '0-1 mes (0-4 semanas)', '1-3 meses (4-13 semanas)',
+    '3-6 meses (13-26 semanas)', '6-12 meses (26-52 semanas)',
+    '1-2 años (52-104 semanas)', '2+ años (104+ semanas)',
+]
+
+
+def _pesos_zipf(n: int, exponente: float = 1.1) -> np.ndarray:
+    pesos = 1.0 / np.arange(1, n + 1) ** exponente
+    return pesos / pesos.sum()
+
+
+def _rango(valores: np.ndarray, cortes: List[float], etiquetas: List[str]) -> np.ndarray:
+    indices = np.searchsorted(cortes, valores, side='right') - 1
+    return np.asarray(etiquetas, dtype=object)[np.clip(indices, 0, len(etiquetas) - 1)]
+
+
+def generar_empleados(
+    n: int,
+    semilla: int = 0,
+    n_supervisores: int = 200,
+    fecha_fin: str = '2024-12-31',
+    anios: int = 2
+) -> pd.DataFrame:
+    """
+    Genera `n` bajas sintéticas
+
+    Args:
+        n: Número de registros
+        semilla: Semilla del generador
+        n_supervisores: Supervisores distintos (repartidos entre las áreas)
+        fecha_fin: Última fecha de baja posible
+        anios: Años cubiertos por las fechas de baja
+
+    Returns:
+        DataFrame con las columnas de EmpleadoRotacion
+    """
+    rng = np.random.default_rng(semilla)
+
+    # Organización: área sesgada; supervisor sesgado dentro de su área
+    area_idx = rng.choice(len(AREAS), size=n, p=_pesos_zipf(len(AREAS)))
+    supervisores_por_area = max(1, n_supervisores // len(AREAS))
+    pesos_supervisor = _pesos_zipf(supervisores_por_area, 0.9)
+    supervisor_local = rng.choice(supervisores_por_area, size=n, p=pesos_supervisor)
+    supervisor_idx = area_idx * supervisores_por_area + supervisor_local
+
+    puesto_idx = rng.choice(len(PUESTOS), size=n, p=_pesos_zipf(len(PUESTOS), 1.3))
+    turno_idx = rng.choice(len(TURNOS), size=n, p=PESOS_TURNO)
+
+    # Antigüedad log-normal: mediana ~20 semanas, cola larga de varios años
+    semanas = np.clip(np.round(rng.lognormal(mean=3.0, sigma=1.2, size=n)), 0, 1500).astype(np.int64)
+    dias = semanas * 7 + rng.integers(0, 7, size=n)
+
+    # Salario: base del puesto + incremento por antigüedad + ruido
+    base = np.array([p[1] for p in PUESTOS], dtype=np.float64)[puesto_idx]
+    salario = base * (1 + 0.0015 * np.minimum(semanas, 520)) * rng.lognormal(0, 0.12, size=n)
+    salario = np.round(salario, 2)
+
+    # Faltas: más frecuentes en antigüedades cortas y en el turno nocturno
+    tasa_faltas = 0.5 + 2.5 * np.exp(-semanas / 26) + 0.8 * (turno_idx == 2)
+    faltas = rng.poisson(tasa_faltas)
+    permisos = rng.poisson(0.3 + 0.004 * np.minimum(semanas, 260))
+    entrenamiento = rng.random(n) < np.where(semanas < 4, 0.55, 0.92)
+
+    # Renuncia voluntaria vs. baja por faltas (BXF)
+    logit = (
+        1.2
+        - 0.45 * faltas
+        + 0.00004 * (salario - 9000)
+        - 0.3 * (turno_idx == 2)
+        + 0.5 * entrenamiento
+    )
+    es_rv = rng.random(n) < 1 / (1 + np.exp(-logit))
+    punto = rng.random(n) < 0.15
+    tipo_baja = np.where(es_rv, np.where(punto, 'RV.', 'RV'), np.where(punto, 'BXF.', 'BXF'))
+
+    # Fechas: baja uniforme en el periodo; alta = baja - antigüedad
+    fin = np.datetime64(fecha_fin, 'D')
+    baja = fin - rng.integers(0, 365 * anios, size=n).astype('timedelta64[D]')
+    udt = baja - rng.integers(0, 8, size=n).astype('timedelta64[D]')
+    alta = baja - dias.astype('timedelta64[D]')
+
+    razones = np.where(
+        es_rv,
+        np.asarray(RAZONES_RV, dtype=object)[rng.integers(0, len(RAZONES_RV), size=n)],
+        np.asarray(RAZONES_BXF, dtype=object)[rng.integers(0, len(RAZONES_BXF), size=n)],
+    )
+    con_encuesta = es_rv & (rng.random(n) < 0.6)
+
+    numero = np.arange(100000, 100000 + n)
+    areas = np.asarray(AREAS, dtype=object)[area_idx]
+
+    return pd.DataFrame({
+        'numeroEmpleado': numero.astype(str),
+        'nombre': np.char.add('Empleado ', numero.astype(str)),
+        'departamento': areas,
+        'fechaAlta': np.datetime_as_string(alta),
+        'fechaBajaSistema': np.datetime_as_string(baja),
+        'fechaUltimoDiaTrabajo': np.datetime_as_string(udt),
+        'antiguedadSemanas': semanas,
+        'diasAntiguedad': dias,
+        'mesesAntiguedad': np.round(dias / 30.44, 1),
+        'numeroSemanaUltimasHoras': pd.DatetimeIndex(udt).isocalendar().week.to_numpy(dtype=np.int64),
+        'totalHorasUltimaSemana': np.round(np.clip(rng.normal(40, 9, size=n), 0, 60), 1),
+        'montoFiniquito': np.round(salario / 30 * np.minimum(dias, 365) / 365 * 15 + salario / 2, 2),
+        'encuestaSalida4FRH209': np.where(con_encuesta, razones, None),
+        'razonRenunciaRH': np.where(es_rv, razones, None),
+        'razonCapturadaSistema': razones,
+        'clase': np.asarray([p[2] for p in PUESTOS], dtype=object)[puesto_idx],
+        'turno': np.asarray(TURNOS, dtype=object)[turno_idx],
+        'tipoBaja': tipo_baja,
+        'tipoBajaNormalizado': np.where(es_rv, 'RV', 'BXF'),
+        'area': areas,
+        'supervisor': np.char.add('Supervisor ', (supervisor_idx + 1).astype(str)),
+        'puesto': np.asarray([p[0] for p in PUESTOS], dtype=object)[puesto_idx],
+        'cumplioEntrenamiento': entrenamiento,
+        'totalFaltas': faltas,
+        'permisos': permisos,
+        'salario': salario,
+        'rangoSalarial': _rango(salario, CORTES_SALARIO, ETIQUETAS_SALARIO),
+        'rangoAntiguedad': _rango(semanas, CORTES_ANTIGUEDAD, ETIQUETAS_ANTIGUEDAD),
+        'rotacionTemprana': semanas < 13,
+    })
+
+
+def generar_registros(n: int, semilla: int = 0, **kwargs) -> List[Dict]:
+    """
+    Igual que generar_empleados() pero como lista de registros JSON
+
+    Args:
+        n: Número de registros
+        semilla: Semilla del generador
+        kwargs: Parámetros adicionales de generar_empleados()
+
+    Returns:
+        Lista de diccionarios con tipos nativos de Python
+    """
+    df = generar_empleados(n, semilla, **kwargs)
+    return df.astype(object).where(df.notna(), None).to_dict('records')
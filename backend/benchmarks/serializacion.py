@@ -0,0 +1,83 @@
+"""
+Benchmark del camino rápido de serialización (SERIALIZACION_RAPIDA)
+
+Mide, por endpoint, el tiempo de una respuesta ya calculada (acierto del
+caché de resultados) con la revalidación de `response_model` de FastAPI y
+con la serialización directa, para distintas cardinalidades de supervisor.
+
+Uso (desde backend/):
+    python -m benchmarks.serializacion [--registros 50000] [--repeticiones 20]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.datos_sinteticos import generar_registros
+
+
+def _medir(cliente, url: str, repeticiones: int) -> float:
+    """Mediana en ms de `repeticiones` requests (después de calentar el caché)"""
+    respuesta = cliente.post(url)
+    respuesta.raise_for_status()
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        cliente.post(url).raise_for_status()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--registros', type=int, default=50000)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    parser.add_argument('--supervisores', type=int, nargs='+', default=[50, 1000, 5000])
+    args = parser.parse_args()
+
+    # Directorios aislados para no tocar los datos del servidor
+    temporal = tempfile.mkdtemp(prefix='bench_serializacion_')
+    os.environ.setdefault('DATASET_DIR', os.path.join(temporal, 'datasets'))
+    os.environ.setdefault('JOB_DB_PATH', os.path.join(temporal, 'jobs.db'))
+    os.environ.setdefault('MODEL_REGISTRY_DIR', os.path.join(temporal, 'modelos'))
+    os.environ['CACHE_DIR'] = ''
+
+    from fastapi.testclient import TestClient
+    from app.config.settings import get_settings
+    from app.main import app
+
+    settings = get_settings()
+
+    with TestClient(app) as cliente:
+        cliente.post('/api/ml/train', json=generar_registros(2000, semilla=1)).raise_for_status()
+
+        print(f"{'endpoint':<32}{'supervisores':>13}{'validado ms':>14}{'rápido ms':>12}{'ahorro':>9}")
+        for n_supervisores in args.supervisores:
+            registros = generar_registros(args.registros, n_supervisores=n_supervisores)
+            dataset_id = cliente.post('/api/datasets', json=registros).json()['dataset_id']
+
+            endpoints = {
+                '/api/analyze': f'/api/analyze?dataset_id={dataset_id}',
+                '/api/pareto/supervisor': f'/api/pareto/supervisor?dataset_id={dataset_id}',
+                '/api/ml/predict/ranking': (
+                    f'/api/ml/predict/ranking?dataset_id={dataset_id}&k=50&agrupar_por=supervisor'
+                ),
+            }
+
+            for nombre, url in endpoints.items():
+                settings.SERIALIZACION_RAPIDA = False
+                validado = _medir(cliente, url, args.repeticiones)
+                settings.SERIALIZACION_RAPIDA = True
+                rapido = _medir(cliente, url, args.repeticiones)
+
+                print(
+                    f'{nombre:<32}{n_supervisores:>13}{validado:>14.2f}{rapido:>12.2f}'
+                    f'{(1 - rapido / validado) * 100:>8.0f}%'
+                )
+
+
+if __name__ == '__main__':
+    main()
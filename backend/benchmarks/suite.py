@@ -0,0 +1,352 @@
+"""
+Micro-benchmarks de los servicios y endpoints sobre datos sintéticos
+
+Para cada tamaño de dataset mide la mediana del tiempo y la memoria pico
+(tracemalloc) de las funciones de AnalysisService, ParetoService y
+MLService, y la latencia de los endpoints principales a través de la app
+(con el caché de resultados desactivado). En los endpoints la tarea corre en
+el pool de cómputo: la memoria reportada es la del proceso de la API
+(decodificación y serialización), no la del worker.
+
+Con duckdb instalado, los análisis y Pareto también se miden con el engine
+duckdb sobre el DataFrame y sobre el Parquet del dataset (casos con
+[duckdb] / [duckdb-parquet] en el nombre), para comparar ambos engines. La
+memoria del Parquet es la de Python: DuckDB reserva la suya fuera de
+tracemalloc.
+
+Los resultados se comparan contra benchmarks/baselines.json; un caso es una
+regresión si su tiempo o su memoria superan la línea base en más de
+--umbral (y en más de --minimo-ms / --minimo-mb, para ignorar el ruido de
+los casos muy rápidos). Con regresiones el proceso termina con código 1.
+
+Uso (desde backend/):
+    python -m benchmarks.suite                          # 10k, 100k y 1M
+    python -m benchmarks.suite --tamanos 10000 --solo servicio
+    python -m benchmarks.suite --filtro analizar_datos     # pandas vs duckdb
+    python -m benchmarks.suite --tamanos 10000 100000 --guardar-baseline
+    python -m benchmarks.suite --umbral 0.25 --salida resultados.json
+
+Las líneas base dependen de la máquina: regenérelas con --guardar-baseline
+en el mismo equipo donde se comparan (p. ej. el runner de CI).
+"""
+
+import argparse
+import importlib
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.datos_sinteticos import generar_empleados, generar_registros
+
+RUTA_BASELINES = os.path.join(os.path.dirname(__file__), 'baselines.json')
+TAMANOS_DEFECTO = [10_000, 100_000, 1_000_000]
+REGISTROS_ENTRENAMIENTO = 20_000
+DUCKDB_DISPONIBLE = importlib.util.find_spec('duckdb') is not None
+
+
+@dataclass
+class Caso:
+    """Función medida: `preparar(contexto)` retorna la llamada sin argumentos"""
+
+    nombre: str
+    tipo: str  # 'servicio' | 'endpoint'
+    preparar: Callable[[Dict], Callable[[], object]]
+    max_registros: Optional[int] = None  # casos que no escalan a 1M
+
+
+def _casos() -> List[Caso]:
+    from app.services.analysis_engines import crear_engine_analisis
+    from app.services.analysis_service import AnalysisService
+    from app.services.pareto_service import ParetoService
+
+    def post(url: str, **kwargs) -> Callable[[Dict], Callable[[], object]]:
+        def preparar(ctx: Dict) -> Callable[[], object]:
+            cliente = ctx['cliente']
+            destino = url.format(**ctx)
+            return lambda: cliente.post(destino, **kwargs).raise_for_status()
+        return preparar
+
+    def post_registros(url: str) -> Callable[[Dict], Callable[[], object]]:
+        def preparar(ctx: Dict) -> Callable[[], object]:
+            cliente = ctx['cliente']
+            cuerpo = json.dumps(ctx['registros']).encode('utf-8')
+            cabeceras = {'Content-Type': 'application/json'}
+            return lambda: cliente.post(url, content=cuerpo, headers=cabeceras).raise_for_status()
+        return preparar
+
+    def duckdb(parquet: bool = False) -> Callable[[Dict], object]:
+        # El engine se crea dentro de la llamada medida (incluye registrar los datos)
+        if parquet:
+            return lambda ctx: crear_engine_analisis('duckdb', ruta_parquet=ctx['parquet'])
+        return lambda ctx: crear_engine_analisis('duckdb', data=ctx['df'])
+
+    casos_duckdb = []
+    if DUCKDB_DISPONIBLE:
+        for sufijo, engine in (('duckdb', duckdb()), ('duckdb-parquet', duckdb(parquet=True))):
+            casos_duckdb += [
+                Caso(f'analysis.analizar_datos[{sufijo}]', 'servicio',
+                     lambda ctx, engine=engine: lambda: AnalysisService.analizar_datos(engine(ctx))),
+                Caso(f'pareto.analizar_pareto[supervisor,{sufijo}]', 'servicio',
+                     lambda ctx, engine=engine: lambda: ParetoService.analizar_pareto(
+                         engine(ctx), 'supervisor', limite=100)),
+                Caso(f'pareto.analizar_multiples_categorias[{sufijo}]', 'servicio',
+                     lambda ctx, engine=engine: lambda: ParetoService.analizar_multiples_categorias(
+                         engine(ctx), limite=100)),
+            ]
+
+    return [
+        Caso('analysis.analizar_datos', 'servicio',
+             lambda ctx: lambda: AnalysisService.analizar_datos(ctx['df'])),
+        Caso('analysis.analizar_datos[registros]', 'servicio',
+             lambda ctx: lambda: AnalysisService.analizar_datos(ctx['registros']),
+             max_registros=100_000),
+        Caso('analysis.calcular_agregados', 'servicio',
+             lambda ctx: lambda: AnalysisService.calcular_agregados(ctx['df'])),
+        Caso('pareto.analizar_pareto[area]', 'servicio',
+             lambda ctx: lambda: ParetoService.analizar_pareto(ctx['df'], 'area')),
+        Caso('pareto.analizar_pareto[supervisor]', 'servicio',
+             lambda ctx: lambda: ParetoService.analizar_pareto(ctx['df'], 'supervisor', limite=100)),
+        Caso('pareto.analizar_multiples_categorias', 'servicio',
+             lambda ctx: lambda: ParetoService.analizar_multiples_categorias(ctx['df'], limite=100)),
+        *casos_duckdb,
+        Caso('ml.entrenar_modelo', 'servicio',
+             lambda ctx: lambda: ctx['ml_entrenamiento'].entrenar_modelo(ctx['df']),
+             max_registros=100_000),
+        Caso('ml.predecir_bloque', 'servicio',
+             lambda ctx: lambda: ctx['ml'].predecir_bloque(ctx['df'])),
+        Caso('ml.ranking_riesgo', 'servicio',
+             lambda ctx: lambda: ctx['ml'].ranking_riesgo(ctx['df'], k=50, agrupar_por='supervisor')),
+
+        Caso('POST /api/analyze', 'endpoint', post('/api/analyze?dataset_id={dataset_id}')),
+        Caso('POST /api/pareto/supervisor', 'endpoint',
+             post('/api/pareto/supervisor?dataset_id={dataset_id}')),
+        Caso('POST /api/ml/predict/ranking', 'endpoint',
+             post('/api/ml/predict/ranking?dataset_id={dataset_id}&k=50&agrupar_por=supervisor')),
+        Caso('POST /api/ml/predict/batch', 'endpoint', post_registros('/api/ml/predict/batch'),
+             max_registros=100_000),
+    ]
+
+
+def _medir(llamada: Callable[[], object], repeticiones: int) -> Dict[str, float]:
+    """
+    Mide una llamada
+
+    Args:
+        llamada: Función sin argumentos
+        repeticiones: Ejecuciones cronometradas (después de una de calentamiento)
+
+    Returns:
+        Diccionario con la mediana en ms y la memoria pico en MB
+    """
+    llamada()
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        llamada()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    # tracemalloc hace más lenta la ejecución: la memoria se mide aparte
+    tracemalloc.start()
+    try:
+        llamada()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'ms': round(statistics.median(tiempos), 2),
+        'mb': round(pico / 1024 / 1024, 2),
+    }
+
+
+def _configurar_entorno(temporal: str, max_registros: int) -> None:
+    # Directorios aislados y sin caché de resultados: se mide el cálculo
+    os.environ['DATASET_DIR'] = os.path.join(temporal, 'datasets')
+    os.environ['JOB_DB_PATH'] = os.path.join(temporal, 'jobs.db')
+    os.environ['MODEL_REGISTRY_DIR'] = os.path.join(temporal, 'modelos')
+    os.environ['CACHE_MAX_ENTRADAS'] = '0'
+    os.environ['CACHE_DIR'] = ''
+    # Límites de subida holgados: los benchmarks envían hasta max_registros en JSON
+    os.environ['MAX_RECORDS'] = str(max_registros)
+    os.environ['MAX_UPLOAD_SIZE'] = str(max_registros * 1024)
+
+
+def ejecutar(tamanos: List[int], tipos: List[str], repeticiones: int, filtro: Optional[str]) -> Dict:
+    """
+    Ejecuta la suite
+
+    Args:
+        tamanos: Registros de cada dataset sintético
+        tipos: 'servicio' y/o 'endpoint'
+        repeticiones: Ejecuciones cronometradas por caso
+        filtro: Subcadena del nombre de los casos a ejecutar
+
+    Returns:
+        Diccionario {tamaño: {caso: {'ms', 'mb'}}}
+    """
+    temporal = tempfile.mkdtemp(prefix='bench_suite_')
+    _configurar_entorno(temporal, max(tamanos + [REGISTROS_ENTRENAMIENTO]))
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.ml.registry import ModelRegistry
+    from app.services.dataset_service import get_dataset_service
+    from app.services.ml_service import MLService
+
+    casos = [
+        caso for caso in _casos()
+        if caso.tipo in tipos and (filtro is None or filtro in caso.nombre)
+    ]
+    resultados: Dict[str, Dict] = {}
+
+    with TestClient(app) as cliente:
+        # Un modelo fijo para todos los tamaños: predicción y ranking se comparan igual
+        entrenamiento = generar_registros(REGISTROS_ENTRENAMIENTO, semilla=1)
+        cliente.post('/api/ml/train', json=entrenamiento).raise_for_status()
+        ml = MLService(registry=ModelRegistry(os.environ['MODEL_REGISTRY_DIR']))
+        ml.sincronizar()
+
+        for n in tamanos:
+            df = generar_empleados(n, semilla=0)
+            contexto = {
+                'cliente': cliente,
+                'df': df,
+                'ml': ml,
+                # Entrenar en otra instancia sin registro no cambia el modelo activo
+                'ml_entrenamiento': MLService(),
+                'dataset_id': get_dataset_service().guardar(df)['dataset_id'],
+            }
+            if any(c.max_registros and n <= c.max_registros for c in casos):
+                contexto['registros'] = generar_registros(n, semilla=0)
+            if any('duckdb-parquet' in c.nombre for c in casos):
+                contexto['parquet'] = os.path.join(temporal, f'datos_{n}.parquet')
+                df.to_parquet(contexto['parquet'], index=False)
+
+            resultados[str(n)] = {}
+            for caso in casos:
+                if caso.max_registros is not None and n > caso.max_registros:
+                    continue
+                medicion = _medir(caso.preparar(contexto), repeticiones)
+                resultados[str(n)][caso.nombre] = medicion
+                print(f"{n:>10}  {caso.nombre:<42}{medicion['ms']:>12.2f} ms{medicion['mb']:>10.2f} MB", flush=True)
+
+    return resultados
+
+
+def comparar(
+    resultados: Dict,
+    baselines: Dict,
+    umbral: float,
+    minimo_ms: float,
+    minimo_mb: float
+) -> List[str]:
+    """
+    Compara los resultados contra las líneas base
+
+    Args:
+        resultados: Salida de ejecutar()
+        baselines: Contenido de baselines.json
+        umbral: Aumento relativo tolerado (0.25 = 25%)
+        minimo_ms: Aumento absoluto de tiempo por debajo del cual no hay regresión
+        minimo_mb: Aumento absoluto de memoria por debajo del cual no hay regresión
+
+    Returns:
+        Descripción de cada regresión encontrada
+    """
+    regresiones = []
+    for tamano, casos in resultados.items():
+        for nombre, medicion in casos.items():
+            base = baselines.get('resultados', {}).get(tamano, {}).get(nombre)
+            if base is None:
+                continue
+            for metrica, minimo in (('ms', minimo_ms), ('mb', minimo_mb)):
+                actual, referencia = medicion[metrica], base[metrica]
+                if actual > referencia * (1 + umbral) and actual - referencia > minimo:
+                    regresiones.append(
+                        f"{tamano:>10}  {nombre}: {metrica} {referencia} -> {actual} "
+                        f"(+{(actual / referencia - 1) * 100:.0f}%)"
+                    )
+    return regresiones
+
+
+def _entorno() -> Dict:
+    import numpy
+    import pandas
+    import sklearn
+
+    return {
+        'fecha': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'sklearn': sklearn.__version__,
+        'duckdb': importlib.import_module('duckdb').__version__ if DUCKDB_DISPONIBLE else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tamanos', type=int, nargs='+', default=TAMANOS_DEFECTO)
+    parser.add_argument('--solo', choices=['servicio', 'endpoint'], default=None)
+    parser.add_argument('--filtro', default=None, help='Subcadena del nombre de los casos')
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--umbral', type=float, default=0.25)
+    parser.add_argument('--minimo-ms', type=float, default=5.0)
+    parser.add_argument('--minimo-mb', type=float, default=1.0)
+    parser.add_argument('--baselines', default=RUTA_BASELINES)
+    parser.add_argument('--guardar-baseline', action='store_true',
+                        help='Actualiza las líneas base con estos resultados en vez de compararlos')
+    parser.add_argument('--salida', default=None, help='Archivo JSON con los resultados')
+    args = parser.parse_args()
+
+    tipos = [args.solo] if args.solo else ['servicio', 'endpoint']
+    resultados = ejecutar(args.tamanos, tipos, args.repeticiones, args.filtro)
+
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump({'entorno': _entorno(), 'resultados': resultados}, f, indent=2, ensure_ascii=False)
+
+    baselines = {}
+    if os.path.exists(args.baselines):
+        with open(args.baselines, encoding='utf-8') as f:
+            baselines = json.load(f)
+
+    if args.guardar_baseline:
+        # Se conservan los tamaños y casos que no se volvieron a medir
+        guardados = baselines.get('resultados', {})
+        for tamano, casos in resultados.items():
+            guardados.setdefault(tamano, {}).update(casos)
+        with open(args.baselines, 'w', encoding='utf-8') as f:
+            json.dump({'entorno': _entorno(), 'resultados': guardados}, f, indent=2, ensure_ascii=False)
+            f.write('\n')
+        print(f"\nLíneas base guardadas en {args.baselines}")
+        return
+
+    if not baselines:
+        print("\nSin líneas base: ejecute con --guardar-baseline para crearlas")
+        return
+
+    regresiones = comparar(resultados, baselines, args.umbral, args.minimo_ms, args.minimo_mb)
+    if regresiones:
+        print(f"\n{len(regresiones)} regresiones (umbral {args.umbral:.0%}):")
+        for regresion in regresiones:
+            print(f"  {regresion}")
+        sys.exit(1)
+
+    print(f"\nSin regresiones (umbral {args.umbral:.0%})")
+
+
+if __name__ == '__main__':
+    main()
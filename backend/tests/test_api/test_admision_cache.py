@@ -0,0 +1,82 @@
+"""
+Admisión y caché: un acierto del caché o una revalidación 304 no reservan
+presupuesto; sólo un cálculo real puede recibir 429/503
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import deps, pareto
+from app.services.admission_service import ControlAdmision
+from app.services.cache_service import ResultCache
+
+REGISTROS = [{'area': area} for area in ['Calidad'] * 6 + ['Ensamble'] * 3 + ['Pintura']]
+
+
+class EjecutorEnLinea:
+    """Corre las tareas en el mismo proceso y cuenta las llamadas"""
+
+    def __init__(self):
+        self.llamadas = 0
+
+    async def ejecutar(self, funcion, *args):
+        self.llamadas += 1
+        return funcion(*args)
+
+
+@pytest.fixture
+def entorno(monkeypatch):
+    ejecutor = EjecutorEnLinea()
+    cache = ResultCache()
+    control = ControlAdmision(memoria_mb=100, max_operaciones=1, espera_s=0)
+    monkeypatch.setattr(deps, 'get_compute_executor', lambda: ejecutor)
+    monkeypatch.setattr(deps, 'get_result_cache', lambda: cache)
+    monkeypatch.setattr(deps, 'get_control_admision', lambda: control)
+
+    app = FastAPI()
+    app.include_router(pareto.router)
+    with TestClient(app) as cliente:
+        yield cliente, ejecutor, control
+
+
+def _ocupar(cliente, control):
+    """Otra operación pesada en curso ocupa todo el presupuesto"""
+    cliente.portal.call(control.admitir, 100)
+
+
+def test_calculo_con_presupuesto_lleno_se_rechaza(entorno):
+    cliente, ejecutor, control = entorno
+    _ocupar(cliente, control)
+
+    respuesta = cliente.post('/pareto/area', json=REGISTROS)
+    assert respuesta.status_code == 429
+    assert respuesta.headers['retry-after'] == str(control.retry_after_s)
+    assert ejecutor.llamadas == 0
+
+
+def test_acierto_de_cache_con_presupuesto_lleno(entorno):
+    cliente, ejecutor, control = entorno
+    primera = cliente.post('/pareto/area', json=REGISTROS)
+    assert primera.status_code == 200
+    assert control.estadisticas()['operaciones'] == 0
+
+    _ocupar(cliente, control)
+
+    # Mismo cálculo: se responde del caché sin reservar
+    segunda = cliente.post('/pareto/area', json=REGISTROS)
+    assert segunda.status_code == 200
+    assert segunda.json()['patrones'] == primera.json()['patrones']
+
+    # Revalidación con el ETag vigente
+    revalidada = cliente.post(
+        '/pareto/area', json=REGISTROS, headers={'If-None-Match': primera.headers['etag']}
+    )
+    assert revalidada.status_code == 304
+
+    # Las recomendaciones comparten el mismo resultado
+    assert cliente.post('/pareto/area/recomendaciones', json=REGISTROS).status_code == 200
+
+    assert ejecutor.llamadas == 1
+    assert control.estadisticas()['admitidas'] == 2
+    assert control.estadisticas()['operaciones'] == 1
@@ -0,0 +1,70 @@
+"""
+Exportación de análisis: cabeceras de la descarga y contenido por formato
+"""
+
+import io
+
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import deps, exports
+from app.services.cache_service import ResultCache
+from benchmarks.datos_sinteticos import generar_registros
+
+
+class EjecutorEnLinea:
+    """Corre las tareas en el mismo proceso"""
+
+    async def ejecutar(self, funcion, *args):
+        return funcion(*args)
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    monkeypatch.setattr(deps, 'get_compute_executor', EjecutorEnLinea)
+    monkeypatch.setattr(deps, 'get_result_cache', lambda: ResultCache())
+
+    app = FastAPI()
+    app.include_router(exports.router)
+    return TestClient(app)
+
+
+@pytest.fixture(scope='module')
+def registros():
+    return generar_registros(300, 1)
+
+
+def test_csv(cliente, registros):
+    respuesta = cliente.post('/export/analyze?formato=csv&tabla=distribucion_por_area', json=registros)
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers['content-type'] == 'text/csv; charset=utf-8'
+    assert respuesta.headers['content-disposition'] == \
+        'attachment; filename="analisis_distribucion_por_area.csv"'
+    # UTF-8 con BOM para Excel
+    assert respuesta.content.startswith('﻿'.encode())
+    tabla = pd.read_csv(io.BytesIO(respuesta.content), encoding='utf-8-sig')
+    assert tabla['total'].sum() == len(registros)
+
+
+def test_parquet(cliente, registros):
+    respuesta = cliente.post('/export/analyze?formato=parquet&tabla=resumen', json=registros)
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers['content-type'] == 'application/vnd.apache.parquet'
+    assert list(pd.read_parquet(io.BytesIO(respuesta.content)).columns) == ['indicador', 'valor']
+
+
+def test_xlsx(cliente, registros):
+    respuesta = cliente.post('/export/analyze', json=registros)
+
+    assert respuesta.status_code == 200
+    assert respuesta.headers['content-type'] == \
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    assert respuesta.content[:2] == b'PK'
+
+
+def test_csv_sin_tabla(cliente, registros):
+    assert cliente.post('/export/analyze?formato=csv', json=registros).status_code == 400
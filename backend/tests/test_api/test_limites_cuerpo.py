@@ -0,0 +1,61 @@
+"""
+Límites de carga: 413 por tamaño del cuerpo (declarado o recibido por partes)
+y por número de registros
+"""
+
+import json
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import leer_registros
+from app.config.settings import get_settings
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, 'MAX_UPLOAD_SIZE', 1000)
+    monkeypatch.setattr(settings, 'MAX_RECORDS', 5)
+
+    app = FastAPI()
+
+    @app.post('/registros')
+    async def registros(data=Depends(leer_registros)):
+        return {'n': len(data)}
+
+    return TestClient(app)
+
+
+def _cuerpo(n: int, relleno: int = 0) -> bytes:
+    return json.dumps([{'area': 'Calidad', 'nota': 'x' * relleno} for _ in range(n)]).encode()
+
+
+def test_dentro_de_los_limites(cliente):
+    respuesta = cliente.post('/registros', content=_cuerpo(5), headers={'Content-Type': 'application/json'})
+    assert respuesta.status_code == 200
+    assert respuesta.json() == {'n': 5}
+
+
+def test_413_por_content_length(cliente):
+    respuesta = cliente.post('/registros', content=_cuerpo(2, relleno=600), headers={'Content-Type': 'application/json'})
+    assert respuesta.status_code == 413
+
+
+def test_413_por_partes_sin_content_length(cliente):
+    cuerpo = _cuerpo(2, relleno=600)
+    partes = (cuerpo[i:i + 100] for i in range(0, len(cuerpo), 100))
+    respuesta = cliente.post('/registros', content=partes, headers={'Content-Type': 'application/json'})
+    assert respuesta.status_code == 413
+
+
+def test_413_por_numero_de_registros(cliente):
+    respuesta = cliente.post('/registros', content=_cuerpo(6), headers={'Content-Type': 'application/json'})
+    assert respuesta.status_code == 413
+    assert '6 registros' in respuesta.json()['detail']
+
+
+def test_400_sin_registros(cliente):
+    respuesta = cliente.post('/registros', content=b'[]', headers={'Content-Type': 'application/json'})
+    assert respuesta.status_code == 400
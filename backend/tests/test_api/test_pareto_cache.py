@@ -0,0 +1,62 @@
+"""
+Pareto: /pareto/{categoria} y sus recomendaciones comparten el resultado en
+caché (un solo cálculo para ambos endpoints con los mismos datos)
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import deps, pareto
+from app.services.cache_service import ResultCache
+
+REGISTROS = [{'area': area} for area in ['Calidad'] * 6 + ['Ensamble'] * 3 + ['Pintura']]
+
+
+class EjecutorEnLinea:
+    """Corre las tareas en el mismo proceso y cuenta las llamadas"""
+
+    def __init__(self):
+        self.llamadas = []
+
+    async def ejecutar(self, funcion, *args):
+        self.llamadas.append(funcion.__name__)
+        return funcion(*args)
+
+
+@pytest.fixture
+def ejecutor(monkeypatch):
+    ejecutor = EjecutorEnLinea()
+    cache = ResultCache()
+    monkeypatch.setattr(deps, 'get_compute_executor', lambda: ejecutor)
+    monkeypatch.setattr(deps, 'get_result_cache', lambda: cache)
+    return ejecutor
+
+
+@pytest.fixture
+def cliente(ejecutor):
+    app = FastAPI()
+    app.include_router(pareto.router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize('orden', [('analisis', 'recomendaciones'), ('recomendaciones', 'analisis')])
+def test_un_calculo_para_ambos_endpoints(cliente, ejecutor, orden):
+    rutas = {'analisis': '/pareto/area', 'recomendaciones': '/pareto/area/recomendaciones'}
+    respuestas = {nombre: cliente.post(rutas[nombre], json=REGISTROS) for nombre in orden}
+
+    assert respuestas['analisis'].status_code == 200
+    assert respuestas['analisis'].json()['patrones'][0]['valor'] == 'Calidad'
+    assert respuestas['recomendaciones'].status_code == 200
+    assert "'Calidad'" in respuestas['recomendaciones'].json()['recomendaciones'][0]
+    assert ejecutor.llamadas == ['analizar_pareto']
+
+
+def test_mismo_limite_misma_clave(cliente, ejecutor):
+    cliente.post('/pareto/area?limite=1', json=REGISTROS)
+    recomendaciones = cliente.post('/pareto/area/recomendaciones?limite=1', json=REGISTROS).json()
+    cliente.post('/pareto/area?limite=2', json=REGISTROS)
+
+    assert ejecutor.llamadas == ['analizar_pareto', 'analizar_pareto']
+    # El total de categorías no depende de la página: 1 de 3 áreas (no de 2 patrones)
+    assert recomendaciones['recomendaciones'][1].startswith('El 33% de los areas')
@@ -0,0 +1,62 @@
+"""
+Reserva de admisión de las respuestas en streaming: dura hasta terminar de
+enviar el cuerpo, también si el cálculo falla a la mitad
+"""
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import reservar_admision, ReservaAdmision, RespuestaConReserva
+from app.services.admission_service import get_control_admision
+
+
+def _operaciones() -> int:
+    return get_control_admision().estadisticas()['operaciones']
+
+
+@pytest.fixture
+def cliente():
+    app = FastAPI()
+    observadas = []
+
+    def contenido(fallar: bool):
+        for i in range(3):
+            observadas.append(_operaciones())
+            if fallar and i == 1:
+                raise RuntimeError('fallo a la mitad')
+            yield b'bloque\n'
+
+    @app.post('/stream')
+    async def stream(fallar: bool = False, reserva: ReservaAdmision = Depends(reservar_admision('exportacion'))):
+        return RespuestaConReserva(contenido(fallar), reserva=reserva)
+
+    @app.post('/sin-stream')
+    async def sin_stream(reserva: ReservaAdmision = Depends(reservar_admision('exportacion'))):
+        return {'reservado': reserva.costo is not None}
+
+    return TestClient(app, raise_server_exceptions=False), observadas
+
+
+def test_reserva_dura_todo_el_streaming(cliente):
+    cliente, observadas = cliente
+    respuesta = cliente.post('/stream', json=[{'a': 1}])
+
+    assert respuesta.status_code == 200
+    assert respuesta.content == b'bloque\n' * 3
+    assert observadas == [1, 1, 1]
+    assert _operaciones() == 0
+
+
+def test_reserva_se_libera_si_el_streaming_falla(cliente):
+    cliente, observadas = cliente
+    cliente.post('/stream?fallar=true', json=[{'a': 1}])
+
+    assert observadas == [1, 1]
+    assert _operaciones() == 0
+
+
+def test_reserva_no_retenida_se_libera_con_el_request(cliente):
+    cliente, _ = cliente
+    assert cliente.post('/sin-stream', json=[{'a': 1}]).json() == {'reservado': True}
+    assert _operaciones() == 0
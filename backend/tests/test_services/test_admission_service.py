@@ -0,0 +1,99 @@
+"""
+Control de admisión: reserva, espera por espacio y rechazos 429/503
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.admission_service import (
+    ControlAdmision,
+    SobrecargaError,
+    costo_mb,
+    registros_en_cuerpo,
+)
+
+
+def test_admite_hasta_el_presupuesto_y_libera():
+    async def escenario():
+        control = ControlAdmision(memoria_mb=100, max_operaciones=4, espera_s=0)
+        await control.admitir(60)
+        await control.admitir(40)
+        assert control.estadisticas()['reservado_mb'] == 100
+
+        await control.liberar(60)
+        await control.liberar(40)
+        return control.estadisticas()
+
+    estadisticas = asyncio.run(escenario())
+    assert estadisticas['admitidas'] == 2
+    assert estadisticas['operaciones'] == 0
+    assert estadisticas['reservado_mb'] == 0
+
+
+def test_503_sin_memoria():
+    async def escenario():
+        control = ControlAdmision(memoria_mb=100, max_operaciones=4, espera_s=0.05, retry_after_s=7)
+        await control.admitir(80)
+        with pytest.raises(SobrecargaError) as error:
+            await control.admitir(30)
+        return control, error.value
+
+    control, error = asyncio.run(escenario())
+    assert error.codigo == 503
+    assert error.retry_after_s == 7
+    assert control.estadisticas()['rechazos_memoria'] == 1
+    assert control.estadisticas()['operaciones'] == 1
+
+
+def test_429_por_operaciones_simultaneas():
+    async def escenario():
+        control = ControlAdmision(memoria_mb=1000, max_operaciones=2, espera_s=0)
+        await control.admitir(1)
+        await control.admitir(1)
+        with pytest.raises(SobrecargaError) as error:
+            await control.admitir(1)
+        return control, error.value
+
+    control, error = asyncio.run(escenario())
+    assert error.codigo == 429
+    assert control.estadisticas()['rechazos_operaciones'] == 1
+
+
+def test_espera_a_que_se_libere_espacio():
+    async def escenario():
+        control = ControlAdmision(memoria_mb=100, max_operaciones=4, espera_s=2)
+        await control.admitir(80)
+
+        async def liberar_despues():
+            await asyncio.sleep(0.05)
+            await control.liberar(80)
+
+        tarea = asyncio.ensure_future(liberar_despues())
+        await control.admitir(50)
+        await tarea
+        return control.estadisticas()
+
+    estadisticas = asyncio.run(escenario())
+    assert estadisticas['admitidas'] == 2
+    assert estadisticas['reservado_mb'] == 50
+
+
+def test_operacion_mayor_que_el_presupuesto_sola():
+    async def escenario():
+        control = ControlAdmision(memoria_mb=100, max_operaciones=4, espera_s=0)
+        # Sin otras operaciones en curso se admite: nunca queda rechazada para siempre
+        await control.admitir(500)
+        with pytest.raises(SobrecargaError):
+            await control.admitir(1)
+
+    asyncio.run(escenario())
+
+
+def test_estimaciones():
+    # Sin Content-Length se asume el máximo
+    assert registros_en_cuerpo(None, 'application/json', 50000) == 50000
+    assert registros_en_cuerpo(3000, 'application/json', 50000) == 10
+    assert registros_en_cuerpo(3000, 'application/vnd.apache.parquet', 50000) == 100
+    assert registros_en_cuerpo(10 ** 9, 'application/json', 50000) == 50000
+    assert costo_mb('analisis', 1024) == 3.0
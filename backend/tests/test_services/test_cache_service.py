@@ -0,0 +1,148 @@
+"""
+Caché de resultados: expulsión LRU por entradas y por bytes, TTL y el nivel en disco
+"""
+
+import os
+import pickle
+
+import pandas as pd
+import pytest
+
+from app.services import cache_service
+from app.services.cache_service import ResultCache, clave_resultado
+
+
+class Reloj:
+    """Reemplazo del módulo time del caché con una hora controlada"""
+
+    def __init__(self):
+        self.ahora = 1000.0
+
+    def time(self) -> float:
+        return self.ahora
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    reloj = Reloj()
+    monkeypatch.setattr(cache_service, 'time', reloj)
+    return reloj
+
+
+def _tamano(valor) -> int:
+    return len(pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def test_lru_por_entradas(reloj):
+    cache = ResultCache(max_entradas=2)
+    cache.guardar('a', 1)
+    cache.guardar('b', 2)
+    # Leer 'a' la vuelve la más reciente: se expulsa 'b'
+    assert cache.obtener('a') == 1
+    cache.guardar('c', 3)
+
+    assert cache.obtener('b') is None
+    assert cache.obtener('a') == 1
+    assert cache.obtener('c') == 3
+    assert cache.estadisticas()['expulsiones'] == 1
+
+
+def test_lru_por_bytes(reloj):
+    valor = 'x' * 1000
+    cache = ResultCache(max_entradas=100, max_bytes=_tamano(valor) * 2)
+    cache.guardar('a', valor)
+    cache.guardar('b', valor)
+    cache.guardar('c', valor)
+
+    assert cache.obtener('a') is None
+    assert cache.obtener('b') == valor
+    assert cache.estadisticas()['bytes'] == _tamano(valor) * 2
+
+
+def test_resultado_mayor_que_el_cache_no_se_guarda(reloj):
+    cache = ResultCache(max_bytes=100)
+    cache.guardar('a', 'x' * 1000)
+
+    assert cache.obtener('a') is None
+    assert cache.estadisticas()['bytes'] == 0
+
+
+def test_reemplazar_una_clave_no_duplica_bytes(reloj):
+    cache = ResultCache()
+    cache.guardar('a', 'x' * 100)
+    cache.guardar('a', 'y' * 100)
+
+    assert cache.obtener('a') == 'y' * 100
+    assert cache.estadisticas()['entradas'] == 1
+    assert cache.estadisticas()['bytes'] == _tamano('y' * 100)
+
+
+def test_ttl(reloj):
+    cache = ResultCache(ttl_s=10)
+    cache.guardar('a', 1)
+
+    reloj.ahora += 9.9
+    assert cache.obtener('a') == 1
+    reloj.ahora += 0.1
+    assert cache.obtener('a') is None
+
+    estadisticas = cache.estadisticas()
+    assert estadisticas['expiraciones'] == 1
+    assert estadisticas['entradas'] == 0
+    assert estadisticas['bytes'] == 0
+
+
+def test_disco_compartido_entre_procesos(reloj, tmp_path):
+    escritor = ResultCache(directorio=str(tmp_path))
+    escritor.guardar('ab12', {'total': 5})
+
+    # Otro worker: no lo tiene en memoria, lo lee del disco y lo promueve
+    lector = ResultCache(directorio=str(tmp_path))
+    assert lector.obtener('ab12') == {'total': 5}
+    assert lector.obtener('ab12') == {'total': 5}
+
+    estadisticas = lector.estadisticas()
+    assert estadisticas['hits_disco'] == 1
+    assert estadisticas['hits_memoria'] == 1
+
+
+def test_disco_expira_por_fecha_del_archivo(reloj, tmp_path):
+    cache = ResultCache(ttl_s=10, directorio=str(tmp_path))
+    cache.guardar('ab12', 1)
+    ruta = cache._ruta('ab12')
+    os.utime(ruta, (reloj.ahora - 11, reloj.ahora - 11))
+
+    assert ResultCache(ttl_s=10, directorio=str(tmp_path)).obtener('ab12') is None
+    assert not os.path.exists(ruta)
+
+
+def test_depurar_y_limpiar(reloj, tmp_path):
+    cache = ResultCache(ttl_s=10, directorio=str(tmp_path))
+    cache.guardar('aa01', 1)
+    cache.guardar('bb02', 2)
+    viejo = cache._ruta('aa01')
+    os.utime(viejo, (reloj.ahora - 100, reloj.ahora - 100))
+    reloj.ahora = os.path.getmtime(cache._ruta('bb02'))
+
+    assert cache.depurar() == 1
+    assert not os.path.exists(viejo)
+
+    cache.limpiar()
+    assert cache.obtener('bb02') is None
+    assert cache.estadisticas()['entradas'] == 0
+
+
+def test_clave_resultado():
+    registros = [{'area': 'Calidad', 'salario': 9000}]
+
+    # Mismo contenido en lista o DataFrame, distinto orden de llaves: misma clave
+    assert clave_resultado('analizar', registros, 10) == clave_resultado(
+        'analizar', [{'salario': 9000, 'area': 'Calidad'}], 10
+    )
+    assert clave_resultado('analizar', pd.DataFrame(registros)) == clave_resultado(
+        'analizar', pd.DataFrame(registros)
+    )
+    # Operación, parámetros y dataset cambian la clave
+    assert clave_resultado('analizar', registros, 10) != clave_resultado('pareto', registros, 10)
+    assert clave_resultado('analizar', registros, 10) != clave_resultado('analizar', registros, 20)
+    assert clave_resultado('analizar', 'ds1') != clave_resultado('analizar', 'ds2')
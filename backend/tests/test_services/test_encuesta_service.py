@@ -0,0 +1,129 @@
+"""
+Temas de la encuesta de salida: aprendizaje incremental por lote (un lote se
+aprende una vez; de un lote derivado sólo las filas nuevas) y distribuciones
+"""
+
+import pytest
+
+from app.services.encuesta_service import EncuestaService
+
+RESPUESTAS = [
+    'Mejor oferta salarial en otra empresa',
+    'El salario es muy bajo',
+    'Problemas con el supervisor',
+    'Mal trato del supervisor de turno',
+    'Horario de trabajo muy pesado',
+    'Cambio de horario sin aviso',
+    'Me cambio de ciudad',
+    'Cambio de domicilio familiar',
+    'Transporte de personal deficiente',
+    'La ruta del transporte no llega',
+    'Estudios universitarios',
+    'Regreso a la escuela',
+]
+
+
+def _registros(n: int, inicio: int = 0):
+    return [
+        {
+            'area': ['Calidad', 'Ensamble', 'Pintura'][i % 3],
+            'supervisor': f'S{i % 4}',
+            'encuestaSalida4FRH209': RESPUESTAS[i % len(RESPUESTAS)],
+        }
+        for i in range(inicio, inicio + n)
+    ]
+
+
+@pytest.fixture
+def servicio(tmp_path):
+    return EncuestaService(str(tmp_path), n_temas=3, n_features=2 ** 12)
+
+
+def test_lote_conocido_no_se_aprende_dos_veces(servicio):
+    registros = _registros(40)
+
+    primero = servicio.analizar(registros, lote='ds1')
+    assert primero['respuestas_aprendidas'] == 40
+    assert primero['respuestas_modelo'] == 40
+    version = primero['version_modelo']
+
+    segundo = servicio.analizar(registros, lote='ds1')
+    assert segundo['respuestas_aprendidas'] == 0
+    assert segundo['respuestas_modelo'] == 40
+    assert segundo['version_modelo'] == version
+    assert servicio.info()['lotes'] == ['ds1']
+
+
+def test_lote_derivado_aprende_solo_las_filas_nuevas(servicio):
+    base = _registros(40)
+    servicio.analizar(base, lote='ds1')
+
+    # Se agregan 10 registros, dos de ellos sin respuesta
+    nuevos = _registros(10, inicio=40)
+    nuevos[0]['encuestaSalida4FRH209'] = None
+    nuevos[1]['encuestaSalida4FRH209'] = 'N/A'
+
+    resultado = servicio.analizar(base + nuevos, lote='ds2', lote_base='ds1', filas_base=len(base))
+
+    assert resultado['respuestas_aprendidas'] == 8
+    assert resultado['respuestas_modelo'] == 48
+    assert resultado['version_modelo'].endswith('.2')
+    assert servicio.info()['lotes'] == ['ds1', 'ds2']
+
+
+def test_lote_derivado_de_uno_desconocido_se_aprende_completo(servicio):
+    servicio.analizar(_registros(20), lote='ds1')
+    resultado = servicio.analizar(_registros(30), lote='ds3', lote_base='otro', filas_base=20)
+
+    assert resultado['respuestas_aprendidas'] == 30
+
+
+def test_registros_del_request_solo_entrenan_sin_modelo(servicio):
+    primero = servicio.analizar(_registros(24))
+    assert primero['respuestas_aprendidas'] == 24
+    assert servicio.info()['lotes'] == []
+
+    segundo = servicio.analizar(_registros(24, inicio=5))
+    assert segundo['respuestas_aprendidas'] == 0
+    assert segundo['version_modelo'] == primero['version_modelo']
+
+
+def test_pocas_respuestas_distintas_no_entrenan(servicio):
+    resultado = servicio.analizar(
+        [{'area': 'Calidad', 'encuestaSalida4FRH209': 'Salario bajo'}] * 10, lote='ds1'
+    )
+
+    assert resultado['respuestas_aprendidas'] == 0
+    assert resultado['n_temas'] == 0
+    assert resultado['temas'] == []
+    assert servicio.info() is None
+
+
+def test_distribuciones_suman_las_respuestas(servicio):
+    registros = _registros(60)
+    registros[3]['encuestaSalida4FRH209'] = ''
+    resultado = servicio.analizar(registros, lote='ds1')
+
+    assert resultado['total_respuestas'] == 59
+    assert resultado['sin_respuesta'] == 1
+    assert resultado['n_temas'] == 3
+    assert sum(tema['respuestas'] for tema in resultado['temas']) == 59
+    assert sum(tema['porcentaje'] for tema in resultado['temas']) == pytest.approx(100, abs=0.05)
+
+    for columna in ('por_area', 'por_supervisor'):
+        filas = resultado[columna]
+        assert sum(fila['total'] for fila in filas) == 59
+        assert all(sum(fila['conteos']) == fila['total'] for fila in filas)
+
+    # Con límite, las demás categorías se suman en 'Otros'
+    limitado = servicio.analizar(registros, limite=1, lote='ds1')
+    assert len(limitado['por_supervisor']) == 2
+    assert sum(fila['total'] for fila in limitado['por_supervisor']) == 59
+
+
+def test_reiniciar(servicio):
+    servicio.analizar(_registros(20), lote='ds1')
+    servicio.reiniciar()
+
+    assert servicio.version() is None
+    assert servicio.analizar(_registros(20), lote='ds1')['respuestas_aprendidas'] == 20
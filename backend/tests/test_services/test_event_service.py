@@ -0,0 +1,90 @@
+"""
+Eventos en vivo: un solo sondeo por proceso, fuera del event loop, que
+reparte a cada suscriptor los eventos de sus canales sin perder ni repetir
+"""
+
+import asyncio
+import threading
+
+import pytest
+
+from app.services.event_service import EventService
+
+
+@pytest.fixture
+def eventos(tmp_path):
+    servicio = EventService(str(tmp_path / 'eventos.db'), intervalo_s=0.01, heartbeat_s=0.2)
+    lecturas = []
+    leer = servicio.leer
+
+    def leer_registrando(canales, desde_id=0, limite=100):
+        lecturas.append((canales, threading.get_ident()))
+        return leer(canales, desde_id, limite)
+
+    servicio.leer = leer_registrando
+    servicio.lecturas = lecturas
+    return servicio
+
+
+async def _recibir(suscripcion, n):
+    recibidos = []
+    async for evento in suscripcion:
+        recibidos.append(evento)
+        if len(recibidos) == n:
+            break
+    await suscripcion.aclose()
+    return recibidos
+
+
+def test_un_sondeo_compartido_fuera_del_event_loop(eventos):
+    async def escenario():
+        suscripciones = [eventos.suscribir(['a']) for _ in range(5)] + [eventos.suscribir(['b'])]
+        tareas = [asyncio.ensure_future(_recibir(s, 2)) for s in suscripciones]
+        await asyncio.sleep(0.05)
+        sondeo = eventos._sondeo
+
+        for canal, n in (('a', 1), ('b', 1), ('a', 2), ('b', 2)):
+            eventos.publicar(canal, 'prueba', {'n': n})
+        recibidos = await asyncio.wait_for(asyncio.gather(*tareas), timeout=5)
+
+        await asyncio.sleep(0.05)
+        return recibidos, sondeo, threading.get_ident()
+
+    recibidos, sondeo, hilo_loop = asyncio.run(escenario())
+
+    for recibido in recibidos[:5]:
+        assert [(e['canal'], e['datos']['n']) for e in recibido] == [('a', 1), ('a', 2)]
+    assert [(e['canal'], e['datos']['n']) for e in recibidos[5]] == [('b', 1), ('b', 2)]
+
+    # Todas las lecturas son del sondeo compartido (todos los canales) y en el threadpool
+    assert eventos.lecturas
+    assert all(canales is None for canales, _ in eventos.lecturas)
+    assert all(hilo != hilo_loop for _, hilo in eventos.lecturas)
+    # Sin suscriptores el sondeo termina
+    assert sondeo.done()
+    assert not eventos._suscriptores
+
+
+def test_reconexion_recibe_lo_perdido_sin_repetir(eventos):
+    ids = [eventos.publicar('a', 'prueba', {'n': n}) for n in range(3)]
+    eventos.publicar('b', 'prueba', {'n': 99})
+
+    async def escenario():
+        suscripcion = eventos.suscribir(['a'], desde_id=ids[0])
+        tarea = asyncio.ensure_future(_recibir(suscripcion, 3))
+        await asyncio.sleep(0.05)
+        eventos.publicar('a', 'prueba', {'n': 3})
+        return await asyncio.wait_for(tarea, timeout=5)
+
+    recibidos = asyncio.run(escenario())
+    assert [e['datos']['n'] for e in recibidos] == [1, 2, 3]
+
+
+def test_heartbeat_sin_eventos(eventos):
+    async def escenario():
+        suscripcion = eventos.suscribir(['a'])
+        primero = await asyncio.wait_for(suscripcion.__anext__(), timeout=5)
+        await suscripcion.aclose()
+        return primero
+
+    assert asyncio.run(escenario()) is None
@@ -0,0 +1,130 @@
+"""
+Historial de bajas: conteos al registrar lotes, trayectoria de un empleado
+y análisis de reingresos sobre un historial conocido
+"""
+
+import pytest
+
+from app.services.historial_service import HistorialService
+
+
+def _baja(numero, fecha_baja, area='Calidad', **campos):
+    return {'numeroEmpleado': numero, 'fechaBajaSistema': fecha_baja, 'area': area, **campos}
+
+
+@pytest.fixture
+def historial(tmp_path):
+    return HistorialService(str(tmp_path / 'historial.db'))
+
+
+def test_registrar_conteos(historial):
+    primero = historial.registrar([
+        _baja('100', '2023-01-10'),
+        _baja('101', '2023-02-01'),
+        _baja(None, '2023-02-01'),
+        _baja('102', 'no es fecha'),
+    ], lote='enero')
+
+    assert primero == {
+        'recibidos': 4,
+        'nuevos': 2,
+        'actualizados': 0,
+        'sin_cambios': 0,
+        'duplicados': 0,
+        'descartados': 2,
+        'total_historial': 2,
+    }
+
+    # El acumulado repite la baja de 100 igual, corrige la de 101 y la
+    # de 103 aparece dos veces: gana la última
+    segundo = historial.registrar([
+        _baja('100', '2023-01-10'),
+        _baja('101', '2023-02-01', area='Ensamble'),
+        _baja('103', '2023-03-15', area='Almacén'),
+        _baja('103', '2023-03-15', area='Pintura'),
+    ], lote='acumulado')
+
+    assert segundo == {
+        'recibidos': 4,
+        'nuevos': 1,
+        'actualizados': 1,
+        'sin_cambios': 1,
+        'duplicados': 1,
+        'descartados': 0,
+        'total_historial': 3,
+    }
+    assert historial.historial_empleado('101')[0]['area'] == 'Ensamble'
+    assert historial.historial_empleado('103')[0]['area'] == 'Pintura'
+
+
+def test_numero_de_empleado_numerico(historial):
+    # 1234.0 (columna float por nulos) y '1234' son el mismo empleado: la
+    # baja se actualiza (cambia el registro) en lugar de duplicarse
+    historial.registrar([_baja(1234.0, '2023-01-10'), _baja(None, '2023-01-11')])
+    resultado = historial.registrar([_baja('1234', '2023-01-10')])
+
+    assert resultado['nuevos'] == 0
+    assert resultado['actualizados'] == 1
+    assert resultado['total_historial'] == 1
+    assert historial.historial_empleado('1234')[0]['numero_empleado'] == '1234'
+
+
+def test_historial_empleado(historial):
+    historial.registrar([
+        _baja('100', '2023-06-30', area='Pintura', lote_origen='b'),
+        _baja('100', '2023-01-10', lote_origen='a'),
+    ], lote='ds1')
+
+    bajas = historial.historial_empleado('100')
+    assert [baja['fecha_baja'] for baja in bajas] == ['2023-01-10', '2023-06-30']
+    assert bajas[0]['lote'] == 'ds1'
+    assert bajas[1]['registro']['lote_origen'] == 'b'
+
+    with pytest.raises(ValueError):
+        historial.historial_empleado('999')
+
+
+def test_analizar_reingresos(historial):
+    historial.registrar([
+        # 100: baja BXF en Calidad, recontratado 50 días después y vuelve a causar baja
+        _baja('100', '2023-01-10', supervisor='S1', tipoBajaNormalizado='BXF'),
+        _baja('100', '2023-06-30', supervisor='S2', fechaAlta='2023-03-01', rotacionTemprana=1),
+        # 101: una sola baja
+        _baja('101', '2023-02-01', area='Ensamble'),
+        # 102: alta anterior a la baja previa, sin días fuera válidos
+        _baja('102', '2023-01-05', area='Ensamble', supervisor='S3', tipoBajaNormalizado='RV'),
+        _baja('102', '2023-04-01', area='Pintura', supervisor='S3', fechaAlta='2022-12-01'),
+    ])
+
+    resultado = historial.analizar_reingresos()
+
+    assert resultado['total_bajas'] == 5
+    assert resultado['total_empleados'] == 3
+    assert resultado['empleados_con_reingreso'] == 2
+    assert resultado['tasa_reingreso'] == 66.67
+    assert resultado['total_reingresos'] == 2
+    assert resultado['dias_fuera_mediana'] == 50.0
+    assert resultado['dias_fuera_promedio'] == 50.0
+    assert resultado['reingresos_tras_bxf'] == 1
+    assert resultado['reingresos_misma_area'] == 1
+    assert resultado['reingresos_mismo_supervisor'] == 1
+    assert resultado['reingresos_con_rotacion_temprana'] == 1
+
+    assert sorted(resultado['por_area'], key=lambda a: a['area']) == [
+        {'area': 'Calidad', 'bajas': 2, 'reingresos': 1, 'tasa_reingreso': 50.0},
+        {'area': 'Ensamble', 'bajas': 2, 'reingresos': 1, 'tasa_reingreso': 50.0},
+    ]
+    assert resultado['empleados_frecuentes'] == [
+        {'numero_empleado': '100', 'total_bajas': 2, 'primera_baja': '2023-01-10',
+         'ultima_baja': '2023-06-30', 'areas': ['Calidad']},
+        {'numero_empleado': '102', 'total_bajas': 2, 'primera_baja': '2023-01-05',
+         'ultima_baja': '2023-04-01', 'areas': ['Ensamble', 'Pintura']},
+    ]
+
+
+def test_analizar_reingresos_vacio(historial):
+    resultado = historial.analizar_reingresos()
+
+    assert resultado['total_bajas'] == 0
+    assert resultado['dias_fuera_mediana'] is None
+    assert resultado['por_area'] == []
@@ -0,0 +1,84 @@
+"""
+Actualización incremental del modelo: los árboles/iteraciones existentes no
+cambian y sólo se agregan los nuevos
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.ml.registry import ModelRegistry
+from app.services.ml_service import MLService
+from benchmarks.datos_sinteticos import generar_registros
+
+N_BASE = 3000
+N_DELTA = 335
+
+
+@pytest.fixture(scope='module')
+def registros():
+    return generar_registros(N_BASE + N_DELTA, 3)
+
+
+def _entrenado(registros, engine, tmp_path):
+    servicio = MLService(registry=ModelRegistry(str(tmp_path)))
+    servicio.entrenar_modelo(registros[:N_BASE], engine=engine)
+    return servicio
+
+
+def _X(servicio, registros):
+    bundle = servicio.bundle
+    return bundle.engine.preparar_X(bundle.pipeline.transform(pd.DataFrame(registros[:1000])))
+
+
+def test_hist_gradient_boosting_conserva_iteraciones_previas(registros, tmp_path):
+    servicio = _entrenado(registros, 'hist_gradient_boosting', tmp_path)
+    anterior = copy.deepcopy(servicio.model)
+    X = _X(servicio, registros)
+
+    servicio.actualizar_modelo(registros[N_BASE:], n_adicionales=10)
+    modelo = servicio.model
+
+    assert modelo.n_iter_ == anterior.n_iter_ + 10
+    # El delta no trae todas las categorías: la codificación debe seguir
+    # siendo la del entrenamiento para que las iteraciones previas no cambien
+    etapas = list(modelo.staged_predict_proba(X))
+    np.testing.assert_array_equal(etapas[anterior.n_iter_ - 1], anterior.predict_proba(X))
+
+
+def test_hist_gradient_boosting_rechaza_codificacion_distinta(registros, tmp_path):
+    servicio = _entrenado(registros, 'hist_gradient_boosting', tmp_path)
+    bundle = servicio.bundle
+    # Un modelo ajustado sin las filas ancla (p. ej. entrenado antes de
+    # usarlas) codifica sólo las categorías de su entrenamiento
+    X = bundle.engine.preparar_X(bundle.pipeline.transform(pd.DataFrame(registros[:N_BASE])))
+    y = (pd.DataFrame(registros[:N_BASE])['tipoBajaNormalizado'] == 'RV').astype(int)
+    modelo = bundle.engine.crear_modelo(bundle.feature_names, max_iter=20).fit(X.iloc[:1000], y.iloc[:1000])
+
+    delta = bundle.engine.preparar_X(bundle.pipeline.transform(pd.DataFrame(registros[N_BASE:])))
+    y_delta = (pd.DataFrame(registros[N_BASE:])['tipoBajaNormalizado'] == 'RV').astype(int)
+    with pytest.raises(ValueError):
+        bundle.engine.ampliar_modelo(modelo, delta, y_delta, 5, bundle.pipeline)
+
+
+def test_random_forest_agrega_arboles(registros, tmp_path):
+    servicio = _entrenado(registros, 'random_forest', tmp_path)
+    anterior = copy.deepcopy(servicio.model)
+    X = _X(servicio, registros)
+
+    servicio.actualizar_modelo(registros[N_BASE:], n_adicionales=15)
+    modelo = servicio.model
+
+    assert len(modelo.estimators_) == len(anterior.estimators_) + 15
+    # Los árboles se ajustan sin nombres de columnas
+    X = X.to_numpy()
+    for nuevo, previo in zip(modelo.estimators_, anterior.estimators_):
+        np.testing.assert_array_equal(nuevo.predict_proba(X), previo.predict_proba(X))
+
+
+def test_actualizar_sin_modelo(registros, tmp_path):
+    servicio = MLService(registry=ModelRegistry(str(tmp_path)))
+    with pytest.raises(ValueError):
+        servicio.actualizar_modelo(registros[N_BASE:])
@@ -0,0 +1,70 @@
+"""
+Registro de modelos: promociones simultáneas sin perder historial y
+depuración que respeta las versiones que se están cargando
+"""
+
+import os
+import threading
+
+import pytest
+
+from app.ml.registry import ModelRegistry
+
+
+def _registrar(registro: ModelRegistry, n: int, activar: bool = False):
+    return [registro.registrar({'modelo': i}, {'engine': 'prueba'}, activar=activar) for i in range(n)]
+
+
+def test_activaciones_simultaneas_conservan_el_historial(tmp_path):
+    versiones = _registrar(ModelRegistry(str(tmp_path)), 12)
+    inicio = threading.Barrier(len(versiones))
+
+    def promover(version):
+        # Una instancia por hilo, como workers distintos
+        registro = ModelRegistry(str(tmp_path))
+        inicio.wait()
+        registro.activar(version)
+
+    hilos = [threading.Thread(target=promover, args=(v,)) for v in versiones]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    activo = ModelRegistry(str(tmp_path))._leer_activo()
+    assert sorted(activo['historial'] + [activo['version']]) == versiones
+
+
+def test_rollback(tmp_path):
+    registro = ModelRegistry(str(tmp_path))
+    v1, v2 = _registrar(registro, 2, activar=True)
+
+    assert registro.rollback() == v1
+    assert registro.version_activa() == v1
+    with pytest.raises(ValueError):
+        registro.rollback()
+
+
+def test_no_depura_una_version_que_se_esta_cargando(tmp_path):
+    registro = ModelRegistry(str(tmp_path), max_versiones=2)
+    primera = _registrar(registro, 1)[0]
+    ruta = os.path.join(registro.directorio_versiones, primera)
+
+    # Otro worker la está cargando
+    with registro._bloqueo(ruta, compartido=True):
+        _registrar(registro, 3)
+        assert os.path.isdir(ruta)
+
+    _registrar(registro, 1)
+    assert not os.path.isdir(ruta)
+    with pytest.raises(ValueError):
+        registro.cargar(primera)
+
+
+def test_cargar(tmp_path):
+    registro = ModelRegistry(str(tmp_path))
+    version = _registrar(registro, 1)[0]
+
+    assert registro.cargar(version) == {'modelo': 0}
+    with pytest.raises(ValueError):
+        registro.cargar('v9999')
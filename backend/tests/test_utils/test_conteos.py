@@ -0,0 +1,75 @@
+"""
+Selección de categorías por página: se compara contra ordenar todas las
+categorías (total descendente, empates por orden de aparición)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.conteos import contar_categorias, seleccionar_categorias
+
+
+def _por_fuerza_bruta(conteo: pd.Series, limite, offset):
+    totales = conteo.tolist()
+    orden = sorted(range(len(totales)), key=lambda i: (-totales[i], i))
+    fin = len(orden) if limite is None else min(len(orden), offset + limite)
+    pagina = orden[offset:fin]
+    return {
+        'valores': [str(conteo.index[i]) for i in pagina],
+        'totales': [totales[i] for i in pagina],
+        'previos': sum(totales[i] for i in orden[:offset]),
+        'otros_total': sum(totales[i] for i in orden[fin:]),
+        'otros_categorias': len(orden) - fin,
+        'total_categorias': len(orden),
+    }
+
+
+def _comparable(resultado):
+    return {**resultado, 'totales': [int(t) for t in resultado['totales']]}
+
+
+@pytest.mark.parametrize('semilla', range(20))
+def test_igual_que_ordenar_todo(semilla):
+    rng = np.random.default_rng(semilla)
+    n = int(rng.integers(0, 60))
+    # Pocos valores distintos: muchos empates, también en el umbral de la página
+    conteo = pd.Series(rng.integers(1, 6, size=n), index=[f'cat{i}' for i in range(n)])
+
+    for limite in [None, 0, 1, 3, 10, 100]:
+        for offset in [0, 1, 5, 59]:
+            esperado = _por_fuerza_bruta(conteo, limite, offset)
+            resultado = _comparable(seleccionar_categorias(conteo, limite, offset))
+            assert resultado == esperado, (limite, offset)
+
+
+def test_empates_en_orden_de_aparicion():
+    conteo = pd.Series([2, 5, 2, 5, 1], index=['a', 'b', 'c', 'd', 'e'])
+    resultado = seleccionar_categorias(conteo, limite=3)
+
+    assert resultado['valores'] == ['b', 'd', 'a']
+    assert resultado['totales'].tolist() == [5, 5, 2]
+    assert resultado['otros_total'] == 3  # 'c' y 'e'
+    assert resultado['otros_categorias'] == 2
+
+
+def test_paginas_consecutivas_cubren_todo():
+    conteo = pd.Series([3, 1, 4, 1, 5, 9, 2, 6, 5, 3], index=list('abcdefghij'))
+    total = int(conteo.sum())
+
+    valores = []
+    for offset in range(0, 10, 3):
+        pagina = seleccionar_categorias(conteo, limite=3, offset=offset)
+        assert pagina['previos'] + int(pagina['totales'].sum()) + pagina['otros_total'] == total
+        valores += pagina['valores']
+
+    assert valores == _por_fuerza_bruta(conteo, None, 0)['valores']
+
+
+def test_contar_categorias_excluye_nulos():
+    serie = pd.Series(['b', None, 'a', 'b', np.nan, 'a', 'c'])
+    resultado = contar_categorias(serie, limite=1)
+
+    assert resultado['valores'] == ['b']
+    assert resultado['otros_total'] == 3
+    assert resultado['total_categorias'] == 3
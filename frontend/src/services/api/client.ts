@@ -6,8 +6,33 @@ import axios, { AxiosInstance, AxiosError } from 'axios';
 import { APP_CONFIG } from '@/config/app';
 import type { ApiError, ApiResponse } from '@/types';
 
+// Respuestas POST guardadas por ETag (las GET las revalida el navegador),
+// limitadas por el tamaño de su JSON y no por número: una respuesta de un
+// dataset grande puede ocupar lo mismo que cientos de respuestas pequeñas
+const MAX_CARACTERES_ETAG = 8 * 1024 * 1024;
+
+/**
+ * Hash de 53 bits (cyrb53) del cuerpo serializado, para la clave de caché.
+ * Una colisión no puede devolver datos ajenos: el backend sólo responde 304
+ * si el ETag coincide con el del cuerpo que recibió.
+ */
+function hashTexto(texto: string): string {
+  let h1 = 0xdeadbeef;
+  let h2 = 0x41c6ce57;
+  for (let i = 0; i < texto.length; i++) {
+    const c = texto.charCodeAt(i);
+    h1 = Math.imul(h1 ^ c, 2654435761);
+    h2 = Math.imul(h2 ^ c, 1597334677);
+  }
+  h1 = Math.imul(h1 ^ (h1 >>> 16), 2246822507) ^ Math.imul(h2 ^ (h2 >>> 13), 3266489909);
+  h2 = Math.imul(h2 ^ (h2 >>> 16), 2246822507) ^ Math.imul(h1 ^ (h1 >>> 13), 3266489909);
+  return (4294967296 * (2097151 & h2) + (h1 >>> 0)).toString(36);
+}
+
 class ApiClient {
   private client: AxiosInstance;
+  private respuestasEtag = new Map<string, { etag: string; data: unknown; caracteres: number }>();
+  private caracteresEtag = 0;
 
   constructor() {
     this.client = axios.create({
@@ -64,7 +89,48 @@ class ApiClient {
 
   async post<T>(url: string, data?: any): Promise<ApiResponse<T>> {
     try {
-      const response = await this.client.post<T>(url, data);
+      // Se serializa una sola vez: el mismo texto se hashea para la clave y
+      // se envía tal cual. La clave guarda sólo el hash, no el cuerpo.
+      const cuerpo = JSON.stringify(data ?? null);
+      const clave = `${url}|${hashTexto(cuerpo)}`;
+      const guardada = this.respuestasEtag.get(clave);
+
+      // Con el ETag de la última respuesta, el backend responde 304 sin cuerpo
+      let caracteres = 0;
+      const response = await this.client.post<T>(url, cuerpo, {
+        headers: guardada ? { 'If-None-Match': guardada.etag } : undefined,
+        validateStatus: (status) => (status >= 200 && status < 300) || status === 304,
+        // Por defecto axios valida un cuerpo string con JSON.parse antes de enviarlo
+        transformRequest: (texto) => texto,
+        // Se mide el JSON recibido para el límite de la caché
+        transformResponse: (texto) => {
+          if (typeof texto !== 'string' || texto === '') {
+            return texto;
+          }
+          caracteres = texto.length;
+          try {
+            return JSON.parse(texto);
+          } catch {
+            return texto;
+          }
+        },
+      });
+
+      if (response.status === 304 && guardada) {
+        // Se vuelve a marcar como la más reciente
+        this.respuestasEtag.delete(clave);
+        this.respuestasEtag.set(clave, guardada);
+        return {
+          data: guardada.data as T,
+          success: true,
+        };
+      }
+
+      const etag = response.headers['etag'];
+      if (etag) {
+        this.guardarRespuestaEtag(clave, { etag, data: response.data, caracteres });
+      }
+
       return {
         data: response.data,
         success: true,
@@ -77,6 +143,33 @@ class ApiClient {
     }
   }
 
+  private guardarRespuestaEtag(
+    clave: string,
+    entrada: { etag: string; data: unknown; caracteres: number }
+  ) {
+    const anterior = this.respuestasEtag.get(clave);
+    if (anterior) {
+      this.caracteresEtag -= anterior.caracteres;
+      this.respuestasEtag.delete(clave);
+    }
+    // Una respuesta mayor que todo el límite no se guarda
+    if (entrada.caracteres > MAX_CARACTERES_ETAG) {
+      return;
+    }
+
+    this.respuestasEtag.set(clave, entrada);
+    this.caracteresEtag += entrada.caracteres;
+
+    // Se descartan las menos recientes hasta volver al límite
+    for (const [claveAntigua, antigua] of this.respuestasEtag) {
+      if (this.caracteresEtag <= MAX_CARACTERES_ETAG) {
+        break;
+      }
+      this.respuestasEtag.delete(claveAntigua);
+      this.caracteresEtag -= antigua.caracteres;
+    }
+  }
+
   async postFormData<T>(url: string, formData: FormData): Promise<ApiResponse<T>> {
     try {
       const response = await this.client.post<T>(url, formData, {
@@ -125,6 +218,30 @@ class ApiClient {
       };
     }
   }
+
+  /**
+   * Suscribe handlers a un stream de Server-Sent Events
+   * (p. ej. /api/jobs/{id}/events o /api/events/datasets).
+   * El navegador reconecta solo y reanuda desde el último evento recibido.
+   * Retorna una función que cierra la conexión.
+   */
+  subscribe(
+    url: string,
+    handlers: Record<string, (data: any) => void>,
+    onError?: (error: Event) => void
+  ): () => void {
+    const source = new EventSource(`${APP_CONFIG.apiUrl}${url}`);
+
+    Object.entries(handlers).forEach(([event, handler]) => {
+      source.addEventListener(event, (e) => handler(JSON.parse((e as MessageEvent).data)));
+    });
+
+    if (onError) {
+      source.onerror = onError;
+    }
+
+    return () => source.close();
+  }
 }
 
 export const apiClient = new ApiClient();
@@ -10,6 +10,7 @@ export interface PatronRotacion {
   porcentajeAcumulado: number;
   impacto80_20: boolean;
   indiceRotacion: number;
+  agrupadas?: number; // categorías sumadas en el patrón "Otros"
 }
 
 export interface AnalisisPareto {
@@ -17,6 +18,7 @@ export interface AnalisisPareto {
   patrones: PatronRotacion[];
   concentracion80: PatronRotacion[];
   totalRotaciones: number;
+  totalCategorias?: number;
   fechaAnalisis: Date;
 }
 
@@ -82,6 +84,7 @@ export interface DistribucionCategoria {
   categoria: string;
   total: number;
   porcentaje: number;
+  agrupadas?: number; // categorías sumadas en la entrada "Otros"
 }
 
 export interface TendenciaRotacion {